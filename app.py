@@ -7,26 +7,85 @@ import json
 import time
 import os
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import MutableHeaders
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from typing import List, Optional
 
+from src.config import Config
 from src.db.repository import PolicyRepository
-from src.db.connection import DatabaseConnection
-from src.agents.intake_agent import IntakeAgent
-from src.agents.quotation_agent import QuotationAgent
-from src.agents.payment_agent import PaymentAgent
-from src.agents.issuance_agent import IssuanceAgent
+from src.db.connection import DatabaseConnection, db_rate_limiter
+from src.db.migrations import run_migrations
+from src.db.export import EXPORT_FORMATS, resolve_export, stream_export
+from src.db.metrics import db_metrics
+from src.db.replica import embedded_replica
+from src.db.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor
+from src.models import PolicyAggregate
+from src.agents.registry import agent_registry
+from src.agents.context_builder import context_builder
+from src.agents.fast_path import try_fast_path
+from src.streaming import ChatCompletionChunker, sse, stream_agent
+from src.tracing import install_agents_bridge, recent_traces, tracer
+from src.pricing.catalog import template_catalog
+from src.pricing.rerating import RerateJob
+from src.payments.webhooks import webhook_processor
+from src.payments.reconciler import payment_reconciler
+from src.issuance.outbox import issuance_worker
+from src.payments.gateway import mercadopago_gateway
 from agents import Runner
 
 load_dotenv()
 
 app = FastAPI(title="aseguraOpen - Insurance Agents")
 
-# Get DB query delay from env
-DB_QUERY_DELAY = float(os.getenv("DB_QUERY_DELAY", "0"))
+# Re-rating job started from the admin API (one at a time per process)
+_rerate_job: Optional[RerateJob] = None
+_rerate_task: Optional[asyncio.Task] = None
+
+# Keep proxies (nginx, Render) from buffering server-sent events
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+class InstrumentRequests:
+    """Root span of the turn plus its DB round-trips (headers only in DEBUG mode)
+
+    Pure ASGI middleware: the request is accounted once the last body chunk
+    has been sent, so a streamed (SSE) turn includes the agent run and the
+    writes made after the stream. Streamed responses send their headers
+    before that work happens, so they don't get the X-DB-* headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        with tracer.span(f"{method} {scope['path']}", kind="server", **{"http.request.method": method}) as span, \
+                db_metrics.track_request() as stats, embedded_replica.request_scope():
+            async def send_instrumented(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    headers = MutableHeaders(scope=message)
+                    if Config.DEBUG and not headers.get("content-type", "").startswith("text/event-stream"):
+                        headers["X-DB-Roundtrips"] = str(stats.roundtrips)
+                        headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+                await send(message)
+
+            await self.app(scope, receive, send_instrumented)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            span.name = f"{method} {route}"
+            span.set_attribute("http.route", route)
+            if not route.startswith("/debug/"):
+                span.set_attribute("session.id", scope.get("path_params", {}).get("session_id"))
+            span.set_attribute("db.roundtrips", stats.roundtrips)
+        db_metrics.observe_request(route, stats)
+
+app.add_middleware(InstrumentRequests)
 
 # Health check endpoint (before startup)
 @app.get("/health")
@@ -78,19 +137,16 @@ async def chat_completions(request: ChatCompletionRequest):
     Compatible with OpenAI client libraries and tools.
     """
     try:
-        # Get or create session
+        # Get or create session (policy, client, vehicle and session in one batch)
         session_id = request.session_id or str(uuid.uuid4())
-        session = PolicyRepository.get_session(session_id)
+        tracer.set_root_attribute("session.id", session_id)
+        aggregate = await PolicyRepository.load_session_aggregate_async(session_id)
         
-        if not session:
+        if not aggregate:
             # Create new policy and session
-            policy = PolicyRepository.create_policy("intake")
-            PolicyRepository.create_session(session_id, policy.id)
-            policy_id = policy.id
-            # Re-fetch the session after creation
-            session = PolicyRepository.get_session(session_id)
-        else:
-            policy_id = session["policy_id"]
+            policy = await PolicyRepository.create_policy_async("intake")
+            session = await PolicyRepository.create_session_async(session_id, policy.id)
+            aggregate = PolicyAggregate(policy=policy, session=session)
         
         # Get the last user message
         user_message = next(
@@ -101,89 +157,54 @@ async def chat_completions(request: ChatCompletionRequest):
         if not user_message:
             raise HTTPException(status_code=400, detail="No user message provided")
         
-        # Add delay if configured
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        # Current policy state
+        policy = aggregate.policy
         
-        # Get current policy state
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        
-        # Determine which agent to use based on policy state
+        # Pick the cached agent for the current policy state
         current_state = policy.state
         agent = None
         
-        if current_state == "intake":
-            agent = IntakeAgent.create_agent()
-        elif current_state == "loaded":
-            agent = QuotationAgent.create_agent()
-        elif current_state == "quotation":
-            agent = QuotationAgent.create_agent()
-        elif current_state == "payment":
-            agent = PaymentAgent.create_agent()
-        elif current_state == "issued":
-            agent = IssuanceAgent.create_agent()
-        elif current_state == "completed":
+        if current_state == "completed":
             response_text = "✅ ¡Tu póliza ya está completada! Si necesitas hacer cambios, contáctanos."
+        elif current_state == "issued":
+            # The issuance worker finishes the policy; no LLM turn needed
+            response_text = await asyncio.to_thread(issuance_worker.status_reply, policy.id)
         else:
-            agent = IntakeAgent.create_agent()
-        
-        # Build conversation history for context
-        session_messages = session.get("messages", [])
-        conversation_history = "\n".join([
-            f"{msg['role'].upper()}: {msg['content']}" 
-            for msg in session_messages
-        ])
-        
-        # Build system context based on current state
-        system_context = f"""CONTEXTO ACTUAL DE LA PÓLIZA:
-- Policy ID: {policy_id}
-- Estado: {policy.state}
-- Tipo de Seguro: {policy.insurance_type or "No especificado"}
-- Cliente: {client_data.name if client_data else "No completado"}
-- Email: {client_data.email if client_data else "N/A"}
-- Teléfono: {client_data.phone if client_data else "N/A"}
-- Vehículo: {f"{vehicle_data.make} {vehicle_data.model}" if vehicle_data else "No ingresado"}
-
-HISTORIAL DE CONVERSACIÓN:
-{conversation_history if conversation_history else 'No hay mensajes previos'}
-
-NUEVO MENSAJE DEL CLIENTE:
-{user_message}"""
+            # Structured inputs (auto/moto, email, phone, plate) skip the LLM
+            response_text = await try_fast_path(aggregate, user_message)
+            if response_text is None:
+                agent = agent_registry.for_state(current_state) or agent_registry.get("IntakeAgent")
+        
+        # Bounded prompt: pinned policy facts, rolling summary, recent turns
+        context = await context_builder.build_async(aggregate, user_message) if agent is not None else None
         
         # Add user message to session
-        messages = session.get("messages", [])
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
-        PolicyRepository.update_session_messages(session_id, messages)
+        await PolicyRepository.append_message_async(session_id, "user", user_message)
+        
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
         
-        # Add delay if configured
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        # Stream chunks as they arrive; the reply is persisted when the run ends
+        if request.stream:
+            return StreamingResponse(
+                _stream_completion_chunks(
+                    session_id, agent, context.prompt if context else None, request.model, completion_id,
+                    fixed_response=None if agent is not None else response_text
+                ),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
         
         # Run the appropriate agent based on state
         if agent is not None:
-            result = await Runner.run(agent, system_context)
+            with tracer.span("agent.run", **{"gen_ai.agent.name": agent.name}):
+                result = await Runner.run(agent, context.prompt)
             response_text = str(result.final_output)
-        # else response_text already set for completed state
+        # else response_text already set (completed/issued state or fast path)
         
         # Add agent response to session
-        messages.append({
-            "role": "assistant",
-            "content": response_text
-        })
-        PolicyRepository.update_session_messages(session_id, messages)
-        
-        # Add delay if configured
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        await PolicyRepository.append_message_async(session_id, "assistant", response_text)
         
         # Build response in OpenAI format
-        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
-        
         return ChatCompletionResponse(
             id=completion_id,
             created=int(time.time()),
@@ -209,6 +230,36 @@ NUEVO MENSAJE DEL CLIENTE:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _stream_completion_chunks(session_id: str, agent, prompt: str, model: str,
+                                    completion_id: str, fixed_response: Optional[str] = None):
+    """SSE body for a streamed chat completion (chat.completion.chunk frames)"""
+    chunker = ChatCompletionChunker(model, completion_id)
+    yield chunker.role()
+    
+    try:
+        if agent is None:
+            response_text = fixed_response
+            yield chunker.content(response_text)
+        else:
+            async for kind, value in stream_agent(agent, prompt):
+                if kind == "delta":
+                    yield chunker.content(value)
+                elif kind == "final":
+                    response_text = value
+                else:
+                    yield chunker.progress(kind, value)
+        
+        # Add agent response to session once the run is complete
+        await PolicyRepository.append_message_async(session_id, "assistant", response_text)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield sse({"error": {"message": str(e), "type": "server_error"}})
+        return
+    
+    yield chunker.stop()
+    yield chunker.done()
+
 @app.post("/chat/completions")
 async def chat_completions_legacy(request: ChatCompletionRequest):
     """Legacy endpoint without /v1 prefix for compatibility"""
@@ -222,47 +273,54 @@ async def startup_event():
         DatabaseConnection.get_connection()
         print("Database connection established")
         
-        # Create payments table if it doesn't exist
+        # Create/upgrade tables (payments, session_messages, ...)
         try:
-            print("Creating payments table if not exists...")
-            create_payments_table = """
-            CREATE TABLE IF NOT EXISTS payments (
-              id TEXT PRIMARY KEY,
-              policy_id TEXT NOT NULL REFERENCES policies(id),
-              quotation_id TEXT REFERENCES quotation_data(id),
-              amount DECIMAL,
-              preference_id TEXT,
-              payment_link TEXT,
-              payment_status TEXT DEFAULT 'pending',
-              payment_id TEXT,
-              created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-              updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-            DatabaseConnection.execute_update(create_payments_table)
-            
-            # Create indexes
-            DatabaseConnection.execute_update("CREATE INDEX IF NOT EXISTS idx_payments_policy_id ON payments(policy_id)")
-            DatabaseConnection.execute_update("CREATE INDEX IF NOT EXISTS idx_payments_preference_id ON payments(preference_id)")
-            DatabaseConnection.execute_update("CREATE INDEX IF NOT EXISTS idx_payments_payment_id ON payments(payment_id)")
-            print("Payments table created/verified")
+            print("Running schema migrations...")
+            await asyncio.to_thread(run_migrations)
+            print("Schema migrations completed")
         except Exception as e:
-            print(f"Warning: Could not create payments table: {e}")
+            print(f"Warning: Could not run migrations: {e}")
         
         try:
-            PolicyRepository.seed_quotation_templates()
-            print("Quotation templates seeded")
+            await PolicyRepository.seed_quotation_templates_async()
+            print("Quotation templates seeded and catalog loaded")
         except Exception as e:
             print(f"Warning: Could not seed templates: {e}")
         print("Database initialization completed")
+        
+        # Build every agent once; requests reuse the cached instances
+        agent_registry.warm_up()
+        # Agent / LLM / tool spans of the Agents SDK join our traces
+        install_agents_bridge()
+        print("Agents ready")
+        
+        # Drain queued Mercado Pago notifications in the background
+        webhook_processor.start()
+        # Catch payments whose webhook never arrived
+        if Config.PAYMENT_RECONCILE_ENABLED:
+            payment_reconciler.start()
+        # Send issued policies to the issuer API
+        issuance_worker.start()
+        # Keep the local read replica (if any) in sync with Turso
+        embedded_replica.start()
     except Exception as e:
         print(f"ERROR during startup: {e}")
         import traceback
         traceback.print_exc()
         # Don't re-raise - let the app continue to serve requests
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    await webhook_processor.stop()
+    await payment_reconciler.stop()
+    await issuance_worker.stop()
+    await embedded_replica.stop()
+    mercadopago_gateway.close()
+
 class MessageRequest(BaseModel):
     message: str
+    stream: Optional[bool] = False
 
 class ChatSession(BaseModel):
     policy_id: str
@@ -272,15 +330,11 @@ class ChatSession(BaseModel):
 async def start_chat():
     """Start a new chat session"""
     try:
-        policy = PolicyRepository.create_policy("intake")
+        policy = await PolicyRepository.create_policy_async("intake")
         session_id = str(uuid.uuid4())
         
         # Save session to database instead of in-memory dict
-        PolicyRepository.create_session(session_id, policy.id)
-        
-        # Add delay to prevent rate limiting
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        await PolicyRepository.create_session_async(session_id, policy.id)
         
         return {
             "session_id": session_id,
@@ -294,21 +348,17 @@ async def start_chat():
 async def restore_chat(session_id: str):
     """Restore an existing chat session"""
     try:
-        session = PolicyRepository.get_session(session_id)
-        if not session:
+        # Session and current policy state in one batch
+        aggregate = await PolicyRepository.load_session_aggregate_async(session_id)
+        if not aggregate:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        policy_id = session["policy_id"]
-        
-        # Get current policy state
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
-        
-        # Add delay to prevent rate limiting
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        session = aggregate.session
+        policy_id = aggregate.policy.id
+        policy = aggregate.policy
+        client_data = aggregate.client
+        vehicle_data = aggregate.vehicle
+        quotations = aggregate.quotations
         
         return {
             "session_id": session_id,
@@ -336,19 +386,15 @@ async def restore_chat(session_id: str):
 async def restart_chat(session_id: str):
     """Restart/reset a chat session - clears messages but keeps policy"""
     try:
-        session = PolicyRepository.get_session(session_id)
+        session = await PolicyRepository.get_session_async(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Clear messages but keep the session
-        PolicyRepository.update_session_messages(session_id, [])
+        await PolicyRepository.clear_session_messages_async(session_id)
         
         policy_id = session["policy_id"]
-        policy = PolicyRepository.get_policy(policy_id)
-        
-        # Add delay to prevent rate limiting
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        policy = await PolicyRepository.get_policy_async(policy_id)
         
         return {
             "session_id": session_id,
@@ -362,208 +408,218 @@ async def restart_chat(session_id: str):
 async def send_message(session_id: str, request: MessageRequest):
     """Send a message to the agent"""
     try:
-        session = PolicyRepository.get_session(session_id)
-        if not session:
+        # Session and current policy state in one batch
+        aggregate = await PolicyRepository.load_session_aggregate_async(session_id)
+        if not aggregate:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        policy_id = session["policy_id"]
-        
-        # Add delay to prevent rate limiting
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        session = aggregate.session
         
-        # Get current policy state
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
+        policy = aggregate.policy
         
-        # Determine which agent to use based on policy state
+        # Pick the cached agent for the current policy state
         current_state = policy.state
-        agent = None
         
-        if current_state == "intake":
-            agent = IntakeAgent.create_agent()
-        elif current_state == "loaded":
-            agent = QuotationAgent.create_agent()
-        elif current_state == "quotation":
-            agent = QuotationAgent.create_agent()
-        elif current_state == "payment":
-            agent = PaymentAgent.create_agent()
-        elif current_state == "issued":
-            agent = IssuanceAgent.create_agent()
-        elif current_state == "completed":
+        if current_state == "completed":
             return {
                 "response": "✅ ¡Tu póliza ya está completada! Si necesitas hacer cambios, contáctanos.",
                 "policy_state": "completed",
                 "messages": session["messages"]
             }
-        else:
+        
+        if current_state == "issued":
+            # The issuance worker finishes the policy; no LLM turn needed
+            await PolicyRepository.append_message_async(session_id, "user", request.message)
+            reply = await asyncio.to_thread(issuance_worker.status_reply, policy.id)
+            return await _finish_message(session_id, reply)
+        
+        agent = agent_registry.for_state(current_state)
+        if agent is None:
             raise HTTPException(status_code=500, detail=f"Unknown policy state: {current_state}")
         
-        # Build conversation history for context
-        conversation_history = "\n".join([
-            f"{msg['role'].upper()}: {msg['content']}" 
-            for msg in session["messages"]
-        ])
+        # Structured inputs (auto/moto, email, phone, plate) skip the LLM;
+        # streaming clients get the plain JSON body
+        fast_reply = await try_fast_path(aggregate, request.message)
+        if fast_reply is not None:
+            await PolicyRepository.append_message_async(session_id, "user", request.message)
+            return await _finish_message(session_id, fast_reply)
         
-        # Build system context based on current state
-        system_context = f"""CONTEXTO ACTUAL DE LA PÓLIZA:
-- Policy ID: {policy_id}
-- Estado: {policy.state}
-- Tipo de Seguro: {policy.insurance_type or "No especificado"}
-- Cliente: {client_data.name if client_data else "No completado"}
-- Email: {client_data.email if client_data else "N/A"}
-- Teléfono: {client_data.phone if client_data else "N/A"}
-- Vehículo: {f"{vehicle_data.make} {vehicle_data.model}" if vehicle_data else "No ingresado"}
-
-HISTORIAL DE CONVERSACIÓN:
-{conversation_history if conversation_history else 'No hay mensajes previos'}
-
-NUEVO MENSAJE DEL CLIENTE:
-{request.message}"""
+        # Bounded prompt: pinned policy facts, rolling summary, recent turns
+        context = await context_builder.build_async(aggregate, request.message)
         
         # Add user message to session
-        messages = session["messages"]
-        messages.append({
-            "role": "user",
-            "content": request.message
-        })
-        PolicyRepository.update_session_messages(session_id, messages)
-        
-        # Add delay to prevent rate limiting
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
+        await PolicyRepository.append_message_async(session_id, "user", request.message)
+        
+        # Stream deltas and tool progress; "done" carries the usual response body
+        if request.stream:
+            return StreamingResponse(
+                _stream_message_events(session_id, agent, context.prompt),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
         
         # Run the appropriate agent based on state
-        if agent is None:
-            raise HTTPException(status_code=500, detail="No agent could be selected")
-        
-        result = await Runner.run(agent, system_context)
+        with tracer.span("agent.run", **{"gen_ai.agent.name": agent.name}):
+            result = await Runner.run(agent, context.prompt)
         
         agent_response = str(result.final_output)
         
-        # Add agent response to session
-        messages.append({
-            "role": "agent",
-            "content": agent_response
-        })
-        PolicyRepository.update_session_messages(session_id, messages)
-        
-        # Add delay to prevent rate limiting
-        if DB_QUERY_DELAY > 0:
-            await asyncio.sleep(DB_QUERY_DELAY)
-        
-        # Get updated policy data after agent run
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
-        
-        # Refresh session from DB to get latest messages
-        session = PolicyRepository.get_session(session_id)
-        
-        return {
-            "response": agent_response,
-            "policy_state": policy.state,
-            "intention_confirmed": policy.intention,
-            "insurance_type": policy.insurance_type,
-            "client_saved": client_data is not None,
-            "client_name": client_data.name if client_data else None,
-            "client_email": client_data.email if client_data else None,
-            "client_phone": client_data.phone if client_data else None,
-            "vehicle_saved": vehicle_data is not None,
-            "vehicle_make": vehicle_data.make if vehicle_data else None,
-            "vehicle_model": vehicle_data.model if vehicle_data else None,
-            "quotations": quotations,
-            "messages": session["messages"]
-        }
+        return await _finish_message(session_id, agent_response)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/chat/{session_id}")
-def get_session(session_id: str):
-    """Get session data"""
-    session = PolicyRepository.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+async def _finish_message(session_id: str, agent_response: str) -> dict:
+    """Persist the agent reply and return it with the updated policy status"""
+    # Add agent response to session
+    await PolicyRepository.append_message_async(session_id, "agent", agent_response)
     
-    policy = PolicyRepository.get_policy(session["policy_id"])
+    # Get updated policy data and latest messages after agent run
+    aggregate = await PolicyRepository.load_session_aggregate_async(session_id)
+    session = aggregate.session
+    policy = aggregate.policy
+    client_data = aggregate.client
+    vehicle_data = aggregate.vehicle
+    quotations = aggregate.quotations
     
     return {
-        "session_id": session_id,
-        "policy_id": session["policy_id"],
+        "response": agent_response,
         "policy_state": policy.state,
+        "intention_confirmed": policy.intention,
+        "insurance_type": policy.insurance_type,
+        "client_saved": client_data is not None,
+        "client_name": client_data.name if client_data else None,
+        "client_email": client_data.email if client_data else None,
+        "client_phone": client_data.phone if client_data else None,
+        "vehicle_saved": vehicle_data is not None,
+        "vehicle_make": vehicle_data.make if vehicle_data else None,
+        "vehicle_model": vehicle_data.model if vehicle_data else None,
+        "quotations": quotations,
         "messages": session["messages"]
     }
 
-# Database Admin Endpoints
-@app.get("/api/admin/policies")
-def get_all_policies():
-    """Get all policies for admin view"""
+async def _stream_message_events(session_id: str, agent, prompt: str):
+    """SSE body for the native endpoint: delta / tool_call / tool_output / agent / done"""
     try:
-        policies = PolicyRepository.get_all_policies()
-        return {"policies": jsonable_encoder(policies)}
+        async for kind, value in stream_agent(agent, prompt):
+            if kind == "delta":
+                yield sse({"content": value}, event="delta")
+            elif kind == "final":
+                yield sse(jsonable_encoder(await _finish_message(session_id, value)), event="done")
+            else:
+                yield sse({"name": value}, event=kind)
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        yield sse({"detail": str(e)}, event="error")
 
-@app.get("/api/admin/clients")
-def get_all_clients():
-    """Get all client data for admin view"""
+@app.get("/api/chat/{session_id}")
+def get_session(session_id: str):
+    """Get session data"""
+    aggregate = PolicyRepository.load_session_aggregate(session_id)
+    if not aggregate:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        "session_id": session_id,
+        "policy_id": aggregate.policy.id,
+        "policy_state": aggregate.policy.state,
+        "messages": aggregate.messages
+    }
+
+@app.get("/api/chat/{session_id}/messages")
+def get_session_messages(session_id: str, limit: int = 50, before_seq: Optional[int] = None, after_seq: Optional[int] = None):
+    """Page through a session's messages (oldest first within a page)"""
+    messages = PolicyRepository.get_session_messages(
+        session_id, limit=min(limit, 500), before_seq=before_seq, after_seq=after_seq
+    )
+    return {
+        "session_id": session_id,
+        "messages": messages,
+        "next_before_seq": messages[0]["seq"] if messages else None
+    }
+
+# Database Admin Endpoints
+# Every listing is newest first, keyset-paginated: pass the response's
+# next_cursor back as ?cursor= for the following page.
+def _admin_page(key: str, fetch, limit: int, cursor: Optional[str], id_field: str = "id", **filters) -> dict:
+    """Fetch one page (plus one row to know if there is another) and its next cursor"""
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    limit = clamp_page_size(limit)
     try:
-        clients = PolicyRepository.get_all_client_data()
-        return {"clients": jsonable_encoder(clients)}
+        rows = fetch(limit=limit + 1, before=before, **filters)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1][id_field])
+    return {key: jsonable_encoder(rows), "next_cursor": next_cursor, "limit": limit}
+
+@app.get("/api/admin/policies")
+def get_all_policies(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                     state: Optional[str] = None, insurance_type: Optional[str] = None,
+                     created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of policies for admin view"""
+    return _admin_page("policies", PolicyRepository.get_all_policies, limit, cursor,
+                       state=state, insurance_type=insurance_type,
+                       created_from=created_from, created_to=created_to)
+
+@app.get("/api/admin/clients")
+def get_all_clients(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                    policy_id: Optional[str] = None, email: Optional[str] = None,
+                    created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of client data for admin view"""
+    return _admin_page("clients", PolicyRepository.get_all_client_data, limit, cursor,
+                       policy_id=policy_id, email=email,
+                       created_from=created_from, created_to=created_to)
 
 @app.get("/api/admin/transitions")
-def get_all_transitions():
-    """Get all state transitions for admin view"""
-    try:
-        transitions = PolicyRepository.get_all_state_transitions()
-        return {"transitions": jsonable_encoder(transitions)}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+def get_all_transitions(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                        policy_id: Optional[str] = None, to_state: Optional[str] = None,
+                        agent: Optional[str] = None,
+                        created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of state transitions for admin view"""
+    return _admin_page("transitions", PolicyRepository.get_all_state_transitions, limit, cursor,
+                       policy_id=policy_id, to_state=to_state, agent=agent,
+                       created_from=created_from, created_to=created_to)
 
 @app.get("/api/admin/vehicles")
-def get_all_vehicles():
-    """Get all vehicle data for admin view"""
-    try:
-        vehicles = PolicyRepository.get_all_vehicle_data()
-        return {"vehicles": jsonable_encoder(vehicles)}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+def get_all_vehicles(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                     policy_id: Optional[str] = None, plate: Optional[str] = None,
+                     created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of vehicle data for admin view"""
+    return _admin_page("vehicles", PolicyRepository.get_all_vehicle_data, limit, cursor,
+                       policy_id=policy_id, plate=plate,
+                       created_from=created_from, created_to=created_to)
 
 @app.get("/api/admin/quotations")
-def get_all_quotations():
-    """Get all quotations for admin view"""
-    try:
-        quotations = PolicyRepository.get_all_quotations()
-        return {"quotations": jsonable_encoder(quotations)}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+def get_all_quotations(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                       policy_id: Optional[str] = None, coverage_type: Optional[str] = None,
+                       created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of quotations for admin view"""
+    return _admin_page("quotations", PolicyRepository.get_all_quotations, limit, cursor,
+                       policy_id=policy_id, coverage_type=coverage_type,
+                       created_from=created_from, created_to=created_to)
 
 @app.get("/api/chat/{session_id}/quotations")
 async def get_quotations(session_id: str):
     """Get quotations for a policy"""
     try:
-        session = PolicyRepository.get_session(session_id)
+        session = await PolicyRepository.get_session_async(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
         policy_id = session["policy_id"]
-        quotations = PolicyRepository.get_quotations(policy_id)
+        quotations = await PolicyRepository.get_quotations_async(policy_id)
         
         return {
             "quotations": quotations,
@@ -575,26 +631,127 @@ async def get_quotations(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/admin/sessions")
-def get_all_sessions():
-    """Get all sessions for admin view"""
-    try:
-        sessions_list = PolicyRepository.get_all_sessions()
-        return {"sessions": jsonable_encoder(sessions_list)}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+def get_all_sessions(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                     policy_id: Optional[str] = None,
+                     created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of sessions for admin view"""
+    return _admin_page("sessions", PolicyRepository.get_all_sessions, limit, cursor,
+                       id_field="session_id", policy_id=policy_id,
+                       created_from=created_from, created_to=created_to)
 
 @app.get("/api/admin/payments")
-def get_all_payments():
-    """Get all payments for admin view"""
+def get_all_payments(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                     payment_status: Optional[str] = None, policy_id: Optional[str] = None,
+                     created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Page of payments for admin view"""
+    return _admin_page("payments", PolicyRepository.get_all_payments, limit, cursor,
+                       payment_status=payment_status, policy_id=policy_id,
+                       created_from=created_from, created_to=created_to)
+
+@app.get("/api/admin/export/{table}")
+def export_table(table: str, format: str = "ndjson", columns: Optional[str] = None,
+                 created_from: Optional[str] = None, created_to: Optional[str] = None):
+    """Stream a whole table as NDJSON or CSV, oldest first, in constant memory"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format} (use ndjson or csv)")
     try:
-        payments = PolicyRepository.get_all_payments()
-        return {"payments": jsonable_encoder(payments)}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        spec = resolve_export(table, [c.strip() for c in columns.split(",") if c.strip()] if columns else None)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown table: {table}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        stream_export(spec, format, created_from, created_to),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{spec.table}.{format}"'}
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """DB statement latency and round-trip metrics (Prometheus text format)"""
+    body = db_metrics.render_prometheus()
+    pool = DatabaseConnection.pool_stats()
+    if pool:
+        body += "# TYPE aseguraopen_db_pool_connections gauge\n"
+        for state in ("idle", "in_use"):
+            body += f'aseguraopen_db_pool_connections{{pool="{pool["name"]}",state="{state}"}} {pool[state]}\n'
+    limiter = db_rate_limiter.stats()
+    body += ("# TYPE aseguraopen_db_rate_limited_total counter\n"
+             f"aseguraopen_db_rate_limited_total {limiter['rate_limited']}\n"
+             "# TYPE aseguraopen_db_rate_limit_wait_seconds_total counter\n"
+             f"aseguraopen_db_rate_limit_wait_seconds_total {limiter['wait_seconds_total']}\n")
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/trace/{session_id}")
+def get_session_traces(session_id: str, limit: int = 10):
+    """Span trees of a session's latest turns (DEBUG mode only)"""
+    if not Config.DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {"session_id": session_id, "traces": recent_traces.get(session_id, limit)}
+
+@app.get("/api/admin/db/statements")
+def get_db_statements(top: int = 20):
+    """Statements that took the most total DB time since startup"""
+    return {"roundtrips": db_metrics.roundtrips, "statements": db_metrics.snapshot(top)}
+
+@app.get("/api/admin/db/replica")
+def get_replica_stats():
+    """Embedded replica sync state and how many reads it served"""
+    return embedded_replica.stats()
+
+@app.get("/api/admin/cache")
+def get_cache_stats():
+    """Policy read cache hit/miss counters"""
+    return PolicyRepository.cache_stats()
+
+@app.post("/api/admin/agents/reload")
+def reload_agents(name: Optional[str] = None, reimport: bool = False):
+    """Rebuild cached agents (e.g. after editing their instructions)
+
+    reimport=true re-executes agent modules from disk, so it is only
+    available in DEBUG mode.
+    """
+    if reimport and not Config.DEBUG:
+        raise HTTPException(status_code=403, detail="reimport is only available in DEBUG mode")
+    try:
+        reloaded = agent_registry.reload(name, reimport=reimport)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'\""))
+    return {"reloaded": reloaded, "states": agent_registry.states()}
+
+@app.post("/api/admin/templates/reload")
+def reload_templates():
+    """Reload the quotation template catalog in every process (after editing prices)"""
+    template_catalog.bump_version()
+    return template_catalog.stats()
+
+@app.post("/api/admin/quotations/rerate")
+async def start_rerate(batch_size: int = 500, dry_run: bool = False, restart: bool = False):
+    """Reprice open quotations in the background (see scripts/rerate_quotations.py)"""
+    global _rerate_job, _rerate_task
+    if batch_size <= 0:
+        raise HTTPException(status_code=422, detail="batch_size must be a positive integer")
+    if _rerate_task is not None and not _rerate_task.done():
+        raise HTTPException(status_code=409, detail="A re-rating job is already running")
+
+    _rerate_job = RerateJob(batch_size=batch_size, dry_run=dry_run,
+                            checkpoint_path="rerate_checkpoint.json")
+    _rerate_task = asyncio.create_task(asyncio.to_thread(_rerate_job.run, not restart))
+    return {"started": True, "dry_run": dry_run, "batch_size": batch_size}
+
+@app.get("/api/admin/quotations/rerate")
+async def get_rerate_status():
+    """Progress of the last re-rating job"""
+    if _rerate_job is None:
+        return {"running": False, "report": None}
+    error = None
+    # exception() raises on a cancelled task (e.g. cancelled at shutdown)
+    if _rerate_task.cancelled():
+        error = "cancelled"
+    elif _rerate_task.done() and _rerate_task.exception() is not None:
+        error = str(_rerate_task.exception())
+    return {"running": not _rerate_task.done(), "report": _rerate_job.report.to_dict(), "error": error}
 
 class MercadoPagoWebhook(BaseModel):
     """Mercado Pago webhook notification"""
@@ -611,60 +768,49 @@ class MercadoPagoWebhook(BaseModel):
 
 @app.post("/webhooks/mercadopago")
 async def mercadopago_webhook(webhook: MercadoPagoWebhook):
-    """Handle Mercado Pago payment notifications"""
+    """Record a Mercado Pago notification; the webhook workers process it"""
     try:
-        # Log webhook for debugging
         print(f"📩 Mercado Pago Webhook: {webhook.type} - {webhook.action}")
-        
-        # Only process payment notifications
-        if webhook.type == "payment":
-            payment_id = webhook.data.get("id")
-            
-            # Get payment details from Mercado Pago
-            import mercadopago
-            access_token = os.getenv("MERCADOPAGO_ACCESS_TOKEN")
-            if not access_token:
-                print("❌ Mercado Pago access token not configured")
-                return {"status": "error", "message": "Access token not configured"}
-            
-            sdk = mercadopago.SDK(access_token)
-            payment_info = sdk.payment().get(payment_id)
-            
-            if payment_info["status"] == 200:
-                payment_data = payment_info["response"]
-                status = payment_data.get("status")  # approved, rejected, pending
-                preference_id = payment_data.get("external_reference") or payment_data.get("metadata", {}).get("preference_id")
-                
-                # Update payment status in database
-                if preference_id:
-                    PolicyRepository.update_payment_status(
-                        preference_id=preference_id,
-                        payment_status=status,
-                        payment_id=str(payment_id)
-                    )
-                    
-                    print(f"✅ Payment {payment_id} status updated to: {status}")
-                    
-                    # If approved, update policy state to issued
-                    if status == "approved":
-                        # Get policy_id from payment
-                        payment_record = PolicyRepository.get_payment_by_policy(payment_data.get("external_reference"))
-                        if payment_record:
-                            PolicyRepository.update_policy_state(
-                                policy_id=payment_record.policy_id,
-                                new_state="issued",
-                                reason="Pago aprobado por Mercado Pago",
-                                agent="MercadoPagoWebhook"
-                            )
-                            print(f"✅ Policy {payment_record.policy_id} state updated to issued")
-            
-        return {"status": "ok"}
+        event_id = await webhook_processor.record_async(webhook.model_dump())
+        return {"status": "ok", "event_id": event_id}
     except Exception as e:
         import traceback
         traceback.print_exc()
         print(f"❌ Webhook error: {e}")
-        # Don't raise exception - return 200 to avoid webhook retries
-        return {"status": "error", "message": str(e)}
+        # Not stored: let Mercado Pago retry the notification
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/admin/webhooks")
+def get_webhook_stats():
+    """Webhook inbox counts by status and worker counters"""
+    return webhook_processor.stats()
+
+@app.get("/api/admin/payments/reconciliation")
+def get_reconciliation_metrics():
+    """Pending-payment backlog, lag and reconciler counters"""
+    return payment_reconciler.metrics()
+
+@app.get("/api/admin/payments/gateway")
+def get_gateway_stats():
+    """Mercado Pago client: circuit breaker state and call counters"""
+    return mercadopago_gateway.stats()
+
+@app.get("/api/admin/issuance")
+def get_issuance_stats():
+    """Issuance outbox counts by status and worker counters"""
+    return issuance_worker.stats()
+
+@app.post("/api/admin/issuance/run")
+async def run_issuance():
+    """Send every due policy in the issuance outbox now"""
+    processed = await issuance_worker.drain()
+    return {"processed": processed, **issuance_worker.stats()}
+
+@app.post("/api/admin/payments/reconcile")
+async def run_reconciliation():
+    """Run one reconciliation sweep now"""
+    updated = await payment_reconciler.run_once()
+    return {"updated": updated, **payment_reconciler.metrics()}
 
 @app.get("/admin")
 def serve_admin_ui():
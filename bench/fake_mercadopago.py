@@ -0,0 +1,85 @@
+"""
+Local stand-in for the Mercado Pago REST API
+
+Plugs into the shared gateway as its SDK HttpClient, so PaymentAgent, the
+webhook workers and the reconciler run their real code paths:
+
+    fake = FakeMercadoPago(latency=0.05)
+    mercadopago_gateway.configure(access_token="TEST-bench", http_client=fake)
+    payment_id = fake.pay(policy_id)          # the customer pays
+"""
+import itertools
+import json
+import threading
+import time
+from typing import Dict
+
+from mercadopago.http import HttpClient
+
+
+class FakeMercadoPago(HttpClient):
+    """In-memory preferences and payments behind the SDK's HttpClient interface"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.preferences: Dict[str, dict] = {}
+        self.payments: Dict[str, dict] = {}
+        self.calls = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _respond(self, status: int, body: dict) -> dict:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {"status": status, "response": body}
+
+    # ==================== Customer side ====================
+
+    def pay(self, policy_id: str, status: str = "approved") -> str:
+        """Simulate the customer paying a policy's checkout; returns the payment id"""
+        with self._lock:
+            payment_id = str(next(self._ids))
+            self.payments[payment_id] = {
+                "id": payment_id,
+                "status": status,
+                "external_reference": policy_id
+            }
+        return payment_id
+
+    def notification(self, payment_id: str) -> dict:
+        """Webhook body Mercado Pago would POST for a payment"""
+        return {"id": 10**9 + int(payment_id), "type": "payment", "action": "payment.created",
+                "data": {"id": payment_id}}
+
+    # ==================== HttpClient ====================
+
+    def post(self, url, headers, data=None, params=None, timeout=None, maxretries=None):
+        if url.endswith("/checkout/preferences"):
+            preference = json.loads(data) if data else {}
+            with self._lock:
+                preference_id = f"pref-{next(self._ids)}"
+                self.preferences[preference_id] = preference
+            return self._respond(201, {
+                "id": preference_id,
+                "init_point": f"https://mercadopago.local/checkout/{preference_id}",
+                "external_reference": preference.get("external_reference")
+            })
+        return self._respond(404, {"message": f"not found: {url}"})
+
+    def get(self, url, headers, params=None, timeout=None, maxretries=None):
+        if url.endswith("/v1/payments/search"):
+            policy_id = (params or {}).get("external_reference")
+            results = [p for p in self.payments.values() if p["external_reference"] == policy_id]
+            return self._respond(200, {"results": list(reversed(results))})
+        payment = self.payments.get(url.rsplit("/", 1)[-1])
+        if payment is None:
+            return self._respond(404, {"message": "payment not found"})
+        return self._respond(200, dict(payment))
+
+    def put(self, url, headers, data=None, params=None, timeout=None, maxretries=None):
+        return self._respond(404, {"message": f"not found: {url}"})
+
+    def delete(self, url, headers, params=None, timeout=None, maxretries=None):
+        return self._respond(404, {"message": f"not found: {url}"})
+
@@ -0,0 +1,317 @@
+"""
+In-process load harness
+
+Runs app.py against a throwaway local SQLite database with the scripted
+model (bench/stub_model.py) and the fake Mercado Pago
+(bench/fake_mercadopago.py), and drives N synthetic customers - up to
+`concurrency` at a time - through intake -> quotation -> payment ->
+issuance over HTTP (httpx's ASGI transport, no sockets).
+
+Reported per run:
+  - p50/p95/p99 latency per endpoint and per step of the journey
+  - DB round-trips per chat turn (src/db/metrics.py request attribution)
+  - chat turns per second, and webhook -> completed issuance latency
+
+    report = asyncio.run(run_benchmark(BenchConfig(customers=50, concurrency=10)))
+    print(format_report(report))
+
+The environment (SQLITE_PATH, DB_RATE_LIMIT, ...) must be prepared with
+prepare_environment() before app.py is imported; bench/run.py does this.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+# ==================== Environment ====================
+
+
+def prepare_environment(workdir: Optional[str] = None) -> str:
+    """Point the app at a fresh local SQLite file; returns its path"""
+    workdir = workdir or tempfile.mkdtemp(prefix="aseguraopen-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    db_path = os.path.join(workdir, "bench.db")
+    for var in ("TURSO_DATABASE_URL", "TURSO_AUTH_TOKEN", "MERCADOPAGO_ACCESS_TOKEN", "ISSUER_API_URL"):
+        os.environ.pop(var, None)
+    os.environ["SQLITE_PATH"] = db_path
+    os.environ["DB_RATE_LIMIT"] = "0"
+    os.environ["PAYMENT_RECONCILE_ENABLED"] = "false"
+    os.environ.setdefault("OPENAI_API_KEY", "bench-not-used")
+
+    from scripts.init_db import SCHEMA
+    from src.config import Config
+    from src.db.connection import DatabaseConnection
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.close()
+
+    # Config may already be imported (tests): apply the settings on the class too
+    Config.SQLITE_PATH = db_path
+    Config.PAYMENT_RECONCILE_ENABLED = False
+    DatabaseConnection.close()
+    return db_path
+
+
+# ==================== Results ====================
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 2) if values else 0.0,
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+    }
+
+
+@dataclass
+class BenchConfig:
+    customers: int = 20
+    concurrency: int = 5
+    model_latency: float = 0.0          # seconds per simulated LLM call
+    mercadopago_latency: float = 0.0    # seconds per fake Mercado Pago call
+    issuance_timeout: float = 15.0      # seconds to wait for webhook -> completed
+
+
+@dataclass
+class Recorder:
+    endpoints: Dict[str, List[float]] = field(default_factory=dict)
+    steps: Dict[str, List[float]] = field(default_factory=dict)
+    turn_roundtrips: List[int] = field(default_factory=list)
+    issuance: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    completed: int = 0
+    attributed: int = 0     # round-trips made while serving a bench request
+
+    def add(self, bucket: Dict[str, List[float]], key: str, value: float):
+        bucket.setdefault(key, []).append(value)
+
+    def error(self, key: str):
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+# ==================== Synthetic customer ====================
+
+def plate_for(n: int) -> str:
+    """Distinct Mercosur car plate (AB123CD) per customer"""
+    letters = "ABCDEFGHJKLMNPRSTUVWXYZ"
+    a, b, c, d = (letters[(n // len(letters) ** i) % len(letters)] for i in range(4))
+    return f"{a}{b}{n % 1000:03d}{c}{d}"
+
+
+def journey(n: int) -> List[tuple]:
+    """(step, message) turns of customer n; fast-path steps never reach the model"""
+    return [
+        ("greeting", "Hola, quiero cotizar un seguro"),
+        ("intention", "auto"),
+        ("name", f"Me llamo Cliente {n}"),
+        ("email", f"cliente{n}@example.com"),
+        ("phone", f"11{55000000 + n}"),
+        ("plate", plate_for(n)),
+        ("select", "Quiero la opción 2"),
+        ("payment_link", "Quiero pagar con Mercado Pago"),
+    ]
+
+
+class Customer:
+    def __init__(self, n: int, client, recorder: Recorder, fake_mp, config: BenchConfig):
+        self.n = n
+        self.client = client
+        self.recorder = recorder
+        self.fake_mp = fake_mp
+        self.config = config
+
+    async def request(self, method: str, url: str, endpoint: str, step: Optional[str] = None, **kwargs):
+        from src.db.metrics import db_metrics
+
+        started = time.perf_counter()
+        # The ASGI transport runs the app in this task, so its round-trips land here
+        with db_metrics.track_request() as stats:
+            response = await self.client.request(method, url, **kwargs)
+        self.recorder.attributed += stats.roundtrips
+        elapsed = (time.perf_counter() - started) * 1000
+        self.recorder.add(self.recorder.endpoints, endpoint, elapsed)
+        if step:
+            self.recorder.add(self.recorder.steps, step, elapsed)
+            self.recorder.turn_roundtrips.append(stats.roundtrips)
+        if response.status_code >= 400:
+            self.recorder.error(endpoint)
+            raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def run(self):
+        import asyncio
+
+        started = await self.request("POST", "/api/chat/start", "POST /api/chat/start")
+        session_id, policy_id = started["session_id"], started["policy_id"]
+        message_url = f"/api/chat/{session_id}/message"
+
+        for step, message in journey(self.n):
+            await self.request("POST", message_url, "POST /api/chat/{id}/message", step,
+                               json={"message": message})
+
+        # The customer pays; Mercado Pago notifies us
+        payment_id = self.fake_mp.pay(policy_id)
+        paid_at = time.perf_counter()
+        await self.request("POST", "/webhooks/mercadopago", "POST /webhooks/mercadopago",
+                           json=self.fake_mp.notification(payment_id))
+
+        deadline = paid_at + self.config.issuance_timeout
+        while time.perf_counter() < deadline:
+            session = await self.request("GET", f"/api/chat/{session_id}", "GET /api/chat/{id}")
+            if session["policy_state"] == "completed":
+                self.recorder.issuance.append((time.perf_counter() - paid_at) * 1000)
+                self.recorder.completed += 1
+                break
+            await asyncio.sleep(0.02)
+        else:
+            self.recorder.error("issuance timeout")
+
+        await self.request("POST", message_url, "POST /api/chat/{id}/message", "after_issuance",
+                           json={"message": "¿Ya está mi póliza?"})
+
+
+# ==================== Run ====================
+
+async def run_benchmark(config: BenchConfig) -> dict:
+    """Start the app in-process, run every customer and return the report"""
+    import asyncio
+
+    import httpx
+    from agents import set_tracing_disabled
+
+    import app as app_module
+    from bench.fake_mercadopago import FakeMercadoPago
+    from bench.stub_model import ScriptedModelProvider
+    from src.agents.registry import agent_registry
+    from src.config import Config
+    from src.db.metrics import db_metrics
+    from src.issuance.outbox import issuance_worker
+    from src.payments.gateway import mercadopago_gateway
+    from src.payments.webhooks import webhook_processor
+
+    set_tracing_disabled(True)
+    Config.validate = classmethod(lambda cls: True)
+
+    fake_mp = FakeMercadoPago(latency=config.mercadopago_latency)
+    mercadopago_gateway.configure(access_token="TEST-bench", http_client=fake_mp)
+    webhook_processor.poll_interval = 0.05
+    issuance_worker.poll_interval = 0.05
+
+    await app_module.startup_event()
+    provider = ScriptedModelProvider(latency=config.model_latency)
+    provider.install(agent_registry)
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(config.concurrency)
+    transport = httpx.ASGITransport(app=app_module.app)
+
+    async def one(n: int):
+        async with semaphore:
+            try:
+                await Customer(n, client, recorder, fake_mp, config).run()
+            except Exception as e:
+                recorder.error(type(e).__name__)
+                print(f"⚠️  Customer {n}: {e}")
+
+    db_metrics.reset()
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await asyncio.gather(*(one(n) for n in range(config.customers)))
+    finally:
+        wall = time.perf_counter() - started
+        await app_module.shutdown_event()
+
+    turns = len(recorder.turn_roundtrips)
+    return {
+        "config": asdict(config),
+        "wall_seconds": round(wall, 2),
+        "customers_completed": recorder.completed,
+        "turns": turns,
+        "turns_per_second": round(turns / wall, 2) if wall else 0.0,
+        "endpoints_ms": {name: summarize(values) for name, values in sorted(recorder.endpoints.items())},
+        "steps_ms": {name: summarize(values) for name, values in recorder.steps.items()},
+        "issuance_ms": summarize(recorder.issuance),
+        "db_roundtrips_per_turn": summarize([float(v) for v in recorder.turn_roundtrips]),
+        "db_roundtrips_background": db_metrics.roundtrips - recorder.attributed,
+        "db_top_statements": db_metrics.snapshot(top=5),
+        "model": dict(provider.stats),
+        "mercadopago_calls": fake_mp.calls,
+        "errors": recorder.errors,
+    }
+
+
+# ==================== Reporting ====================
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"🏁 {report['customers_completed']}/{report['config']['customers']} customers completed "
+        f"in {report['wall_seconds']}s ({report['turns']} turns, {report['turns_per_second']} turns/s)",
+        "",
+        f"{'latency (ms)':<38}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}",
+    ]
+    for section in ("endpoints_ms", "steps_ms"):
+        for name, stats in report[section].items():
+            label = name if section == "endpoints_ms" else f"  step: {name}"
+            lines.append(f"{label:<38}{stats['count']:>7}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}")
+    issuance = report["issuance_ms"]
+    lines.append(f"{'webhook -> completed':<38}{issuance['count']:>7}{issuance['p50']:>10}"
+                 f"{issuance['p95']:>10}{issuance['p99']:>10}")
+    db = report["db_roundtrips_per_turn"]
+    lines += [
+        "",
+        f"DB round-trips per turn: mean {db['mean']}, p50 {db['p50']}, p95 {db['p95']}, p99 {db['p99']}"
+        f" (background workers: {report['db_roundtrips_background']})",
+        f"Model: {report['model']}  |  Mercado Pago calls: {report['mercadopago_calls']}",
+        "",
+        "Top statements by total DB time:",
+    ]
+    for row in report["db_top_statements"]:
+        lines.append(f"  {row['total_ms']:>9} ms {row['count']:>6}x  {row['operation']} {row['statement'][:90]}")
+    if report["errors"]:
+        lines.append(f"❌ Errors: {report['errors']}")
+    return "\n".join(lines)
+
+
+# Metrics compared against a baseline, and whether higher is worse
+REGRESSION_METRICS = {
+    "turns_per_second": False,
+    "db_roundtrips_per_turn.mean": True,
+    "endpoints_ms.POST /api/chat/{id}/message.p95": True,
+}
+
+
+def _lookup(report: dict, path: str):
+    value = report
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2) -> List[str]:
+    """Metrics that got worse than `baseline` by more than `tolerance` (a fraction)"""
+    regressions = []
+    for path, higher_is_worse in REGRESSION_METRICS.items():
+        before, after = _lookup(baseline, path), _lookup(current, path)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        if (change if higher_is_worse else -change) > tolerance:
+            regressions.append(f"{path}: {before} -> {after} ({change:+.0%})")
+    if current["customers_completed"] < current["config"]["customers"]:
+        regressions.append(f"only {current['customers_completed']} customers completed")
+    return regressions
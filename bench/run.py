@@ -0,0 +1,65 @@
+"""
+Load test: N synthetic customers through intake -> quotation -> payment -> issuance
+
+Runs app.py in-process against a throwaway SQLite database, with a
+scripted model instead of OpenAI and a local fake of Mercado Pago:
+
+    python bench/run.py --customers 50 --concurrency 10 --model-latency 0.3
+    python bench/run.py --json bench/baseline.json            # save a baseline
+    python bench/run.py --baseline bench/baseline.json        # exit 1 on regressions
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.harness import BenchConfig, compare, format_report, prepare_environment
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test of the chat flow")
+    parser.add_argument("--customers", type=int, default=20, help="Synthetic customers to run")
+    parser.add_argument("--concurrency", type=int, default=5, help="Customers in flight at once")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Seconds per simulated LLM call")
+    parser.add_argument("--mp-latency", type=float, default=0.0, help="Seconds per fake Mercado Pago call")
+    parser.add_argument("--workdir", default=None, help="Directory for the benchmark database")
+    parser.add_argument("--json", default=None, help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression (fraction)")
+    args = parser.parse_args()
+
+    db_path = prepare_environment(args.workdir)
+    print(f"🗄️  Benchmark database: {db_path}")
+
+    # app.py reads its settings at import: only after the environment is ready
+    from bench.harness import run_benchmark
+
+    report = asyncio.run(run_benchmark(BenchConfig(
+        customers=args.customers,
+        concurrency=args.concurrency,
+        model_latency=args.model_latency,
+        mercadopago_latency=args.mp_latency
+    )))
+    print(format_report(report))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
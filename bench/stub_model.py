@@ -0,0 +1,145 @@
+"""
+Deterministic stand-in for the LLM, plugged into the Agents SDK
+
+Each agent gets a ScriptedModel (an agents.Model). On a turn it reads the
+policy id and the customer's message out of the prompt built by
+ContextBuilder, and replays the first scripted tool call whose pattern
+matches; once the tool output comes back it answers with plain text. The
+tools themselves run for real, so the DB work of a turn is the same as
+with the real model - only the model's latency is simulated.
+
+    provider = ScriptedModelProvider(DEFAULT_SCRIPT, latency=0.3)
+    provider.install(agent_registry)
+"""
+import asyncio
+import itertools
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from agents.items import ModelResponse
+from agents.models.interface import Model, ModelProvider
+from agents.usage import Usage
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+POLICY_ID_RE = re.compile(r"- Policy ID: (\S+)")
+MESSAGE_MARKER = "NUEVO MENSAJE DEL CLIENTE:\n"
+
+
+@dataclass
+class ScriptedCall:
+    """Call `tool` when the customer's message matches `pattern`"""
+    agent: str
+    pattern: str
+    tool: str
+    arguments: Callable[[str, re.Match], dict]
+
+
+# The synthetic customer journey's free-text turns (the structured ones go
+# through the fast path and never reach the model)
+DEFAULT_SCRIPT: List[ScriptedCall] = [
+    ScriptedCall("IntakeAgent", r"(?:me llamo|soy) (.+)", "save_client_field",
+                 lambda policy_id, m: {"policy_id": policy_id, "field_name": "name",
+                                       "field_value": m.group(1).strip()}),
+    ScriptedCall("QuotationAgent", r"opci[oó]n (\d+)", "select_quotation_and_move_to_payment",
+                 lambda policy_id, m: {"policy_id": policy_id, "quotation_index": int(m.group(1))}),
+    ScriptedCall("PaymentAgent", r"mercado ?pago", "generate_mercadopago_payment_link",
+                 lambda policy_id, m: {"policy_id": policy_id}),
+    ScriptedCall("IntakeAgent", r".*", "get_policy_context",
+                 lambda policy_id, m: {"policy_id": policy_id}),
+]
+
+
+def _text(item) -> str:
+    content = item.get("content") if isinstance(item, dict) else None
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class ScriptedModel(Model):
+    """One agent's scripted model"""
+
+    def __init__(self, agent_name: str, script: List[ScriptedCall], latency: float = 0.0,
+                 stats: Optional[Dict[str, int]] = None):
+        self.agent_name = agent_name
+        self.script = [call for call in script if call.agent == agent_name]
+        self.latency = latency
+        self.stats = stats if stats is not None else {}
+        self._ids = itertools.count(1)
+
+    def _count(self, key: str, amount: int = 1):
+        self.stats[key] = self.stats.get(key, 0) + amount
+
+    def _decide(self, items: list, tool_names: set):
+        """A tool call for a fresh turn, or the final text once a tool has answered"""
+        outputs = [item for item in items if isinstance(item, dict) and item.get("type") == "function_call_output"]
+        if outputs:
+            return None, f"Listo. {str(outputs[-1].get('output', ''))[:200]}"
+
+        prompt = next((_text(item) for item in items if isinstance(item, dict) and item.get("role") == "user"), "")
+        policy_match = POLICY_ID_RE.search(prompt)
+        message = prompt.split(MESSAGE_MARKER, 1)[-1].strip()
+        if policy_match:
+            for call in self.script:
+                match = re.search(call.pattern, message, re.IGNORECASE)
+                if match and call.tool in tool_names:
+                    return call, call.arguments(policy_match.group(1), match)
+        return None, f"[{self.agent_name}] ¿En qué más te puedo ayudar?"
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, *, previous_response_id=None, conversation_id=None,
+                           prompt=None) -> ModelResponse:
+        items = [{"role": "user", "content": input}] if isinstance(input, str) else list(input)
+        call, payload = self._decide(items, {getattr(tool, "name", "") for tool in tools})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        n = next(self._ids)
+        if call is not None:
+            output = ResponseFunctionToolCall(
+                type="function_call", id=f"fc_{n}", call_id=f"call_{self.agent_name}_{n}",
+                name=call.tool, arguments=json.dumps(payload, ensure_ascii=False), status="completed"
+            )
+            self._count("tool_calls")
+        else:
+            output = ResponseOutputMessage(
+                type="message", id=f"msg_{n}", role="assistant", status="completed",
+                content=[ResponseOutputText(type="output_text", text=payload, annotations=[])]
+            )
+        input_tokens = sum(len(_text(item)) for item in items) // 4
+        self._count("requests")
+        self._count("input_tokens", input_tokens)
+        return ModelResponse(
+            output=[output],
+            usage=Usage(requests=1, input_tokens=input_tokens, output_tokens=20, total_tokens=input_tokens + 20),
+            response_id=None
+        )
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError("The load harness drives the non-streaming endpoints")
+
+
+class ScriptedModelProvider(ModelProvider):
+    """Builds a ScriptedModel per agent; `stats` aggregates requests and tokens"""
+
+    def __init__(self, script: Optional[List[ScriptedCall]] = None, latency: float = 0.0):
+        self.script = DEFAULT_SCRIPT if script is None else script
+        self.latency = latency
+        self.stats: Dict[str, int] = {}
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return ScriptedModel(model_name or "", self.script, self.latency, self.stats)
+
+    def install(self, registry) -> List[str]:
+        """Point every agent of an AgentRegistry at its scripted model (also after reloads)"""
+        def apply(names):
+            for name in names:
+                agent = registry.get(name)
+                agent.model = self.get_model(agent.name)
+
+        registry.on_reload(apply)
+        names = registry.warm_up()
+        apply(names)
+        return names
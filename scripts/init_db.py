@@ -94,10 +94,67 @@ CREATE TABLE IF NOT EXISTS sessions (
   policy_id TEXT NOT NULL REFERENCES policies(id),
   messages TEXT NOT NULL,
   context_built INTEGER DEFAULT 0,
+  message_count INTEGER NOT NULL DEFAULT 0,  -- mantenidos al agregar mensajes
+  last_message_at TIMESTAMP,
+  last_role TEXT,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Mensajes de cada sesión (append-only, uno por fila)
+CREATE TABLE IF NOT EXISTS session_messages (
+  session_id TEXT NOT NULL REFERENCES sessions(session_id),
+  seq INTEGER NOT NULL,
+  role TEXT NOT NULL,
+  content TEXT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (session_id, seq)
+);
+
+-- Resumen acumulado de los mensajes que ya no entran en el contexto del agente
+CREATE TABLE IF NOT EXISTS session_summaries (
+  session_id TEXT PRIMARY KEY REFERENCES sessions(session_id),
+  summary TEXT NOT NULL,
+  through_seq INTEGER NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Versión del catálogo de cotizaciones (se incrementa al cambiar quotation_templates)
+CREATE TABLE IF NOT EXISTS catalog_versions (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Notificaciones de Mercado Pago pendientes de procesar
+CREATE TABLE IF NOT EXISTS webhook_events (
+  id TEXT PRIMARY KEY,  -- Mercado Pago notification id
+  topic TEXT,
+  resource_id TEXT,
+  payload TEXT,
+  status TEXT NOT NULL DEFAULT 'pending',  -- pending, processing, done, failed, ignored
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP,
+  last_error TEXT,
+  processed_at TIMESTAMP,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Pólizas pendientes de enviar a la API del emisor
+CREATE TABLE IF NOT EXISTS issuance_outbox (
+  policy_id TEXT PRIMARY KEY,
+  status TEXT NOT NULL DEFAULT 'pending',  -- pending, processing, done, failed
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP,
+  last_error TEXT,
+  external_id TEXT,  -- policy number returned by the issuer
+  processed_at TIMESTAMP,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (policy_id) REFERENCES policies(id)
+);
+
 -- Payments (Mercado Pago integration)
 CREATE TABLE IF NOT EXISTS payments (
   id TEXT PRIMARY KEY,
@@ -122,6 +179,19 @@ CREATE INDEX IF NOT EXISTS idx_sessions_policy_id ON sessions(policy_id);
 CREATE INDEX IF NOT EXISTS idx_payments_policy_id ON payments(policy_id);
 CREATE INDEX IF NOT EXISTS idx_payments_preference_id ON payments(preference_id);
 CREATE INDEX IF NOT EXISTS idx_payments_payment_id ON payments(payment_id);
+CREATE INDEX IF NOT EXISTS idx_payments_status_created ON payments(payment_status, created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quotation_templates_key ON quotation_templates(insurance_type, coverage_type, coverage_level);
+CREATE INDEX IF NOT EXISTS idx_webhook_events_due ON webhook_events(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_issuance_outbox_due ON issuance_outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_policies_created ON policies(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_policies_state_created ON policies(state, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_policies_type_created ON policies(insurance_type, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_client_data_created ON client_data(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_vehicle_data_created ON vehicle_data(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_quotation_data_created ON quotation_data(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_state_transitions_created ON state_transitions(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions(created_at, session_id);
+CREATE INDEX IF NOT EXISTS idx_payments_created ON payments(created_at, id);
 """
 
 def init_db(db_path: str = "aseguraopen.db"):
@@ -0,0 +1,39 @@
+"""
+Reprice the stored quotations of every open policy (quotation / payment)
+
+Run after changing quotation_templates prices or the rating tables:
+
+    python scripts/rerate_quotations.py                  # resume if interrupted
+    python scripts/rerate_quotations.py --restart        # ignore the checkpoint
+    python scripts/rerate_quotations.py --dry-run        # only report changes
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pricing.rerating import OPEN_STATES, RerateJob
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk re-rating of open quotations")
+    parser.add_argument("--batch-size", type=int, default=500, help="Policies per chunk")
+    parser.add_argument("--states", nargs="+", default=list(OPEN_STATES), help="Policy states to reprice")
+    parser.add_argument("--checkpoint", default="rerate_checkpoint.json", help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Start over instead of resuming")
+    parser.add_argument("--dry-run", action="store_true", help="Compute new prices without writing them")
+    args = parser.parse_args()
+
+    job = RerateJob(
+        batch_size=args.batch_size,
+        states=args.states,
+        checkpoint_path=args.checkpoint,
+        dry_run=args.dry_run
+    )
+    report = job.run(resume=not args.restart)
+    print(report.to_dict())
+
+
+if __name__ == "__main__":
+    main()
@@ -98,10 +98,67 @@ SCHEMA_STATEMENTS = [
       policy_id TEXT NOT NULL REFERENCES policies(id),
       messages TEXT NOT NULL,
       context_built INTEGER DEFAULT 0,
+      message_count INTEGER NOT NULL DEFAULT 0,
+      last_message_at TIMESTAMP,
+      last_role TEXT,
       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
       updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )""",
     
+    # Mensajes de cada sesión (append-only)
+    """CREATE TABLE IF NOT EXISTS session_messages (
+      session_id TEXT NOT NULL REFERENCES sessions(session_id),
+      seq INTEGER NOT NULL,
+      role TEXT NOT NULL,
+      content TEXT NOT NULL,
+      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (session_id, seq)
+    )""",
+    
+    # Resumen acumulado de mensajes fuera del contexto del agente
+    """CREATE TABLE IF NOT EXISTS session_summaries (
+      session_id TEXT PRIMARY KEY REFERENCES sessions(session_id),
+      summary TEXT NOT NULL,
+      through_seq INTEGER NOT NULL,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    
+    # Versión del catálogo de cotizaciones
+    """CREATE TABLE IF NOT EXISTS catalog_versions (
+      name TEXT PRIMARY KEY,
+      version INTEGER NOT NULL DEFAULT 0,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    
+    # Notificaciones de Mercado Pago pendientes de procesar
+    """CREATE TABLE IF NOT EXISTS webhook_events (
+      id TEXT PRIMARY KEY,
+      topic TEXT,
+      resource_id TEXT,
+      payload TEXT,
+      status TEXT NOT NULL DEFAULT 'pending',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      next_attempt_at TIMESTAMP,
+      last_error TEXT,
+      processed_at TIMESTAMP,
+      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    
+    # Pólizas pendientes de enviar a la API del emisor
+    """CREATE TABLE IF NOT EXISTS issuance_outbox (
+      policy_id TEXT PRIMARY KEY,
+      status TEXT NOT NULL DEFAULT 'pending',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      next_attempt_at TIMESTAMP,
+      last_error TEXT,
+      external_id TEXT,
+      processed_at TIMESTAMP,
+      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      FOREIGN KEY (policy_id) REFERENCES policies(id)
+    )""",
+    
     # Índices
     "CREATE INDEX IF NOT EXISTS idx_policies_state ON policies(state)",
     "CREATE INDEX IF NOT EXISTS idx_client_data_policy ON client_data(policy_id)",
@@ -109,6 +166,17 @@ SCHEMA_STATEMENTS = [
     "CREATE INDEX IF NOT EXISTS idx_quotation_data_policy ON quotation_data(policy_id)",
     "CREATE INDEX IF NOT EXISTS idx_state_transitions_policy ON state_transitions(policy_id)",
     "CREATE INDEX IF NOT EXISTS idx_sessions_policy_id ON sessions(policy_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_quotation_templates_key ON quotation_templates(insurance_type, coverage_type, coverage_level)",
+    "CREATE INDEX IF NOT EXISTS idx_webhook_events_due ON webhook_events(status, next_attempt_at)",
+    "CREATE INDEX IF NOT EXISTS idx_issuance_outbox_due ON issuance_outbox(status, next_attempt_at)",
+    "CREATE INDEX IF NOT EXISTS idx_policies_created ON policies(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_policies_state_created ON policies(state, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_policies_type_created ON policies(insurance_type, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_client_data_created ON client_data(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_vehicle_data_created ON vehicle_data(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_quotation_data_created ON quotation_data(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_state_transitions_created ON state_transitions(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions(created_at, session_id)",
 ]
 
 def execute_turso_query(database_url: str, auth_token: str, sql: str) -> dict:
@@ -0,0 +1,217 @@
+"""
+Context Builder - Arma el prompt de cada turno con un presupuesto de tokens
+
+El prompt tiene tres partes:
+  1. Datos fijos de la póliza (siempre presentes, no compiten por presupuesto)
+  2. Resumen acumulado de los mensajes viejos (opcional, guardado por sesión)
+  3. Ventana de los mensajes más recientes que entren en el presupuesto
+
+Así el tamaño del prompt se mantiene constante sin importar cuán larga sea
+la conversación. Cualquier agente de `src/agents` puede usarlo:
+
+    context = await context_builder.build_async(aggregate, user_message)
+    result = await Runner.run(agent, context.prompt)
+"""
+import functools
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from src.config import Config
+from src.db.repository import PolicyRepository
+from src.models import PolicyAggregate
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character heuristic
+    tiktoken = None
+
+# Longest excerpt of a single message kept in the extractive summary
+SUMMARY_LINE_CHARS = 160
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding():
+    """cl100k_base, loaded on first use (tiktoken may need to download it)"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠️  tiktoken encoding unavailable, estimating tokens by length: {e}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of a text (tiktoken if available, else ~4 chars per token)"""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def format_message(message: dict) -> str:
+    return f"{message['role'].upper()}: {message['content']}"
+
+
+def extractive_summary(previous: Optional[str], messages: List[dict], max_tokens: int,
+                       count_tokens: Callable[[str], int] = estimate_tokens) -> str:
+    """Default summarizer: one truncated line per message, oldest lines dropped first
+
+    Deterministic and free (no LLM call). Any callable with the same
+    signature can be passed to ContextBuilder as `summarizer`.
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        content = " ".join(str(message["content"]).split())
+        if len(content) > SUMMARY_LINE_CHARS:
+            content = content[:SUMMARY_LINE_CHARS - 1] + "…"
+        lines.append(f"{message['role'].upper()}: {content}")
+
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+@dataclass
+class AgentContext:
+    """Prompt built for one agent turn"""
+    prompt: str
+    token_count: int
+    messages_included: int
+    messages_dropped: int
+    summary: Optional[str] = None
+    summary_through_seq: int = 0
+    summary_changed: bool = False
+
+
+class ContextBuilder:
+    """Build bounded agent prompts from a PolicyAggregate"""
+
+    def __init__(
+        self,
+        max_tokens: int = None,
+        window_messages: int = None,
+        summary_enabled: bool = None,
+        summary_max_tokens: int = None,
+        summarizer: Callable = extractive_summary,
+        count_tokens: Callable[[str], int] = estimate_tokens
+    ):
+        self.max_tokens = max_tokens if max_tokens is not None else Config.CONTEXT_MAX_TOKENS
+        self.window_messages = window_messages if window_messages is not None else Config.CONTEXT_WINDOW_MESSAGES
+        self.summary_enabled = summary_enabled if summary_enabled is not None else Config.CONTEXT_SUMMARY_ENABLED
+        self.summary_max_tokens = (
+            summary_max_tokens if summary_max_tokens is not None else Config.CONTEXT_SUMMARY_MAX_TOKENS
+        )
+        self.summarizer = summarizer
+        self.count_tokens = count_tokens
+
+    # ==================== Sections ====================
+
+    @staticmethod
+    def policy_facts(aggregate: PolicyAggregate) -> str:
+        """Pinned, structured policy facts"""
+        policy = aggregate.policy
+        client_data = aggregate.client
+        vehicle_data = aggregate.vehicle
+        selected = aggregate.selected_quotation
+
+        facts = f"""CONTEXTO ACTUAL DE LA PÓLIZA:
+- Policy ID: {policy.id}
+- Estado: {policy.state}
+- Tipo de Seguro: {policy.insurance_type or "No especificado"}
+- Cliente: {client_data.name if client_data else "No completado"}
+- Email: {client_data.email if client_data else "N/A"}
+- Teléfono: {client_data.phone if client_data else "N/A"}
+- Vehículo: {f"{vehicle_data.make} {vehicle_data.model}" if vehicle_data else "No ingresado"}"""
+
+        if vehicle_data:
+            facts += f"\n- Año / Patente: {vehicle_data.year} / {vehicle_data.plate}"
+        if aggregate.quotations:
+            facts += f"\n- Cotizaciones: {len(aggregate.quotations)} opciones disponibles"
+        if selected:
+            facts += (
+                f"\n- Cotización elegida: {selected['coverage_type']} {selected['coverage_level']}"
+                f" (${selected['monthly_premium']}/mes)"
+            )
+        return facts
+
+    # ==================== Build ====================
+
+    def build(self, aggregate: PolicyAggregate, user_message: str) -> AgentContext:
+        """Assemble the prompt for one turn (no I/O)
+
+        Messages are walked newest first and kept while they fit both the
+        window and the token budget. If summaries are enabled, messages that
+        slid out since the last summary are folded into it; the caller
+        persists it when `summary_changed` is set (see build_async).
+        """
+        session = aggregate.session or {}
+        messages = session.get("messages", [])
+        summary = session.get("summary")
+        through_seq = session.get("summary_through_seq") or 0
+
+        facts = self.policy_facts(aggregate)
+        new_message = f"NUEVO MENSAJE DEL CLIENTE:\n{user_message}"
+        fixed_tokens = self.count_tokens(facts) + self.count_tokens(new_message)
+
+        # Reserve room for the summary only when one can exist
+        summary_budget = self.summary_max_tokens if self.summary_enabled else 0
+        history_budget = max(self.max_tokens - fixed_tokens - summary_budget, 0)
+
+        kept = []
+        used = 0
+        for message in reversed(messages[-self.window_messages:] if self.window_messages > 0 else []):
+            cost = self.count_tokens(format_message(message)) + 1
+            if used + cost > history_budget:
+                break
+            kept.append(message)
+            used += cost
+        kept.reverse()
+
+        # Everything older than the kept tail slid out of the window. Seqs
+        # need not be contiguous, so the summary tracks them, not positions
+        older = messages[:len(messages) - len(kept)]
+        dropped = len(older)
+
+        summary_changed = False
+        if not self.summary_enabled:
+            summary = None
+        elif older and older[-1]["seq"] > through_seq:
+            summary = self.summarizer(
+                summary, [m for m in older if m["seq"] > through_seq], self.summary_max_tokens, self.count_tokens
+            )
+            through_seq = older[-1]["seq"]
+            summary_changed = True
+
+        sections = [facts]
+        if summary:
+            sections.append(f"RESUMEN DE LA CONVERSACIÓN ANTERIOR:\n{summary}")
+        history = "\n".join(format_message(message) for message in kept)
+        sections.append(f"HISTORIAL DE CONVERSACIÓN:\n{history if history else 'No hay mensajes previos'}")
+        sections.append(new_message)
+        prompt = "\n\n".join(sections)
+
+        return AgentContext(
+            prompt=prompt,
+            token_count=self.count_tokens(prompt),
+            messages_included=len(kept),
+            messages_dropped=dropped,
+            summary=summary,
+            summary_through_seq=through_seq,
+            summary_changed=summary_changed
+        )
+
+    async def build_async(self, aggregate: PolicyAggregate, user_message: str) -> AgentContext:
+        """Build the prompt and persist the rolling summary if it moved"""
+        context = self.build(aggregate, user_message)
+        if context.summary_changed and aggregate.session:
+            await PolicyRepository.save_session_summary_async(
+                aggregate.session["session_id"], context.summary, context.summary_through_seq
+            )
+        return context
+
+
+# Shared builder configured from the environment
+context_builder = ContextBuilder()
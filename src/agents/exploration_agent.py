@@ -12,7 +12,7 @@ async def validate_client_data(ctx: RunContextWrapper[Any], policy_id: str) -> s
     """Validate client data for anomalies and completeness"""
     try:
         # Obtener datos del cliente
-        client_data = PolicyRepository.get_client_data(policy_id)
+        client_data = await PolicyRepository.get_client_data_async(policy_id)
         
         if not client_data:
             return "❌ No client data found for this policy"
@@ -31,7 +31,7 @@ async def validate_client_data(ctx: RunContextWrapper[Any], policy_id: str) -> s
         
         if anomalies:
             # Guardar datos de exploración con anomalías
-            PolicyRepository.save_exploration_data(
+            await PolicyRepository.save_exploration_data_async(
                 policy_id=policy_id,
                 validation_status="suspicious",
                 anomalies={"issues": anomalies}
@@ -39,7 +39,7 @@ async def validate_client_data(ctx: RunContextWrapper[Any], policy_id: str) -> s
             return f"⚠️ Anomalías detectadas: {', '.join(anomalies)}"
         else:
             # Todo válido
-            PolicyRepository.save_exploration_data(
+            await PolicyRepository.save_exploration_data_async(
                 policy_id=policy_id,
                 validation_status="validated",
                 anomalies=None
@@ -53,7 +53,7 @@ async def validate_client_data(ctx: RunContextWrapper[Any], policy_id: str) -> s
 async def check_fraud_indicators(ctx: RunContextWrapper[Any], policy_id: str) -> str:
     """Check for potential fraud indicators"""
     try:
-        client_data = PolicyRepository.get_client_data(policy_id)
+        client_data = await PolicyRepository.get_client_data_async(policy_id)
         if not client_data:
             return "❌ No client data found"
         
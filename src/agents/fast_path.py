@@ -0,0 +1,161 @@
+"""
+Fast Path - Responde sin LLM a los pasos estructurados del flujo
+
+El intake y la carga de patente son un guion fijo: "auto"/"moto", email,
+teléfono, patente. Cuando el mensaje es inequívoco se llama directamente a
+las mismas funciones que usan las tools de los agentes y se responde con una
+plantilla. Cualquier otra cosa (texto libre, nombres, preguntas) devuelve
+None y sigue por el agente.
+
+    reply = await try_fast_path(aggregate, user_message)
+    if reply is None:
+        result = await Runner.run(agent, prompt)
+"""
+import re
+from typing import Optional
+
+from src.config import Config
+from src.models import PolicyAggregate
+from src.agents.intake_agent import (
+    complete_intake_and_move_to_loaded_impl,
+    save_client_field_impl,
+    set_insurance_intention_impl,
+)
+from src.agents.quotation_agent import (
+    collect_vehicle_data_impl,
+    generate_available_quotations_impl,
+    move_to_quotation_state_impl,
+)
+
+# "auto", "moto", "un auto", "quiero seguro para mi moto", ...
+INTENTION_RE = re.compile(
+    r"^(?:quiero\s+|busco\s+)?(?:un\s+|una\s+|el\s+|la\s+)?"
+    r"(?:seguro\s+(?:de|para)\s+(?:mi\s+|un\s+|una\s+)?)?"
+    r"(auto|moto|coche|carro|motocicleta)s?$"
+)
+INTENTION_ALIASES = {"coche": "auto", "carro": "auto", "motocicleta": "moto"}
+
+EMAIL_RE = re.compile(r"^[\w.+-]+@[\w-]+(?:\.[\w-]+)+$")
+# "+54 9 11 4567-8901", "(011) 4567-8901", "1145678901": digits, spaces and
+# parentheses with at most one dash, area code included (10+ digits). Dates
+# ("2024-01-15", "15.01.2024"), DNIs ("30.123.456", "30123456") and CUILs
+# don't match, so they are left to the agent
+PHONE_RE = re.compile(r"^\+?[\d\s()]+(?:-[\d\s()]+)?$")
+PHONE_MIN_DIGITS, PHONE_MAX_DIGITS = 10, 15
+
+# Argentine plates: ABC123 (old car), AB123CD (Mercosur car),
+# 123ABC (old moto), A123BCD (Mercosur moto)
+PLATE_RE = re.compile(r"^(?:[A-Z]{3}\d{3}|[A-Z]{2}\d{3}[A-Z]{2}|\d{3}[A-Z]{3}|[A-Z]\d{3}[A-Z]{3})$")
+
+FIELD_QUESTIONS = {
+    "name": "¿Cuál es tu nombre completo?",
+    "email": "¿Cuál es tu email?",
+    "phone": "¿Cuál es tu teléfono?",
+}
+
+
+def _clean(message: str) -> str:
+    return " ".join(message.strip().rstrip(".!").split())
+
+
+def match_intention(message: str) -> Optional[str]:
+    match = INTENTION_RE.match(_clean(message).lower())
+    if not match:
+        return None
+    return INTENTION_ALIASES.get(match.group(1), match.group(1))
+
+
+def match_email(message: str) -> Optional[str]:
+    text = _clean(message)
+    return text.lower() if EMAIL_RE.match(text) else None
+
+
+def match_phone(message: str) -> Optional[str]:
+    text = _clean(message)
+    digits = re.sub(r"\D", "", text)
+    return text if PHONE_RE.match(text) and PHONE_MIN_DIGITS <= len(digits) <= PHONE_MAX_DIGITS else None
+
+
+def match_plate(message: str) -> Optional[str]:
+    plate = re.sub(r"[\s.-]", "", _clean(message)).upper()
+    return plate if PLATE_RE.match(plate) else None
+
+
+async def try_fast_path(aggregate: PolicyAggregate, message: str) -> Optional[str]:
+    """Handle an unambiguous structured input without the LLM
+
+    Returns the reply to send, or None when the agent should handle it.
+    """
+    if not Config.FAST_PATH_ENABLED or not message:
+        return None
+
+    policy = aggregate.policy
+    if policy.state == "intake":
+        return await _intake_step(aggregate, message)
+    if policy.state in ("loaded", "quotation") and aggregate.vehicle is None and policy.insurance_type:
+        return await _plate_step(aggregate, message)
+    return None
+
+
+async def _intake_step(aggregate: PolicyAggregate, message: str) -> Optional[str]:
+    policy = aggregate.policy
+
+    if not policy.intention:
+        insurance_type = match_intention(message)
+        if not insurance_type:
+            return None
+        result = await set_insurance_intention_impl(policy.id, insurance_type)
+        if result.startswith("❌"):
+            return None
+        return f"✅ Perfecto, seguro de {insurance_type}. Ahora necesito tus datos. {FIELD_QUESTIONS['name']}"
+
+    field_name, value = None, match_email(message)
+    if value:
+        field_name = "email"
+    else:
+        value = match_phone(message)
+        field_name = "phone" if value else None
+    if not field_name:
+        return None
+
+    result = await save_client_field_impl(policy.id, field_name, value)
+    if result.startswith("❌"):
+        return None
+
+    client = aggregate.client
+    saved = {
+        "name": client.name if client else None,
+        "email": client.email if client else None,
+        "phone": client.phone if client else None,
+        field_name: value,
+    }
+    label = "Email" if field_name == "email" else "Teléfono"
+    missing = [name for name in ("name", "email", "phone") if not saved[name]]
+    if missing:
+        return f"✅ {label} guardado. {FIELD_QUESTIONS[missing[0]]}"
+
+    result = await complete_intake_and_move_to_loaded_impl(policy.id)
+    if result.startswith("❌"):
+        return f"✅ {label} guardado."
+    return (f"✅ {label} guardado. Perfecto, tengo todos tus datos. Pasamos a cotización.\n"
+            f"¿Cuál es la patente del vehículo?")
+
+
+async def _plate_step(aggregate: PolicyAggregate, message: str) -> Optional[str]:
+    policy = aggregate.policy
+    plate = match_plate(message)
+    if not plate:
+        return None
+
+    if policy.state == "loaded":
+        result = await move_to_quotation_state_impl(policy.id)
+        if result.startswith("❌"):
+            return None
+
+    # Make, model and year are not asked for in this flow
+    result = await collect_vehicle_data_impl(policy.id, plate, None, None, None)
+    if result.startswith("❌"):
+        return None
+
+    quotations = await generate_available_quotations_impl(policy.id, policy.insurance_type)
+    return f"✅ Guardé la patente {plate}.\n\n{quotations}\n¿Qué opción preferís?"
@@ -12,14 +12,12 @@ import json
 async def start_policy() -> str:
     """Start a new policy for intake"""
     try:
-        policy = PolicyRepository.create_policy("intake")
+        policy = await PolicyRepository.create_policy_async("intake")
         return f"✅ Póliza creada con ID: {policy.id[:8]}... Estado: {policy.state}"
     except Exception as e:
         return f"❌ Error al crear póliza: {str(e)}"
 
-@function_tool
-async def set_insurance_intention(
-    ctx: RunContextWrapper[Any],
+async def set_insurance_intention_impl(
     policy_id: str,
     insurance_type: str
 ) -> str:
@@ -28,11 +26,20 @@ async def set_insurance_intention(
         if insurance_type not in ["auto", "moto"]:
             return f"❌ Tipo de seguro inválido. Usa 'auto' o 'moto'"
         
-        policy = PolicyRepository.set_intention(policy_id, insurance_type)
+        policy = await PolicyRepository.set_intention_async(policy_id, insurance_type)
         return f"✅ Intención registrada: Seguro de {insurance_type}. Proceederemos a recopilar tus datos."
     except Exception as e:
         return f"❌ Error al registrar intención: {str(e)}"
 
+@function_tool
+async def set_insurance_intention(
+    ctx: RunContextWrapper[Any],
+    policy_id: str,
+    insurance_type: str
+) -> str:
+    """Mark that customer has expressed interest in a specific insurance type (auto/moto)"""
+    return await set_insurance_intention_impl(policy_id, insurance_type)
+
 @function_tool
 async def validate_and_save_client_data(
     ctx: RunContextWrapper[Any],
@@ -51,12 +58,12 @@ async def validate_and_save_client_data(
             return f"❌ Datos inválidos:\n{error_list}\n\nPor favor, proporciona datos válidos."
         
         # Check if intention was already set
-        policy = PolicyRepository.get_policy(policy_id)
+        policy = await PolicyRepository.get_policy_async(policy_id)
         if not policy.intention:
             return "❌ Primero debes confirmar tu intención de compra antes de proporcionar datos."
         
         # Save the validated data
-        client_data = PolicyRepository.save_client_data(
+        client_data = await PolicyRepository.save_client_data_async(
             policy_id=policy_id,
             name=validation["data"]["name"],
             email=validation["data"]["email"],
@@ -67,9 +74,7 @@ async def validate_and_save_client_data(
     except Exception as e:
         return f"❌ Error al guardar datos: {str(e)}"
 
-@function_tool
-async def save_client_field(
-    ctx: RunContextWrapper[Any],
+async def save_client_field_impl(
     policy_id: str,
     field_name: str,
     field_value: str
@@ -80,7 +85,7 @@ async def save_client_field(
             return f"❌ Campo inválido: {field_name}. Usa 'name', 'email' o 'phone'"
         
         # Check if intention was set
-        policy = PolicyRepository.get_policy(policy_id)
+        policy = await PolicyRepository.get_policy_async(policy_id)
         if not policy.intention:
             return "❌ Primero confirma tu intención de compra antes de guardar datos."
         
@@ -96,7 +101,7 @@ async def save_client_field(
         
         # Save the field
         update_dict = {field_name: field_value.strip()}
-        client_data = PolicyRepository.update_client_data_partial(policy_id, **update_dict)
+        client_data = await PolicyRepository.update_client_data_partial_async(policy_id, **update_dict)
         
         saved_fields = []
         if client_data.name:
@@ -111,15 +116,26 @@ async def save_client_field(
     except Exception as e:
         return f"❌ Error al guardar {field_name}: {str(e)}"
 
+@function_tool
+async def save_client_field(
+    ctx: RunContextWrapper[Any],
+    policy_id: str,
+    field_name: str,
+    field_value: str
+) -> str:
+    """Save a single client data field (name, email, or phone) - called progressively"""
+    return await save_client_field_impl(policy_id, field_name, field_value)
+
 @function_tool
 async def get_policy_context(ctx: RunContextWrapper[Any], policy_id: str) -> str:
     """Get current policy and client information"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
-        if not policy:
+        aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id)
+        if not aggregate:
             return f"❌ Póliza {policy_id} no encontrada"
         
-        client_data = PolicyRepository.get_client_data(policy_id)
+        policy = aggregate.policy
+        client_data = aggregate.client
         
         result = f"📋 Contexto de la Póliza:\n"
         result += f"  • ID: {policy.id[:8]}...\n"
@@ -140,15 +156,16 @@ async def get_policy_context(ctx: RunContextWrapper[Any], policy_id: str) -> str
     except Exception as e:
         return f"❌ Error al obtener contexto: {str(e)}"
 
-@function_tool
-async def complete_intake_and_move_to_loaded(
-    ctx: RunContextWrapper[Any],
+async def complete_intake_and_move_to_loaded_impl(
     policy_id: str
 ) -> str:
     """Mark intake as complete and move to loaded phase"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
+        aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id)
+        if not aggregate:
+            return f"❌ Póliza {policy_id} no encontrada"
+        policy = aggregate.policy
+        client_data = aggregate.client
         
         # Verify all requirements are met
         if not policy.intention:
@@ -158,7 +175,7 @@ async def complete_intake_and_move_to_loaded(
             return "❌ Faltan datos del cliente"
         
         # Update state to loaded
-        PolicyRepository.update_policy_state(
+        await PolicyRepository.update_policy_state_async(
             policy_id=policy_id,
             new_state="loaded",
             reason="Intake completo - datos del cliente cargados",
@@ -170,33 +187,12 @@ async def complete_intake_and_move_to_loaded(
         return f"❌ Error al completar intake: {str(e)}"
 
 @function_tool
-async def get_policy_context(ctx: RunContextWrapper[Any], policy_id: str) -> str:
-    """Get current policy and client information"""
-    try:
-        policy = PolicyRepository.get_policy(policy_id)
-        if not policy:
-            return f"❌ Póliza {policy_id} no encontrada"
-        
-        client_data = PolicyRepository.get_client_data(policy_id)
-        
-        result = f"📋 Contexto de la Póliza:\n"
-        result += f"  • ID: {policy.id[:8]}...\n"
-        result += f"  • Estado: {policy.state}\n"
-        result += f"  • Intención: {'✅ Sí' if policy.intention else '❌ No'}\n"
-        
-        if policy.insurance_type:
-            result += f"  • Tipo: {policy.insurance_type}\n"
-        
-        if client_data:
-            result += f"  • Cliente: {client_data.name}\n"
-            result += f"  • Email: {client_data.email}\n"
-            result += f"  • Teléfono: {client_data.phone}\n"
-        else:
-            result += f"  • Cliente: Sin datos aún\n"
-        
-        return result
-    except Exception as e:
-        return f"❌ Error al obtener contexto: {str(e)}"
+async def complete_intake_and_move_to_loaded(
+    ctx: RunContextWrapper[Any],
+    policy_id: str
+) -> str:
+    """Mark intake as complete and move to loaded phase"""
+    return await complete_intake_and_move_to_loaded_impl(policy_id)
 
 class IntakeAgent:
     """Agent that handles client intake with proper flow"""
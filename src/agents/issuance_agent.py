@@ -1,11 +1,17 @@
 """
 Issuance Agent - Handles policy issuance and delivery
-Flujo: Generar póliza → Enviar a API → Cambiar estado a completado
+Flujo: Pago aprobado → Outbox de emisión → IssuanceWorker envía a la API → completado
+
+Issuance itself runs in src/issuance/outbox.py without the LLM; the chat
+endpoints answer "issued" policies with a fixed status message, so this agent
+is not in the state dispatch table; it only remains as a manual way to
+(re)queue a policy.
 """
 from agents import Agent, function_tool, RunContextWrapper
 from src.db.repository import PolicyRepository
+from src.issuance.outbox import issuance_worker
 from typing import Any
-import json
+import asyncio
 
 @function_tool
 async def get_issuance_context(
@@ -14,10 +20,13 @@ async def get_issuance_context(
 ) -> str:
     """Get current issuance context"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
+        aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id)
+        if not aggregate:
+            return f"❌ Póliza {policy_id} no encontrada"
+        policy = aggregate.policy
+        client_data = aggregate.client
+        vehicle_data = aggregate.vehicle
+        quotations = aggregate.quotations
         selected = None
         
         for q in quotations:
@@ -49,78 +58,19 @@ async def issue_policy_to_api(
     ctx: RunContextWrapper[Any],
     policy_id: str
 ) -> str:
-    """Issue policy and send to external API"""
+    """Queue the policy for the issuance worker and report its status"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
-        
-        # Find selected quotation
-        selected = None
-        for q in quotations:
-            if q.get('selected'):
-                selected = q
-                break
-        
-        if not selected and quotations:
-            selected = quotations[0]
+        policy = await PolicyRepository.get_policy_async(policy_id, use_cache=False)
+        if not policy:
+            return f"❌ Póliza {policy_id} no encontrada"
+        if policy.state == "completed":
+            return "✅ La póliza ya fue emitida. Revisa tu email para descargar los documentos."
+        if policy.state != "issued":
+            return f"❌ La póliza no está lista para emitirse (estado: {policy.state})"
         
-        if not selected:
-            return "❌ No hay cotización seleccionada para emitir"
-        
-        # Build policy data for API
-        policy_data = {
-            "policy_id": policy_id,
-            "client": {
-                "name": client_data.name,
-                "email": client_data.email,
-                "phone": client_data.phone
-            },
-            "vehicle": {
-                "make": vehicle_data.make,
-                "model": vehicle_data.model,
-                "year": vehicle_data.year,
-                "plate": vehicle_data.plate,
-                "engine_number": vehicle_data.engine_number,
-                "chassis_number": vehicle_data.chassis_number
-            },
-            "insurance": {
-                "type": policy.insurance_type,
-                "coverage_type": selected['coverage_type'],
-                "coverage_level": selected['coverage_level'],
-                "monthly_premium": selected['monthly_premium'],
-                "annual_premium": selected['annual_premium'],
-                "deductible": selected['deductible']
-            }
-        }
-        
-        # TODO: In production, send to actual API
-        # response = requests.post("https://api.issuer.com/policies", json=policy_data)
-        # if response.status_code != 200:
-        #     raise Exception(f"API Error: {response.text}")
-        
-        # For now, simulate successful API call
-        print(f"📤 Enviando póliza a API: {json.dumps(policy_data, indent=2)}")
-        
-        # Update state to completed
-        PolicyRepository.update_policy_state(
-            policy_id=policy_id,
-            new_state="completed",
-            reason="Póliza emitida y enviada a cliente",
-            agent="IssuanceAgent"
-        )
-        
-        return f"""✅ ¡PÓLIZA EMITIDA CON ÉXITO!
-
-📋 DETALLES:
-- Número de Póliza: {policy_id[:8]}...
-- Enviada a: {client_data.email}
-- Cobertura: {selected['coverage_type']} - {selected['coverage_level']}
-- Vehículo: {vehicle_data.make} {vehicle_data.model} ({vehicle_data.year})
-- Prima Anual: ${selected['annual_premium']:.2f}
-
-Revisa tu email para descargar los documentos."""
+        # The worker sends it to the issuer API and marks it completed
+        await asyncio.to_thread(issuance_worker.enqueue, policy_id)
+        return await asyncio.to_thread(issuance_worker.status_reply, policy_id)
     except Exception as e:
         return f"❌ Error al emitir póliza: {str(e)}"
 
@@ -130,9 +80,8 @@ class IssuanceAgent:
     
     INSTRUCTIONS = """Eres un agente de emisión automático. Tu ÚNICO trabajo es:
 1. Revisar que todo esté listo
-2. Emitir la póliza
-3. Enviar a la API
-4. Marcar como completado
+2. Encolar la póliza para su emisión
+3. Informar el estado de la emisión
 
 **IMPORTANTE: NO INTERACTÚAS CON EL CLIENTE**
 - Este agente es completamente automático
@@ -147,12 +96,11 @@ class IssuanceAgent:
 
 🔧 PASO 2 - Emitir póliza:
 - LLAMA: issue_policy_to_api(policy_id)
-- Envía todo a la API
-- Marca como completado
+- Encola la póliza; el envío a la API y el cambio a completado son automáticos
 
 **RESPUESTA FINAL:**
 - Solo confirma que se emitió correctamente
-- El cliente recibirá el documento por email""",
+- El cliente recibirá el documento por email"""
     
     @staticmethod
     def create_agent():
@@ -10,21 +10,34 @@ ya existentes en `src/agents` (IntakeAgent, QuotationAgent, ExplorationAgent).
 from typing import Any, Callable, Dict, Iterable, Optional
 import inspect
 
+from src.agents.registry import AgentRegistry, agent_registry
+
 
 class AgentOrchestrator:
-    def __init__(self) -> None:
+    def __init__(self, registry: Optional[AgentRegistry] = None) -> None:
         self.agents: Dict[str, Any] = {}
+        self.registry = registry or agent_registry
+        self.registry.on_reload(self._refresh)
 
     def register(self, agent_creator: Any) -> str:
         """Registra un agente a partir de su clase/creator que expone `create_agent()`.
 
-        Devuelve el nombre con el que quedó registrado.
+        La instancia sale del registro compartido, así que no se reconstruye
+        si ya existe. Devuelve el nombre con el que quedó registrado.
         """
-        agent = agent_creator.create_agent()
+        agent = self.registry.get_or_build(agent_creator)
         name = getattr(agent, "name", None) or getattr(agent_creator, "__name__", "UnknownAgent")
         self.agents[name] = agent
         return name
 
+    def _refresh(self, keys) -> None:
+        """Hot-reload hook: swap in the rebuilt instances"""
+        for key in keys:
+            agent = self.registry.get(key)
+            name = getattr(agent, "name", None) or key
+            if name in self.agents:
+                self.agents[name] = agent
+
     def list_agents(self) -> Iterable[str]:
         return list(self.agents.keys())
 
@@ -4,9 +4,10 @@ Flujo: Ofrecer métodos → Procesar pago → Confirmar → Pasar a emisión
 """
 from agents import Agent, function_tool, RunContextWrapper
 from src.db.repository import PolicyRepository
+from src.payments.gateway import PaymentGatewayError, mercadopago_gateway
+from src.payments.reconciler import payment_reconciler
 from typing import Any
 import os
-import mercadopago
 
 # Available payment methods
 PAYMENT_METHODS = {
@@ -23,9 +24,12 @@ async def get_payment_context(
 ) -> str:
     """Get current payment context"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
+        aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id)
+        if not aggregate:
+            return f"❌ Póliza {policy_id} no encontrada"
+        policy = aggregate.policy
+        client_data = aggregate.client
+        quotations = aggregate.quotations
         selected = None
         
         # Find selected quotation
@@ -52,44 +56,64 @@ async def get_payment_context(
     except Exception as e:
         return f"❌ Error al obtener contexto: {str(e)}"
 
-@function_tool
-async def process_payment(
-    ctx: RunContextWrapper[Any],
-    policy_id: str,
-    payment_method: str
-) -> str:
-    """Process payment when client confirms"""
-    try:
-        if payment_method not in PAYMENT_METHODS:
-            methods_text = "\n".join([f"{k}. {v['name']}" for k, v in PAYMENT_METHODS.items()])
-            return f"❌ Método de pago inválido. Opciones disponibles:\n{methods_text}"
-        
-        method = PAYMENT_METHODS[payment_method]
-        
-        quotations = PolicyRepository.get_quotations(policy_id)
-        selected = None
-        for q in quotations:
-            if q.get('selected'):
-                selected = q
-                break
-        
-        if not selected and quotations:
-            selected = quotations[0]
-        
-        if not selected:
-            return "❌ No hay cotización seleccionada para procesar el pago"
-        
-        client_data = PolicyRepository.get_client_data(policy_id)
-        
-        # Update policy state to issued (payment processed successfully)
-        PolicyRepository.update_policy_state(
-            policy_id=policy_id,
-            new_state="issued",
-            reason=f"Pago confirmado mediante {method['name']}",
-            agent="PaymentAgent"
-        )
-        
-        return f"""✅ ¡Pago procesado exitosamente!
+# Replies for every Mercado Pago status other than "approved"
+NO_PAYMENT_REPLY = ("💳 Todavía no hay un pago registrado para tu póliza. Primero generá el link de "
+                    "Mercado Pago y completá el pago; tu póliza se emite automáticamente cuando se acredita.")
+PENDING_REPLY = """⏳ Todavía no recibimos la confirmación de tu pago de Mercado Pago.
+
+Si ya pagaste, puede demorar unos minutos: tu póliza se emitirá automáticamente apenas se acredite."""
+PAYMENT_STATUS_REPLIES = {
+    "pending": PENDING_REPLY,
+    "in_process": ("🔎 Mercado Pago está revisando tu pago. Te avisamos apenas se acredite; "
+                   "no hace falta que pagues de nuevo."),
+    "authorized": ("🔐 Tu pago fue autorizado pero todavía no se acreditó. La póliza se emite "
+                   "automáticamente apenas Mercado Pago lo confirme."),
+    "in_mediation": ("⚖️ Tu pago está en una disputa abierta en Mercado Pago. La póliza no se puede emitir "
+                     "hasta que se resuelva."),
+    "rejected": "❌ Mercado Pago rechazó el pago. Podés intentarlo de nuevo con el mismo link o con otro medio de pago.",
+    "cancelled": "❌ El pago fue cancelado. Podés generar un nuevo link de Mercado Pago para intentarlo de nuevo.",
+    "refunded": "↩️ El pago fue devuelto, así que la póliza no puede emitirse. Generá un nuevo link para volver a pagar.",
+    "charged_back": ("↩️ El pago tuvo un contracargo, así que la póliza no puede emitirse. "
+                     "Generá un nuevo link para volver a pagar."),
+}
+UNKNOWN_STATUS_REPLY = ("⏳ Tu pago figura como \"{status}\" en Mercado Pago y todavía no está acreditado. "
+                        "Te avisamos apenas se confirme.")
+
+
+async def confirm_payment(policy_id: str, payment_method: str) -> str:
+    """Reply for a client who says they paid
+    
+    Never issues the policy itself: only the webhook workers and the
+    reconciler do, once Mercado Pago reports the payment as "approved".
+    """
+    if payment_method not in PAYMENT_METHODS:
+        methods_text = "\n".join([f"{k}. {v['name']}" for k, v in PAYMENT_METHODS.items()])
+        return f"❌ Método de pago inválido. Opciones disponibles:\n{methods_text}"
+    
+    method = PAYMENT_METHODS[payment_method]
+    
+    quotations = await PolicyRepository.get_quotations_async(policy_id)
+    selected = None
+    for q in quotations:
+        if q.get('selected'):
+            selected = q
+            break
+    
+    if not selected and quotations:
+        selected = quotations[0]
+    
+    if not selected:
+        return "❌ No hay cotización seleccionada para procesar el pago"
+    
+    # Checks the provider now when the payment is still pending (and issues
+    # the policy through the reconciler if it was approved meanwhile)
+    payment_status = await payment_reconciler.reconcile_policy(policy_id)
+    if payment_status is None:
+        return NO_PAYMENT_REPLY
+    if payment_status != "approved":
+        return PAYMENT_STATUS_REPLIES.get(payment_status, UNKNOWN_STATUS_REPLY.format(status=payment_status))
+    
+    return f"""✅ ¡Pago procesado exitosamente!
 
 📋 DETALLES DEL PAGO:
 - Método: {method['name']}
@@ -98,6 +122,16 @@ async def process_payment(
 - Deductible: ${selected['deductible']:.2f}
 
 Tu póliza se está emitiendo y se te enviará en breve."""
+
+@function_tool
+async def process_payment(
+    ctx: RunContextWrapper[Any],
+    policy_id: str,
+    payment_method: str
+) -> str:
+    """Check the payment when the client says they paid"""
+    try:
+        return await confirm_payment(policy_id, payment_method)
     except Exception as e:
         return f"❌ Error al procesar pago: {str(e)}"
 
@@ -125,16 +159,17 @@ async def generate_mercadopago_payment_link(
 ) -> str:
     """Generate a Mercado Pago payment link for the selected quotation"""
     try:
-        # Get access token from environment
-        access_token = os.getenv("MERCADOPAGO_ACCESS_TOKEN")
-        if not access_token:
+        if not mercadopago_gateway.configured:
             return "❌ Error: Mercado Pago no está configurado. Contacta al administrador."
         
         # Get policy and quotation data
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
+        aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id)
+        if not aggregate:
+            return f"❌ Póliza {policy_id} no encontrada"
+        policy = aggregate.policy
+        client_data = aggregate.client
+        vehicle_data = aggregate.vehicle
+        quotations = aggregate.quotations
         
         # Find selected quotation
         selected = None
@@ -149,9 +184,6 @@ async def generate_mercadopago_payment_link(
         if not selected:
             return "❌ No hay cotización seleccionada para generar el link de pago"
         
-        # Initialize Mercado Pago SDK
-        sdk = mercadopago.SDK(access_token)
-        
         # Create preference data
         preference_data = {
             "items": [
@@ -181,8 +213,11 @@ async def generate_mercadopago_payment_link(
             "notification_url": os.getenv("MERCADOPAGO_WEBHOOK_URL", "https://aseguraopen.onrender.com/webhooks/mercadopago")
         }
         
-        # Create preference
-        preference_response = sdk.preference().create(preference_data)
+        # Create preference (shared pooled client, off the event loop)
+        try:
+            preference_response = await mercadopago_gateway.create_preference_async(preference_data)
+        except PaymentGatewayError as e:
+            return f"❌ Mercado Pago no responde en este momento, intentá de nuevo en unos minutos. ({e})"
         preference = preference_response["response"]
         
         if preference_response["status"] != 201:
@@ -196,7 +231,7 @@ async def generate_mercadopago_payment_link(
             return "❌ Error: No se pudo obtener el link de pago"
         
         # Save payment to database
-        PolicyRepository.create_payment(
+        await PolicyRepository.create_payment_async(
             policy_id=policy_id,
             quotation_id=selected['id'],
             amount=float(selected['monthly_premium']),
@@ -8,9 +8,7 @@ from src.db.session import get_session_storage
 from typing import Any
 import json
 
-@function_tool
-async def collect_vehicle_data(
-    ctx: RunContextWrapper[Any],
+async def collect_vehicle_data_impl(
     policy_id: str,
     plate: str,
     make: str,
@@ -22,7 +20,7 @@ async def collect_vehicle_data(
 ) -> str:
     """Collect and save vehicle data"""
     try:
-        vehicle = PolicyRepository.save_vehicle_data(
+        vehicle = await PolicyRepository.save_vehicle_data_async(
             policy_id=policy_id,
             plate=plate,
             make=make,
@@ -37,14 +35,27 @@ async def collect_vehicle_data(
         return f"❌ Error al guardar datos del vehículo: {str(e)}"
 
 @function_tool
-async def generate_available_quotations(
+async def collect_vehicle_data(
     ctx: RunContextWrapper[Any],
+    policy_id: str,
+    plate: str,
+    make: str,
+    model: str,
+    year: int,
+    engine_number: str = None,
+    chassis_number: str = None,
+    engine_displacement: int = None
+) -> str:
+    """Collect and save vehicle data"""
+    return await collect_vehicle_data_impl(policy_id, plate, make, model, year, engine_number, chassis_number, engine_displacement)
+
+async def generate_available_quotations_impl(
     policy_id: str,
     insurance_type: str
 ) -> str:
     """Generate quotations for the vehicle"""
     try:
-        quotations = PolicyRepository.generate_quotations(
+        quotations = await PolicyRepository.generate_quotations_async(
             policy_id=policy_id,
             insurance_type=insurance_type
         )
@@ -64,6 +75,15 @@ async def generate_available_quotations(
     except Exception as e:
         return f"❌ Error al generar cotizaciones: {str(e)}"
 
+@function_tool
+async def generate_available_quotations(
+    ctx: RunContextWrapper[Any],
+    policy_id: str,
+    insurance_type: str
+) -> str:
+    """Generate quotations for the vehicle"""
+    return await generate_available_quotations_impl(policy_id, insurance_type)
+
 @function_tool
 async def get_policy_context(
     ctx: RunContextWrapper[Any],
@@ -71,10 +91,13 @@ async def get_policy_context(
 ) -> str:
     """Get current policy context"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
-        client_data = PolicyRepository.get_client_data(policy_id)
-        vehicle_data = PolicyRepository.get_vehicle_data(policy_id)
-        quotations = PolicyRepository.get_quotations(policy_id)
+        aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id)
+        if not aggregate:
+            return f"❌ Póliza {policy_id} no encontrada"
+        policy = aggregate.policy
+        client_data = aggregate.client
+        vehicle_data = aggregate.vehicle
+        quotations = aggregate.quotations
         
         context = f"""CONTEXTO ACTUAL:
 - Estado: {policy.state}
@@ -87,20 +110,18 @@ async def get_policy_context(
     except Exception as e:
         return f"❌ Error al obtener contexto: {str(e)}"
 
-@function_tool
-async def move_to_quotation_state(
-    ctx: RunContextWrapper[Any],
+async def move_to_quotation_state_impl(
     policy_id: str
 ) -> str:
     """Move policy from loaded to quotation state"""
     try:
-        policy = PolicyRepository.get_policy(policy_id)
+        policy = await PolicyRepository.get_policy_async(policy_id)
         
         if policy.state != "loaded":
             return f"ℹ️ La póliza ya está en estado: {policy.state}"
         
         # Update state to quotation
-        PolicyRepository.update_policy_state(
+        await PolicyRepository.update_policy_state_async(
             policy_id=policy_id,
             new_state="quotation",
             reason="Iniciando fase de cotización",
@@ -111,6 +132,14 @@ async def move_to_quotation_state(
     except Exception as e:
         return f"❌ Error al cambiar estado: {str(e)}"
 
+@function_tool
+async def move_to_quotation_state(
+    ctx: RunContextWrapper[Any],
+    policy_id: str
+) -> str:
+    """Move policy from loaded to quotation state"""
+    return await move_to_quotation_state_impl(policy_id)
+
 @function_tool
 async def select_quotation_and_move_to_payment(
     ctx: RunContextWrapper[Any],
@@ -119,7 +148,7 @@ async def select_quotation_and_move_to_payment(
 ) -> str:
     """Select a quotation and move to payment phase"""
     try:
-        quotations = PolicyRepository.get_quotations(policy_id)
+        quotations = await PolicyRepository.get_quotations_async(policy_id)
         
         if not quotations:
             return "❌ No hay cotizaciones disponibles"
@@ -131,7 +160,7 @@ async def select_quotation_and_move_to_payment(
         selected = quotations[quotation_index - 1]
         
         # Update state to payment (no need to save selection separately)
-        PolicyRepository.update_policy_state(
+        await PolicyRepository.update_policy_state_async(
             policy_id=policy_id,
             new_state="payment",
             reason=f"Cotización seleccionada: {selected['coverage_type']} - {selected['coverage_level']}",
@@ -0,0 +1,140 @@
+"""
+Agent Registry - Una instancia de cada agente por proceso
+
+Los agentes se construyen una sola vez (en el startup o la primera vez que se
+piden) y se reutilizan en cada mensaje. `for_state()` reemplaza la cadena
+if/elif que elegía el agente según el estado de la póliza.
+
+Para aplicar cambios de instrucciones sin reiniciar el proceso:
+
+    agent_registry.reload()                 # reconstruye todos
+    agent_registry.reload("IntakeAgent", reimport=True)  # relee el módulo
+"""
+import importlib
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.agents.intake_agent import IntakeAgent
+from src.agents.quotation_agent import QuotationAgent
+from src.agents.payment_agent import PaymentAgent
+
+
+class AgentRegistry:
+    """Process-wide cache of built agents, keyed by name and policy state"""
+
+    def __init__(self) -> None:
+        self._creators: Dict[str, Any] = {}
+        self._agents: Dict[str, Any] = {}
+        self._states: Dict[str, str] = {}
+        self._reload_hooks: List[Callable[[List[str]], None]] = []
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(agent_creator: Any) -> str:
+        return getattr(agent_creator, "__name__", None) or type(agent_creator).__name__
+
+    def register(self, agent_creator: Any, states: Iterable[str] = ()) -> str:
+        """Register a creator exposing `create_agent()`, optionally for some policy states
+
+        Registering is cheap; the agent is built on first use (or by warm_up).
+        Returns the registry key (the creator's class name).
+        """
+        key = self._key(agent_creator)
+        with self._lock:
+            if self._creators.get(key) is not agent_creator:
+                self._creators[key] = agent_creator
+                self._agents.pop(key, None)
+            for state in states:
+                self._states[state] = key
+        return key
+
+    def get(self, name: str) -> Any:
+        """Built agent for a registry key, building it once if needed"""
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is None:
+                creator = self._creators.get(name)
+                if creator is None:
+                    raise KeyError(f"Agent '{name}' is not registered")
+                agent = creator.create_agent()
+                self._agents[name] = agent
+            return agent
+
+    def get_or_build(self, agent_creator: Any) -> Any:
+        """Register (if new) and return the cached agent for a creator"""
+        return self.get(self.register(agent_creator))
+
+    def for_state(self, state: str) -> Optional[Any]:
+        """Agent that handles a policy state, or None if no agent does"""
+        name = self._states.get(state)
+        return self.get(name) if name else None
+
+    def states(self) -> Dict[str, str]:
+        """Dispatch table: policy state -> agent key"""
+        return dict(self._states)
+
+    def warm_up(self) -> List[str]:
+        """Build every registered agent now (called on startup)
+
+        A broken agent is reported and skipped so the others still warm up;
+        it raises again when a request actually needs it.
+        """
+        names = list(self._creators)
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"⚠️  Could not build agent '{name}': {e}")
+        return names
+
+    # ==================== Hot reload ====================
+
+    def on_reload(self, hook: Callable[[List[str]], None]):
+        """Register a callback run with the reloaded keys after every reload"""
+        self._reload_hooks.append(hook)
+        return hook
+
+    def reload(self, name: Optional[str] = None, reimport: bool = False) -> List[str]:
+        """Drop cached agents so the next request rebuilds them
+
+        With reimport=True the creator's module is re-imported first, so edits
+        to instructions or tools on disk take effect without a restart.
+        """
+        with self._lock:
+            names = [name] if name else list(self._creators)
+            for key in names:
+                creator = self._creators.get(key)
+                if creator is None:
+                    raise KeyError(f"Agent '{key}' is not registered")
+                module = sys.modules.get(getattr(creator, "__module__", ""))
+                if reimport and module is not None:
+                    self._creators[key] = getattr(importlib.reload(module), key)
+                self._agents.pop(key, None)
+
+        self.warm_up()
+        for hook in self._reload_hooks:
+            hook(names)
+        print(f"🔄 Agents reloaded: {', '.join(names)}")
+        return names
+
+
+def create_default_registry() -> AgentRegistry:
+    """Registry with the agent for every conversational policy state"""
+    registry = AgentRegistry()
+    registry.register(IntakeAgent, states=["intake"])
+    registry.register(QuotationAgent, states=["loaded", "quotation"])
+    registry.register(PaymentAgent, states=["payment"])
+    # "issued" has no agent: the issuance worker finishes it without the LLM
+    return registry
+
+
+# Shared registry used by the API and the orchestrator
+agent_registry = create_default_registry()
+
+
+__all__ = ["AgentRegistry", "agent_registry", "create_default_registry"]
@@ -8,6 +8,99 @@ class Config:
     TURSO_AUTH_TOKEN = os.getenv("TURSO_AUTH_TOKEN")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+    # Adds X-DB-Roundtrips / X-DB-Time-Ms response headers (see src/db/metrics.py)
+    DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+    
+    # Embedded replica: serve request reads from a local copy of the Turso primary
+    # (needs the libsql package; see src/db/replica.py)
+    TURSO_REPLICA_PATH = os.getenv("TURSO_REPLICA_PATH")
+    TURSO_REPLICA_SYNC_INTERVAL = float(os.getenv("TURSO_REPLICA_SYNC_INTERVAL", "5"))
+    TURSO_REPLICA_READ_YOUR_WRITES = os.getenv("TURSO_REPLICA_READ_YOUR_WRITES", "true").lower() == "true"
+    
+    # Local SQLite fallback
+    SQLITE_PATH = os.getenv("SQLITE_PATH", "aseguraopen.db")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Client-side rate limit of DB round-trips, shared by the whole process (0 = unlimited).
+    # DB_QUERY_DELAY (the old per-statement sleep) still maps to a rate if set alone.
+    _LEGACY_DB_QUERY_DELAY = float(os.getenv("DB_QUERY_DELAY", "0"))
+    DB_RATE_LIMIT = float(os.getenv("DB_RATE_LIMIT") or (1 / _LEGACY_DB_QUERY_DELAY if _LEGACY_DB_QUERY_DELAY > 0 else 0))
+    DB_RATE_LIMIT_BURST = int(os.getenv("DB_RATE_LIMIT_BURST", "20"))
+    # Backoff after Turso answers with a rate-limit error (doubles per consecutive error)
+    DB_RATE_LIMIT_RETRIES = int(os.getenv("DB_RATE_LIMIT_RETRIES", "3"))
+    DB_RATE_LIMIT_BACKOFF_BASE = float(os.getenv("DB_RATE_LIMIT_BACKOFF_BASE", "0.5"))
+    DB_RATE_LIMIT_BACKOFF_MAX = float(os.getenv("DB_RATE_LIMIT_BACKOFF_MAX", "30"))
+    
+    # Connection pool (one pool per backend)
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "8"))
+    DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+    DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+    
+    # In-process read cache of policy aggregates (see PolicyRepository)
+    POLICY_CACHE_ENABLED = os.getenv("POLICY_CACHE_ENABLED", "true").lower() == "true"
+    POLICY_CACHE_SIZE = int(os.getenv("POLICY_CACHE_SIZE", "1000"))
+    POLICY_CACHE_TTL = float(os.getenv("POLICY_CACHE_TTL", "30"))
+    
+    # Mercado Pago gateway (one pooled client per process, see src/payments/gateway.py)
+    MERCADOPAGO_CONNECT_TIMEOUT = float(os.getenv("MERCADOPAGO_CONNECT_TIMEOUT", "3"))
+    MERCADOPAGO_TIMEOUT = float(os.getenv("MERCADOPAGO_TIMEOUT", "10"))
+    MERCADOPAGO_MAX_RETRIES = int(os.getenv("MERCADOPAGO_MAX_RETRIES", "2"))
+    MERCADOPAGO_POOL_SIZE = int(os.getenv("MERCADOPAGO_POOL_SIZE", "10"))
+    MERCADOPAGO_BREAKER_FAILURES = int(os.getenv("MERCADOPAGO_BREAKER_FAILURES", "5"))
+    MERCADOPAGO_BREAKER_RESET_SECONDS = float(os.getenv("MERCADOPAGO_BREAKER_RESET_SECONDS", "30"))
+    
+    # Mercado Pago webhook workers (see src/payments/webhooks.py)
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+    WEBHOOK_RETRY_BASE_SECONDS = float(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "2"))
+    WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "5"))
+    # Seconds a claimed event stays reserved before another worker may retry it
+    WEBHOOK_CLAIM_TIMEOUT = float(os.getenv("WEBHOOK_CLAIM_TIMEOUT", "300"))
+    
+    # Payment reconciliation sweeper (see src/payments/reconciler.py)
+    PAYMENT_RECONCILE_ENABLED = os.getenv("PAYMENT_RECONCILE_ENABLED", "true").lower() == "true"
+    PAYMENT_RECONCILE_INTERVAL = float(os.getenv("PAYMENT_RECONCILE_INTERVAL", "60"))
+    PAYMENT_RECONCILE_MIN_AGE_MINUTES = float(os.getenv("PAYMENT_RECONCILE_MIN_AGE_MINUTES", "5"))
+    PAYMENT_RECONCILE_PAGE_SIZE = int(os.getenv("PAYMENT_RECONCILE_PAGE_SIZE", "100"))
+    PAYMENT_RECONCILE_CONCURRENCY = int(os.getenv("PAYMENT_RECONCILE_CONCURRENCY", "4"))
+    PAYMENT_RECONCILE_RATE = float(os.getenv("PAYMENT_RECONCILE_RATE", "5"))
+    PAYMENT_RECONCILE_BURST = int(os.getenv("PAYMENT_RECONCILE_BURST", "10"))
+    
+    # Policy issuance outbox (see src/issuance/outbox.py); no URL = local stub issuer
+    ISSUER_API_URL = os.getenv("ISSUER_API_URL")
+    ISSUER_API_TOKEN = os.getenv("ISSUER_API_TOKEN")
+    ISSUER_TIMEOUT = float(os.getenv("ISSUER_TIMEOUT", "10"))
+    ISSUANCE_BATCH_SIZE = int(os.getenv("ISSUANCE_BATCH_SIZE", "20"))
+    ISSUANCE_MAX_ATTEMPTS = int(os.getenv("ISSUANCE_MAX_ATTEMPTS", "8"))
+    ISSUANCE_RETRY_BASE_SECONDS = float(os.getenv("ISSUANCE_RETRY_BASE_SECONDS", "5"))
+    ISSUANCE_POLL_INTERVAL = float(os.getenv("ISSUANCE_POLL_INTERVAL", "5"))
+    # Seconds a claimed outbox row stays reserved before another worker may resend it
+    ISSUANCE_CLAIM_TIMEOUT = float(os.getenv("ISSUANCE_CLAIM_TIMEOUT", "300"))
+    
+    # Span tracing of each turn (see src/tracing.py); TRACE_EXPORTER: none, console, file
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACE_RECENT_TURNS = int(os.getenv("TRACE_RECENT_TURNS", "20"))
+    TRACE_RECENT_SESSIONS = int(os.getenv("TRACE_RECENT_SESSIONS", "200"))
+    
+    # Rows per DB fetch in /api/admin/export/{table} (see src/db/export.py)
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+    
+    # Pricing: optional JSON file overriding the default rating tables
+    PRICING_RATING_TABLES = os.getenv("PRICING_RATING_TABLES")
+    # Seconds between checks of the template catalog version (0 = never)
+    TEMPLATE_CATALOG_CHECK_INTERVAL = float(os.getenv("TEMPLATE_CATALOG_CHECK_INTERVAL", "60"))
+    
+    # Agent prompt context (see src/agents/context_builder.py)
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "2000"))
+    CONTEXT_WINDOW_MESSAGES = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "20"))
+    CONTEXT_SUMMARY_ENABLED = os.getenv("CONTEXT_SUMMARY_ENABLED", "true").lower() == "true"
+    CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400"))
+    
+    # Answer structured intake inputs without the LLM (see src/agents/fast_path.py)
+    FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
     
     @classmethod
     def validate(cls):
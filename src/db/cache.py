@@ -0,0 +1,122 @@
+"""
+Small thread-safe LRU cache with per-entry TTL
+
+Used by PolicyRepository to serve repeated reads of the same policy within
+a request and across an agent's tool calls without another round-trip.
+An entry may carry aliases (secondary keys such as a session ID) that live
+and die with it; key_for() resolves them.
+"""
+import collections
+import copy
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """LRU eviction above max_size; entries expire ttl seconds after being stored"""
+
+    def __init__(self, max_size: int = 1000, ttl: float = 30.0, enabled: bool = True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled and max_size > 0 and ttl > 0
+        self._entries = collections.OrderedDict()
+        self._aliases = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; see set(generation=...)
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value (a deep copy, so callers can't mutate the cache) or default"""
+        if not self.enabled:
+            return default
+
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+            else:
+                if entry is not _MISSING:
+                    self._drop(key)
+                self.misses += 1
+                return default
+        return copy.deepcopy(value)
+
+    def key_for(self, alias: Hashable) -> Optional[Hashable]:
+        """Key of the live entry that carries `alias`, if any"""
+        with self._lock:
+            key = self._aliases.get(alias)
+            entry = self._entries.get(key, _MISSING) if key is not None else _MISSING
+            if entry is _MISSING or entry[1] <= time.monotonic():
+                return None
+            return key
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None, aliases: tuple = ()):
+        """Store a value, optionally reachable through `aliases` (see key_for)
+
+        Pass the `generation` read before loading the value: if anything was
+        invalidated meanwhile the value may already be stale, so it is dropped.
+        """
+        if not self.enabled:
+            return
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tuple(aliases))
+            for alias in aliases:
+                self._aliases[alias] = key
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable]):
+        if key is None:
+            return
+        with self._lock:
+            self.generation += 1
+            if key in self._entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._aliases.clear()
+
+    def _drop(self, key: Hashable):
+        """Remove an entry and its aliases (lock held)"""
+        for alias in self._entries.pop(key)[2]:
+            if self._aliases.get(alias) == key:
+                del self._aliases[alias]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
@@ -1,21 +1,63 @@
 """
 Database connection and session management
 Uses Turso (libSQL) for persistent cloud storage
+
+Statements run on connections checked out from a bounded ConnectionPool
+(see src/db/pool.py). The async API uses the native async libsql client for
+Turso, whose aiohttp session keeps its own pool of keep-alive connections.
+
+Round-trips to the primary share one process-wide token bucket
+(DB_RATE_LIMIT / DB_RATE_LIMIT_BURST) and back off only when Turso answers
+with a rate-limit error. Every round-trip is timed into src/db/metrics.py
+(db_metrics) and traced as a db.<operation> span (src/tracing.py). With
+TURSO_REPLICA_PATH set, reads made while serving a request come from a
+local embedded replica instead (src/db/replica.py).
 """
+import asyncio
+import contextlib
 import sqlite3
+import threading
 import os
-import time
 from dotenv import load_dotenv
 import libsql_client
 from src.config import Config
+from src.db.metrics import batch_fingerprint, db_metrics, fingerprint
+from src.db.pool import ConnectionPool
+from src.db.replica import LibsqlSyncer, embedded_replica
+from src.db.transaction import current_unit_of_work, is_read_statement
+from src.tracing import tracer
+from src.utils.rate_limit import TokenBucket
 
 load_dotenv()
 
+RATE_LIMIT_CODES = ("RATE_LIMITED", "TOO_MANY_REQUESTS")
+RATE_LIMIT_MARKERS = ("status 429", "rate limit", "too many requests")
+
+
+def is_rate_limit_error(error) -> bool:
+    """Turso rejected the request for exceeding its quota (nothing was executed)"""
+    if str(getattr(error, "code", "") or "").upper() in RATE_LIMIT_CODES:
+        return True
+    text = str(error).lower()
+    return any(marker in text for marker in RATE_LIMIT_MARKERS)
+
+
+# Shared by every thread and coroutine of the process
+db_rate_limiter = TokenBucket(
+    rate=Config.DB_RATE_LIMIT,
+    burst=Config.DB_RATE_LIMIT_BURST,
+    backoff_base=Config.DB_RATE_LIMIT_BACKOFF_BASE,
+    backoff_max=Config.DB_RATE_LIMIT_BACKOFF_MAX
+)
+
 class DatabaseConnection:
-    """Manage connection to Turso or local SQLite database"""
+    """Manage pooled connections to Turso or local SQLite database"""
     
     _instance = None
-    _conn = None
+    _pool = None
+    _init_lock = threading.Lock()
+    _async_conn = None
+    _async_loop = None
     _turso_url = None
     _turso_token = None
     _use_turso = False
@@ -27,79 +69,338 @@ class DatabaseConnection:
     
     @classmethod
     def get_connection(cls):
-        """Get or create database connection"""
-        if cls._conn is None:
-            try:
-                Config.validate()
+        """Get or create the connection pool for the configured backend"""
+        if cls._pool is None:
+            # Worker threads may race to set up the pool on first use
+            with cls._init_lock:
+                if cls._pool is None:
+                    try:
+                        Config.validate()
                 
-                # Check for Turso credentials
-                cls._turso_url = os.getenv("TURSO_DATABASE_URL")
-                cls._turso_token = os.getenv("TURSO_AUTH_TOKEN")
+                        # Check for Turso credentials
+                        cls._turso_url = os.getenv("TURSO_DATABASE_URL")
+                        cls._turso_token = os.getenv("TURSO_AUTH_TOKEN")
                 
-                if cls._turso_url and cls._turso_token:
-                    # Use Turso with official libsql SDK (sync mode)
-                    # Convert libsql:// to https:// (HTTP instead of WebSocket)
-                    cls._use_turso = True
-                    https_url = cls._turso_url.replace("libsql://", "https://")
+                        if cls._turso_url and cls._turso_token:
+                            # Use Turso with official libsql SDK (sync mode)
+                            # Convert libsql:// to https:// (HTTP instead of WebSocket)
+                            # Each sync client owns its own I/O thread, so a pool of
+                            # them gives real parallelism across worker threads
+                            cls._use_turso = True
+                            https_url = cls._turso_url.replace("libsql://", "https://")
                     
-                    cls._conn = libsql_client.create_client_sync(
-                        url=https_url,
-                        auth_token=cls._turso_token
-                    )
-                    print("✅ Connected to Turso using libsql SDK (HTTP)")
-                    print(f"   Database: {https_url}")
-                else:
-                    # Fallback to local SQLite for development
-                    if not os.path.exists("aseguraopen.db"):
-                        print("⚠️  Creating local database (use .env for Turso)")
+                            cls._pool = ConnectionPool(
+                                factory=lambda: libsql_client.create_client_sync(
+                                    url=https_url,
+                                    auth_token=cls._turso_token
+                                ),
+                                health_check=lambda client: client.execute("SELECT 1"),
+                                **cls._pool_options("turso")
+                            )
+                            print("✅ Connected to Turso using libsql SDK (HTTP)")
+                            print(f"   Database: {https_url}")
+                            if Config.TURSO_REPLICA_PATH:
+                                cls._open_replica()
+                        else:
+                            # Fallback to local SQLite for development
+                            if not os.path.exists(Config.SQLITE_PATH):
+                                print("⚠️  Creating local database (use .env for Turso)")
                     
-                    cls._conn = sqlite3.connect("aseguraopen.db", check_same_thread=False)
-                    cls._conn.row_factory = sqlite3.Row
-                    cls._use_turso = False
-                    print("✅ Connected to local SQLite database")
+                            cls._use_turso = False
+                            cls._pool = ConnectionPool(
+                                factory=cls._open_sqlite,
+                                health_check=lambda conn: conn.execute("SELECT 1").fetchone(),
+                                **cls._pool_options("sqlite")
+                            )
+                            print("✅ Connected to local SQLite database")
                 
-            except Exception as e:
-                print(f"❌ Error connecting to database: {e}")
-                raise
-        return cls._conn
+                    except Exception as e:
+                        print(f"❌ Error connecting to database: {e}")
+                        raise
+        return cls._pool
+    
+    @classmethod
+    def _open_replica(cls):
+        """Serve request reads from a local embedded replica (falls back to the primary)"""
+        try:
+            embedded_replica.open(
+                Config.TURSO_REPLICA_PATH,
+                LibsqlSyncer(Config.TURSO_REPLICA_PATH, cls._turso_url, cls._turso_token)
+            )
+        except Exception as e:
+            print(f"⚠️  Embedded replica disabled, reading from primary: {e}")
+            embedded_replica.close()
+    
+    @staticmethod
+    def _pool_options(name: str) -> dict:
+        return {
+            "name": name,
+            "min_size": Config.DB_POOL_MIN_SIZE,
+            "max_size": Config.DB_POOL_MAX_SIZE,
+            "acquire_timeout": Config.DB_POOL_ACQUIRE_TIMEOUT,
+            "health_check_interval": Config.DB_POOL_HEALTH_CHECK_INTERVAL
+        }
+    
+    @staticmethod
+    def _open_sqlite():
+        """Open a local SQLite connection tuned for concurrent readers/writers"""
+        conn = sqlite3.connect(
+            Config.SQLITE_PATH,
+            check_same_thread=False,
+            timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT_MS)}")
+        return conn
+    
+    @classmethod
+    def connection(cls, timeout=None):
+        """Check out a pooled connection: ``with DatabaseConnection.connection() as conn:``"""
+        return cls.get_connection().connection(timeout)
+    
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """Occupancy of the active pool (empty if not connected yet)"""
+        return cls._pool.stats() if cls._pool else {}
+    
+    @classmethod
+    async def get_async_connection(cls):
+        """Get or create the async libsql client (Turso only)
+
+        The client wraps an aiohttp session bound to the running event loop,
+        so it is recreated (and the old one closed) if the loop changes, e.g.
+        between test runs. First use sets up the pool and its Turso health
+        check in a worker thread, off the event loop.
+        """
+        if cls._pool is None:
+            await asyncio.to_thread(cls.get_connection)
+        if not cls._use_turso:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        if cls._async_conn is None or cls._async_loop is not loop:
+            stale, stale_loop = cls._async_conn, cls._async_loop
+            https_url = cls._turso_url.replace("libsql://", "https://")
+            cls._async_conn = libsql_client.create_client(
+                url=https_url,
+                auth_token=cls._turso_token
+            )
+            cls._async_loop = loop
+            if stale is not None:
+                await cls._close_async_client(stale, stale_loop)
+        return cls._async_conn
+    
+    @staticmethod
+    async def _close_async_client(client, loop):
+        """Close a client created on another event loop (best effort if that loop is gone)"""
+        try:
+            if loop is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.close(), loop)
+            else:
+                await client.close()
+        except Exception as e:
+            print(f"⚠️  Error closing async connection: {e}")
     
     @classmethod
     def close(cls):
         """Close database connection"""
-        if cls._conn:
+        if cls._async_conn:
             try:
-                if cls._use_turso:
-                    # libsql client has close() method
-                    cls._conn.close()
-                else:
-                    cls._conn.close()
-                cls._conn = None
+                if cls._async_loop and cls._async_loop.is_running():
+                    asyncio.run_coroutine_threadsafe(cls._async_conn.close(), cls._async_loop)
+            except Exception as e:
+                print(f"⚠️  Error closing async connection: {e}")
+            cls._async_conn = None
+            cls._async_loop = None
+        
+        embedded_replica.close()
+        if cls._pool:
+            try:
+                cls._pool.close()
+                cls._pool = None
                 print("🔌 Database connection closed")
             except Exception as e:
                 print(f"⚠️  Error closing connection: {e}")
     
+    @classmethod
+    @contextlib.contextmanager
+    def _roundtrip(cls, operation, statement):
+        """Time one round-trip into db_metrics and a db.<operation> span; set timing["rows"]"""
+        system = "libsql" if cls._use_turso and not operation.startswith("replica") else "sqlite"
+        with tracer.span(f"db.{operation}", kind="client", **{"db.system": system, "db.statement": statement}) as span, \
+                db_metrics.timer(operation, statement) as timing:
+            yield timing
+            span.set_attribute("db.rows", timing["rows"])
+    
+    @classmethod
+    def _limited(cls, call, *args):
+        """One round-trip to the primary under the rate limit, retried after a rate-limit error"""
+        for attempt in range(Config.DB_RATE_LIMIT_RETRIES + 1):
+            db_rate_limiter.acquire()
+            try:
+                result = call(*args)
+            except Exception as e:
+                if attempt < Config.DB_RATE_LIMIT_RETRIES and is_rate_limit_error(e):
+                    print(f"⏳ Database rate limit hit, backing off {db_rate_limiter.backoff():.1f}s")
+                    continue
+                raise
+            db_rate_limiter.record_success()
+            return result
+    
+    @classmethod
+    async def _limited_async(cls, call):
+        """Async _limited: `call` returns a fresh awaitable per attempt"""
+        for attempt in range(Config.DB_RATE_LIMIT_RETRIES + 1):
+            await db_rate_limiter.acquire_async()
+            try:
+                result = await call()
+            except Exception as e:
+                if attempt < Config.DB_RATE_LIMIT_RETRIES and is_rate_limit_error(e):
+                    print(f"⏳ Database rate limit hit, backing off {db_rate_limiter.backoff():.1f}s")
+                    continue
+                raise
+            db_rate_limiter.record_success()
+            return result
+    
     @classmethod
     def execute_query(cls, query, params=None):
         """Execute a SELECT query and return results as tuples"""
-        # Add small delay to prevent rate limiting
-        db_delay = float(os.getenv("DB_QUERY_DELAY", "0"))
-        if db_delay > 0:
-            time.sleep(db_delay)
+        cls.get_connection()
+        if embedded_replica.serves_read():
+            with cls._roundtrip("replica_query", fingerprint(query)) as timing:
+                rows = cls._execute_query_sqlite(query, params, embedded_replica.connection)
+                timing["rows"] = len(rows)
+            return rows
+        with cls._roundtrip("query", fingerprint(query)) as timing:
+            rows = cls._limited(cls._query_turso if cls._use_turso else cls._execute_query_sqlite, query, params)
+            timing["rows"] = len(rows)
+        return rows
+    
+    @classmethod
+    def _query_turso(cls, query, params=None):
+        # libsql sync client - execute() returns ResultSet with .rows attribute
+        try:
+            with cls.connection() as client:
+                if params:
+                    result = client.execute(query, params)
+                else:
+                    result = client.execute(query)
+            # libsql ResultSet.rows returns list of Row objects (behaves like tuples)
+            return result.rows if hasattr(result, 'rows') else []
+        except Exception as e:
+            print(f"❌ Query error: {e}")
+            raise
+    
+    @classmethod
+    def execute_update(cls, query, params=None):
+        """Execute an INSERT/UPDATE/DELETE query
         
-        if cls._use_turso:
-            # libsql sync client - execute() returns ResultSet with .rows attribute
-            try:
+        Inside a unit of work (see src/db/transaction.py) the statement is
+        buffered until the unit of work commits and None is returned.
+        """
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.add(query, params)
+            return None
+        
+        cls.get_connection()
+        with cls._roundtrip("update", fingerprint(query)):
+            result = cls._limited(cls._update_turso if cls._use_turso else cls._execute_update_sqlite, query, params)
+        embedded_replica.note_write()
+        return result
+    
+    @classmethod
+    def _update_turso(cls, query, params=None):
+        try:
+            with cls.connection() as client:
                 if params:
-                    result = cls._conn.execute(query, params)
+                    client.execute(query, params)
                 else:
-                    result = cls._conn.execute(query)
-                # libsql ResultSet.rows returns list of Row objects (behaves like tuples)
-                return result.rows if hasattr(result, 'rows') else []
+                    client.execute(query)
+            return None  # libsql doesn't return lastrowid the same way
+        except Exception as e:
+            print(f"❌ Update error: {e}")
+            raise
+    
+    @classmethod
+    def execute_batch(cls, statements):
+        """Execute (query, params) statements atomically in one round-trip
+        
+        Returns one list of rows per statement. Inside a unit of work the
+        write statements are buffered (their result is None) and the reads
+        run immediately, together in a single batch.
+        """
+        uow = current_unit_of_work()
+        if uow is not None:
+            reads = cls._split_for_unit_of_work(uow, statements)
+            read_rows = iter(cls._run_batch([statements[i] for i in reads]) if reads else [])
+            return [next(read_rows) if i in reads else None for i in range(len(statements))]
+        return cls._run_batch(statements)
+    
+    @classmethod
+    def _run_batch(cls, statements):
+        cls.get_connection()
+        writes = any(not is_read_statement(query) for query, _ in statements)
+        if not writes and embedded_replica.serves_read():
+            with cls._roundtrip("replica_batch", batch_fingerprint(statements)) as timing:
+                results = cls._execute_batch_sqlite(statements, embedded_replica.connection)
+                timing["rows"] = sum(len(rows) for rows in results)
+            return results
+        with cls._roundtrip("batch", batch_fingerprint(statements)) as timing:
+            results = cls._limited(cls._batch_turso if cls._use_turso else cls._execute_batch_sqlite, statements)
+            timing["rows"] = sum(len(rows) for rows in results)
+        if writes:
+            embedded_replica.note_write()
+        return results
+    
+    @classmethod
+    def _batch_turso(cls, statements):
+        try:
+            with cls.connection() as client:
+                result_sets = client.batch(cls._to_libsql_statements(statements))
+            return [rs.rows for rs in result_sets]
+        except Exception as e:
+            print(f"❌ Batch error: {e}")
+            raise
+    
+    @staticmethod
+    def _split_for_unit_of_work(uow, statements) -> set:
+        """Buffer the writes of a batch and return the indexes of its reads"""
+        reads = set()
+        for i, (query, params) in enumerate(statements):
+            if is_read_statement(query):
+                reads.add(i)
+            else:
+                uow.add(query, params)
+        return reads
+    
+    @staticmethod
+    def _to_libsql_statements(statements):
+        return [(query, list(params) if params else None) for query, params in statements]
+    
+    @classmethod
+    def _execute_batch_sqlite(cls, statements, checkout=None):
+        """Run statements in a single transaction on a pooled SQLite connection"""
+        writes = any(not is_read_statement(query) for query, _ in statements)
+        with (checkout or cls.connection)() as conn:
+            try:
+                # Take the write lock up front so concurrent batches queue on
+                # busy_timeout instead of failing on lock upgrade
+                conn.execute("BEGIN IMMEDIATE" if writes else "BEGIN")
+                results = [conn.execute(query, params or ()).fetchall() for query, params in statements]
+                conn.commit()
+                return results
             except Exception as e:
-                print(f"❌ Query error: {e}")
+                conn.rollback()
+                print(f"❌ Batch error: {e}")
                 raise
-        else:
-            conn = cls.get_connection()
+    
+    @classmethod
+    def _execute_query_sqlite(cls, query, params=None, checkout=None):
+        """Run a SELECT on a pooled local SQLite connection (or the replica's, via `checkout`)"""
+        with (checkout or cls.connection)() as conn:
             cursor = conn.cursor()
             try:
                 if params:
@@ -110,27 +411,13 @@ class DatabaseConnection:
             except Exception as e:
                 print(f"❌ Query error: {e}")
                 raise
+            finally:
+                cursor.close()
     
     @classmethod
-    def execute_update(cls, query, params=None):
-        """Execute an INSERT/UPDATE/DELETE query"""
-        # Add small delay to prevent rate limiting
-        db_delay = float(os.getenv("DB_QUERY_DELAY", "0"))
-        if db_delay > 0:
-            time.sleep(db_delay)
-        
-        if cls._use_turso:
-            try:
-                if params:
-                    cls._conn.execute(query, params)
-                else:
-                    cls._conn.execute(query)
-                return None  # libsql doesn't return lastrowid the same way
-            except Exception as e:
-                print(f"❌ Update error: {e}")
-                raise
-        else:
-            conn = cls.get_connection()
+    def _execute_update_sqlite(cls, query, params=None):
+        """Run an INSERT/UPDATE/DELETE on a pooled local SQLite connection"""
+        with cls.connection() as conn:
             cursor = conn.cursor()
             try:
                 if params:
@@ -140,9 +427,99 @@ class DatabaseConnection:
                 conn.commit()
                 return cursor.lastrowid
             except Exception as e:
+                conn.rollback()
                 print(f"❌ Update error: {e}")
                 raise
+            finally:
+                cursor.close()
+    
+    # ==================== Async API ====================
+    
+    @classmethod
+    async def fetch(cls, query, params=None):
+        """Async counterpart of execute_query - does not block the event loop
+        
+        Turso goes through the native async libsql client; local SQLite runs
+        the blocking call in the default executor.
+        """
+        client = await cls.get_async_connection()
+        if embedded_replica.enabled and await asyncio.to_thread(embedded_replica.serves_read):
+            with cls._roundtrip("replica_query", fingerprint(query)) as timing:
+                rows = await asyncio.to_thread(cls._execute_query_sqlite, query, params, embedded_replica.connection)
+                timing["rows"] = len(rows)
+            return rows
+        with cls._roundtrip("query", fingerprint(query)) as timing:
+            if client is None:
+                rows = await cls._limited_async(lambda: asyncio.to_thread(cls._execute_query_sqlite, query, params))
+            else:
+                try:
+                    result = await cls._limited_async(lambda: client.execute(query, params or None))
+                    rows = result.rows if hasattr(result, 'rows') else []
+                except Exception as e:
+                    print(f"❌ Query error: {e}")
+                    raise
+            timing["rows"] = len(rows)
+        return rows
+    
+    @classmethod
+    async def execute(cls, query, params=None):
+        """Async counterpart of execute_update"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.add(query, params)
+            return None
+        
+        client = await cls.get_async_connection()
+        with cls._roundtrip("update", fingerprint(query)):
+            if client is None:
+                result = await cls._limited_async(lambda: asyncio.to_thread(cls._execute_update_sqlite, query, params))
+            else:
+                try:
+                    await cls._limited_async(lambda: client.execute(query, params or None))
+                    result = None
+                except Exception as e:
+                    print(f"❌ Update error: {e}")
+                    raise
+        embedded_replica.note_write()
+        return result
+    
+    @classmethod
+    async def batch(cls, statements):
+        """Async counterpart of execute_batch"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            reads = cls._split_for_unit_of_work(uow, statements)
+            read_rows = iter(await cls._run_batch_async([statements[i] for i in reads]) if reads else [])
+            return [next(read_rows) if i in reads else None for i in range(len(statements))]
+        return await cls._run_batch_async(statements)
+    
+    @classmethod
+    async def _run_batch_async(cls, statements):
+        client = await cls.get_async_connection()
+        writes = any(not is_read_statement(query) for query, _ in statements)
+        if not writes and embedded_replica.enabled and await asyncio.to_thread(embedded_replica.serves_read):
+            with cls._roundtrip("replica_batch", batch_fingerprint(statements)) as timing:
+                results = await asyncio.to_thread(cls._execute_batch_sqlite, statements, embedded_replica.connection)
+                timing["rows"] = sum(len(rows) for rows in results)
+            return results
+        with cls._roundtrip("batch", batch_fingerprint(statements)) as timing:
+            if client is None:
+                results = await cls._limited_async(lambda: asyncio.to_thread(cls._execute_batch_sqlite, statements))
+            else:
+                try:
+                    result_sets = await cls._limited_async(
+                        lambda: client.batch(cls._to_libsql_statements(statements))
+                    )
+                    results = [rs.rows for rs in result_sets]
+                except Exception as e:
+                    print(f"❌ Batch error: {e}")
+                    raise
+            timing["rows"] = sum(len(rows) for rows in results)
+        if writes:
+            embedded_replica.note_write()
+        return results
+
 
 def get_db():
-    """Dependency for getting database connection"""
+    """Dependency for getting the database connection pool"""
     return DatabaseConnection.get_connection()
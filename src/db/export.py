@@ -0,0 +1,170 @@
+"""
+Streaming exports of admin tables (NDJSON / CSV)
+
+Rows are read in keyset-paginated chunks of EXPORT_CHUNK_SIZE on
+(created_at, id), oldest first, and each chunk is serialized and handed to
+the client before the next one is fetched. Memory stays bounded by one
+chunk whatever the table size, and each fetch is a single indexed range
+scan (Turso over HTTP has no server-side cursors to stream from).
+
+    spec = resolve_export("state_transitions", ["id", "to_state"])
+    return StreamingResponse(stream_export(spec, "csv"), media_type=EXPORT_FORMATS["csv"])
+"""
+import asyncio
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional
+
+from src.config import Config
+from src.db.connection import DatabaseConnection
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    """A table, the columns to export and its (created_at, id) key"""
+    table: str
+    columns: tuple
+    key: tuple = ("created_at", "id")
+
+
+# Exportable tables and every column they may export. Session messages are
+# exported row by row from session_messages, not as the legacy JSON blob.
+EXPORTABLE = {
+    "policies": ExportSpec("policies", (
+        "id", "state", "intention", "insurance_type", "created_at", "updated_at")),
+    "client_data": ExportSpec("client_data", (
+        "id", "policy_id", "name", "email", "phone", "created_at")),
+    "vehicle_data": ExportSpec("vehicle_data", (
+        "id", "policy_id", "plate", "make", "model", "year", "engine_number", "chassis_number",
+        "engine_displacement", "created_at")),
+    "quotation_data": ExportSpec("quotation_data", (
+        "id", "policy_id", "vehicle_id", "coverage_type", "coverage_level", "monthly_premium",
+        "annual_premium", "deductible", "risk_level", "selected", "created_at")),
+    "state_transitions": ExportSpec("state_transitions", (
+        "id", "policy_id", "from_state", "to_state", "reason", "agent", "created_at")),
+    "sessions": ExportSpec("sessions", (
+        "session_id", "policy_id", "message_count", "last_message_at", "last_role", "context_built",
+        "created_at", "updated_at"),
+        key=("created_at", "session_id")),
+    "session_messages": ExportSpec("session_messages", (
+        "session_id", "seq", "role", "content", "created_at"),
+        key=("session_id", "seq")),
+    "payments": ExportSpec("payments", (
+        "id", "policy_id", "quotation_id", "amount", "preference_id", "payment_link",
+        "payment_status", "payment_id", "created_at", "updated_at")),
+}
+
+# Names used by the /api/admin/* listings
+ALIASES = {
+    "clients": "client_data",
+    "vehicles": "vehicle_data",
+    "quotations": "quotation_data",
+    "transitions": "state_transitions",
+}
+
+
+def resolve_export(table: str, columns: Optional[List[str]] = None) -> ExportSpec:
+    """Spec for a table, projected to `columns`
+
+    Raises KeyError for an unknown table and ValueError for unknown columns;
+    names are checked against EXPORTABLE, never interpolated from the request.
+    """
+    spec = EXPORTABLE[ALIASES.get(table, table)]
+    if not columns:
+        return spec
+    unknown = [c for c in columns if c not in spec.columns]
+    if unknown:
+        raise ValueError(f"Unknown columns for {spec.table}: {', '.join(unknown)}")
+    return ExportSpec(spec.table, tuple(columns), spec.key)
+
+
+def _range_key(spec: ExportSpec) -> Optional[str]:
+    """Column the created_from/created_to filters apply to"""
+    return "created_at" if "created_at" in EXPORTABLE[spec.table].columns else None
+
+
+def fetch_chunk(spec: ExportSpec, after: Optional[tuple], limit: int,
+                created_from: Optional[str] = None, created_to: Optional[str] = None,
+                db=DatabaseConnection) -> list:
+    """Next chunk after `after` (the previous chunk's key), with the key columns appended"""
+    first, second = spec.key
+    conditions, params = [], []
+    range_column = _range_key(spec)
+    if range_column and created_from:
+        conditions.append(f"{range_column} >= ?")
+        params.append(created_from)
+    if range_column and created_to:
+        conditions.append(f"{range_column} <= ?")
+        params.append(created_to)
+    if after is not None:
+        conditions.append(f"({first} > ? OR ({first} = ? AND {second} > ?))")
+        params.extend([after[0], after[0], after[1]])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT {', '.join(spec.columns)}, {first}, {second} FROM {spec.table}
+        {where}
+        ORDER BY {first}, {second}
+        LIMIT ?
+    """
+    return db.execute_query(query, tuple(params) + (limit,)) or []
+
+
+def iter_chunks(spec: ExportSpec, created_from: Optional[str] = None, created_to: Optional[str] = None,
+                chunk_size: Optional[int] = None, db=DatabaseConnection) -> Iterator[list]:
+    """Every row of the export, one chunk (list of value tuples) at a time"""
+    chunk_size = chunk_size or Config.EXPORT_CHUNK_SIZE
+    width = len(spec.columns)
+    after = None
+    while True:
+        rows = fetch_chunk(spec, after, chunk_size, created_from, created_to, db)
+        if not rows:
+            return
+        yield [tuple(row)[:width] for row in rows]
+        last = tuple(rows[-1])
+        after = (last[width], last[width + 1])
+        if len(rows) < chunk_size:
+            return
+
+
+# ==================== Formats ====================
+
+def format_ndjson(columns: tuple, rows: list) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n" for row in rows
+    )
+
+
+def format_csv(columns: tuple, rows: list, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+FORMATTERS = {"ndjson": format_ndjson, "csv": format_csv}
+
+
+async def stream_export(spec: ExportSpec, fmt: str = "ndjson", created_from: Optional[str] = None,
+                        created_to: Optional[str] = None, chunk_size: Optional[int] = None,
+                        db=DatabaseConnection) -> AsyncIterator[bytes]:
+    """Encoded export, one chunk per DB fetch (fetches run off the event loop)"""
+    formatter = FORMATTERS[fmt]
+    if fmt == "csv":
+        # Header first, so even an empty export is valid CSV
+        yield format_csv(spec.columns, [], header=True).encode()
+    chunks = iter_chunks(spec, created_from, created_to, chunk_size, db)
+    while True:
+        rows = await asyncio.to_thread(next, chunks, None)
+        if rows is None:
+            return
+        yield formatter(spec.columns, rows).encode()
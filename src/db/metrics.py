@@ -0,0 +1,233 @@
+"""
+Per-statement DB metrics
+
+DatabaseConnection reports every round-trip (query, update or batch) here:
+its latency, row count and a normalized SQL fingerprint. Totals live in an
+in-process registry exported at /metrics in Prometheus text format, and the
+round-trips of the current request are counted through a contextvar:
+
+    with db_metrics.track_request() as stats:
+        ...                                   # handler runs
+    stats.roundtrips, stats.seconds, stats.statements
+
+The context is copied into asyncio.to_thread / the threadpool, so blocking
+repository calls made on behalf of a request are attributed to it too.
+Background workers have no request and only show up in the totals.
+"""
+import bisect
+import collections
+import contextlib
+import contextvars
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds; same spirit as the Prometheus client defaults, shifted towards DB latencies
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+ROUNDTRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(query: str) -> str:
+    """SQL with literals replaced by ? and IN-lists collapsed, so one code path = one key"""
+    query = _STRING_RE.sub("?", query)
+    query = _NUMBER_RE.sub("?", query)
+    query = _IN_LIST_RE.sub("(?...)", query)
+    return _SPACE_RE.sub(" ", query).strip()
+
+
+def batch_fingerprint(statements) -> str:
+    """Distinct statement fingerprints of a batch, in order"""
+    seen = dict.fromkeys(fingerprint(query) for query, _ in statements)
+    return "BATCH: " + "; ".join(seen)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, out = 0, []
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            out.append((bound if bound == "+Inf" else repr(float(bound)), total))
+        return out
+
+
+class StatementStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.rows = 0
+        self.errors = 0
+
+
+class RequestStats:
+    """DB work attributed to one request (nested trackers also count into their parent)"""
+
+    def __init__(self, parent: Optional["RequestStats"] = None):
+        self.parent = parent
+        self.roundtrips = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = collections.Counter()
+
+    def add(self, key: str, seconds: float):
+        stats = self
+        while stats is not None:
+            stats.roundtrips += 1
+            stats.seconds += seconds
+            stats.statements[key] += 1
+            stats = stats.parent
+
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "db_request_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+class QueryMetrics:
+    """Process-wide registry of statement timings, keyed by (operation, fingerprint)"""
+
+    def __init__(self):
+        self._statements: Dict[Tuple[str, str], StatementStats] = {}
+        self._requests: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.roundtrips = 0
+
+    def record(self, operation: str, statement: str, seconds: float, rows: int = 0, error: bool = False):
+        """Account one round-trip; `statement` is already fingerprinted"""
+        key = (operation, statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats()
+            stats.latency.observe(seconds)
+            stats.rows += rows
+            stats.errors += int(error)
+            self.roundtrips += 1
+        request = _current_request.get()
+        if request is not None:
+            request.add(f"{operation} {statement}", seconds)
+
+    @contextlib.contextmanager
+    def timer(self, operation: str, statement: str) -> Iterator[dict]:
+        """Time a round-trip; set result["rows"] inside the block"""
+        result = {"rows": 0}
+        started = time.perf_counter()
+        try:
+            yield result
+        except Exception:
+            self.record(operation, statement, time.perf_counter() - started, error=True)
+            raise
+        self.record(operation, statement, time.perf_counter() - started, result["rows"])
+
+    @contextlib.contextmanager
+    def track_request(self) -> Iterator[RequestStats]:
+        """Attribute the round-trips made inside the block (and its threads) to a RequestStats"""
+        stats = RequestStats(parent=_current_request.get())
+        token = _current_request.set(stats)
+        try:
+            yield stats
+        finally:
+            _current_request.reset(token)
+
+    def observe_request(self, route: str, stats: RequestStats):
+        """Round-trips-per-request histogram by route"""
+        with self._lock:
+            histogram = self._requests.get(route)
+            if histogram is None:
+                histogram = self._requests[route] = Histogram(ROUNDTRIP_BUCKETS)
+            histogram.observe(stats.roundtrips)
+
+    def snapshot(self, top: Optional[int] = None) -> List[dict]:
+        """Statements ordered by total time spent"""
+        with self._lock:
+            rows = [{
+                "operation": operation,
+                "statement": statement,
+                "count": stats.latency.count,
+                "total_ms": round(stats.latency.sum * 1000, 2),
+                "mean_ms": round(stats.latency.sum * 1000 / stats.latency.count, 3) if stats.latency.count else 0.0,
+                "rows": stats.rows,
+                "errors": stats.errors
+            } for (operation, statement), stats in self._statements.items()]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows[:top] if top else rows
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._requests.clear()
+            self.roundtrips = 0
+
+    # ==================== Prometheus ====================
+
+    def render_prometheus(self) -> str:
+        """Text exposition format (version 0.0.4)"""
+        lines = [
+            "# HELP aseguraopen_db_statement_duration_seconds Latency of one DB round-trip by statement",
+            "# TYPE aseguraopen_db_statement_duration_seconds histogram",
+        ]
+        with self._lock:
+            statements = sorted(self._statements.items())
+            requests = sorted(self._requests.items())
+            roundtrips = self.roundtrips
+
+        for (operation, statement), stats in statements:
+            labels = f'operation="{operation}",statement="{_escape(statement)}"'
+            for bound, count in stats.latency.cumulative():
+                lines.append(f'aseguraopen_db_statement_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"aseguraopen_db_statement_duration_seconds_sum{{{labels}}} {stats.latency.sum:.6f}")
+            lines.append(f"aseguraopen_db_statement_duration_seconds_count{{{labels}}} {stats.latency.count}")
+
+        lines += ["# HELP aseguraopen_db_statement_rows_total Rows returned by statement",
+                  "# TYPE aseguraopen_db_statement_rows_total counter"]
+        for (operation, statement), stats in statements:
+            lines.append(f'aseguraopen_db_statement_rows_total{{operation="{operation}",'
+                         f'statement="{_escape(statement)}"}} {stats.rows}')
+
+        lines += ["# HELP aseguraopen_db_statement_errors_total Failed round-trips by statement",
+                  "# TYPE aseguraopen_db_statement_errors_total counter"]
+        for (operation, statement), stats in statements:
+            if stats.errors:
+                lines.append(f'aseguraopen_db_statement_errors_total{{operation="{operation}",'
+                             f'statement="{_escape(statement)}"}} {stats.errors}')
+
+        lines += ["# HELP aseguraopen_db_roundtrips_total DB round-trips (requests and background workers)",
+                  "# TYPE aseguraopen_db_roundtrips_total counter",
+                  f"aseguraopen_db_roundtrips_total {roundtrips}",
+                  "# HELP aseguraopen_db_roundtrips_per_request DB round-trips made while serving one request",
+                  "# TYPE aseguraopen_db_roundtrips_per_request histogram"]
+        for route, histogram in requests:
+            labels = f'route="{_escape(route)}"'
+            for bound, count in histogram.cumulative():
+                lines.append(f'aseguraopen_db_roundtrips_per_request_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"aseguraopen_db_roundtrips_per_request_sum{{{labels}}} {int(histogram.sum)}")
+            lines.append(f"aseguraopen_db_roundtrips_per_request_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# Shared registry fed by DatabaseConnection
+db_metrics = QueryMetrics()
@@ -0,0 +1,258 @@
+"""
+Idempotent schema migrations, applied on startup
+
+Run manually with:  python -m src.db.migrations
+"""
+import json
+
+from src.db.connection import DatabaseConnection
+
+# Each entry is (name, statements); every statement must be safe to re-run
+MIGRATIONS = [
+    ("payments", [
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+          id TEXT PRIMARY KEY,
+          policy_id TEXT NOT NULL REFERENCES policies(id),
+          quotation_id TEXT REFERENCES quotation_data(id),
+          amount DECIMAL,
+          preference_id TEXT,
+          payment_link TEXT,
+          payment_status TEXT DEFAULT 'pending',
+          payment_id TEXT,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_payments_policy_id ON payments(policy_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_preference_id ON payments(preference_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_payment_id ON payments(payment_id)",
+        # Pending-payment sweeps of the reconciler
+        "CREATE INDEX IF NOT EXISTS idx_payments_status_created ON payments(payment_status, created_at)",
+    ]),
+    ("session_messages", [
+        # One row per chat message; (session_id, seq) orders a conversation
+        """
+        CREATE TABLE IF NOT EXISTS session_messages (
+          session_id TEXT NOT NULL REFERENCES sessions(session_id),
+          seq INTEGER NOT NULL,
+          role TEXT NOT NULL,
+          content TEXT NOT NULL,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          PRIMARY KEY (session_id, seq)
+        )
+        """,
+    ]),
+    ("session_summaries", [
+        # Rolling summary of the messages that slid out of the agent context
+        """
+        CREATE TABLE IF NOT EXISTS session_summaries (
+          session_id TEXT PRIMARY KEY REFERENCES sessions(session_id),
+          summary TEXT NOT NULL,
+          through_seq INTEGER NOT NULL,
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    ("quotation_templates_key", [
+        # Drop duplicates left by the old check-then-insert seeding, then let
+        # INSERT OR IGNORE rely on the (type, coverage, level) key
+        """
+        DELETE FROM quotation_templates WHERE rowid NOT IN (
+          SELECT MIN(rowid) FROM quotation_templates
+          GROUP BY insurance_type, coverage_type, coverage_level
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_quotation_templates_key ON quotation_templates(insurance_type, coverage_type, coverage_level)",
+        # Bumped whenever quotation_templates changes (see src/pricing/catalog.py)
+        """
+        CREATE TABLE IF NOT EXISTS catalog_versions (
+          name TEXT PRIMARY KEY,
+          version INTEGER NOT NULL DEFAULT 0,
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    ("webhook_events", [
+        # Durable inbox of Mercado Pago notifications (see src/payments/webhooks.py)
+        """
+        CREATE TABLE IF NOT EXISTS webhook_events (
+          id TEXT PRIMARY KEY,
+          topic TEXT,
+          resource_id TEXT,
+          payload TEXT,
+          status TEXT NOT NULL DEFAULT 'pending',
+          attempts INTEGER NOT NULL DEFAULT 0,
+          next_attempt_at TIMESTAMP,
+          last_error TEXT,
+          processed_at TIMESTAMP,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_webhook_events_due ON webhook_events(status, next_attempt_at)",
+    ]),
+    ("issuance_outbox", [
+        # Policies waiting to be sent to the issuer API (see src/issuance/outbox.py)
+        """
+        CREATE TABLE IF NOT EXISTS issuance_outbox (
+          policy_id TEXT PRIMARY KEY,
+          status TEXT NOT NULL DEFAULT 'pending',
+          attempts INTEGER NOT NULL DEFAULT 0,
+          next_attempt_at TIMESTAMP,
+          last_error TEXT,
+          external_id TEXT,
+          processed_at TIMESTAMP,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          FOREIGN KEY (policy_id) REFERENCES policies(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_issuance_outbox_due ON issuance_outbox(status, next_attempt_at)",
+    ]),
+    ("admin_pagination", [
+        # Keyset pagination of the admin listings (newest first on created_at, id)
+        "CREATE INDEX IF NOT EXISTS idx_policies_created ON policies(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_policies_state_created ON policies(state, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_policies_type_created ON policies(insurance_type, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_client_data_created ON client_data(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_vehicle_data_created ON vehicle_data(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_quotation_data_created ON quotation_data(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_state_transitions_created ON state_transitions(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions(created_at, session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_created ON payments(created_at, id)",
+    ]),
+]
+
+
+# Columns added to existing tables: (table, column, definition).
+# SQLite has no ADD COLUMN IF NOT EXISTS, so ensure_columns checks first.
+COLUMNS = [
+    # Denormalized session activity, maintained by PolicyRepository.append_message
+    # (message_count doubles as the seq counter for new messages)
+    ("sessions", "message_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("sessions", "last_message_at", "TIMESTAMP"),
+    ("sessions", "last_role", "TEXT"),
+]
+
+
+def ensure_columns(db=DatabaseConnection):
+    """Add any missing columns from COLUMNS"""
+    existing = {}
+    for table, column, definition in COLUMNS:
+        if table not in existing:
+            existing[table] = {row[1] for row in db.execute_query(f"PRAGMA table_info({table})") or []}
+        if column not in existing[table]:
+            db.execute_update(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            existing[table].add(column)
+            print(f"   ✅ Added column {table}.{column}")
+
+
+def ensure_schema(db=DatabaseConnection):
+    """Create any missing tables, columns and indexes"""
+    for name, statements in MIGRATIONS:
+        db.execute_batch([(statement, ()) for statement in statements])
+        print(f"   ✅ Schema '{name}' verified")
+    ensure_columns(db)
+
+
+def migrate_session_messages(db=DatabaseConnection, batch_size: int = 100) -> int:
+    """Explode legacy sessions.messages JSON blobs into session_messages rows
+
+    Sessions are walked in session_id order; each page is rewritten in one
+    atomic batch that inserts the rows and empties the blob, so the
+    migration can be interrupted and re-run safely. Returns the number of
+    sessions migrated.
+    """
+    migrated = 0
+    last_session_id = ""
+
+    while True:
+        rows = db.execute_query("""
+            SELECT session_id, messages FROM sessions
+            WHERE session_id > ? AND messages IS NOT NULL AND messages != '[]'
+              AND NOT EXISTS (SELECT 1 FROM session_messages m WHERE m.session_id = sessions.session_id)
+            ORDER BY session_id
+            LIMIT ?
+        """, (last_session_id, batch_size))
+
+        if not rows:
+            return migrated
+
+        statements = []
+        for session_id, messages_json in rows:
+            last_session_id = session_id
+            try:
+                messages = json.loads(messages_json) if messages_json else []
+            except (TypeError, ValueError):
+                print(f"⚠️  Skipping session {session_id}: unreadable messages JSON")
+                continue
+
+            for seq, message in enumerate(messages, 1):
+                statements.append(("""
+                    INSERT OR IGNORE INTO session_messages (session_id, seq, role, content)
+                    VALUES (?, ?, ?, ?)
+                """, (session_id, seq, message.get("role", "user"), message.get("content", ""))))
+            statements.append(("""
+                UPDATE sessions
+                SET messages = '[]', message_count = ?, last_role = ?,
+                    last_message_at = CASE WHEN ? > 0 THEN COALESCE(updated_at, CURRENT_TIMESTAMP) END
+                WHERE session_id = ?
+            """, (len(messages), messages[-1].get("role", "user") if messages else None,
+                  len(messages), session_id)))
+            migrated += 1
+
+        if statements:
+            db.execute_batch(statements)
+
+
+def backfill_session_stats(db=DatabaseConnection, batch_size: int = 500) -> int:
+    """Fill sessions.message_count / last_message_at / last_role from session_messages
+
+    Only sessions with messages but no last_message_at are touched (those
+    written before the columns existed), a page of session ids per UPDATE,
+    so re-running it is cheap. Returns the number of sessions backfilled.
+    """
+    backfilled = 0
+    last_session_id = ""
+
+    while True:
+        rows = db.execute_query("""
+            SELECT session_id FROM sessions
+            WHERE session_id > ? AND last_message_at IS NULL
+              AND EXISTS (SELECT 1 FROM session_messages m WHERE m.session_id = sessions.session_id)
+            ORDER BY session_id
+            LIMIT ?
+        """, (last_session_id, batch_size))
+
+        if not rows:
+            return backfilled
+
+        session_ids = [row[0] for row in rows]
+        marks = ", ".join("?" for _ in session_ids)
+        db.execute_update(f"""
+            UPDATE sessions SET
+              message_count = (SELECT COUNT(*) FROM session_messages m WHERE m.session_id = sessions.session_id),
+              last_message_at = (SELECT MAX(m.created_at) FROM session_messages m
+                                 WHERE m.session_id = sessions.session_id),
+              last_role = (SELECT m.role FROM session_messages m WHERE m.session_id = sessions.session_id
+                           ORDER BY m.seq DESC LIMIT 1)
+            WHERE session_id IN ({marks})
+        """, tuple(session_ids))
+        backfilled += len(session_ids)
+        last_session_id = session_ids[-1]
+
+
+def run_migrations(db=DatabaseConnection):
+    """Apply all schema changes and data migrations"""
+    ensure_schema(db)
+    migrated = migrate_session_messages(db)
+    if migrated:
+        print(f"   ✅ Migrated {migrated} session message blobs to session_messages")
+    backfilled = backfill_session_stats(db)
+    if backfilled:
+        print(f"   ✅ Backfilled message stats of {backfilled} sessions")
+
+
+if __name__ == "__main__":
+    run_migrations()
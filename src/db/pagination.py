@@ -0,0 +1,37 @@
+"""
+Keyset pagination helpers for the admin listings
+
+Admin tables are listed newest first on (created_at, id). A page's cursor
+is the (created_at, id) of its last row, packed into an opaque URL-safe
+string; the next page is every row strictly "before" it:
+
+    created_at < :created_at OR (created_at = :created_at AND id < :id)
+
+which, unlike OFFSET, costs the same on page 1 and page 1000 and doesn't
+skip or repeat rows when new ones are inserted meanwhile.
+"""
+import base64
+import json
+from typing import Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """(created_at, id) from a cursor; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    return str(created_at), str(row_id)
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
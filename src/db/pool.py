@@ -0,0 +1,166 @@
+"""
+Bounded connection pool shared by the local SQLite and Turso backends
+
+Each pooled connection is used by a single thread at a time, so sync
+endpoints running in FastAPI's threadpool and the executor threads behind
+the async repository API no longer share (and corrupt) one connection.
+"""
+import collections
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be acquired within the timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool with min/max size, acquire timeout and health checks"""
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 5,
+        acquire_timeout: float = 10.0,
+        health_check: Optional[Callable[[Any], None]] = None,
+        health_check_interval: float = 30.0,
+        close: Optional[Callable[[Any], None]] = None,
+        name: str = "db"
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self._factory = factory
+        self._health_check = health_check
+        self._close = close or (lambda conn: conn.close())
+
+        # Idle connections as (conn, last_used_at); newest on the right
+        self._idle = collections.deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append((self._factory(), time.monotonic()))
+            self._size += 1
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Check out a connection, opening a new one if below max_size"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout(f"Pool '{self.name}' is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot, then open outside the lock
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"Timed out after {timeout:.1f}s waiting for a '{self.name}' connection "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+        if conn is None:
+            try:
+                return self._factory()
+            except Exception:
+                self._discard_slot()
+                raise
+
+        if self._health_check and time.monotonic() - last_used > self.health_check_interval:
+            try:
+                self._health_check(conn)
+            except Exception as e:
+                print(f"⚠️  Discarding unhealthy '{self.name}' connection: {e}")
+                self._safe_close(conn)
+                self._discard_slot()
+                return self.acquire(max(deadline - time.monotonic(), 0))
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool (or drop it if broken)"""
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._safe_close(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager that checks a connection out and back in"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            # Don't hand a connection in an unknown state to the next caller
+            # unless it still passes the health check
+            self.release(conn, discard=not self._is_healthy(conn))
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections; checked-out ones close on release"""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn in idle:
+            self._safe_close(conn)
+
+    def stats(self) -> dict:
+        """Current pool occupancy"""
+        with self._cond:
+            return {
+                "name": self.name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size
+            }
+
+    def _discard_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn) -> bool:
+        if not self._health_check:
+            return True
+        try:
+            self._health_check(conn)
+            return True
+        except Exception:
+            return False
+
+    def _safe_close(self, conn):
+        try:
+            self._close(conn)
+        except Exception as e:
+            print(f"⚠️  Error closing '{self.name}' connection: {e}")
@@ -0,0 +1,207 @@
+"""
+Local read replica of the Turso primary (libsql embedded replica)
+
+With TURSO_REPLICA_PATH set, a local SQLite file is kept in sync with the
+Turso primary by the libsql package (`pip install libsql`). Reads made while
+serving a request - single SELECTs and read-only batches - are answered from
+that file through a pool of read-only SQLite connections; every write still
+goes to the primary over HTTPS.
+
+    primary  <-- writes -----------------------------  DatabaseConnection
+        |                                                    |
+        +-- sync every TURSO_REPLICA_SYNC_INTERVAL s --> replica file <-- reads
+
+Read-your-writes: every write made by this process (requests and background
+workers alike) moves a watermark, and the replica only answers reads once a
+sync that started after the latest write has finished. With
+TURSO_REPLICA_READ_YOUR_WRITES the first read after a write triggers that
+sync itself (concurrent readers share it); otherwise reads go to the
+primary until the next periodic sync. Pure-read traffic never waits. Writes
+made by other processes show up within one sync interval. Reads outside a
+request (see request_scope: background workers, scripts) always go to the
+primary.
+"""
+import asyncio
+import contextlib
+import contextvars
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
+
+from src.config import Config
+from src.db.pool import ConnectionPool
+
+try:
+    import libsql
+except ImportError:
+    try:
+        import libsql_experimental as libsql
+    except ImportError:  # optional: embedded replicas need the libsql package
+        libsql = None
+
+
+class LibsqlSyncer:
+    """Embedded replica connection whose only job is pulling frames from the primary"""
+
+    def __init__(self, path: str, url: str, auth_token: str):
+        if libsql is None:
+            raise RuntimeError("TURSO_REPLICA_PATH requires the libsql package (pip install libsql)")
+        self._conn = libsql.connect(path, sync_url=url, auth_token=auth_token)
+
+    def sync(self):
+        self._conn.sync()
+
+    def close(self):
+        self._conn.close()
+
+
+_in_request: contextvars.ContextVar[bool] = contextvars.ContextVar("replica_in_request", default=False)
+
+
+class EmbeddedReplica:
+    """Routes request reads to the local replica file and keeps it fresh"""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.sync_interval = Config.TURSO_REPLICA_SYNC_INTERVAL
+        self.read_your_writes = Config.TURSO_REPLICA_READ_YOUR_WRITES
+        self._syncer = None
+        self._pool: Optional[ConnectionPool] = None
+        self._sync_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # monotonic start time of the last successful sync / time of the last write
+        self.synced_from: Optional[float] = None
+        self.written_at: Optional[float] = None
+        self.syncs = 0
+        self.sync_errors = 0
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._pool is not None
+
+    def open(self, path: str, syncer):
+        """Sync once, then serve reads from `path`; `syncer` has sync() / close()"""
+        self.close()
+        self.path = path
+        self._syncer = syncer
+        self.sync()
+        self._pool = ConnectionPool(
+            factory=self._open_reader,
+            health_check=lambda conn: conn.execute("SELECT 1").fetchone(),
+            name="replica",
+            min_size=Config.DB_POOL_MIN_SIZE,
+            max_size=Config.DB_POOL_MAX_SIZE,
+            acquire_timeout=Config.DB_POOL_ACQUIRE_TIMEOUT,
+            health_check_interval=Config.DB_POOL_HEALTH_CHECK_INTERVAL
+        )
+        print(f"📚 Reads served from local replica {path} (sync every {self.sync_interval}s)")
+
+    def _open_reader(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False,
+                               timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._syncer is not None:
+            try:
+                self._syncer.close()
+            except Exception as e:
+                print(f"⚠️  Error closing replica: {e}")
+            self._syncer = None
+        self.synced_from = None
+        self.written_at = None
+
+    # ==================== Sync ====================
+
+    def sync(self):
+        """Pull new frames from the primary; concurrent callers share one sync"""
+        requested_at = time.monotonic()
+        with self._sync_lock:
+            if self.synced_from is not None and self.synced_from >= requested_at:
+                return
+            started = time.monotonic()
+            try:
+                self._syncer.sync()
+            except Exception:
+                self.sync_errors += 1
+                raise
+            self.synced_from = started
+            self.syncs += 1
+
+    def fresh_since(self, moment: Optional[float]) -> bool:
+        return moment is None or (self.synced_from is not None and self.synced_from >= moment)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                print(f"❌ Replica sync error: {e}")
+
+    def start(self):
+        if self.enabled and self.sync_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ==================== Routing ====================
+
+    @contextlib.contextmanager
+    def request_scope(self) -> Iterator[None]:
+        """Reads inside the block (and its worker threads) may use the replica"""
+        token = _in_request.set(True)
+        try:
+            yield
+        finally:
+            _in_request.reset(token)
+
+    def note_write(self):
+        """A write reached the primary: older syncs no longer cover it"""
+        self.written_at = time.monotonic()
+
+    def serves_read(self) -> bool:
+        """Whether the current read can go to the replica (may sync first, so call off the event loop)"""
+        if not self.enabled or not _in_request.get():
+            return False
+        if not self.fresh_since(self.written_at) and self.read_your_writes:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"⚠️  Replica sync failed, reading from primary: {e}")
+        if self.fresh_since(self.written_at):
+            self.replica_reads += 1
+            return True
+        self.primary_reads += 1
+        return False
+
+    def connection(self):
+        return self._pool.connection()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "sync_interval": self.sync_interval,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "seconds_since_sync": round(time.monotonic() - self.synced_from, 3) if self.synced_from else None,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pool": self._pool.stats() if self._pool else {}
+        }
+
+
+# Shared replica used by DatabaseConnection (disabled unless TURSO_REPLICA_PATH is set)
+embedded_replica = EmbeddedReplica()
@@ -1,16 +1,79 @@
 """
 Database repository for policies and related data
+
+Every public classmethod also has an ``<name>_async`` variant (e.g.
+``await PolicyRepository.get_policy_async(policy_id)``), so async handlers and
+agent tools never block the event loop on a database round-trip. The hot
+paths (aggregates, get_policy, append_message, update_policy_state and the
+payment methods) are native coroutines on DatabaseConnection.fetch/execute/
+batch; the rest are declared at the end of the class and run in the default
+executor.
+
+Policy reads (get_policy, get_client_data, get_vehicle_data, get_quotations,
+load_*_aggregate) go through an in-process LRU+TTL cache of PolicyAggregates
+keyed by policy_id; every write invalidates the affected policy. Pass
+``use_cache=False`` to force a fresh read.
 """
+import asyncio
+import functools
 import uuid
+from dataclasses import replace
 from datetime import datetime
+from src.config import Config
+from src.db.cache import LRUTTLCache
 from src.db.connection import DatabaseConnection
-from src.models import Policy, ClientData, ExplorationData, VehicleData, QuotationData, QuotationTemplate, StateTransition, PaymentData
+from src.db.transaction import UnitOfWork, current_unit_of_work
+from src.pricing.catalog import template_catalog
+from src.models import Policy, ClientData, ExplorationData, VehicleData, QuotationData, QuotationTemplate, StateTransition, PaymentData, PolicyAggregate
+
+POLICY_COLUMNS = "id, state, intention, insurance_type, created_at, updated_at"
+CLIENT_COLUMNS = "id, policy_id, name, email, phone, created_at"
+VEHICLE_COLUMNS = "id, policy_id, plate, make, model, year, engine_number, chassis_number, engine_displacement, created_at"
+QUOTATION_COLUMNS = "id, coverage_type, coverage_level, monthly_premium, annual_premium, deductible, selected"
+SESSION_COLUMNS = "session_id, policy_id, context_built"
+MESSAGE_COLUMNS = "seq, role, content, created_at"
+PAYMENT_COLUMNS = ("id, policy_id, quotation_id, amount, preference_id, payment_link, "
+                   "payment_status, payment_id, created_at, updated_at")
+LATEST_PAYMENT_QUERY = f"""
+    SELECT {PAYMENT_COLUMNS}
+    FROM payments 
+    WHERE policy_id = ?
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+
+def _threaded(method: classmethod) -> classmethod:
+    """<name>_async for a blocking repository classmethod: run it in the default executor"""
+    func = method.__func__
+    
+    @functools.wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        return await asyncio.to_thread(func, cls, *args, **kwargs)
+    return classmethod(wrapper)
+
+
+# Methods that make no sense (or no difference) off the event loop
+_SYNC_ONLY = {"transaction", "validate_client_data"}
+
 
 class PolicyRepository:
     """Manage policy data in database"""
     
     db = DatabaseConnection
     
+    # Read-through cache: policy_id -> PolicyAggregate (its session_id is an alias)
+    cache = LRUTTLCache(Config.POLICY_CACHE_SIZE, Config.POLICY_CACHE_TTL, Config.POLICY_CACHE_ENABLED)
+    
+    @classmethod
+    def transaction(cls) -> UnitOfWork:
+        """Unit of work: ``with repo.transaction():`` / ``async with repo.transaction():``
+        
+        Writes issued inside the block are committed together in one batch
+        when it exits, or discarded if it raises.
+        """
+        return UnitOfWork(cls.db)
+    
     @classmethod
     def create_policy(cls, initial_state: str = "intake") -> Policy:
         """Create a new policy"""
@@ -33,59 +96,112 @@ class PolicyRepository:
         )
     
     @classmethod
-    def get_policy(cls, policy_id: str) -> Policy:
+    def get_policy(cls, policy_id: str, use_cache: bool = True) -> Policy:
         """Get policy by ID"""
-        query = "SELECT id, state, intention, insurance_type, created_at, updated_at FROM policies WHERE id = ?"
+        if use_cache:
+            aggregate = cls.load_policy_aggregate(policy_id)
+            return aggregate.policy if aggregate else None
+        
+        query = f"SELECT {POLICY_COLUMNS} FROM policies WHERE id = ?"
         result = cls.db.execute_query(query, (policy_id,))
         
-        if result:
-            row = result[0]
-            return Policy(
-                id=row[0],
-                state=row[1],
-                intention=bool(row[2]),
-                insurance_type=row[3],
-                created_at=row[4],
-                updated_at=row[5]
-            )
-        return None
+        return cls._policy_from_row(result[0]) if result else None
     
     @classmethod
-    def update_policy_state(cls, policy_id: str, new_state: str, reason: str, agent: str):
-        """Update policy state and create transition record"""
-        policy = cls.get_policy(policy_id)
-        
-        if not policy:
-            raise ValueError(f"Policy {policy_id} not found")
+    async def get_policy_async(cls, policy_id: str, use_cache: bool = True) -> Policy:
+        """Native async get_policy"""
+        if use_cache:
+            aggregate = await cls.load_policy_aggregate_async(policy_id)
+            return aggregate.policy if aggregate else None
         
-        old_state = policy.state
-        now = datetime.now().isoformat()
-        
-        # Update policy state
-        query = "UPDATE policies SET state = ?, updated_at = ? WHERE id = ?"
-        cls.db.execute_update(query, (new_state, now, policy_id))
-        
-        # Record transition
-        transition_id = str(uuid.uuid4())
-        transition_query = """
-            INSERT INTO state_transitions (id, policy_id, from_state, to_state, reason, agent, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """
-        cls.db.execute_update(
-            transition_query,
-            (transition_id, policy_id, old_state, new_state, reason, agent, now)
-        )
+        query = f"SELECT {POLICY_COLUMNS} FROM policies WHERE id = ?"
+        result = await cls.db.fetch(query, (policy_id,))
         
-        return StateTransition(
-            id=transition_id,
-            policy_id=policy_id,
-            from_state=old_state,
-            to_state=new_state,
-            reason=reason,
-            agent=agent,
-            created_at=now
+        return cls._policy_from_row(result[0]) if result else None
+    
+    @staticmethod
+    def _policy_from_row(row) -> Policy:
+        return Policy(
+            id=row[0],
+            state=row[1],
+            intention=bool(row[2]),
+            insurance_type=row[3],
+            created_at=row[4],
+            updated_at=row[5]
         )
     
+    @classmethod
+    def update_policy_state(cls, policy_id: str, new_state: str, reason: str, agent: str,
+                            expected_state: str = None):
+        """Update policy state and create transition record
+        
+        The read of the old state, the transition insert and the state update
+        go out as one atomic batch, so a transition is never half-applied.
+        With `expected_state` the transition only happens if the policy is
+        still in that state when the batch runs (compare-and-set), so racing
+        writers of the same transition apply it once; the loser gets None.
+        Inside a unit of work the check uses the state read when the call is
+        made (the guarded statements still re-check it at commit).
+        """
+        transition = cls._new_transition(policy_id, new_state, reason, agent)
+        results = cls.db.execute_batch(cls._policy_state_statements(transition, expected_state))
+        cls.invalidate_policy(policy_id)
+        return cls._applied_transition(results, transition, expected_state)
+    
+    @classmethod
+    async def update_policy_state_async(cls, policy_id: str, new_state: str, reason: str, agent: str,
+                                        expected_state: str = None):
+        """Native async update_policy_state"""
+        transition = cls._new_transition(policy_id, new_state, reason, agent)
+        results = await cls.db.batch(cls._policy_state_statements(transition, expected_state))
+        cls.invalidate_policy(policy_id)
+        return cls._applied_transition(results, transition, expected_state)
+    
+    @staticmethod
+    def _new_transition(policy_id: str, new_state: str, reason: str, agent: str) -> StateTransition:
+        # from_state is filled in from the batch's read of the old state
+        return StateTransition(id=str(uuid.uuid4()), policy_id=policy_id, from_state=None, to_state=new_state,
+                               reason=reason, agent=agent, created_at=datetime.now().isoformat())
+    
+    @staticmethod
+    def _policy_state_statements(transition: StateTransition, expected_state: str = None) -> list:
+        policy_id, new_state, now = transition.policy_id, transition.to_state, transition.created_at
+        guard, guard_params = ("AND state = ?", (expected_state,)) if expected_state else ("", ())
+        
+        # Every guarded statement runs before the UPDATE, so the transition
+        # row copies from_state and all of them see the same old state, even
+        # when buffered in a unit of work
+        statements = [
+            ("SELECT state FROM policies WHERE id = ?", (policy_id,)),
+            (f"""
+                INSERT INTO state_transitions (id, policy_id, from_state, to_state, reason, agent, created_at)
+                SELECT ?, id, state, ?, ?, ?, ? FROM policies WHERE id = ? {guard}
+            """, (transition.id, new_state, transition.reason, transition.agent, now, policy_id) + guard_params),
+        ]
+        if new_state == "issued":
+            # Outbox row for the issuance worker, committed with the transition
+            statements.append((f"""
+                INSERT OR IGNORE INTO issuance_outbox
+                  (policy_id, status, attempts, next_attempt_at, created_at, updated_at)
+                SELECT id, 'pending', 0, ?, ?, ? FROM policies WHERE id = ? {guard}
+            """, (now, now, now, policy_id) + guard_params))
+        statements.append((f"UPDATE policies SET state = ?, updated_at = ? WHERE id = ? {guard} RETURNING id",
+                           (new_state, now, policy_id) + guard_params))
+        return statements
+    
+    @staticmethod
+    def _applied_transition(results, transition: StateTransition, expected_state: str = None):
+        if not results[0]:
+            raise ValueError(f"Policy {transition.policy_id} not found")
+        
+        old_state = results[0][0][0]
+        # The UPDATE returns no row when the guard failed (inside a unit of
+        # work it is buffered, so the state read above decides)
+        if expected_state and (old_state != expected_state or results[-1] == []):
+            return None
+        
+        return replace(transition, from_state=old_state)
+    
     @classmethod
     def save_client_data(cls, policy_id: str, name: str, email: str, phone: str) -> ClientData:
         """Save client data from intake"""
@@ -98,6 +214,7 @@ class PolicyRepository:
         """
         
         cls.db.execute_update(query, (client_id, policy_id, name, email, phone, now))
+        cls.invalidate_policy(policy_id)
         
         return ClientData(
             id=client_id,
@@ -109,69 +226,66 @@ class PolicyRepository:
         )
     
     @classmethod
-    def get_client_data(cls, policy_id: str) -> ClientData:
+    def get_client_data(cls, policy_id: str, use_cache: bool = True) -> ClientData:
         """Get client data for a policy"""
-        query = "SELECT id, policy_id, name, email, phone, created_at FROM client_data WHERE policy_id = ?"
+        if use_cache:
+            aggregate = cls.load_policy_aggregate(policy_id)
+            return aggregate.client if aggregate else None
+        
+        query = f"SELECT {CLIENT_COLUMNS} FROM client_data WHERE policy_id = ?"
         result = cls.db.execute_query(query, (policy_id,))
         
-        if result:
-            row = result[0]
-            return ClientData(
-                id=row[0],
-                policy_id=row[1],
-                name=row[2],
-                email=row[3],
-                phone=row[4],
-                created_at=row[5]
-            )
-        return None
+        return cls._client_from_row(result[0]) if result else None
+    
+    @staticmethod
+    def _client_from_row(row) -> ClientData:
+        return ClientData(
+            id=row[0],
+            policy_id=row[1],
+            name=row[2],
+            email=row[3],
+            phone=row[4],
+            created_at=row[5]
+        )
     
     @classmethod
     def update_client_data_partial(cls, policy_id: str, **fields) -> ClientData:
-        """Update specific client data fields (name, email, phone) - saves partially"""
-        client_data = cls.get_client_data(policy_id)
-        
-        if not client_data:
-            # If no client data exists, create with provided fields
-            name = fields.get('name')
-            email = fields.get('email')
-            phone = fields.get('phone')
-            
-            client_id = str(uuid.uuid4())
-            now = datetime.now().isoformat()
-            
-            query = """
-                INSERT INTO client_data (id, policy_id, name, email, phone, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """
-            cls.db.execute_update(query, (client_id, policy_id, name, email, phone, now))
-            
-            return cls.get_client_data(policy_id)
-        
-        # Update existing record with provided fields
-        update_parts = []
-        update_values = []
-        
-        if 'name' in fields:
-            update_parts.append("name = ?")
-            update_values.append(fields['name'])
+        """Update specific client data fields (name, email, phone) - saves partially
         
-        if 'email' in fields:
-            update_parts.append("email = ?")
-            update_values.append(fields['email'])
-        
-        if 'phone' in fields:
-            update_parts.append("phone = ?")
-            update_values.append(fields['phone'])
-        
-        if not update_parts:
-            return client_data
-        
-        update_values.append(policy_id)
-        query = f"UPDATE client_data SET {', '.join(update_parts)} WHERE policy_id = ?"
-        cls.db.execute_update(query, tuple(update_values))
+        Update-or-insert and re-read run as a single batch (one round-trip).
+        """
+        fields = {k: v for k, v in fields.items() if k in ("name", "email", "phone")}
+        client_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
         
-        return cls.get_client_data(policy_id)
+        statements = []
+        if fields:
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            statements.append((
+                f"UPDATE client_data SET {assignments} WHERE policy_id = ?",
+                (*fields.values(), policy_id)
+            ))
+        # If no client data exists yet, create it with the provided fields
+        statements.append(("""
+            INSERT INTO client_data (id, policy_id, name, email, phone, created_at)
+            SELECT ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM client_data WHERE policy_id = ?)
+        """, (client_id, policy_id, fields.get('name'), fields.get('email'), fields.get('phone'), now, policy_id)))
+        statements.append((f"SELECT {CLIENT_COLUMNS} FROM client_data WHERE policy_id = ?", (policy_id,)))
+        
+        rows = cls.db.execute_batch(statements)[-1]
+        cls.invalidate_policy(policy_id)
+        
+        # Inside a unit of work the read runs before the buffered writes,
+        # so overlay the new values on whatever was there before
+        if rows:
+            client_data = cls._client_from_row(rows[0])
+        else:
+            client_data = ClientData(id=client_id, policy_id=policy_id, name=None,
+                                     email=None, phone=None, created_at=now)
+        for name, value in fields.items():
+            setattr(client_data, name, value)
+        return client_data
     
     @classmethod
     def save_exploration_data(cls, policy_id: str, validation_status: str, anomalies: dict = None) -> ExplorationData:
@@ -233,6 +347,7 @@ class PolicyRepository:
         """
         
         cls.db.execute_update(query, (quotation_id, policy_id, amount, risk_level, premium, now))
+        cls.invalidate_policy(policy_id)
         
         return QuotationData(
             id=quotation_id,
@@ -271,6 +386,7 @@ class PolicyRepository:
         now = datetime.now().isoformat()
         query = "UPDATE policies SET intention = ?, insurance_type = ?, updated_at = ? WHERE id = ?"
         cls.db.execute_update(query, (True, insurance_type, now, policy_id))
+        cls.invalidate_policy(policy_id)
         
         return cls.get_policy(policy_id)
     
@@ -299,104 +415,133 @@ class PolicyRepository:
         }
     
     @classmethod
-    def get_all_policies(cls) -> list:
-        """Get all policies"""
-        query = "SELECT id, state, intention, insurance_type, created_at, updated_at FROM policies ORDER BY created_at DESC"
-        results = cls.db.execute_query(query)
-        
-        policies = []
-        if results:
-            for row in results:
-                policies.append({
-                    "id": row[0] if isinstance(row, tuple) else row["id"],
-                    "state": row[1] if isinstance(row, tuple) else row["state"],
-                    "intention": bool(row[2] if isinstance(row, tuple) else row["intention"]),
-                    "insurance_type": row[3] if isinstance(row, tuple) else row["insurance_type"],
-                    "created_at": row[4] if isinstance(row, tuple) else row["created_at"],
-                    "updated_at": row[5] if isinstance(row, tuple) else row["updated_at"]
-                })
-        return policies
-    
-    @classmethod
-    def get_all_client_data(cls) -> list:
-        """Get all client data"""
-        query = "SELECT id, policy_id, name, email, phone, created_at FROM client_data ORDER BY created_at DESC"
-        results = cls.db.execute_query(query)
-        
-        clients = []
-        if results:
-            for row in results:
-                clients.append({
-                    "id": row[0] if isinstance(row, tuple) else row["id"],
-                    "policy_id": row[1] if isinstance(row, tuple) else row["policy_id"],
-                    "name": row[2] if isinstance(row, tuple) else row["name"],
-                    "email": row[3] if isinstance(row, tuple) else row["email"],
-                    "phone": row[4] if isinstance(row, tuple) else row["phone"],
-                    "created_at": row[5] if isinstance(row, tuple) else row["created_at"]
-                })
-        return clients
-    
-    @classmethod
-    def get_all_state_transitions(cls) -> list:
-        """Get all state transitions"""
-        query = "SELECT id, policy_id, from_state, to_state, reason, agent, created_at FROM state_transitions ORDER BY created_at DESC"
-        results = cls.db.execute_query(query)
-        
-        transitions = []
-        if results:
-            for row in results:
-                transitions.append({
-                    "id": row[0] if isinstance(row, tuple) else row["id"],
-                    "policy_id": row[1] if isinstance(row, tuple) else row["policy_id"],
-                    "from_state": row[2] if isinstance(row, tuple) else row["from_state"],
-                    "to_state": row[3] if isinstance(row, tuple) else row["to_state"],
-                    "reason": row[4] if isinstance(row, tuple) else row["reason"],
-                    "agent": row[5] if isinstance(row, tuple) else row["agent"],
-                    "created_at": row[6] if isinstance(row, tuple) else row["created_at"]
-                })
-        return transitions
-    
-    @classmethod
-    def get_all_vehicle_data(cls) -> list:
-        """Get all vehicle data"""
-        query = "SELECT id, policy_id, plate, make, model, year, engine_number, chassis_number, engine_displacement FROM vehicles ORDER BY created_at DESC"
-        results = cls.db.execute_query(query)
-        
-        vehicles = []
-        if results:
-            for row in results:
-                vehicles.append({
-                    "id": row[0] if isinstance(row, tuple) else row["id"],
-                    "policy_id": row[1] if isinstance(row, tuple) else row["policy_id"],
-                    "plate": row[2] if isinstance(row, tuple) else row["plate"],
-                    "make": row[3] if isinstance(row, tuple) else row["make"],
-                    "model": row[4] if isinstance(row, tuple) else row["model"],
-                    "year": row[5] if isinstance(row, tuple) else row["year"],
-                    "engine_number": row[6] if isinstance(row, tuple) else row["engine_number"],
-                    "chassis_number": row[7] if isinstance(row, tuple) else row["chassis_number"],
-                    "engine_displacement": row[8] if isinstance(row, tuple) else row["engine_displacement"]
-                })
-        return vehicles
-    
-    @classmethod
-    def get_all_quotations(cls) -> list:
-        """Get all quotations"""
-        query = "SELECT id, policy_id, coverage_type, coverage_level, monthly_premium, annual_premium, deductible FROM quotations ORDER BY created_at DESC"
-        results = cls.db.execute_query(query)
+    def _keyset_page(cls, select: str, filters: dict, before: tuple = None, limit: int = 50,
+                     created_from: str = None, created_to: str = None,
+                     key: tuple = ("created_at", "id")) -> list:
+        """One page of an admin listing, newest first
         
-        quotations = []
-        if results:
-            for row in results:
-                quotations.append({
-                    "id": row[0] if isinstance(row, tuple) else row["id"],
-                    "policy_id": row[1] if isinstance(row, tuple) else row["policy_id"],
-                    "coverage_type": row[2] if isinstance(row, tuple) else row["coverage_type"],
-                    "coverage_level": row[3] if isinstance(row, tuple) else row["coverage_level"],
-                    "monthly_premium": row[4] if isinstance(row, tuple) else row["monthly_premium"],
-                    "annual_premium": row[5] if isinstance(row, tuple) else row["annual_premium"],
-                    "deductible": row[6] if isinstance(row, tuple) else row["deductible"]
-                })
-        return quotations
+        `filters` maps column -> value (None values are skipped). Keyset-paginated
+        on `key`: pass the last row's (created_at, id) as `before` for the next page.
+        """
+        created_col, id_col = key
+        conditions, params = [], []
+        for column, value in filters.items():
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if created_from:
+            conditions.append(f"{created_col} >= ?")
+            params.append(created_from)
+        if created_to:
+            conditions.append(f"{created_col} <= ?")
+            params.append(created_to)
+        if before:
+            conditions.append(f"({created_col} < ? OR ({created_col} = ? AND {id_col} < ?))")
+            params.extend([before[0], before[0], before[1]])
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"{select} {where} ORDER BY {created_col} DESC, {id_col} DESC LIMIT ?"
+        return cls.db.execute_query(query, tuple(params) + (limit,)) or []
+    
+    @classmethod
+    def get_all_policies(cls, limit: int = 50, before: tuple = None, state: str = None,
+                         insurance_type: str = None, created_from: str = None, created_to: str = None) -> list:
+        """Page of policies for the admin view"""
+        results = cls._keyset_page(
+            "SELECT id, state, intention, insurance_type, created_at, updated_at FROM policies",
+            {"state": state, "insurance_type": insurance_type},
+            before, limit, created_from, created_to
+        )
+        return [{
+            "id": row[0],
+            "state": row[1],
+            "intention": bool(row[2]),
+            "insurance_type": row[3],
+            "created_at": row[4],
+            "updated_at": row[5]
+        } for row in results]
+    
+    @classmethod
+    def get_all_client_data(cls, limit: int = 50, before: tuple = None, policy_id: str = None,
+                            email: str = None, created_from: str = None, created_to: str = None) -> list:
+        """Page of client data for the admin view"""
+        results = cls._keyset_page(
+            "SELECT id, policy_id, name, email, phone, created_at FROM client_data",
+            {"policy_id": policy_id, "email": email},
+            before, limit, created_from, created_to
+        )
+        return [{
+            "id": row[0],
+            "policy_id": row[1],
+            "name": row[2],
+            "email": row[3],
+            "phone": row[4],
+            "created_at": row[5]
+        } for row in results]
+    
+    @classmethod
+    def get_all_state_transitions(cls, limit: int = 50, before: tuple = None, policy_id: str = None,
+                                  to_state: str = None, agent: str = None,
+                                  created_from: str = None, created_to: str = None) -> list:
+        """Page of state transitions for the admin view"""
+        results = cls._keyset_page(
+            "SELECT id, policy_id, from_state, to_state, reason, agent, created_at FROM state_transitions",
+            {"policy_id": policy_id, "to_state": to_state, "agent": agent},
+            before, limit, created_from, created_to
+        )
+        return [{
+            "id": row[0],
+            "policy_id": row[1],
+            "from_state": row[2],
+            "to_state": row[3],
+            "reason": row[4],
+            "agent": row[5],
+            "created_at": row[6]
+        } for row in results]
+    
+    @classmethod
+    def get_all_vehicle_data(cls, limit: int = 50, before: tuple = None, policy_id: str = None,
+                             plate: str = None, created_from: str = None, created_to: str = None) -> list:
+        """Page of vehicle data for the admin view"""
+        results = cls._keyset_page(
+            """SELECT id, policy_id, plate, make, model, year, engine_number, chassis_number,
+                      engine_displacement, created_at FROM vehicle_data""",
+            {"policy_id": policy_id, "plate": plate},
+            before, limit, created_from, created_to
+        )
+        return [{
+            "id": row[0],
+            "policy_id": row[1],
+            "plate": row[2],
+            "make": row[3],
+            "model": row[4],
+            "year": row[5],
+            "engine_number": row[6],
+            "chassis_number": row[7],
+            "engine_displacement": row[8],
+            "created_at": row[9]
+        } for row in results]
+    
+    @classmethod
+    def get_all_quotations(cls, limit: int = 50, before: tuple = None, policy_id: str = None,
+                           coverage_type: str = None, created_from: str = None, created_to: str = None) -> list:
+        """Page of quotations for the admin view"""
+        results = cls._keyset_page(
+            """SELECT id, policy_id, coverage_type, coverage_level, monthly_premium, annual_premium,
+                      deductible, created_at FROM quotation_data""",
+            {"policy_id": policy_id, "coverage_type": coverage_type},
+            before, limit, created_from, created_to
+        )
+        return [{
+            "id": row[0],
+            "policy_id": row[1],
+            "coverage_type": row[2],
+            "coverage_level": row[3],
+            "monthly_premium": row[4],
+            "annual_premium": row[5],
+            "deductible": row[6],
+            "created_at": row[7]
+        } for row in results]
     
     @classmethod
     def save_vehicle_data(cls, policy_id: str, plate: str, make: str, model: str, year: int, 
@@ -413,6 +558,7 @@ class PolicyRepository:
         
         cls.db.execute_update(query, (vehicle_id, policy_id, plate, make, model, year, 
                                      engine_number, chassis_number, engine_displacement, now))
+        cls.invalidate_policy(policy_id)
         
         return VehicleData(
             id=vehicle_id,
@@ -428,133 +574,112 @@ class PolicyRepository:
         )
     
     @classmethod
-    def get_vehicle_data(cls, policy_id: str) -> VehicleData:
+    def get_vehicle_data(cls, policy_id: str, use_cache: bool = True) -> VehicleData:
         """Get vehicle data for a policy"""
-        query = """SELECT id, policy_id, plate, make, model, year, engine_number, chassis_number, engine_displacement, created_at 
-                   FROM vehicle_data WHERE policy_id = ?"""
+        if use_cache:
+            aggregate = cls.load_policy_aggregate(policy_id)
+            return aggregate.vehicle if aggregate else None
+        
+        query = f"SELECT {VEHICLE_COLUMNS} FROM vehicle_data WHERE policy_id = ?"
         result = cls.db.execute_query(query, (policy_id,))
         
-        if result:
-            row = result[0]
-            return VehicleData(
-                id=row[0] if isinstance(row, tuple) else row["id"],
-                policy_id=row[1] if isinstance(row, tuple) else row["policy_id"],
-                plate=row[2] if isinstance(row, tuple) else row["plate"],
-                make=row[3] if isinstance(row, tuple) else row["make"],
-                model=row[4] if isinstance(row, tuple) else row["model"],
-                year=row[5] if isinstance(row, tuple) else row["year"],
-                engine_number=row[6] if isinstance(row, tuple) else row["engine_number"],
-                chassis_number=row[7] if isinstance(row, tuple) else row["chassis_number"],
-                engine_displacement=row[8] if isinstance(row, tuple) else row["engine_displacement"],
-                created_at=row[9] if isinstance(row, tuple) else row["created_at"]
-            )
-        return None
+        return cls._vehicle_from_row(result[0]) if result else None
+    
+    @staticmethod
+    def _vehicle_from_row(row) -> VehicleData:
+        return VehicleData(
+            id=row[0],
+            policy_id=row[1],
+            plate=row[2],
+            make=row[3],
+            model=row[4],
+            year=row[5],
+            engine_number=row[6],
+            chassis_number=row[7],
+            engine_displacement=row[8],
+            created_at=row[9]
+        )
     
     @classmethod
     def generate_quotations(cls, policy_id: str, insurance_type: str) -> list:
-        """Generate quotations based on insurance type"""
+        """Generate quotations based on insurance type
+        
+        Vehicle and client are read in one batch, templates come from the
+        in-memory catalog, every coverage is priced in one vectorized pass
+        (src/pricing) and all quotation rows are inserted in a second batch.
+        """
         quotations = []
-        vehicle = cls.get_vehicle_data(policy_id)
+        vehicle_rows, client_rows = cls.db.execute_batch([
+            (f"SELECT {VEHICLE_COLUMNS} FROM vehicle_data WHERE policy_id = ?", (policy_id,)),
+            (f"SELECT {CLIENT_COLUMNS} FROM client_data WHERE policy_id = ?", (policy_id,)),
+        ])
         
-        if not vehicle:
+        if not vehicle_rows:
             return quotations
         
-        # Get base templates for this insurance type
-        query = """SELECT id, insurance_type, coverage_type, coverage_level, base_monthly_premium, deductible 
-                   FROM quotation_templates WHERE insurance_type = ? ORDER BY base_monthly_premium"""
-        results = cls.db.execute_query(query, (insurance_type,))
+        vehicle = cls._vehicle_from_row(vehicle_rows[0])
+        client = cls._client_from_row(client_rows[0]) if client_rows else None
+        priced = template_catalog.engine().quote(insurance_type, vehicle, client)
         
-        if not results:
-            return quotations
+        now = datetime.now().isoformat()
+        inserts = []
         
-        for template in results:
-            template_id = template[0] if isinstance(template, tuple) else template["id"]
-            coverage_type = template[2] if isinstance(template, tuple) else template["coverage_type"]
-            coverage_level = template[3] if isinstance(template, tuple) else template["coverage_level"]
-            base_premium = template[4] if isinstance(template, tuple) else template["base_monthly_premium"]
-            deductible = template[5] if isinstance(template, tuple) else template["deductible"]
-            
-            # Calculate monthly premium with adjustments
-            risk_factor = 1.0  # Can be adjusted based on vehicle/client
-            monthly_premium = base_premium * risk_factor
-            annual_premium = monthly_premium * 12
-            
+        for quote in priced:
             quotation_id = str(uuid.uuid4())
-            now = datetime.now().isoformat()
             
-            query = """
+            inserts.append(("""
                 INSERT INTO quotation_data (id, policy_id, vehicle_id, coverage_type, coverage_level, 
                                            monthly_premium, annual_premium, deductible, risk_level, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            cls.db.execute_update(query, (quotation_id, policy_id, vehicle.id, coverage_type, coverage_level,
-                                         monthly_premium, annual_premium, deductible, "medium", now))
+            """, (quotation_id, policy_id, vehicle.id, quote["coverage_type"], quote["coverage_level"],
+                  quote["monthly_premium"], quote["annual_premium"], quote["deductible"], quote["risk_level"], now)))
             
             quotations.append({
                 "id": quotation_id,
-                "coverage_type": coverage_type,
-                "coverage_level": coverage_level,
-                "monthly_premium": monthly_premium,
-                "annual_premium": annual_premium,
-                "deductible": deductible
+                "coverage_type": quote["coverage_type"],
+                "coverage_level": quote["coverage_level"],
+                "monthly_premium": quote["monthly_premium"],
+                "annual_premium": quote["annual_premium"],
+                "deductible": quote["deductible"]
             })
         
+        cls.db.execute_batch(inserts)
+        cls.invalidate_policy(policy_id)
+        
         return quotations
     
     @classmethod
-    def get_quotations(cls, policy_id: str) -> list:
+    def get_quotations(cls, policy_id: str, use_cache: bool = True) -> list:
         """Get all quotations for a policy"""
-        query = """SELECT id, coverage_type, coverage_level, monthly_premium, annual_premium, deductible, selected 
-                   FROM quotation_data WHERE policy_id = ? ORDER BY monthly_premium"""
+        if use_cache:
+            aggregate = cls.load_policy_aggregate(policy_id)
+            return aggregate.quotations if aggregate else []
+        
+        query = f"SELECT {QUOTATION_COLUMNS} FROM quotation_data WHERE policy_id = ? ORDER BY monthly_premium"
         results = cls.db.execute_query(query, (policy_id,))
         
-        quotations = []
-        if results:
-            for row in results:
-                quotations.append({
-                    "id": row[0] if isinstance(row, tuple) else row["id"],
-                    "coverage_type": row[1] if isinstance(row, tuple) else row["coverage_type"],
-                    "coverage_level": row[2] if isinstance(row, tuple) else row["coverage_level"],
-                    "monthly_premium": row[3] if isinstance(row, tuple) else row["monthly_premium"],
-                    "annual_premium": row[4] if isinstance(row, tuple) else row["annual_premium"],
-                    "deductible": row[5] if isinstance(row, tuple) else row["deductible"],
-                    "selected": bool(row[6] if isinstance(row, tuple) else row["selected"])
-                })
-        return quotations
+        return [cls._quotation_from_row(row) for row in results or []]
+    
+    @staticmethod
+    def _quotation_from_row(row) -> dict:
+        return {
+            "id": row[0],
+            "coverage_type": row[1],
+            "coverage_level": row[2],
+            "monthly_premium": row[3],
+            "annual_premium": row[4],
+            "deductible": row[5],
+            "selected": bool(row[6])
+        }
     
     @classmethod
     def seed_quotation_templates(cls):
-        """Seed database with base quotation templates"""
-        templates = [
-            # Auto insurance - different coverage levels
-            ("auto", "Responsabilidad Civil", "Básica", 45.00, 500.0),
-            ("auto", "Responsabilidad Civil", "Intermedia", 65.00, 250.0),
-            ("auto", "Todo Riesgo", "Básica", 95.00, 1000.0),
-            ("auto", "Todo Riesgo", "Premium", 145.00, 0.0),
-            # Moto insurance
-            ("moto", "Responsabilidad Civil", "Básica", 25.00, 1000.0),
-            ("moto", "Responsabilidad Civil", "Intermedia", 40.00, 500.0),
-            ("moto", "Todo Riesgo", "Básica", 60.00, 1500.0),
-            ("moto", "Todo Riesgo", "Premium", 95.00, 0.0),
-        ]
+        """Seed database with base quotation templates and load the template catalog
         
-        for insurance_type, coverage_type, coverage_level, premium, deductible in templates:
-            # Check if already exists
-            check_query = """SELECT id FROM quotation_templates 
-                           WHERE insurance_type = ? AND coverage_type = ? AND coverage_level = ?"""
-            existing = cls.db.execute_query(check_query, (insurance_type, coverage_type, coverage_level))
-            
-            if not existing:
-                template_id = str(uuid.uuid4())
-                now = datetime.now().isoformat()
-                
-                insert_query = """
-                    INSERT INTO quotation_templates (id, insurance_type, coverage_type, coverage_level, base_monthly_premium, deductible, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """
-                
-                cls.db.execute_update(insert_query, (template_id, insurance_type, coverage_type, coverage_level, premium, deductible, now))    
+        One idempotent INSERT OR IGNORE plus the catalog load, in one round-trip.
+        """
+        template_catalog.seed()
+    
     # ==================== Session Management (Persistent) ====================
     
     @classmethod
@@ -568,6 +693,7 @@ class PolicyRepository:
         """
         
         cls.db.execute_update(query, (session_id, policy_id, "[]", 0, now, now))
+        cls.invalidate_policy(policy_id)
         
         return {
             "session_id": session_id,
@@ -578,48 +704,155 @@ class PolicyRepository:
     
     @classmethod
     def get_session(cls, session_id: str) -> dict or None:
-        """Get session by ID"""
-        query = "SELECT session_id, policy_id, messages, context_built FROM sessions WHERE session_id = ?"
-        result = cls.db.execute_query(query, (session_id,))
+        """Get session by ID, with its full message history"""
+        session_rows, message_rows = cls.db.execute_batch([
+            (f"SELECT {SESSION_COLUMNS} FROM sessions WHERE session_id = ?", (session_id,)),
+            (f"SELECT {MESSAGE_COLUMNS} FROM session_messages WHERE session_id = ? ORDER BY seq", (session_id,)),
+        ])
         
-        if result:
-            row = result[0]
-            import json
-            session_id_val = row[0] if isinstance(row, tuple) else row["session_id"]
-            policy_id_val = row[1] if isinstance(row, tuple) else row["policy_id"]
-            messages_json = row[2] if isinstance(row, tuple) else row["messages"]
-            context_built_val = row[3] if isinstance(row, tuple) else row["context_built"]
-            
-            # Parse JSON messages
-            try:
-                messages = json.loads(messages_json) if isinstance(messages_json, str) else messages_json
-            except:
-                messages = []
-            
-            return {
-                "session_id": session_id_val,
-                "policy_id": policy_id_val,
-                "messages": messages,
-                "context_built": bool(context_built_val)
-            }
+        return cls._session_from_row(session_rows[0], message_rows) if session_rows else None
+    
+    @staticmethod
+    def _session_from_row(row, message_rows, summary_row=None) -> dict:
+        return {
+            "session_id": row[0],
+            "policy_id": row[1],
+            "messages": [{"seq": m[0], "role": m[1], "content": m[2]} for m in message_rows],
+            "context_built": bool(row[2]),
+            "summary": summary_row[0] if summary_row else None,
+            "summary_through_seq": summary_row[1] if summary_row else 0
+        }
+    
+    @staticmethod
+    def _message_from_row(row) -> dict:
+        return {"seq": row[0], "role": row[1], "content": row[2], "created_at": row[3]}
+    
+    @classmethod
+    def append_message(cls, session_id: str, role: str, content: str) -> dict:
+        """Append one message to a session (O(1) write, no history rewrite)"""
+        now = datetime.now().isoformat()
         
-        return None
+        # The session's message_count is the seq counter: bumping it and
+        # reading it back in one statement hands each append its own seq
+        results = cls.db.execute_batch(cls._append_message_statements(session_id, role, content, now))
+        cls._invalidate_session(session_id)
+        
+        return cls._appended_message(results, role, content, now)
+    
+    @classmethod
+    async def append_message_async(cls, session_id: str, role: str, content: str) -> dict:
+        """Native async append_message"""
+        now = datetime.now().isoformat()
+        
+        results = await cls.db.batch(cls._append_message_statements(session_id, role, content, now))
+        await cls._invalidate_session_async(session_id)
+        
+        return cls._appended_message(results, role, content, now)
+    
+    @staticmethod
+    def _append_message_statements(session_id: str, role: str, content: str, now: str) -> list:
+        return [
+            ("""
+                UPDATE sessions
+                SET message_count = message_count + 1, last_message_at = ?, last_role = ?, updated_at = ?
+                WHERE session_id = ?
+                RETURNING message_count
+            """, (now, role, now, session_id)),
+            ("""
+                INSERT INTO session_messages (session_id, seq, role, content, created_at)
+                SELECT session_id, message_count, ?, ?, ?
+                FROM sessions WHERE session_id = ?
+            """, (role, content, now, session_id)),
+        ]
+    
+    @staticmethod
+    def _appended_message(results, role: str, content: str, now: str) -> dict:
+        counter = results[0]
+        return {"seq": counter[0][0] if counter else None, "role": role, "content": content, "created_at": now}
+    
+    @classmethod
+    def get_session_messages(cls, session_id: str, limit: int = 50,
+                             before_seq: int = None, after_seq: int = None) -> list:
+        """Page through a session's messages, oldest first
+        
+        Without cursors returns the latest `limit` messages; pass the lowest
+        seq seen as `before_seq` to scroll back, or the highest as
+        `after_seq` to fetch newer ones.
+        """
+        conditions = ["session_id = ?"]
+        params = [session_id]
+        if before_seq is not None:
+            conditions.append("seq < ?")
+            params.append(before_seq)
+        if after_seq is not None:
+            conditions.append("seq > ?")
+            params.append(after_seq)
+        
+        # Newest-first when scrolling back, then flip to chronological order
+        order = "ASC" if after_seq is not None else "DESC"
+        query = f"""SELECT {MESSAGE_COLUMNS} FROM session_messages
+                    WHERE {' AND '.join(conditions)} ORDER BY seq {order} LIMIT ?"""
+        rows = cls.db.execute_query(query, (*params, limit))
+        
+        messages = [cls._message_from_row(row) for row in rows or []]
+        return messages if order == "ASC" else messages[::-1]
     
     @classmethod
     def update_session_messages(cls, session_id: str, messages: list):
-        """Update session messages"""
-        import json
+        """Replace the whole message history of a session
         
+        Rewrites every row - use append_message for new turns.
+        """
         now = datetime.now().isoformat()
-        messages_json = json.dumps(messages)
         
-        query = """
-            UPDATE sessions 
-            SET messages = ?, updated_at = ?
+        # A rewritten history invalidates any rolling summary of it
+        statements = [
+            ("DELETE FROM session_messages WHERE session_id = ?", (session_id,)),
+            ("DELETE FROM session_summaries WHERE session_id = ?", (session_id,)),
+        ]
+        for seq, message in enumerate(messages, 1):
+            statements.append(("""
+                INSERT INTO session_messages (session_id, seq, role, content, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (session_id, seq, message["role"], message["content"], now)))
+        statements.append(("""
+            UPDATE sessions
+            SET message_count = ?, last_message_at = ?, last_role = ?, updated_at = ?
             WHERE session_id = ?
+        """, (len(messages), now if messages else None, messages[-1]["role"] if messages else None,
+              now, session_id)))
+        
+        cls.db.execute_batch(statements)
+        cls._invalidate_session(session_id)
+    
+    @classmethod
+    def clear_session_messages(cls, session_id: str):
+        """Delete all messages of a session"""
+        cls.update_session_messages(session_id, [])
+    
+    @classmethod
+    def get_session_summary(cls, session_id: str) -> dict or None:
+        """Get the rolling summary of a session's older messages"""
+        rows = cls.db.execute_query(
+            "SELECT summary, through_seq, updated_at FROM session_summaries WHERE session_id = ?",
+            (session_id,)
+        )
+        if not rows:
+            return None
+        return {"summary": rows[0][0], "through_seq": rows[0][1], "updated_at": rows[0][2]}
+    
+    @classmethod
+    def save_session_summary(cls, session_id: str, summary: str, through_seq: int):
+        """Store the rolling summary covering messages up to through_seq"""
+        now = datetime.now().isoformat()
+        
+        query = """
+            INSERT OR REPLACE INTO session_summaries (session_id, summary, through_seq, updated_at)
+            VALUES (?, ?, ?, ?)
         """
         
-        cls.db.execute_update(query, (messages_json, now, session_id))
+        cls.db.execute_update(query, (session_id, summary, through_seq, now))
+        cls._invalidate_session(session_id)
     
     @classmethod
     def update_session_context_built(cls, session_id: str, context_built: bool):
@@ -633,45 +866,208 @@ class PolicyRepository:
         """
         
         cls.db.execute_update(query, (1 if context_built else 0, now, session_id))
+        cls._invalidate_session(session_id)
     
     @classmethod
     def delete_session(cls, session_id: str):
-        """Delete a session"""
-        query = "DELETE FROM sessions WHERE session_id = ?"
-        cls.db.execute_update(query, (session_id,))
-    
-    @classmethod
-    def get_all_sessions(cls) -> list:
-        """Get all sessions"""
-        query = "SELECT session_id, policy_id, messages, context_built, created_at, updated_at FROM sessions ORDER BY created_at DESC"
-        results = cls.db.execute_query(query, ())
-        
-        import json
-        sessions = []
-        if results:
-            for row in results:
-                session_id_val = row[0] if isinstance(row, tuple) else row["session_id"]
-                policy_id_val = row[1] if isinstance(row, tuple) else row["policy_id"]
-                messages_json = row[2] if isinstance(row, tuple) else row["messages"]
-                context_built_val = row[3] if isinstance(row, tuple) else row["context_built"]
-                created_at_val = row[4] if isinstance(row, tuple) else row["created_at"]
-                updated_at_val = row[5] if isinstance(row, tuple) else row["updated_at"]
-                
-                try:
-                    messages = json.loads(messages_json) if isinstance(messages_json, str) else messages_json
-                except:
-                    messages = []
-                
-                sessions.append({
-                    "session_id": session_id_val,
-                    "policy_id": policy_id_val,
-                    "messages_count": len(messages),
-                    "context_built": bool(context_built_val),
-                    "created_at": created_at_val,
-                    "updated_at": updated_at_val
-                })
-        
-        return sessions
+        """Delete a session, its messages and summary"""
+        cls.db.execute_batch([
+            ("DELETE FROM session_messages WHERE session_id = ?", (session_id,)),
+            ("DELETE FROM session_summaries WHERE session_id = ?", (session_id,)),
+            ("DELETE FROM sessions WHERE session_id = ?", (session_id,)),
+        ])
+        cls._invalidate_session(session_id)
+    
+    @classmethod
+    def get_all_sessions(cls, limit: int = 50, before: tuple = None, policy_id: str = None,
+                         created_from: str = None, created_to: str = None) -> list:
+        """Page of sessions for the admin view (never reads the messages themselves)"""
+        results = cls._keyset_page(
+            """SELECT session_id, policy_id, message_count, last_message_at, last_role,
+                      context_built, created_at, updated_at FROM sessions""",
+            {"policy_id": policy_id},
+            before, limit, created_from, created_to,
+            key=("created_at", "session_id")
+        )
+        return [{
+            "session_id": row[0],
+            "policy_id": row[1],
+            "messages_count": row[2],
+            "last_message_at": row[3],
+            "last_role": row[4],
+            "context_built": bool(row[5]),
+            "created_at": row[6],
+            "updated_at": row[7]
+        } for row in results]
+    
+    # ==================== Aggregates ====================
+    
+    @classmethod
+    def load_policy_aggregate(cls, policy_id: str, use_cache: bool = True) -> PolicyAggregate or None:
+        """Load policy, client, vehicle, quotations and session in one batch"""
+        if use_cache:
+            aggregate = cls.cache.get(policy_id)
+            if aggregate is not None:
+                return aggregate
+        
+        generation = cls.cache.generation
+        aggregate = cls._load_aggregate("?", (policy_id,))
+        if use_cache:
+            cls._cache_aggregate(aggregate, generation)
+        return aggregate
+    
+    @classmethod
+    async def load_policy_aggregate_async(cls, policy_id: str, use_cache: bool = True) -> PolicyAggregate or None:
+        """Native async load_policy_aggregate"""
+        if use_cache:
+            aggregate = cls.cache.get(policy_id)
+            if aggregate is not None:
+                return aggregate
+        
+        generation = cls.cache.generation
+        aggregate = await cls._load_aggregate_async("?", (policy_id,))
+        if use_cache:
+            cls._cache_aggregate(aggregate, generation)
+        return aggregate
+    
+    @classmethod
+    def load_session_aggregate(cls, session_id: str, use_cache: bool = True) -> PolicyAggregate or None:
+        """Same as load_policy_aggregate, keyed by chat session ID"""
+        aggregate = cls._cached_session_aggregate(session_id) if use_cache else None
+        if aggregate is not None:
+            return aggregate
+        
+        generation = cls.cache.generation
+        aggregate = cls._load_aggregate(*cls._session_aggregate_key(session_id))
+        if aggregate is None or aggregate.session is None:
+            return None
+        if use_cache:
+            cls._cache_aggregate(aggregate, generation)
+        return aggregate
+    
+    @classmethod
+    async def load_session_aggregate_async(cls, session_id: str, use_cache: bool = True) -> PolicyAggregate or None:
+        """Native async load_session_aggregate"""
+        aggregate = cls._cached_session_aggregate(session_id) if use_cache else None
+        if aggregate is not None:
+            return aggregate
+        
+        generation = cls.cache.generation
+        aggregate = await cls._load_aggregate_async(*cls._session_aggregate_key(session_id))
+        if aggregate is None or aggregate.session is None:
+            return None
+        if use_cache:
+            cls._cache_aggregate(aggregate, generation)
+        return aggregate
+    
+    @classmethod
+    def _cached_session_aggregate(cls, session_id: str) -> PolicyAggregate or None:
+        policy_id = cls.cache.key_for(session_id)
+        if policy_id:
+            aggregate = cls.cache.get(policy_id)
+            if aggregate is not None and aggregate.session and aggregate.session["session_id"] == session_id:
+                return aggregate
+        return None
+    
+    @staticmethod
+    def _session_aggregate_key(session_id: str) -> tuple:
+        return ("(SELECT policy_id FROM sessions WHERE session_id = ?)", (session_id,),
+                ("session_id = ?", (session_id,)))
+    
+    @classmethod
+    def _load_aggregate(cls, policy_key: str, key_params: tuple, session_filter=None) -> PolicyAggregate or None:
+        """Run the aggregate reads as one batch; policy_key is an SQL expression for the policy ID"""
+        return cls._aggregate_from_results(
+            cls.db.execute_batch(cls._aggregate_statements(policy_key, key_params, session_filter))
+        )
+    
+    @classmethod
+    async def _load_aggregate_async(cls, policy_key: str, key_params: tuple, session_filter=None) -> PolicyAggregate or None:
+        return cls._aggregate_from_results(
+            await cls.db.batch(cls._aggregate_statements(policy_key, key_params, session_filter))
+        )
+    
+    @staticmethod
+    def _aggregate_statements(policy_key: str, key_params: tuple, session_filter=None) -> list:
+        session_where, session_params = session_filter or (f"policy_id = {policy_key}", key_params)
+        session_query = f"SELECT {SESSION_COLUMNS} FROM sessions WHERE {session_where} ORDER BY created_at DESC LIMIT 1"
+        session_id_query = f"SELECT session_id FROM ({session_query})"
+        return [
+            (f"SELECT {POLICY_COLUMNS} FROM policies WHERE id = {policy_key}", key_params),
+            (f"SELECT {CLIENT_COLUMNS} FROM client_data WHERE policy_id = {policy_key}", key_params),
+            (f"SELECT {VEHICLE_COLUMNS} FROM vehicle_data WHERE policy_id = {policy_key}", key_params),
+            (f"SELECT {QUOTATION_COLUMNS} FROM quotation_data WHERE policy_id = {policy_key} ORDER BY monthly_premium", key_params),
+            (session_query, session_params),
+            (f"""SELECT {MESSAGE_COLUMNS} FROM session_messages
+                 WHERE session_id = ({session_id_query}) ORDER BY seq""", session_params),
+            (f"SELECT summary, through_seq FROM session_summaries WHERE session_id = ({session_id_query})", session_params),
+        ]
+    
+    @classmethod
+    def _aggregate_from_results(cls, results) -> PolicyAggregate or None:
+        (policy_rows, client_rows, vehicle_rows, quotation_rows,
+         session_rows, message_rows, summary_rows) = results
+        if not policy_rows:
+            return None
+        
+        return PolicyAggregate(
+            policy=cls._policy_from_row(policy_rows[0]),
+            client=cls._client_from_row(client_rows[0]) if client_rows else None,
+            vehicle=cls._vehicle_from_row(vehicle_rows[0]) if vehicle_rows else None,
+            quotations=[cls._quotation_from_row(row) for row in quotation_rows],
+            session=cls._session_from_row(
+                session_rows[0], message_rows, summary_rows[0] if summary_rows else None
+            ) if session_rows else None
+        )
+    
+    # ==================== Cache ====================
+    
+    @classmethod
+    def _cache_aggregate(cls, aggregate: PolicyAggregate, generation: int):
+        if aggregate is None:
+            return
+        aliases = (aggregate.session["session_id"],) if aggregate.session else ()
+        cls.cache.set(aggregate.policy.id, aggregate, generation=generation, aliases=aliases)
+    
+    @classmethod
+    def invalidate_policy(cls, policy_id: str):
+        """Drop a policy from the read cache
+        
+        Inside a unit of work the writes are still buffered, so the entry is
+        dropped again once they commit.
+        """
+        if policy_id is None:
+            return
+        cls.cache.invalidate(policy_id)
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.after_commit(lambda: cls.cache.invalidate(policy_id))
+    
+    @classmethod
+    def _invalidate_session(cls, session_id: str):
+        """Invalidate the policy a session belongs to (looked up if its aggregate isn't cached)"""
+        if not cls.cache.enabled:
+            return
+        policy_id = cls.cache.key_for(session_id)
+        if policy_id is None:
+            rows = cls.db.execute_query("SELECT policy_id FROM sessions WHERE session_id = ?", (session_id,))
+            policy_id = rows[0][0] if rows else None
+        cls.invalidate_policy(policy_id)
+    
+    @classmethod
+    async def _invalidate_session_async(cls, session_id: str):
+        if not cls.cache.enabled:
+            return
+        policy_id = cls.cache.key_for(session_id)
+        if policy_id is None:
+            rows = await cls.db.fetch("SELECT policy_id FROM sessions WHERE session_id = ?", (session_id,))
+            policy_id = rows[0][0] if rows else None
+        cls.invalidate_policy(policy_id)
+    
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """Hit/miss counters of the policy read cache"""
+        return cls.cache.stats()
     
     # ============== Payment Methods ==============
     
@@ -679,20 +1075,26 @@ class PolicyRepository:
     def create_payment(cls, policy_id: str, quotation_id: str, amount: float, 
                       preference_id: str, payment_link: str) -> PaymentData:
         """Create a payment record with Mercado Pago preference"""
-        payment_id = str(uuid.uuid4())
+        payment = cls._new_payment(policy_id, quotation_id, amount, preference_id, payment_link)
+        cls.db.execute_update(*cls._payment_insert(payment))
+        cls.invalidate_policy(policy_id)
+        return payment
+    
+    @classmethod
+    async def create_payment_async(cls, policy_id: str, quotation_id: str, amount: float,
+                                   preference_id: str, payment_link: str) -> PaymentData:
+        """Native async create_payment"""
+        payment = cls._new_payment(policy_id, quotation_id, amount, preference_id, payment_link)
+        await cls.db.execute(*cls._payment_insert(payment))
+        cls.invalidate_policy(policy_id)
+        return payment
+    
+    @staticmethod
+    def _new_payment(policy_id: str, quotation_id: str, amount: float,
+                     preference_id: str, payment_link: str) -> PaymentData:
         now = datetime.now().isoformat()
-        
-        query = """
-            INSERT INTO payments (id, policy_id, quotation_id, amount, preference_id, 
-                                 payment_link, payment_status, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)
-        """
-        
-        cls.db.execute_update(query, (payment_id, policy_id, quotation_id, amount, 
-                                     preference_id, payment_link, now, now))
-        
         return PaymentData(
-            id=payment_id,
+            id=str(uuid.uuid4()),
             policy_id=policy_id,
             quotation_id=quotation_id,
             amount=amount,
@@ -703,38 +1105,95 @@ class PolicyRepository:
             updated_at=now
         )
     
+    @staticmethod
+    def _payment_insert(payment: PaymentData) -> tuple:
+        query = """
+            INSERT INTO payments (id, policy_id, quotation_id, amount, preference_id, 
+                                 payment_link, payment_status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 'pending', ?, ?)
+        """
+        return query, (payment.id, payment.policy_id, payment.quotation_id, payment.amount,
+                       payment.preference_id, payment.payment_link, payment.created_at, payment.updated_at)
+    
     @classmethod
     def get_payment_by_policy(cls, policy_id: str) -> PaymentData:
         """Get payment by policy ID"""
-        query = """
-            SELECT id, policy_id, quotation_id, amount, preference_id, payment_link,
-                   payment_status, payment_id, created_at, updated_at
-            FROM payments 
-            WHERE policy_id = ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        """
-        result = cls.db.execute_query(query, (policy_id,))
+        result = cls.db.execute_query(LATEST_PAYMENT_QUERY, (policy_id,))
+        return cls._payment_from_row(result[0]) if result else None
+    
+    @classmethod
+    async def get_payment_by_policy_async(cls, policy_id: str) -> PaymentData:
+        """Native async get_payment_by_policy"""
+        result = await cls.db.fetch(LATEST_PAYMENT_QUERY, (policy_id,))
+        return cls._payment_from_row(result[0]) if result else None
+    
+    @staticmethod
+    def _payment_from_row(row) -> PaymentData:
+        return PaymentData(
+            id=row[0],
+            policy_id=row[1],
+            quotation_id=row[2],
+            amount=row[3],
+            preference_id=row[4],
+            payment_link=row[5],
+            payment_status=row[6],
+            payment_id=row[7],
+            created_at=row[8],
+            updated_at=row[9]
+        )
+    
+    @classmethod
+    def get_pending_payments(cls, created_before: str, after: tuple = ("", ""), limit: int = 100) -> list:
+        """Page of pending payments created before a timestamp
         
-        if result:
-            row = result[0]
-            return PaymentData(
-                id=row[0],
-                policy_id=row[1],
-                quotation_id=row[2],
-                amount=row[3],
-                preference_id=row[4],
-                payment_link=row[5],
-                payment_status=row[6],
-                payment_id=row[7],
-                created_at=row[8],
-                updated_at=row[9]
-            )
-        return None
+        Keyset-paginated on (created_at, id): pass the last row's
+        (created_at, id) as `after` to get the next page.
+        """
+        results = cls.db.execute_query(*cls._pending_payments_query(created_before, after, limit))
+        return [cls._payment_from_row(row) for row in results or []]
+    
+    @classmethod
+    async def get_pending_payments_async(cls, created_before: str, after: tuple = ("", ""), limit: int = 100) -> list:
+        """Native async get_pending_payments"""
+        results = await cls.db.fetch(*cls._pending_payments_query(created_before, after, limit))
+        return [cls._payment_from_row(row) for row in results or []]
+    
+    @staticmethod
+    def _pending_payments_query(created_before: str, after: tuple, limit: int) -> tuple:
+        after_created_at, after_id = after
+        query = f"""
+            SELECT {PAYMENT_COLUMNS}
+            FROM payments
+            WHERE payment_status = 'pending' AND created_at <= ?
+              AND (created_at > ? OR (created_at = ? AND id > ?))
+            ORDER BY created_at, id
+            LIMIT ?
+        """
+        return query, (created_before, after_created_at, after_created_at, after_id, limit)
+    
+    @classmethod
+    def get_policy_states(cls, policy_ids: list) -> dict:
+        """policy_id -> state for several policies in one query"""
+        if not policy_ids:
+            return {}
+        marks = ", ".join("?" for _ in policy_ids)
+        results = cls.db.execute_query(f"SELECT id, state FROM policies WHERE id IN ({marks})", tuple(policy_ids))
+        return {row[0]: row[1] for row in results or []}
     
     @classmethod
     def update_payment_status(cls, preference_id: str, payment_status: str, payment_id: str = None):
         """Update payment status after webhook notification"""
+        cls.db.execute_update(*cls._payment_status_update(preference_id, payment_status, payment_id))
+        return True
+    
+    @classmethod
+    async def update_payment_status_async(cls, preference_id: str, payment_status: str, payment_id: str = None):
+        """Native async update_payment_status"""
+        await cls.db.execute(*cls._payment_status_update(preference_id, payment_status, payment_id))
+        return True
+    
+    @staticmethod
+    def _payment_status_update(preference_id: str, payment_status: str, payment_id: str = None) -> tuple:
         now = datetime.now().isoformat()
         
         if payment_id:
@@ -743,42 +1202,72 @@ class PolicyRepository:
                 SET payment_status = ?, payment_id = ?, updated_at = ?
                 WHERE preference_id = ?
             """
-            cls.db.execute_update(query, (payment_status, payment_id, now, preference_id))
-        else:
-            query = """
-                UPDATE payments 
-                SET payment_status = ?, updated_at = ?
-                WHERE preference_id = ?
-            """
-            cls.db.execute_update(query, (payment_status, now, preference_id))
+            return query, (payment_status, payment_id, now, preference_id)
         
-        return True
-    
-    @classmethod
-    def get_all_payments(cls):
-        """Get all payments for admin view"""
         query = """
-            SELECT id, policy_id, quotation_id, amount, preference_id, payment_link,
-                   payment_status, payment_id, created_at, updated_at
-            FROM payments
-            ORDER BY created_at DESC
+            UPDATE payments 
+            SET payment_status = ?, updated_at = ?
+            WHERE preference_id = ?
         """
-        results = cls.db.execute_query(query)
-        
-        payments = []
-        if results:
-            for row in results:
-                payments.append({
-                    "id": row[0],
-                    "policy_id": row[1],
-                    "quotation_id": row[2],
-                    "amount": row[3],
-                    "preference_id": row[4],
-                    "payment_link": row[5],
-                    "payment_status": row[6],
-                    "payment_id": row[7],
-                    "created_at": row[8],
-                    "updated_at": row[9]
-                })
-        
-        return payments
\ No newline at end of file
+        return query, (payment_status, now, preference_id)
+    
+    @classmethod
+    def get_all_payments(cls, limit: int = 50, before: tuple = None, payment_status: str = None,
+                         policy_id: str = None, created_from: str = None, created_to: str = None) -> list:
+        """Page of payments for the admin view"""
+        results = cls._keyset_page(
+            """SELECT id, policy_id, quotation_id, amount, preference_id, payment_link,
+                      payment_status, payment_id, created_at, updated_at FROM payments""",
+            {"payment_status": payment_status, "policy_id": policy_id},
+            before, limit, created_from, created_to
+        )
+        return [{
+            "id": row[0],
+            "policy_id": row[1],
+            "quotation_id": row[2],
+            "amount": row[3],
+            "preference_id": row[4],
+            "payment_link": row[5],
+            "payment_status": row[6],
+            "payment_id": row[7],
+            "created_at": row[8],
+            "updated_at": row[9]
+        } for row in results]
+    
+    # ==================== Async variants ====================
+    # The hot paths above have native *_async methods on top of
+    # DatabaseConnection.fetch/execute/batch; the rest run in the default executor.
+    
+    create_policy_async = _threaded(create_policy)
+    save_client_data_async = _threaded(save_client_data)
+    get_client_data_async = _threaded(get_client_data)
+    update_client_data_partial_async = _threaded(update_client_data_partial)
+    save_exploration_data_async = _threaded(save_exploration_data)
+    get_exploration_data_async = _threaded(get_exploration_data)
+    save_quotation_data_async = _threaded(save_quotation_data)
+    get_quotation_data_async = _threaded(get_quotation_data)
+    set_intention_async = _threaded(set_intention)
+    get_all_policies_async = _threaded(get_all_policies)
+    get_all_client_data_async = _threaded(get_all_client_data)
+    get_all_state_transitions_async = _threaded(get_all_state_transitions)
+    get_all_vehicle_data_async = _threaded(get_all_vehicle_data)
+    get_all_quotations_async = _threaded(get_all_quotations)
+    save_vehicle_data_async = _threaded(save_vehicle_data)
+    get_vehicle_data_async = _threaded(get_vehicle_data)
+    generate_quotations_async = _threaded(generate_quotations)
+    get_quotations_async = _threaded(get_quotations)
+    seed_quotation_templates_async = _threaded(seed_quotation_templates)
+    create_session_async = _threaded(create_session)
+    get_session_async = _threaded(get_session)
+    get_session_messages_async = _threaded(get_session_messages)
+    update_session_messages_async = _threaded(update_session_messages)
+    clear_session_messages_async = _threaded(clear_session_messages)
+    get_session_summary_async = _threaded(get_session_summary)
+    save_session_summary_async = _threaded(save_session_summary)
+    update_session_context_built_async = _threaded(update_session_context_built)
+    delete_session_async = _threaded(delete_session)
+    get_all_sessions_async = _threaded(get_all_sessions)
+    invalidate_policy_async = _threaded(invalidate_policy)
+    cache_stats_async = _threaded(cache_stats)
+    get_policy_states_async = _threaded(get_policy_states)
+    get_all_payments_async = _threaded(get_all_payments)
@@ -0,0 +1,111 @@
+"""
+Unit of work: buffer writes and commit them atomically in one round-trip
+
+    with PolicyRepository.transaction():
+        PolicyRepository.set_intention(policy_id, "auto")
+        PolicyRepository.update_policy_state(policy_id, "loaded", reason, agent)
+
+    async with PolicyRepository.transaction():
+        await PolicyRepository.set_intention_async(policy_id, "auto")
+
+While a unit of work is active, every write issued through DatabaseConnection
+(execute_update / execute / the write statements of execute_batch) is
+buffered and sent as a single libsql batch (Turso) or a single sqlite
+transaction when the block exits. If the block raises, nothing is written.
+Nested blocks join the outermost one; if a nested block raises, only its
+own writes are dropped, so the outer block can catch the error and go on.
+
+Reads are NOT buffered: they run immediately and do not see the unit of
+work's own pending writes.
+"""
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+Statement = Tuple[str, tuple]
+
+_current: ContextVar[Optional["UnitOfWork"]] = ContextVar("db_unit_of_work", default=None)
+
+
+def current_unit_of_work() -> Optional["UnitOfWork"]:
+    """The unit of work active in this context, if any"""
+    return _current.get()
+
+
+def is_read_statement(query: str) -> bool:
+    """Whether a statement only reads (and can run outside the buffer)"""
+    head = query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+    return head in ("SELECT", "WITH", "PRAGMA", "EXPLAIN")
+
+
+class UnitOfWork:
+    """Collects write statements and flushes them in one atomic batch"""
+
+    def __init__(self, db):
+        self.db = db
+        self.statements: List[Statement] = []
+        self.results = None
+        self._after_commit: List[Callable[[], None]] = []
+        self._token = None
+        self._outer = None
+        self._mark = (0, 0)
+
+    def add(self, query: str, params=None):
+        """Buffer a write statement"""
+        self.statements.append((query, tuple(params) if params else ()))
+    
+    def after_commit(self, callback: Callable[[], None]):
+        """Run a callback once the buffered writes have been committed"""
+        self._after_commit.append(callback)
+
+    # ---- sync ----
+
+    def __enter__(self) -> "UnitOfWork":
+        self._begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        statements = self._end(exc_type is not None)
+        if exc_type is None and self._outer is None and statements:
+            self.results = self.db.execute_batch(statements)
+            self._run_after_commit()
+        return False
+
+    # ---- async ----
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self._begin()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        statements = self._end(exc_type is not None)
+        if exc_type is None and self._outer is None and statements:
+            self.results = await self.db.batch(statements)
+            self._run_after_commit()
+        return False
+
+    def _begin(self):
+        # Nested blocks join the outermost unit of work
+        self._outer = _current.get()
+        if self._outer is not None:
+            self.statements = self._outer.statements
+            self._after_commit = self._outer._after_commit
+            self._mark = (len(self.statements), len(self._after_commit))
+        self._token = _current.set(self._outer or self)
+
+    def _end(self, failed: bool) -> List[Statement]:
+        # Deactivate before flushing so the flush itself isn't buffered
+        _current.reset(self._token)
+        self._token = None
+        statements = self.statements
+        if self._outer is None:
+            self.statements = []
+        elif failed:
+            # Roll the shared buffer back to where this nested block started
+            del statements[self._mark[0]:]
+            del self._after_commit[self._mark[1]:]
+        return statements
+    
+    def _run_after_commit(self):
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
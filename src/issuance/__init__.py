@@ -0,0 +1 @@
+# Issuance module
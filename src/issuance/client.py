@@ -0,0 +1,129 @@
+"""
+Issuer API clients
+
+The issuance worker only talks to an IssuerClient. HttpIssuerClient posts
+the policy to ISSUER_API_URL; StubIssuerClient (used when no URL is
+configured, and in tests) just logs the payload and makes up a policy number.
+
+    policy_number = await client.issue(build_issuance_payload(aggregate))
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import requests
+
+from src.config import Config
+from src.models import PolicyAggregate
+
+
+class IssuerError(Exception):
+    """The issuer did not accept the policy (the worker retries later)"""
+
+
+def build_issuance_payload(aggregate: PolicyAggregate) -> dict:
+    """Policy, client, vehicle and chosen quotation in the issuer's format"""
+    policy = aggregate.policy
+    client_data = aggregate.client
+    vehicle_data = aggregate.vehicle
+    selected = aggregate.selected_quotation or (aggregate.quotations[0] if aggregate.quotations else None)
+
+    if not client_data or not vehicle_data:
+        raise IssuerError(f"Policy {policy.id} is missing client or vehicle data")
+    if not selected:
+        raise IssuerError(f"Policy {policy.id} has no quotation to issue")
+
+    return {
+        "policy_id": policy.id,
+        "client": {
+            "name": client_data.name,
+            "email": client_data.email,
+            "phone": client_data.phone
+        },
+        "vehicle": {
+            "make": vehicle_data.make,
+            "model": vehicle_data.model,
+            "year": vehicle_data.year,
+            "plate": vehicle_data.plate,
+            "engine_number": vehicle_data.engine_number,
+            "chassis_number": vehicle_data.chassis_number
+        },
+        "insurance": {
+            "type": policy.insurance_type,
+            "coverage_type": selected['coverage_type'],
+            "coverage_level": selected['coverage_level'],
+            "monthly_premium": selected['monthly_premium'],
+            "annual_premium": selected['annual_premium'],
+            "deductible": selected['deductible']
+        }
+    }
+
+
+class IssuerClient(ABC):
+    """Interface of an issuer API client"""
+
+    @abstractmethod
+    async def issue(self, payload: dict) -> str:
+        """Send one policy; returns the issuer's policy number"""
+
+    def close(self):
+        pass
+
+
+class HttpIssuerClient(IssuerClient):
+    """REST issuer: POST the payload as JSON, keyed by policy id"""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: Optional[float] = None):
+        self.url = url
+        self.token = token
+        self.timeout = timeout or Config.ISSUER_TIMEOUT
+        self.session = requests.Session()
+
+    def _post(self, payload: dict) -> str:
+        headers = {"Idempotency-Key": payload["policy_id"]}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            response = self.session.post(self.url, json=payload, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise IssuerError(f"Issuer request failed: {e}") from e
+        if response.status_code >= 400:
+            raise IssuerError(f"Issuer returned {response.status_code}: {response.text[:200]}")
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        return str(body.get("policy_number") or body.get("id") or payload["policy_id"])
+
+    async def issue(self, payload: dict) -> str:
+        return await asyncio.to_thread(self._post, payload)
+
+    def close(self):
+        self.session.close()
+
+
+class StubIssuerClient(IssuerClient):
+    """Local issuer for development and tests (idempotent per policy, like the real API)"""
+
+    def __init__(self):
+        self.issued: List[dict] = []
+        self.duplicates = 0
+        self.fail_with: Optional[Exception] = None
+
+    async def issue(self, payload: dict) -> str:
+        if self.fail_with:
+            raise self.fail_with
+        if any(sent["policy_id"] == payload["policy_id"] for sent in self.issued):
+            self.duplicates += 1
+            return f"POL-{payload['policy_id'][:8].upper()}"
+        self.issued.append(payload)
+        print(f"📤 Enviando póliza a API (stub): {json.dumps(payload, ensure_ascii=False)}")
+        return f"POL-{payload['policy_id'][:8].upper()}"
+
+
+def default_issuer_client() -> IssuerClient:
+    """HTTP client when ISSUER_API_URL is set, otherwise the stub"""
+    if Config.ISSUER_API_URL:
+        return HttpIssuerClient(Config.ISSUER_API_URL, Config.ISSUER_API_TOKEN)
+    return StubIssuerClient()
@@ -0,0 +1,226 @@
+"""
+Transactional outbox for policy issuance
+
+Moving a policy to "issued" (PolicyRepository.update_policy_state) also
+writes its issuance_outbox row in the same batch, so an approved payment
+can never be lost between the state change and the issuer call. The
+IssuanceWorker drains due rows in batches, sends each policy through an
+IssuerClient, and in one transaction per batch marks the rows done and
+moves the policies to "completed" - no LLM involved.
+
+    pending -> processing -> done (policy completed)
+                          -> pending (retried at next_attempt_at) -> ... -> failed
+
+Rows are claimed before being sent, like webhook events (see
+src/payments/webhooks.py): one conditional UPDATE moves them to
+"processing" and pushes next_attempt_at ISSUANCE_CLAIM_TIMEOUT seconds
+ahead as a lease, so the background loop, the admin drain endpoint and
+other processes never send the same policy at the same time. The done /
+retry updates only apply while the lease is held.
+
+A crash after the issuer accepted a policy but before the batch committed
+re-sends it once the lease expires; HttpIssuerClient passes the policy id
+as Idempotency-Key so the issuer can drop the duplicate.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from src.config import Config
+from src.db.connection import DatabaseConnection
+from src.db.repository import PolicyRepository
+from src.issuance.client import IssuerClient, build_issuance_payload, default_issuer_client
+
+OUTBOX_COLUMNS = "policy_id, status, attempts, next_attempt_at, last_error, external_id"
+
+AGENT_NAME = "IssuanceWorker"
+
+ISSUING_REPLY = ("⏳ ¡Pago confirmado! Tu póliza se está emitiendo y te llegará por email "
+                 "en unos minutos.")
+ISSUANCE_FAILED_REPLY = ("⚠️ Tu pago está confirmado, pero hubo una demora al emitir la póliza. "
+                         "Nuestro equipo ya fue notificado y te contactará a la brevedad.")
+
+
+class IssuanceWorker:
+    """Drains issuance_outbox into the issuer API"""
+
+    def __init__(self, client: Optional[IssuerClient] = None, batch_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None, retry_base: Optional[float] = None,
+                 poll_interval: Optional[float] = None, db=DatabaseConnection):
+        self.client = client or default_issuer_client()
+        self.batch_size = batch_size or Config.ISSUANCE_BATCH_SIZE
+        self.max_attempts = max_attempts or Config.ISSUANCE_MAX_ATTEMPTS
+        self.retry_base = Config.ISSUANCE_RETRY_BASE_SECONDS if retry_base is None else retry_base
+        self.poll_interval = Config.ISSUANCE_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.claim_timeout = Config.ISSUANCE_CLAIM_TIMEOUT
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+        self.issued = 0
+        self.retried = 0
+        self.failed = 0
+
+    # ==================== Outbox ====================
+
+    def enqueue(self, policy_id: str):
+        """Queue a policy that reached "issued" some other way (no-op if already queued)"""
+        now = datetime.now().isoformat()
+        self.db.execute_update("""
+            INSERT OR IGNORE INTO issuance_outbox
+              (policy_id, status, attempts, next_attempt_at, created_at, updated_at)
+            VALUES (?, 'pending', 0, ?, ?, ?)
+        """, (policy_id, now, now, now))
+
+    def due_rows(self, limit: Optional[int] = None) -> list:
+        """Pending rows that are due, plus claims whose lease expired"""
+        return self.db.execute_query(f"""
+            SELECT {OUTBOX_COLUMNS} FROM issuance_outbox
+            WHERE status IN ('pending', 'processing') AND next_attempt_at <= ?
+            ORDER BY next_attempt_at LIMIT ?
+        """, (datetime.now().isoformat(), limit or self.batch_size)) or []
+
+    def claim(self, rows) -> Tuple[list, Optional[str]]:
+        """Take due rows for sending; returns the ones this call got and their lease"""
+        if not rows:
+            return [], None
+        now = datetime.now()
+        lease = (now + timedelta(seconds=self.claim_timeout)).isoformat()
+        placeholders = ", ".join("?" for _ in rows)
+        claimed = self.db.execute_batch([(f"""
+            UPDATE issuance_outbox
+            SET status = 'processing', next_attempt_at = ?, updated_at = ?
+            WHERE policy_id IN ({placeholders})
+              AND status IN ('pending', 'processing') AND next_attempt_at <= ?
+            RETURNING policy_id
+        """, (lease, now.isoformat(), *(row[0] for row in rows), now.isoformat()))])[0]
+        ids = {row[0] for row in claimed}
+        return [row for row in rows if row[0] in ids], lease
+
+    def status(self, policy_id: str) -> Optional[str]:
+        rows = self.db.execute_query("SELECT status FROM issuance_outbox WHERE policy_id = ?", (policy_id,))
+        return rows[0][0] if rows else None
+
+    def status_reply(self, policy_id: str) -> str:
+        """Fixed reply for a client whose policy is being issued"""
+        return ISSUANCE_FAILED_REPLY if self.status(policy_id) == "failed" else ISSUING_REPLY
+
+    def stats(self) -> dict:
+        rows = self.db.execute_query("SELECT status, COUNT(*) FROM issuance_outbox GROUP BY status") or []
+        return {
+            "outbox": {row[0]: row[1] for row in rows},
+            "client": type(self.client).__name__,
+            "issued": self.issued,
+            "retried": self.retried,
+            "failed": self.failed,
+            "running": self._task is not None and not self._task.done()
+        }
+
+    # ==================== Processing ====================
+
+    async def _send(self, row):
+        """Issue one policy; returns (policy_id, attempts, external_id, error)"""
+        policy_id, attempts = row[0], row[2] + 1
+        try:
+            aggregate = await PolicyRepository.load_policy_aggregate_async(policy_id, use_cache=False)
+            if aggregate is None:
+                raise ValueError(f"Policy {policy_id} not found")
+            external_id = await self.client.issue(build_issuance_payload(aggregate))
+            return policy_id, attempts, external_id, None
+        except Exception as e:
+            return policy_id, attempts, None, str(e) or type(e).__name__
+
+    async def run_once(self) -> int:
+        """Claim and send one batch of due policies; returns how many this call claimed"""
+        due = await asyncio.to_thread(self.due_rows)
+        rows, lease = await asyncio.to_thread(self.claim, due)
+        if not rows:
+            return 0
+        results = await asyncio.gather(*(self._send(row) for row in rows))
+        await asyncio.to_thread(self._apply, results, lease)
+        return len(rows)
+
+    def _apply(self, results, lease: str):
+        """Record a batch's outcomes and complete the issued policies, atomically"""
+        issued = [r for r in results if r[3] is None]
+        states = PolicyRepository.get_policy_states([r[0] for r in issued])
+        now = datetime.now()
+
+        with PolicyRepository.transaction():
+            for policy_id, attempts, external_id, _ in issued:
+                self.db.execute_update("""
+                    UPDATE issuance_outbox
+                    SET status = 'done', attempts = ?, external_id = ?, last_error = NULL,
+                        processed_at = ?, updated_at = ?
+                    WHERE policy_id = ? AND status = 'processing' AND next_attempt_at = ?
+                """, (attempts, external_id, now.isoformat(), now.isoformat(), policy_id, lease))
+                # Only "issued" moves on; anything else was changed by hand meanwhile
+                if states.get(policy_id) == "issued":
+                    PolicyRepository.update_policy_state(
+                        policy_id=policy_id,
+                        new_state="completed",
+                        reason=f"Póliza emitida por la API del emisor (N° {external_id})",
+                        agent=AGENT_NAME,
+                        expected_state="issued"
+                    )
+
+            for policy_id, attempts, _, error in results:
+                if error is not None:
+                    self._schedule_retry(policy_id, attempts, error, now, lease)
+
+        self.issued += len(issued)
+        if issued:
+            print(f"📄 Issued {len(issued)} policies")
+
+    def _schedule_retry(self, policy_id: str, attempts: int, error: str, now: datetime, lease: str):
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = "failed", now
+            self.failed += 1
+            print(f"❌ Issuance of policy {policy_id} failed after {attempts} attempts: {error}")
+        else:
+            status = "pending"
+            next_attempt_at = now + timedelta(seconds=self.retry_base * 2 ** (attempts - 1))
+            self.retried += 1
+            print(f"⚠️  Issuance of policy {policy_id} attempt {attempts} failed, retrying: {error}")
+
+        self.db.execute_update("""
+            UPDATE issuance_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+            WHERE policy_id = ? AND status = 'processing' AND next_attempt_at = ?
+        """, (status, attempts, next_attempt_at.isoformat(), error[:500], now.isoformat(), policy_id, lease))
+
+    async def drain(self) -> int:
+        """Run batches until nothing is due; returns how many rows were processed"""
+        total = 0
+        while True:
+            count = await self.run_once()
+            total += count
+            if count < self.batch_size:
+                return total
+
+    # ==================== Background loop ====================
+
+    async def _loop(self):
+        while True:
+            try:
+                count = await self.run_once()
+            except Exception as e:
+                count = 0
+                print(f"❌ Issuance worker error: {e}")
+            # A full batch means there may be more due right away
+            if count < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            print(f"📄 Issuance worker started ({type(self.client).__name__})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.client.close()
+
+
+# Shared worker used by the API and IssuanceAgent
+issuance_worker = IssuanceWorker()
@@ -1,7 +1,7 @@
 """
 Data models for insurance policies
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 import json
@@ -102,3 +102,21 @@ class PaymentData:
     payment_id: Optional[str] = None  # Mercado Pago payment ID (después del pago)
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+
+@dataclass
+class PolicyAggregate:
+    """Everything a chat turn needs about a policy, loaded in one batch"""
+    policy: Policy
+    client: Optional[ClientData] = None
+    vehicle: Optional[VehicleData] = None
+    quotations: list = field(default_factory=list)
+    session: Optional[dict] = None  # same shape as PolicyRepository.get_session()
+    
+    @property
+    def selected_quotation(self) -> Optional[dict]:
+        """Quotation flagged as selected, if any"""
+        return next((q for q in self.quotations if q.get('selected')), None)
+    
+    @property
+    def messages(self) -> list:
+        return self.session["messages"] if self.session else []
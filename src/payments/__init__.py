@@ -0,0 +1 @@
+# Payments module
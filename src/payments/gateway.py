@@ -0,0 +1,250 @@
+"""
+Shared Mercado Pago gateway
+
+One SDK client per process, backed by one pooled requests.Session, so
+calls reuse keep-alive TLS connections instead of opening a new one each
+time (the SDK's default HttpClient builds a fresh Session per request).
+
+    preference = await mercadopago_gateway.create_preference_async(data)
+    payment = await mercadopago_gateway.get_payment_async(payment_id)
+
+Every call has connect/read timeouts and a retry policy (connection errors,
+plus 429/5xx on idempotent methods), and goes through a circuit breaker:
+after MERCADOPAGO_BREAKER_FAILURES consecutive failures calls fail fast
+with CircuitOpenError for MERCADOPAGO_BREAKER_RESET_SECONDS, then one trial
+call decides whether to close it again. Each call is a mercadopago.<operation>
+span (src/tracing.py).
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import mercadopago
+import requests
+from mercadopago.config import RequestOptions
+from mercadopago.http import HttpClient
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from src.config import Config
+from src.tracing import tracer
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class PaymentGatewayError(Exception):
+    """Mercado Pago could not be reached"""
+
+
+class CircuitOpenError(PaymentGatewayError):
+    """Calls are short-circuited after repeated failures"""
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self._trial_running):
+                raise CircuitOpenError("Mercado Pago no disponible temporalmente (circuit open)")
+            if state == "half_open":
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class PooledHttpClient(HttpClient):
+    """SDK HttpClient that keeps one Session (and its connection pool) alive"""
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 2,
+                 connect_timeout: float = 3.0, read_timeout: float = 10.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.3,
+            status_forcelist=RETRY_STATUSES,
+            # Preferences are POSTed: only retry them when the request never left
+            allowed_methods=frozenset({"GET", "PUT", "DELETE"}),
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+
+    def request(self, method, url, maxretries=None, timeout=None, **kwargs):
+        """Same contract as the SDK client: {"status": code, "response": json}"""
+        try:
+            api_result = self.session.request(
+                method, url, timeout=(self.connect_timeout, timeout or self.read_timeout), **kwargs
+            )
+        except requests.RequestException as e:
+            raise PaymentGatewayError(f"Mercado Pago request failed: {e}") from e
+        try:
+            body = api_result.json()
+        except ValueError:
+            body = {"message": api_result.text}
+        return {"status": api_result.status_code, "response": body}
+
+    def get(self, url, headers, params=None, timeout=None, maxretries=None):
+        return self.request("GET", url=url, headers=headers, params=params, timeout=timeout)
+
+    def post(self, url, headers, data=None, params=None, timeout=None, maxretries=None):
+        return self.request("POST", url=url, headers=headers, data=data, params=params, timeout=timeout)
+
+    def put(self, url, headers, data=None, params=None, timeout=None, maxretries=None):
+        return self.request("PUT", url=url, headers=headers, data=data, params=params, timeout=timeout)
+
+    def delete(self, url, headers, params=None, timeout=None, maxretries=None):
+        return self.request("DELETE", url=url, headers=headers, params=params, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class MercadoPagoGateway:
+    """Process-wide Mercado Pago client"""
+
+    def __init__(self, access_token: Optional[str] = None, http_client=None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self._access_token = access_token
+        self._http_client = http_client
+        self._sdk = None
+        self._lock = threading.Lock()
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=Config.MERCADOPAGO_BREAKER_FAILURES,
+            reset_timeout=Config.MERCADOPAGO_BREAKER_RESET_SECONDS
+        )
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def access_token(self) -> Optional[str]:
+        return self._access_token or os.getenv("MERCADOPAGO_ACCESS_TOKEN")
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.access_token)
+
+    def sdk(self):
+        """The shared SDK instance (built on first use)"""
+        if self._sdk is None:
+            with self._lock:
+                if self._sdk is None:
+                    if not self.access_token:
+                        raise PaymentGatewayError("Mercado Pago access token not configured")
+                    if self._http_client is None:
+                        self._http_client = PooledHttpClient(
+                            pool_size=Config.MERCADOPAGO_POOL_SIZE,
+                            max_retries=Config.MERCADOPAGO_MAX_RETRIES,
+                            connect_timeout=Config.MERCADOPAGO_CONNECT_TIMEOUT,
+                            read_timeout=Config.MERCADOPAGO_TIMEOUT
+                        )
+                    options = RequestOptions(
+                        connection_timeout=float(Config.MERCADOPAGO_TIMEOUT),
+                        max_retries=Config.MERCADOPAGO_MAX_RETRIES
+                    )
+                    self._sdk = mercadopago.SDK(self.access_token, http_client=self._http_client,
+                                                request_options=options)
+        return self._sdk
+
+    def configure(self, access_token: Optional[str] = None, http_client=None):
+        """Swap credentials and/or HTTP client (local stand-ins); the SDK is rebuilt on next use"""
+        with self._lock:
+            if access_token is not None:
+                self._access_token = access_token
+            if http_client is not None:
+                if isinstance(self._http_client, PooledHttpClient):
+                    self._http_client.close()
+                self._http_client = http_client
+            self._sdk = None
+
+    def _call(self, name: str, operation: Callable[[Any], dict]) -> dict:
+        sdk = self.sdk()              # a missing token is not a provider failure
+        with tracer.span(f"mercadopago.{name}", kind="client", **{"circuit.state": self.breaker.state}) as span:
+            self.breaker.before_call()
+            self.calls += 1
+            try:
+                result = operation(sdk)
+            except Exception:
+                self.errors += 1
+                self.breaker.record_failure()
+                raise
+            span.set_attribute("http.response.status_code", result.get("status"))
+            if result.get("status") in RETRY_STATUSES:
+                self.errors += 1
+                self.breaker.record_failure()
+                span.record_error(f"HTTP {result.get('status')}")
+            else:
+                self.breaker.record_success()
+            return result
+
+    # ==================== API ====================
+
+    def create_preference(self, preference_data: dict) -> dict:
+        return self._call("create_preference", lambda sdk: sdk.preference().create(preference_data))
+
+    def get_payment(self, payment_id: str) -> dict:
+        return self._call("get_payment", lambda sdk: sdk.payment().get(payment_id))
+
+    def search_payments(self, filters: dict) -> dict:
+        return self._call("search_payments", lambda sdk: sdk.payment().search(filters))
+
+    # Async wrappers: the SDK is blocking, run it off the event loop
+    async def create_preference_async(self, preference_data: dict) -> dict:
+        return await asyncio.to_thread(self.create_preference, preference_data)
+
+    async def get_payment_async(self, payment_id: str) -> dict:
+        return await asyncio.to_thread(self.get_payment, payment_id)
+
+    async def search_payments_async(self, filters: dict) -> dict:
+        return await asyncio.to_thread(self.search_payments, filters)
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "calls": self.calls,
+            "errors": self.errors
+        }
+
+    def close(self):
+        if isinstance(self._http_client, PooledHttpClient):
+            self._http_client.close()
+            self._http_client = None
+        self._sdk = None
+
+
+# Shared gateway used by PaymentAgent, the webhook workers and the reconciler
+mercadopago_gateway = MercadoPagoGateway()
@@ -0,0 +1,90 @@
+"""
+Payment provider clients
+
+The webhook workers and the reconciler only talk to a PaymentProvider, so
+tests (and local development without Mercado Pago credentials) can plug in
+FakePaymentProvider instead of the real API.
+
+Payment dicts follow Mercado Pago's shape: {"id", "status", "external_reference"},
+where external_reference is our policy id.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from src.payments.gateway import MercadoPagoGateway, mercadopago_gateway
+
+
+class PaymentProviderError(Exception):
+    """The provider could not be queried (callers retry later)"""
+
+
+class PaymentProvider(ABC):
+    """Interface of a payment provider client"""
+
+    @abstractmethod
+    async def get_payment(self, payment_id: str) -> dict:
+        """Payment by the provider's payment id"""
+
+    @abstractmethod
+    async def find_payment(self, policy_id: str, payment_id: Optional[str] = None) -> Optional[dict]:
+        """Latest payment for a policy, or None if the client hasn't paid yet"""
+
+
+class MercadoPagoProvider(PaymentProvider):
+    """Mercado Pago REST API through the shared gateway"""
+
+    def __init__(self, gateway: Optional[MercadoPagoGateway] = None):
+        self.gateway = gateway or mercadopago_gateway
+
+    async def get_payment(self, payment_id: str) -> dict:
+        payment_info = await self.gateway.get_payment_async(payment_id)
+        if payment_info.get("status") != 200:
+            raise PaymentProviderError(f"Mercado Pago returned {payment_info.get('status')} for payment {payment_id}")
+        return payment_info["response"]
+
+    async def find_payment(self, policy_id: str, payment_id: Optional[str] = None) -> Optional[dict]:
+        if payment_id:
+            return await self.get_payment(payment_id)
+
+        filters = {"external_reference": policy_id, "sort": "date_created", "criteria": "desc"}
+        search = await self.gateway.search_payments_async(filters)
+        if search.get("status") != 200:
+            raise PaymentProviderError(f"Mercado Pago search returned {search.get('status')} for policy {policy_id}")
+        results = search["response"].get("results") or []
+        return results[0] if results else None
+
+
+class FakePaymentProvider(PaymentProvider):
+    """In-memory provider for tests and local runs"""
+
+    def __init__(self):
+        self.payments: Dict[str, dict] = {}
+        self.calls = 0
+        self.fail_with: Optional[Exception] = None
+
+    def pay(self, policy_id: str, status: str = "approved", payment_id: Optional[str] = None) -> dict:
+        """Simulate a client paying (or a payment changing status)"""
+        payment = {
+            "id": payment_id or f"fake-{len(self.payments) + 1}",
+            "status": status,
+            "external_reference": policy_id
+        }
+        self.payments[payment["id"]] = payment
+        return payment
+
+    async def get_payment(self, payment_id: str) -> dict:
+        self.calls += 1
+        if self.fail_with:
+            raise self.fail_with
+        if payment_id not in self.payments:
+            raise PaymentProviderError(f"Payment {payment_id} not found")
+        return dict(self.payments[payment_id])
+
+    async def find_payment(self, policy_id: str, payment_id: Optional[str] = None) -> Optional[dict]:
+        if payment_id:
+            return await self.get_payment(payment_id)
+        self.calls += 1
+        if self.fail_with:
+            raise self.fail_with
+        matches = [p for p in self.payments.values() if p["external_reference"] == policy_id]
+        return dict(matches[-1]) if matches else None
@@ -0,0 +1,180 @@
+"""
+Payment reconciliation sweeper
+
+Webhooks get lost, so payments can stay "pending" even after the client
+paid. The reconciler periodically walks pending payments older than
+PAYMENT_RECONCILE_MIN_AGE_MINUTES in keyset-paginated pages, asks the
+payment provider about each one (bounded concurrency + token-bucket rate
+limit), and writes every status change of a page - plus the resulting
+policy transitions to "issued" - in one transaction.
+
+    reconciler = PaymentReconciler(provider=FakePaymentProvider())
+    await reconciler.run_once()
+    reconciler.metrics()   # backlog, lag, counters
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from src.config import Config
+from src.db.repository import PolicyRepository
+from src.models import PaymentData
+from src.payments.providers import MercadoPagoProvider, PaymentProvider
+from src.payments.status import OPEN_PAYMENT_STATUSES, apply_payment_status
+from src.utils.rate_limit import TokenBucket
+
+AGENT_NAME = "PaymentReconciler"
+
+
+class PaymentReconciler:
+    """Poll the provider for pending payments and apply what changed"""
+
+    def __init__(self, provider: Optional[PaymentProvider] = None,
+                 min_age_minutes: Optional[float] = None, page_size: Optional[int] = None,
+                 concurrency: Optional[int] = None, rate: Optional[float] = None,
+                 burst: Optional[int] = None, interval: Optional[float] = None):
+        self.provider = provider or MercadoPagoProvider()
+        self.min_age_minutes = Config.PAYMENT_RECONCILE_MIN_AGE_MINUTES if min_age_minutes is None else min_age_minutes
+        self.page_size = page_size or Config.PAYMENT_RECONCILE_PAGE_SIZE
+        self.concurrency = concurrency or Config.PAYMENT_RECONCILE_CONCURRENCY
+        self.limiter = TokenBucket(
+            rate=Config.PAYMENT_RECONCILE_RATE if rate is None else rate,
+            burst=burst or Config.PAYMENT_RECONCILE_BURST
+        )
+        self.interval = interval or Config.PAYMENT_RECONCILE_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.checked = 0
+        self.updated = 0
+        self.issued = 0
+        self.errors = 0
+        self.last_run_at: Optional[str] = None
+        self.last_run_seconds: Optional[float] = None
+
+    # ==================== Provider lookups ====================
+
+    async def _lookup(self, payment: PaymentData, semaphore: asyncio.Semaphore) -> Optional[dict]:
+        async with semaphore:
+            await self.limiter.acquire_async()
+            try:
+                return await self.provider.find_payment(payment.policy_id, payment.payment_id)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  Could not reconcile payment {payment.id}: {e}")
+                return None
+
+    async def reconcile(self, payments: List[PaymentData]) -> int:
+        """Check a page of payments and apply every change in one transaction"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._lookup(p, semaphore) for p in payments))
+        self.checked += len(payments)
+
+        changes = [(payment, result) for payment, result in zip(payments, results)
+                   if result and result.get("status") and result["status"] != payment.payment_status]
+        if not changes:
+            return 0
+
+        await asyncio.to_thread(self._apply, changes)
+        return len(changes)
+
+    def _apply(self, changes):
+        states = PolicyRepository.get_policy_states([payment.policy_id for payment, _ in changes])
+        issued = 0
+        with PolicyRepository.transaction():
+            for payment, result in changes:
+                if apply_payment_status(payment, result["status"], result.get("id"),
+                                        states.get(payment.policy_id), AGENT_NAME):
+                    # Two payments of one policy must not issue it twice
+                    states[payment.policy_id] = "issued"
+                    issued += 1
+        self.updated += len(changes)
+        self.issued += issued
+        print(f"🔄 Reconciled {len(changes)} payments ({issued} policies issued)")
+
+    # ==================== Sweeps ====================
+
+    def _cutoff(self) -> str:
+        return (datetime.now() - timedelta(minutes=self.min_age_minutes)).isoformat()
+
+    async def run_once(self) -> int:
+        """One full sweep over the pending backlog; returns the number of payments updated"""
+        started = time.perf_counter()
+        cutoff = self._cutoff()
+        after = ("", "")
+        updated = 0
+
+        while True:
+            page = await PolicyRepository.get_pending_payments_async(cutoff, after, self.page_size)
+            if not page:
+                break
+            updated += await self.reconcile(page)
+            after = (page[-1].created_at, page[-1].id)
+            if len(page) < self.page_size:
+                break
+
+        self.runs += 1
+        self.last_run_at = datetime.now().isoformat()
+        self.last_run_seconds = round(time.perf_counter() - started, 3)
+        return updated
+
+    async def reconcile_policy(self, policy_id: str) -> Optional[str]:
+        """Check one policy's latest payment right now; returns its status"""
+        payment = await PolicyRepository.get_payment_by_policy_async(policy_id)
+        if payment is None:
+            return None
+        if payment.payment_status in OPEN_PAYMENT_STATUSES:
+            await self.reconcile([payment])
+            payment = await PolicyRepository.get_payment_by_policy_async(policy_id)
+        return payment.payment_status
+
+    # ==================== Background loop ====================
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ Payment reconciliation error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            print(f"🔄 Payment reconciler started (every {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ==================== Metrics ====================
+
+    def metrics(self) -> dict:
+        """Backlog (pending payments older than the cutoff) and lag (age of the oldest one)"""
+        rows = PolicyRepository.db.execute_query("""
+            SELECT COUNT(*), MIN(created_at),
+                   SUM(CASE WHEN created_at <= ? THEN 1 ELSE 0 END)
+            FROM payments WHERE payment_status = 'pending'
+        """, (self._cutoff(),))
+        pending, oldest, backlog = rows[0] if rows else (0, None, 0)
+        lag = (datetime.now() - datetime.fromisoformat(oldest)).total_seconds() if oldest else 0.0
+        return {
+            "pending": pending,
+            "backlog": backlog or 0,
+            "lag_seconds": round(lag, 1),
+            "runs": self.runs,
+            "checked": self.checked,
+            "updated": self.updated,
+            "issued": self.issued,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds,
+            "running": self._task is not None and not self._task.done()
+        }
+
+
+# Shared reconciler used by the API and PaymentAgent
+payment_reconciler = PaymentReconciler()
@@ -0,0 +1,48 @@
+"""
+Applying provider payment statuses to payments and policies
+
+Shared by the webhook workers and the reconciler. Call inside a unit of
+work (PolicyRepository.transaction()) so the payment row and the policy
+transition commit together.
+"""
+from typing import Optional
+
+from src.db.repository import PolicyRepository
+from src.models import PaymentData
+
+# Policies in these states are not moved back to "issued" by a late update
+FINAL_STATES = ("issued", "completed")
+
+# Mercado Pago statuses that may still turn into "approved"
+OPEN_PAYMENT_STATUSES = ("pending", "in_process", "authorized", "in_mediation")
+
+
+def apply_payment_status(payment: PaymentData, status: str, provider_payment_id: Optional[str],
+                         policy_state: Optional[str], agent: str) -> bool:
+    """Record a payment's provider status; issue the policy if it was approved
+
+    Returns True when this call transitioned the policy to "issued" (False
+    if another writer got there first or the policy was moved meanwhile).
+    """
+    PolicyRepository.update_payment_status(
+        preference_id=payment.preference_id,
+        payment_status=status,
+        payment_id=str(provider_payment_id) if provider_payment_id else None
+    )
+
+    if status != "approved" or policy_state is None or policy_state in FINAL_STATES:
+        return False
+
+    # Conditional on the state read by the caller: a webhook and a reconcile
+    # pass racing on the same payment issue the policy once
+    transition = PolicyRepository.update_policy_state(
+        policy_id=payment.policy_id,
+        new_state="issued",
+        reason="Pago aprobado por Mercado Pago",
+        agent=agent,
+        expected_state=policy_state
+    )
+    if transition is None:
+        return False
+    print(f"✅ Policy {payment.policy_id} state updated to issued")
+    return True
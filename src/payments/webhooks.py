@@ -0,0 +1,243 @@
+"""
+Queue-backed Mercado Pago webhook processing
+
+The webhook endpoint only records the notification in webhook_events (keyed
+by the notification id, so Mercado Pago retries are deduplicated by
+INSERT OR IGNORE) and returns 200. A pool of background workers then fetches
+the payment details, retrying with exponential backoff, and applies the
+status change in the same transaction that marks the event as done, so each
+notification takes effect exactly once.
+
+    pending -> processing -> done
+                          -> pending (retried at next_attempt_at) -> ... -> failed
+    (non-payment topics are stored as ignored)
+
+A worker claims an event with a conditional UPDATE (pending -> processing)
+before touching it, so across workers and processes only one of them gets
+it. The claim is a lease: next_attempt_at is pushed WEBHOOK_CLAIM_TIMEOUT
+seconds ahead and the done / retry updates only apply while that lease is
+still held. If the process dies mid-way, the event becomes claimable again
+once the lease expires.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Set
+
+from src.config import Config
+from src.db.connection import DatabaseConnection
+from src.db.repository import PolicyRepository
+from src.payments.providers import MercadoPagoProvider
+from src.payments.status import apply_payment_status
+
+EVENT_COLUMNS = "id, topic, resource_id, payload, status, attempts, next_attempt_at, last_error"
+
+PaymentFetcher = Callable[[str], Awaitable[dict]]
+
+
+def event_key(notification: dict) -> str:
+    """Stable id of a notification: Mercado Pago's id, or topic + resource + action"""
+    if notification.get("id") is not None:
+        return str(notification["id"])
+    resource_id = (notification.get("data") or {}).get("id")
+    return f"{notification.get('type')}:{resource_id}:{notification.get('action')}"
+
+
+class WebhookProcessor:
+    """Durable webhook inbox plus the worker pool that drains it"""
+
+    def __init__(self, fetch_payment: Optional[PaymentFetcher] = None,
+                 workers: Optional[int] = None, max_attempts: Optional[int] = None,
+                 retry_base: Optional[float] = None, poll_interval: Optional[float] = None,
+                 db=DatabaseConnection):
+        self.fetch_payment = fetch_payment or MercadoPagoProvider().get_payment
+        self.workers = workers or Config.WEBHOOK_WORKERS
+        self.max_attempts = max_attempts or Config.WEBHOOK_MAX_ATTEMPTS
+        self.retry_base = Config.WEBHOOK_RETRY_BASE_SECONDS if retry_base is None else retry_base
+        self.poll_interval = Config.WEBHOOK_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.claim_timeout = Config.WEBHOOK_CLAIM_TIMEOUT
+        self.db = db
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._in_flight: Set[str] = set()
+        self._tasks = []
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    # ==================== Inbox ====================
+
+    def record(self, notification: dict) -> str:
+        """Store a notification (duplicates are ignored); returns its event id"""
+        key = event_key(notification)
+        topic = notification.get("type") or notification.get("topic")
+        resource_id = (notification.get("data") or {}).get("id")
+        status = "pending" if topic == "payment" and resource_id else "ignored"
+        now = datetime.now().isoformat()
+
+        self.db.execute_update("""
+            INSERT OR IGNORE INTO webhook_events
+              (id, topic, resource_id, payload, status, attempts, next_attempt_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+        """, (key, topic, str(resource_id) if resource_id else None, json.dumps(notification),
+              status, now, now, now))
+        return key
+
+    async def record_async(self, notification: dict) -> str:
+        """Store a notification and wake the workers"""
+        key = await asyncio.to_thread(self.record, notification)
+        if self._wake is not None:
+            self._wake.set()
+        return key
+
+    def due_events(self, limit: int = 100) -> list:
+        """Pending events that are due, plus claims whose lease expired"""
+        return self.db.execute_query(f"""
+            SELECT {EVENT_COLUMNS} FROM webhook_events
+            WHERE status IN ('pending', 'processing') AND next_attempt_at <= ?
+            ORDER BY next_attempt_at LIMIT ?
+        """, (datetime.now().isoformat(), limit)) or []
+
+    def claim(self, event_id: str) -> Optional[str]:
+        """Take an event for processing; returns the lease, or None if someone else holds it"""
+        now = datetime.now()
+        lease = (now + timedelta(seconds=self.claim_timeout)).isoformat()
+        rows = self.db.execute_batch([("""
+            UPDATE webhook_events
+            SET status = 'processing', next_attempt_at = ?, updated_at = ?
+            WHERE id = ? AND status IN ('pending', 'processing') AND next_attempt_at <= ?
+            RETURNING id
+        """, (lease, now.isoformat(), event_id, now.isoformat()))])[0]
+        return lease if len(rows) == 1 else None
+
+    def stats(self) -> dict:
+        rows = self.db.execute_query("SELECT status, COUNT(*) FROM webhook_events GROUP BY status") or []
+        return {
+            "events": {row[0]: row[1] for row in rows},
+            "in_flight": len(self._in_flight),
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed
+        }
+
+    # ==================== Processing ====================
+
+    async def process(self, row) -> Optional[str]:
+        """Claim, fetch and apply one event; returns its new status (None if it wasn't ours)"""
+        event_id, resource_id, attempts = row[0], row[2], row[5] + 1
+        lease = await asyncio.to_thread(self.claim, event_id)
+        if lease is None:
+            return None
+        try:
+            payment_data = await self.fetch_payment(resource_id)
+            await self.apply(event_id, attempts, resource_id, payment_data, lease)
+        except Exception as e:
+            return await asyncio.to_thread(self._schedule_retry, event_id, attempts, str(e), lease)
+
+        self.processed += 1
+        return "done"
+
+    async def apply(self, event_id: str, attempts: int, payment_id: str, payment_data: dict, lease: str):
+        """Apply a payment status change and mark the event done, atomically"""
+        status = payment_data.get("status")  # approved, rejected, pending
+        policy_id = payment_data.get("external_reference")
+
+        async with PolicyRepository.transaction():
+            payment = await PolicyRepository.get_payment_by_policy_async(policy_id) if policy_id else None
+
+            if payment:
+                policy = await PolicyRepository.get_policy_async(payment.policy_id, use_cache=False)
+                await asyncio.to_thread(apply_payment_status, payment, status, payment_id,
+                                        policy.state if policy else None, "MercadoPagoWebhook")
+            elif (payment_data.get("metadata") or {}).get("preference_id"):
+                await PolicyRepository.update_payment_status_async(
+                    preference_id=payment_data["metadata"]["preference_id"],
+                    payment_status=status,
+                    payment_id=str(payment_id)
+                )
+
+            await self.db.execute("""
+                UPDATE webhook_events
+                SET status = 'done', attempts = ?, last_error = NULL, processed_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'processing' AND next_attempt_at = ?
+            """, (attempts, datetime.now().isoformat(), datetime.now().isoformat(), event_id, lease))
+
+        print(f"✅ Payment {payment_id} status updated to: {status}")
+
+    def _schedule_retry(self, event_id: str, attempts: int, error: str, lease: str) -> str:
+        now = datetime.now()
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = "failed", now
+            self.failed += 1
+            print(f"❌ Webhook event {event_id} failed after {attempts} attempts: {error}")
+        else:
+            status = "pending"
+            next_attempt_at = now + timedelta(seconds=self.retry_base * 2 ** (attempts - 1))
+            self.retried += 1
+            print(f"⚠️  Webhook event {event_id} attempt {attempts} failed, retrying: {error}")
+
+        self.db.execute_update("""
+            UPDATE webhook_events
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+            WHERE id = ? AND status = 'processing' AND next_attempt_at = ?
+        """, (status, attempts, next_attempt_at.isoformat(), error[:500], now.isoformat(), event_id, lease))
+        return status
+
+    async def drain(self) -> int:
+        """Process every due event now (without the worker pool); returns how many this call claimed"""
+        rows = await asyncio.to_thread(self.due_events)
+        results = await asyncio.gather(*(self.process(row) for row in rows))
+        return sum(1 for status in results if status is not None)
+
+    # ==================== Worker pool ====================
+
+    async def _dispatcher(self):
+        while True:
+            try:
+                rows = await asyncio.to_thread(self.due_events)
+                for row in rows:
+                    if row[0] not in self._in_flight:
+                        self._in_flight.add(row[0])
+                        await self._queue.put(row)
+            except Exception as e:
+                print(f"❌ Webhook dispatcher error: {e}")
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            row = await self._queue.get()
+            try:
+                await self.process(row)
+            except Exception as e:
+                # Left pending, or claimed until its lease expires: picked up again later
+                print(f"❌ Webhook event {row[0]} error: {e}")
+            finally:
+                self._in_flight.discard(row[0])
+                self._queue.task_done()
+
+    def start(self):
+        """Start the dispatcher and workers on the running event loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._dispatcher())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"📬 Webhook workers started ({self.workers})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._in_flight.clear()
+
+
+# Shared processor used by the API
+webhook_processor = WebhookProcessor()
@@ -0,0 +1 @@
+# Pricing module
@@ -0,0 +1,177 @@
+"""
+In-memory quotation template catalog
+
+All quotation_templates rows are loaded in one query and indexed by
+(insurance_type, coverage_type, coverage_level), together with the
+PricingEngine built from them, so generating quotations needs no template
+round-trip.
+
+The catalog reloads when:
+  - `reload()` is called (POST /api/admin/templates/reload), or
+  - the version in catalog_versions was bumped by another process; it is
+    checked at most every TEMPLATE_CATALOG_CHECK_INTERVAL seconds.
+
+After editing quotation_templates by hand, bump the version so every
+process picks the change up:
+
+    UPDATE catalog_versions SET version = version + 1 WHERE name = 'quotation_templates';
+"""
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.db.connection import DatabaseConnection
+from src.db.transaction import current_unit_of_work
+from src.pricing.engine import PricingEngine, TEMPLATE_COLUMNS
+
+CATALOG_NAME = "quotation_templates"
+
+TemplateKey = Tuple[str, str, str]
+
+# (insurance_type, coverage_type, coverage_level, base_monthly_premium, deductible)
+DEFAULT_TEMPLATES = [
+    # Auto insurance - different coverage levels
+    ("auto", "Responsabilidad Civil", "Básica", 45.00, 500.0),
+    ("auto", "Responsabilidad Civil", "Intermedia", 65.00, 250.0),
+    ("auto", "Todo Riesgo", "Básica", 95.00, 1000.0),
+    ("auto", "Todo Riesgo", "Premium", 145.00, 0.0),
+    # Moto insurance
+    ("moto", "Responsabilidad Civil", "Básica", 25.00, 1000.0),
+    ("moto", "Responsabilidad Civil", "Intermedia", 40.00, 500.0),
+    ("moto", "Todo Riesgo", "Básica", 60.00, 1500.0),
+    ("moto", "Todo Riesgo", "Premium", 95.00, 0.0),
+]
+
+
+class TemplateCatalog:
+    """Process-wide copy of quotation_templates"""
+
+    def __init__(self, db=DatabaseConnection, check_interval: Optional[float] = None):
+        self.db = db
+        self.check_interval = Config.TEMPLATE_CATALOG_CHECK_INTERVAL if check_interval is None else check_interval
+        self.version: Optional[int] = None
+        self.loads = 0
+        self._templates: Dict[TemplateKey, dict] = {}
+        self._by_type: Dict[str, List[dict]] = {}
+        self._engine: Optional[PricingEngine] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # ==================== Loading ====================
+
+    def _select_statements(self) -> list:
+        return [
+            (f"SELECT {TEMPLATE_COLUMNS} FROM quotation_templates ORDER BY base_monthly_premium", ()),
+            ("SELECT version FROM catalog_versions WHERE name = ?", (CATALOG_NAME,)),
+        ]
+
+    def _apply(self, template_rows, version_rows):
+        engine = PricingEngine.from_rows(template_rows or [])
+        templates: Dict[TemplateKey, dict] = {}
+        by_type: Dict[str, List[dict]] = {}
+        for row in template_rows or []:
+            template = {
+                "id": row[0], "insurance_type": row[1], "coverage_type": row[2],
+                "coverage_level": row[3], "base_monthly_premium": row[4], "deductible": row[5]
+            }
+            templates[(row[1], row[2], row[3])] = template
+            by_type.setdefault(row[1], []).append(template)
+
+        with self._lock:
+            self._templates = templates
+            self._by_type = by_type
+            self._engine = engine
+            self.version = version_rows[0][0] if version_rows else 0
+            self._checked_at = time.monotonic()
+            self.loads += 1
+
+    def reload(self) -> "TemplateCatalog":
+        """Load every template (and the current version) in one round-trip"""
+        self._apply(*self.db.execute_batch(self._select_statements()))
+        print(f"📋 Template catalog loaded: {len(self._templates)} templates (version {self.version})")
+        return self
+
+    def ensure_loaded(self) -> "TemplateCatalog":
+        """Load on first use; afterwards reload only if the version was bumped"""
+        if self._engine is None:
+            return self.reload()
+        if self.check_interval > 0 and time.monotonic() - self._checked_at >= self.check_interval:
+            rows = self.db.execute_query(self._select_statements()[1][0], (CATALOG_NAME,))
+            version = rows[0][0] if rows else 0
+            if version != self.version:
+                return self.reload()
+            self._checked_at = time.monotonic()
+        return self
+
+    def clear(self):
+        """Forget the loaded templates (the next use reloads them)"""
+        with self._lock:
+            self._templates, self._by_type, self._engine = {}, {}, None
+            self.version = None
+
+    # ==================== Lookups ====================
+
+    def engine(self) -> PricingEngine:
+        return self.ensure_loaded()._engine
+
+    def get(self, insurance_type: str, coverage_type: str, coverage_level: str) -> Optional[dict]:
+        template = self.ensure_loaded()._templates.get((insurance_type, coverage_type, coverage_level))
+        return dict(template) if template else None
+
+    def for_type(self, insurance_type: str) -> List[dict]:
+        """Templates of an insurance type, cheapest first"""
+        return [dict(t) for t in self.ensure_loaded()._by_type.get(insurance_type, [])]
+
+    def stats(self) -> dict:
+        return {
+            "templates": len(self._templates),
+            "insurance_types": sorted(self._by_type),
+            "version": self.version,
+            "loads": self.loads,
+            "check_interval": self.check_interval
+        }
+
+    # ==================== Writes ====================
+
+    def seed(self, templates=DEFAULT_TEMPLATES) -> "TemplateCatalog":
+        """Insert missing templates with one idempotent INSERT OR IGNORE and load the catalog
+
+        The insert and the reload travel in the same batch (one round-trip).
+        Existing templates, matched by the unique
+        (insurance_type, coverage_type, coverage_level) index, are left untouched.
+        """
+        now = datetime.now().isoformat()
+        values = ", ".join("(?, ?, ?, ?, ?, ?, ?)" for _ in templates)
+        params = []
+        for insurance_type, coverage_type, coverage_level, premium, deductible in templates:
+            params.extend([str(uuid.uuid4()), insurance_type, coverage_type, coverage_level, premium, deductible, now])
+
+        results = self.db.execute_batch([
+            (f"""INSERT OR IGNORE INTO quotation_templates
+                 (id, insurance_type, coverage_type, coverage_level, base_monthly_premium, deductible, created_at)
+                 VALUES {values}""", tuple(params)),
+            *self._select_statements(),
+        ])
+        self._apply(*results[1:])
+        uow = current_unit_of_work()
+        if uow is not None:
+            # The insert is still buffered: load again once it commits
+            uow.after_commit(self.reload)
+        return self
+
+    def bump_version(self) -> int:
+        """Tell every process that quotation_templates changed, and reload this one"""
+        self.db.execute_batch([
+            ("INSERT OR IGNORE INTO catalog_versions (name, version) VALUES (?, 0)", (CATALOG_NAME,)),
+            ("UPDATE catalog_versions SET version = version + 1, updated_at = ? WHERE name = ?",
+             (datetime.now().isoformat(), CATALOG_NAME)),
+        ])
+        self.reload()
+        return self.version
+
+
+# Shared catalog used by PolicyRepository and the re-rating job
+template_catalog = TemplateCatalog()
@@ -0,0 +1,210 @@
+"""
+Vectorized quotation pricing
+
+Templates are held as NumPy arrays per insurance type, and premiums for all
+coverages of one or many policies come out of a single broadcast:
+
+    monthly[i, j] = base[j] * (1 + weight[j] * (risk[i] - 1))
+
+where risk[i] is the product of the rating-table factors for policy i and
+weight[j] is how much of that risk coverage j absorbs.
+
+    engine = PricingEngine.from_rows(template_rows)
+    quotes = engine.quote("auto", vehicle, client)          # one policy
+    batch = engine.price_bulk("auto", years, makes, ...)    # thousands
+"""
+import functools
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import Config
+from src.models import ClientData, VehicleData
+from src.pricing.rating import BandTable, RatingTables
+
+TEMPLATE_COLUMNS = "id, insurance_type, coverage_type, coverage_level, base_monthly_premium, deductible"
+
+
+@functools.lru_cache(maxsize=1)
+def default_rating_tables() -> RatingTables:
+    """Rating tables from PRICING_RATING_TABLES (or the built-in defaults), loaded once"""
+    return RatingTables.load(Config.PRICING_RATING_TABLES)
+
+
+@dataclass
+class TemplateSet:
+    """Templates of one insurance type as parallel arrays"""
+    ids: List[str]
+    coverage_types: List[str]
+    coverage_levels: List[str]
+    base: np.ndarray
+    deductible: np.ndarray
+    weight: np.ndarray
+
+
+@dataclass
+class PricedBatch:
+    """Premiums for n policies x k templates"""
+    templates: TemplateSet
+    risk_factor: np.ndarray      # (n,)
+    risk_level: np.ndarray       # (n,) "low" / "medium" / "high"
+    monthly: np.ndarray          # (n, k)
+    annual: np.ndarray           # (n, k)
+
+    def quotes(self, i: int = 0) -> List[dict]:
+        """Quotations of policy i, cheapest first"""
+        t = self.templates
+        order = np.argsort(self.monthly[i], kind="stable")
+        return [{
+            "template_id": t.ids[j],
+            "coverage_type": t.coverage_types[j],
+            "coverage_level": t.coverage_levels[j],
+            "monthly_premium": float(self.monthly[i, j]),
+            "annual_premium": float(self.annual[i, j]),
+            "deductible": float(t.deductible[j]),
+            "risk_factor": float(self.risk_factor[i]),
+            "risk_level": str(self.risk_level[i])
+        } for j in order]
+
+
+def _as_float(values: Sequence) -> np.ndarray:
+    """Numeric attribute with None / blanks as NaN"""
+    return np.array([np.nan if v in (None, "") else float(v) for v in values], dtype=float)
+
+
+def _band_factors(table: BandTable, values: np.ndarray) -> np.ndarray:
+    factors = np.asarray(table.factors, dtype=float)
+    idx = np.searchsorted(np.asarray(table.bounds, dtype=float), np.nan_to_num(values), side="left")
+    return np.where(np.isnan(values), 1.0, factors[idx])
+
+
+def _lookup_factors(values: Sequence, factor_of) -> np.ndarray:
+    """Apply a per-value Python lookup once per distinct value"""
+    keys = np.array(["" if v is None else str(v) for v in values], dtype=object)
+    if keys.size == 0:
+        return np.ones(0)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return np.array([factor_of(k) for k in unique], dtype=float)[inverse]
+
+
+def area_code(phone: str) -> str:
+    """National digits of an Argentine phone number (+54 9 11 ... -> 11...)"""
+    digits = re.sub(r"\D", "", phone or "")
+    if digits.startswith("54"):
+        digits = digits[2:]
+    return digits.lstrip("09")
+
+
+class PricingEngine:
+    """Price quotation templates against rating tables"""
+
+    def __init__(self, templates: List[dict], tables: RatingTables = None, as_of_year: int = None):
+        self.tables = tables or default_rating_tables()
+        self.as_of_year = as_of_year
+        self._sets: Dict[str, TemplateSet] = {}
+
+        by_type: Dict[str, List[dict]] = {}
+        for template in templates:
+            by_type.setdefault(template["insurance_type"], []).append(template)
+
+        for insurance_type, rows in by_type.items():
+            self._sets[insurance_type] = TemplateSet(
+                ids=[r["id"] for r in rows],
+                coverage_types=[r["coverage_type"] for r in rows],
+                coverage_levels=[r["coverage_level"] for r in rows],
+                base=np.array([r["base_monthly_premium"] for r in rows], dtype=float),
+                deductible=np.array([r["deductible"] or 0.0 for r in rows], dtype=float),
+                weight=np.array([self.tables.coverage_weight.get(r["coverage_type"], 1.0) for r in rows], dtype=float)
+            )
+
+    @classmethod
+    def from_rows(cls, rows, tables: RatingTables = None, as_of_year: int = None) -> "PricingEngine":
+        """Build from quotation_templates rows selected with TEMPLATE_COLUMNS"""
+        templates = [{
+            "id": r[0], "insurance_type": r[1], "coverage_type": r[2],
+            "coverage_level": r[3], "base_monthly_premium": r[4], "deductible": r[5]
+        } for r in rows]
+        return cls(templates, tables, as_of_year)
+
+    def insurance_types(self) -> List[str]:
+        return list(self._sets)
+
+    def templates(self, insurance_type: str) -> Optional[TemplateSet]:
+        return self._sets.get(insurance_type)
+
+    # ==================== Risk ====================
+
+    def _area_factor(self, phone: str) -> float:
+        code = area_code(phone)
+        for length in (4, 3, 2):
+            factor = self.tables.area_code.get(code[:length])
+            if factor is not None:
+                return factor
+        return 1.0
+
+    def _class_factor(self, make: str) -> float:
+        vehicle_class = self.tables.make_class.get(make.strip().lower(), "standard")
+        return self.tables.class_factors.get(vehicle_class, 1.0)
+
+    def risk_factors(self, insurance_type: str, years: Sequence, makes: Sequence,
+                     displacements: Sequence, phones: Sequence = None,
+                     client_ages: Sequence = None) -> np.ndarray:
+        """Overall risk factor per policy (n,)"""
+        as_of_year = self.as_of_year or datetime.now().year
+        tables = self.tables
+
+        risk = _band_factors(tables.vehicle_age, as_of_year - _as_float(years))
+        risk *= _lookup_factors(makes, self._class_factor)
+
+        displacement_table = tables.displacement.get(insurance_type)
+        if displacement_table is not None:
+            risk *= _band_factors(displacement_table, _as_float(displacements))
+        if phones is not None:
+            risk *= _lookup_factors(phones, self._area_factor)
+        if client_ages is not None:
+            risk *= _band_factors(tables.client_age, _as_float(client_ages))
+
+        low, high = tables.risk_factor_range
+        return np.clip(risk, low, high)
+
+    def risk_levels(self, risk: np.ndarray) -> np.ndarray:
+        levels = self.tables.risk_levels
+        return np.where(risk < levels["low"], "low", np.where(risk > levels["high"], "high", "medium"))
+
+    # ==================== Pricing ====================
+
+    def price_bulk(self, insurance_type: str, years: Sequence, makes: Sequence,
+                   displacements: Sequence, phones: Sequence = None,
+                   client_ages: Sequence = None) -> Optional[PricedBatch]:
+        """Price every template of an insurance type for n policies at once"""
+        templates = self._sets.get(insurance_type)
+        if templates is None:
+            return None
+
+        risk = self.risk_factors(insurance_type, years, makes, displacements, phones, client_ages)
+        monthly = templates.base[None, :] * (1.0 + templates.weight[None, :] * (risk[:, None] - 1.0))
+        monthly = np.round(monthly, 2)
+
+        return PricedBatch(
+            templates=templates,
+            risk_factor=np.round(risk, 4),
+            risk_level=self.risk_levels(risk),
+            monthly=monthly,
+            annual=np.round(monthly * 12, 2)
+        )
+
+    def quote(self, insurance_type: str, vehicle: Optional[VehicleData],
+              client: Optional[ClientData] = None, client_age: int = None) -> List[dict]:
+        """Quotations for a single policy, cheapest first"""
+        batch = self.price_bulk(
+            insurance_type,
+            years=[vehicle.year if vehicle else None],
+            makes=[vehicle.make if vehicle else None],
+            displacements=[vehicle.engine_displacement if vehicle else None],
+            phones=[client.phone if client else None],
+            client_ages=[client_age]
+        )
+        return batch.quotes(0) if batch else []
@@ -0,0 +1,106 @@
+"""
+Rating tables for the pricing engine
+
+Every table maps a risk attribute to a multiplicative factor (1.0 = neutral).
+Band tables are (upper_bounds, factors) pairs: a value falls in the first band
+whose upper bound it does not exceed, and values above the last bound use the
+last factor. Missing attributes are always rated neutral.
+
+The defaults can be overridden with a JSON file (PRICING_RATING_TABLES) that
+has the same shape as DEFAULT_RATING_TABLES.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_RATING_TABLES = {
+    # Vehicle age in years: brand new cars cost more to repair, old ones fail more
+    "vehicle_age": {
+        "bounds": [2, 5, 10, 15, 20],
+        "factors": [1.10, 1.00, 0.95, 1.05, 1.15, 1.25]
+    },
+    # Engine displacement in cc, per insurance type
+    "displacement": {
+        "auto": {"bounds": [1400, 1800, 2500, 3500], "factors": [0.92, 1.00, 1.10, 1.25, 1.40]},
+        "moto": {"bounds": [125, 250, 600, 1000], "factors": [0.85, 1.00, 1.20, 1.45, 1.70]}
+    },
+    # Make -> vehicle class; unknown makes are "standard"
+    "make_class": {
+        "fiat": "economy", "chevrolet": "economy", "renault": "economy", "suzuki": "economy",
+        "volkswagen": "standard", "ford": "standard", "peugeot": "standard", "citroen": "standard",
+        "toyota": "standard", "honda": "standard", "nissan": "standard", "yamaha": "standard",
+        "motomel": "economy", "corven": "economy", "gilera": "economy", "zanella": "economy",
+        "jeep": "premium", "audi": "premium", "bmw": "premium", "mercedes-benz": "premium",
+        "mercedes": "premium", "volvo": "premium", "ducati": "sport", "kawasaki": "sport",
+        "porsche": "sport", "harley-davidson": "premium", "ktm": "sport"
+    },
+    "class_factors": {"economy": 0.92, "standard": 1.00, "premium": 1.25, "sport": 1.45},
+    # Client region from the phone area code (longest prefix wins)
+    "area_code": {"11": 1.15, "221": 1.05, "341": 1.08, "351": 1.05, "261": 1.00, "381": 0.97},
+    # Client age in years (only when known)
+    "client_age": {
+        "bounds": [21, 25, 65, 75],
+        "factors": [1.40, 1.20, 1.00, 1.10, 1.25]
+    },
+    # How much of the vehicle/client risk each coverage absorbs: third-party
+    # liability depends less on the vehicle than comprehensive cover does
+    "coverage_weight": {"Responsabilidad Civil": 0.6, "Todo Riesgo": 1.0},
+    # Overall risk factor is clamped to this range
+    "risk_factor_range": [0.75, 2.0],
+    # risk_level label thresholds on the overall factor: below low -> "low",
+    # above high -> "high", otherwise "medium"
+    "risk_levels": {"low": 0.95, "high": 1.15}
+}
+
+
+@dataclass
+class BandTable:
+    """Piecewise-constant factor over a numeric attribute"""
+    bounds: List[float]
+    factors: List[float]
+
+    def __post_init__(self):
+        if len(self.factors) != len(self.bounds) + 1:
+            raise ValueError(f"A band table needs len(bounds) + 1 factors, got {self.bounds} / {self.factors}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BandTable":
+        return cls(bounds=list(data["bounds"]), factors=list(data["factors"]))
+
+
+@dataclass
+class RatingTables:
+    """All rating factors used by PricingEngine"""
+    vehicle_age: BandTable
+    displacement: Dict[str, BandTable]
+    make_class: Dict[str, str]
+    class_factors: Dict[str, float]
+    area_code: Dict[str, float]
+    client_age: BandTable
+    coverage_weight: Dict[str, float]
+    risk_factor_range: List[float] = field(default_factory=lambda: [0.75, 2.0])
+    risk_levels: Dict[str, float] = field(default_factory=lambda: {"low": 0.95, "high": 1.15})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RatingTables":
+        """Build from a dict shaped like DEFAULT_RATING_TABLES (missing keys use defaults)"""
+        merged = {**DEFAULT_RATING_TABLES, **data}
+        return cls(
+            vehicle_age=BandTable.from_dict(merged["vehicle_age"]),
+            displacement={k: BandTable.from_dict(v) for k, v in merged["displacement"].items()},
+            make_class={k.lower(): v for k, v in merged["make_class"].items()},
+            class_factors=dict(merged["class_factors"]),
+            area_code=dict(merged["area_code"]),
+            client_age=BandTable.from_dict(merged["client_age"]),
+            coverage_weight=dict(merged["coverage_weight"]),
+            risk_factor_range=list(merged["risk_factor_range"]),
+            risk_levels=dict(merged["risk_levels"])
+        )
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "RatingTables":
+        """Defaults, or the JSON file at `path` layered over them"""
+        if not path:
+            return cls.from_dict({})
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,244 @@
+"""
+Bulk re-rating of open quotations
+
+After quotation_templates prices (or the rating tables) change, the stored
+quotation_data rows of policies that are still open go stale. RerateJob walks
+those policies in keyset-paginated chunks (ORDER BY id, id > last), reads the
+vehicles, clients and quotations of a whole chunk in one batch, reprices them
+with PricingEngine.price_bulk and writes the changed premiums back with one
+batched UPDATE transaction per chunk.
+
+After every committed chunk the last policy id is written to a checkpoint
+file, so an interrupted run resumes where it stopped:
+
+    python scripts/rerate_quotations.py --batch-size 500
+"""
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.db.repository import PolicyRepository
+from src.pricing.catalog import template_catalog
+from src.pricing.engine import PricingEngine
+
+OPEN_STATES = ("quotation", "payment")
+
+
+@dataclass
+class RerateReport:
+    """Progress of a re-rating run (also the checkpoint contents)"""
+    last_policy_id: str = ""
+    policies: int = 0
+    quotations: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    batches: int = 0
+    total: Optional[int] = None
+    elapsed: float = 0.0
+    completed: bool = False
+    dry_run: bool = False
+    states: List[str] = field(default_factory=lambda: list(OPEN_STATES))
+
+    @property
+    def policies_per_second(self) -> float:
+        return self.policies / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["policies_per_second"] = round(self.policies_per_second, 1)
+        return data
+
+
+def _placeholders(values: Sequence) -> str:
+    return ", ".join("?" for _ in values)
+
+
+class RerateJob:
+    """Reprice the quotations of every open policy in streaming batches"""
+
+    def __init__(self, batch_size: int = 500, states: Sequence[str] = OPEN_STATES,
+                 checkpoint_path: Optional[str] = None, dry_run: bool = False,
+                 engine: Optional[PricingEngine] = None,
+                 on_progress: Optional[Callable[[RerateReport], None]] = None):
+        self.batch_size = batch_size
+        self.states = list(states)
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self.engine = engine
+        self.on_progress = on_progress
+        self.report = RerateReport(dry_run=dry_run, states=self.states)
+        self.db = PolicyRepository.db
+
+    # ==================== Checkpoint ====================
+
+    def load_checkpoint(self) -> Optional[RerateReport]:
+        """Unfinished run stored at checkpoint_path, if any"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("policies_per_second", None)
+        report = RerateReport(**data)
+        if report.completed or report.states != self.states:
+            return None
+        return report
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path or self.dry_run:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report.to_dict(), f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # ==================== Reads ====================
+
+    def count_open_policies(self) -> int:
+        rows = self.db.execute_query(
+            f"SELECT COUNT(*) FROM policies WHERE state IN ({_placeholders(self.states)})",
+            tuple(self.states)
+        )
+        return rows[0][0] if rows else 0
+
+    def next_page(self, after_id: str) -> list:
+        """(id, insurance_type) of the next chunk of open policies"""
+        return self.db.execute_query(
+            f"""SELECT id, insurance_type FROM policies
+                WHERE state IN ({_placeholders(self.states)}) AND id > ?
+                ORDER BY id LIMIT ?""",
+            (*self.states, after_id, self.batch_size)
+        ) or []
+
+    def load_page(self, policy_ids: List[str]):
+        """Vehicles, clients and quotations of a chunk in one batch"""
+        marks = _placeholders(policy_ids)
+        params = tuple(policy_ids)
+        return self.db.execute_batch([
+            (f"""SELECT policy_id, year, make, engine_displacement FROM vehicle_data
+                 WHERE policy_id IN ({marks}) ORDER BY rowid""", params),
+            (f"SELECT policy_id, phone FROM client_data WHERE policy_id IN ({marks}) ORDER BY rowid", params),
+            (f"""SELECT id, policy_id, coverage_type, coverage_level, monthly_premium,
+                        annual_premium, deductible, risk_level
+                 FROM quotation_data WHERE policy_id IN ({marks})""", params),
+        ])
+
+    # ==================== Pricing ====================
+
+    def reprice_page(self, page: list) -> List[tuple]:
+        """UPDATE statements for the quotations of one chunk whose price changed"""
+        policy_ids = [row[0] for row in page]
+        vehicle_rows, client_rows, quotation_rows = self.load_page(policy_ids)
+
+        # First vehicle / client per policy, as PolicyRepository reads them
+        vehicles: Dict[str, tuple] = {}
+        for row in vehicle_rows or []:
+            vehicles.setdefault(row[0], row)
+        phones: Dict[str, str] = {}
+        for row in client_rows or []:
+            phones.setdefault(row[0], row[1])
+        quotations: Dict[str, list] = {}
+        for row in quotation_rows or []:
+            quotations.setdefault(row[1], []).append(row)
+
+        by_type: Dict[str, List[str]] = {}
+        for policy_id, insurance_type in page:
+            if policy_id in vehicles and policy_id in quotations:
+                by_type.setdefault(insurance_type, []).append(policy_id)
+            else:
+                self.report.skipped += 1
+
+        updates = []
+        for insurance_type, ids in by_type.items():
+            batch = self.engine.price_bulk(
+                insurance_type,
+                years=[vehicles[p][1] for p in ids],
+                makes=[vehicles[p][2] for p in ids],
+                displacements=[vehicles[p][3] for p in ids],
+                phones=[phones.get(p) for p in ids]
+            )
+            if batch is None:
+                self.report.skipped += len(ids)
+                continue
+
+            templates = batch.templates
+            column = {key: j for j, key in enumerate(zip(templates.coverage_types, templates.coverage_levels))}
+            for i, policy_id in enumerate(ids):
+                risk_level = str(batch.risk_level[i])
+                for quotation in quotations[policy_id]:
+                    self.report.quotations += 1
+                    j = column.get((quotation[2], quotation[3]))
+                    if j is None:
+                        continue
+                    priced = (float(batch.monthly[i, j]), float(batch.annual[i, j]),
+                              float(templates.deductible[j]), risk_level)
+                    if priced == (quotation[4], quotation[5], quotation[6], quotation[7]):
+                        self.report.unchanged += 1
+                        continue
+                    updates.append((
+                        """UPDATE quotation_data
+                           SET monthly_premium = ?, annual_premium = ?, deductible = ?, risk_level = ?
+                           WHERE id = ?""",
+                        (*priced, quotation[0])
+                    ))
+        return updates
+
+    # ==================== Run ====================
+
+    def run(self, resume: bool = True) -> RerateReport:
+        """Reprice every open policy, resuming from the checkpoint if asked"""
+        previous = self.load_checkpoint() if resume else None
+        if previous:
+            previous.completed = False
+            previous.dry_run = self.dry_run
+            self.report = previous
+            print(f"⏩ Resuming re-rating after policy {previous.last_policy_id} "
+                  f"({previous.policies} policies done)")
+
+        if self.engine is None:
+            # Prices were probably just edited: don't trust the cached catalog
+            self.engine = template_catalog.reload().engine()
+        if self.report.total is None:
+            self.report.total = self.count_open_policies()
+
+        started = time.perf_counter() - self.report.elapsed
+        while True:
+            page = self.next_page(self.report.last_policy_id)
+            if not page:
+                break
+
+            updates = self.reprice_page(page)
+            if updates and not self.dry_run:
+                with PolicyRepository.transaction():
+                    self.db.execute_batch(updates)
+                    for policy_id, _ in page:
+                        PolicyRepository.invalidate_policy(policy_id)
+
+            report = self.report
+            report.updated += len(updates)
+            report.policies += len(page)
+            report.batches += 1
+            report.last_policy_id = page[-1][0]
+            report.elapsed = time.perf_counter() - started
+            self.save_checkpoint()
+            self._progress()
+
+            if len(page) < self.batch_size:
+                break
+
+        self.report.completed = True
+        self.report.elapsed = time.perf_counter() - started
+        self.save_checkpoint()
+        print(f"✅ Re-rating finished: {self.report.policies} policies, "
+              f"{self.report.updated} quotations updated in {self.report.elapsed:.1f}s")
+        return self.report
+
+    def _progress(self):
+        report = self.report
+        total = f"/{report.total}" if report.total else ""
+        print(f"🔁 Re-rated {report.policies}{total} policies, {report.updated} quotations updated "
+              f"({report.policies_per_second:.0f} policies/s)")
+        if self.on_progress:
+            self.on_progress(report)
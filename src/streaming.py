@@ -0,0 +1,102 @@
+"""
+Streaming helpers: run an agent with Runner.run_streamed and emit SSE frames
+
+`stream_agent()` turns the Agents SDK event stream into a small set of
+events the endpoints forward to the browser / OpenAI-compatible clients:
+
+    ("delta", text)            fragment of the assistant message
+    ("tool_call", name)        a function tool started
+    ("tool_output", name)      a function tool finished
+    ("agent", name)            the active agent changed (handoff)
+    ("final", text)            run finished; text is result.final_output
+"""
+import json
+import time
+from typing import AsyncIterator, Optional, Tuple
+
+from agents import Runner
+
+from src.tracing import tracer
+
+StreamEvent = Tuple[str, str]
+
+
+def sse(data, event: Optional[str] = None) -> str:
+    """Format one server-sent-events frame"""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, default=str)
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {payload}\n\n"
+
+
+async def stream_agent(agent, prompt: str) -> AsyncIterator[StreamEvent]:
+    """Run an agent streamed and yield normalized (kind, value) events"""
+    # The run continues in an SDK task that copies the context: make the span current only here
+    span = tracer.start_span("agent.run", **{"gen_ai.agent.name": agent.name, "gen_ai.streamed": True})
+    with tracer.use_span(span):
+        result = Runner.run_streamed(agent, prompt)
+    tool_names = {}
+
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                if getattr(event.data, "type", None) == "response.output_text.delta":
+                    yield "delta", event.data.delta
+            elif event.type == "run_item_stream_event":
+                raw = event.item.raw_item
+                if event.name == "tool_called":
+                    name = getattr(raw, "name", None) or "tool"
+                    tool_names[getattr(raw, "call_id", None)] = name
+                    yield "tool_call", name
+                elif event.name == "tool_output":
+                    call_id = raw.get("call_id") if isinstance(raw, dict) else getattr(raw, "call_id", None)
+                    yield "tool_output", tool_names.get(call_id, "tool")
+            elif event.type == "agent_updated_stream_event":
+                yield "agent", event.new_agent.name
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        # Client went away mid-run: stop generating (and billing) tokens
+        if not result.is_complete:
+            result.cancel()
+        tracer.end_span(span)
+
+    yield "final", str(result.final_output)
+
+
+class ChatCompletionChunker:
+    """Build OpenAI `chat.completion.chunk` SSE frames for one completion"""
+
+    def __init__(self, model: str, completion_id: str = None):
+        self.model = model
+        self.id = completion_id or f"chatcmpl-{time.time_ns():x}"
+        self.created = int(time.time())
+
+    def chunk(self, delta: dict, finish_reason: Optional[str] = None, progress: dict = None) -> str:
+        body = {
+            "id": self.id,
+            "object": "chat.completion.chunk",
+            "created": self.created,
+            "model": self.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        if progress:
+            # Non-standard field; OpenAI clients ignore unknown keys
+            body["progress"] = progress
+        return sse(body)
+
+    def role(self) -> str:
+        return self.chunk({"role": "assistant", "content": ""})
+
+    def content(self, text: str) -> str:
+        return self.chunk({"content": text})
+
+    def progress(self, kind: str, name: str) -> str:
+        return self.chunk({}, progress={"type": kind, "name": name})
+
+    def stop(self) -> str:
+        return self.chunk({}, finish_reason="stop")
+
+    @staticmethod
+    def done() -> str:
+        return sse("[DONE]")
@@ -0,0 +1,442 @@
+"""
+Span-based tracing of chat turns
+
+Every HTTP request opens a root span; Runner.run, each agent/LLM/tool step
+of the Agents SDK, each DB round-trip and each Mercado Pago call nest under
+it, so a slow turn shows where its time went:
+
+    with tracer.span("mercadopago.create_preference", **{"policy.id": policy_id}) as span:
+        ...
+        span.set_attribute("http.response.status_code", 201)
+
+Spans follow the OpenTelemetry data model (32/16 hex trace/span ids, unix
+nano timestamps, semantic-convention attribute names) and are exported
+in-process when their trace's root span ends - no collector needed:
+
+    TRACE_EXPORTER=console     indented tree per turn on stdout
+    TRACE_EXPORTER=file        one OTLP/JSON line per trace in TRACE_FILE
+    (always)                   last TRACE_RECENT_TURNS traces per session,
+                               served by /debug/trace/{session_id} in DEBUG mode
+
+The Agents SDK's own spans (agent, LLM response, function tool) reach us
+through AgentsTraceBridge, a TracingProcessor registered next to the SDK's
+default one. They are only produced while SDK tracing is enabled.
+"""
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.config import Config
+
+# Attribute values longer than this are cut (prompts, SQL)
+MAX_ATTRIBUTE_CHARS = 500
+
+
+class Span:
+    """One timed operation; attributes use OpenTelemetry semantic-convention names"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "root", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, kind: str = "internal",
+                 attributes: Optional[dict] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.root = parent.root if parent else self
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, object] = {}
+        self.status = "UNSET"
+        self.status_message = ""
+        for key, value in (attributes or {}).items():
+            self.set_attribute(key, value)
+
+    def set_attribute(self, key: str, value):
+        if value is None:
+            return
+        if isinstance(value, str) and len(value) > MAX_ATTRIBUTE_CHARS:
+            value = value[:MAX_ATTRIBUTE_CHARS] + "…"
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = "ERROR"
+        self.status_message = str(error)[:MAX_ATTRIBUTE_CHARS]
+        if isinstance(error, BaseException):
+            self.attributes["exception.type"] = type(error).__name__
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "status_message": self.status_message or None,
+            "attributes": dict(self.attributes)
+        }
+
+    def to_otlp(self) -> dict:
+        """OTLP/JSON span"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": {"internal": 1, "server": 2, "client": 3}.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": {"UNSET": 0, "OK": 1, "ERROR": 2}[self.status], "message": self.status_message}
+        }
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _NoopSpan:
+    """Stand-in while tracing is disabled"""
+    root = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+# ==================== Exporters ====================
+
+class ConsoleSpanExporter:
+    """Indented span tree per trace on stdout"""
+
+    def export(self, spans: List[Span]):
+        children = collections.defaultdict(list)
+        ids = {span.span_id for span in spans}
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            children[span.parent_id if span.parent_id in ids else None].append(span)
+
+        lines = []
+
+        def walk(span: Span, depth: int):
+            marker = "❌" if span.status == "ERROR" else "·"
+            lines.append(f"{'  ' * depth}{marker} {span.name} {span.duration_ms:.1f}ms")
+            for child in children.get(span.span_id, []):
+                walk(child, depth + 1)
+
+        for top in children[None]:
+            walk(top, 0)
+        print("🔭 Trace " + spans[0].trace_id + "\n" + "\n".join(lines))
+
+
+class FileSpanExporter:
+    """Append one OTLP/JSON ExportTraceServiceRequest line per trace (written off the event loop)"""
+
+    def __init__(self, path: str, service_name: str = "aseguraopen"):
+        self.path = path
+        self.service_name = service_name
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-file-exporter", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+
+    def _line(self, spans: List[Span]) -> str:
+        return json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "aseguraopen"}, "spans": [span.to_otlp() for span in spans]}]
+        }]}, ensure_ascii=False, default=str)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty() and len(batch) < 100:
+                batch.append(self._queue.get_nowait())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(self._line(spans) + "\n" for spans in batch))
+            except OSError as e:
+                print(f"⚠️  Could not write traces to {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued traces are written (tests, shutdown)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+class RecentTraces:
+    """Last `per_session` traces of the last `max_sessions` active sessions"""
+
+    def __init__(self, per_session: int = 20, max_sessions: int = 200):
+        self.per_session = per_session
+        self.max_sessions = max_sessions
+        self._sessions: "collections.OrderedDict[str, collections.deque]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        session_id = spans[0].root.attributes.get("session.id")
+        if not session_id:
+            return
+        with self._lock:
+            traces = self._sessions.get(session_id)
+            if traces is None:
+                traces = self._sessions[session_id] = collections.deque(maxlen=self.per_session)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            # Spans finishing after their root (streamed bodies) join the trace they belong to
+            for trace in traces:
+                if trace and trace[0].trace_id == spans[0].trace_id:
+                    trace.extend(spans)
+                    return
+            traces.append(list(spans))
+
+    def get(self, session_id: str, limit: Optional[int] = None) -> List[dict]:
+        """Traces of a session, newest first, spans in start order"""
+        with self._lock:
+            traces = list(self._sessions.get(session_id, ()))
+        traces.reverse()
+        return [{
+            "trace_id": spans[0].trace_id,
+            "name": spans[0].root.name,
+            "duration_ms": round(spans[0].root.duration_ms, 3),
+            "spans": [span.to_dict() for span in sorted(spans, key=lambda s: s.start_ns)]
+        } for spans in traces[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+# ==================== Tracer ====================
+
+class Tracer:
+    """Creates spans, keeps the current one in a contextvar and exports finished traces"""
+
+    def __init__(self, exporters: Optional[list] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.exporters = list(exporters or [])
+        self._open: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+        # Extra parent candidates (the Agents SDK's current span, see AgentsTraceBridge)
+        self._parent_resolvers: List[Callable[[], Optional[Span]]] = []
+
+    def current_span(self) -> Optional[Span]:
+        """Innermost active span: ours or a bridged SDK span, whichever started last"""
+        current = _current_span.get()
+        for resolve in self._parent_resolvers:
+            candidate = resolve()
+            if candidate is not None and (current is None or candidate.start_ns > current.start_ns):
+                current = candidate
+        return current
+
+    def add_parent_resolver(self, resolver: Callable[[], Optional[Span]]):
+        self._parent_resolvers.append(resolver)
+
+    def start_span(self, name: str, parent: Optional[Span] = None, kind: str = "internal", **attributes):
+        """Start a span without making it current; finish it with end_span()"""
+        if not self.enabled:
+            return NOOP_SPAN
+        span = Span(name, parent or self.current_span(), kind, attributes)
+        if span.root is span:
+            with self._lock:
+                self._open[span.trace_id] = []
+        return span
+
+    def end_span(self, span):
+        if span is NOOP_SPAN or span.end_ns is not None:
+            return
+        span.end_ns = time.time_ns()
+        if span.status == "UNSET":
+            span.status = "OK"
+        with self._lock:
+            finished = self._open.get(span.trace_id)
+            if finished is None:
+                # Root already exported: ship this straggler on its own
+                spans = [span]
+            elif span.root is span:
+                spans = [span] + self._open.pop(span.trace_id)
+            else:
+                finished.append(span)
+                return
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                print(f"⚠️  Trace exporter {type(exporter).__name__} failed: {e}")
+
+    @contextlib.contextmanager
+    def use_span(self, span) -> Iterator:
+        """Make `span` current inside the block (without ending it)"""
+        if span is NOOP_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator:
+        """Timed span around the block; exceptions mark it as an error and propagate"""
+        span = self.start_span(name, kind=kind, **attributes)
+        try:
+            with self.use_span(span):
+                yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            self.end_span(span)
+
+    def set_root_attribute(self, key: str, value):
+        """Tag the current trace's root span (e.g. session.id once a handler knows it)"""
+        current = _current_span.get()
+        if current is not None and current.root is not None:
+            current.root.set_attribute(key, value)
+
+
+def build_tracer() -> Tracer:
+    """Tracer configured from TRACING_ENABLED / TRACE_EXPORTER / TRACE_FILE"""
+    exporters = [recent_traces]
+    for name in filter(None, (part.strip() for part in Config.TRACE_EXPORTER.split(","))):
+        if name == "console":
+            exporters.append(ConsoleSpanExporter())
+        elif name == "file":
+            exporters.append(FileSpanExporter(Config.TRACE_FILE))
+        elif name != "none":
+            print(f"⚠️  Unknown TRACE_EXPORTER '{name}' (use console, file or none)")
+    return Tracer(exporters, enabled=Config.TRACING_ENABLED)
+
+
+# ==================== Agents SDK bridge ====================
+
+class AgentsTraceBridge:
+    """Mirror the Agents SDK's agent / LLM / tool spans into our traces
+
+    Registered with agents.add_trace_processor; the SDK calls on_span_start in
+    the context that started the span, so SDK root spans nest under the
+    Runner.run span that was current at the time.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: Dict[str, Span] = {}
+        tracer.add_parent_resolver(self.current)
+
+    def current(self) -> Optional[Span]:
+        """Our mirror of the SDK's current span (parent for DB / payment spans inside tools)"""
+        from agents.tracing import get_current_span
+
+        sdk_span = get_current_span()
+        return self._spans.get(sdk_span.span_id) if sdk_span is not None else None
+
+    @staticmethod
+    def _describe(data) -> tuple:
+        kind = getattr(data, "type", "span")
+        if kind == "agent":
+            return f"agent {data.name}", {"gen_ai.agent.name": data.name}
+        if kind == "function":
+            return f"tool {data.name}", {"gen_ai.tool.name": data.name}
+        if kind in ("response", "generation"):
+            return "llm.call", {"gen_ai.operation.name": kind}
+        if kind == "handoff":
+            return "handoff", {"handoff.from": data.from_agent, "handoff.to": data.to_agent}
+        return kind, {}
+
+    def on_trace_start(self, trace):
+        pass
+
+    def on_trace_end(self, trace):
+        pass
+
+    def on_span_start(self, span):
+        if not self.tracer.enabled:
+            return
+        name, attributes = self._describe(span.span_data)
+        parent = self._spans.get(span.parent_id) if span.parent_id else None
+        self._spans[span.span_id] = self.tracer.start_span(name, parent=parent or self.tracer.current_span(),
+                                                           **attributes)
+
+    def on_span_end(self, span):
+        ours = self._spans.pop(span.span_id, None)
+        if ours is None:
+            return
+        data = span.span_data
+        response = getattr(data, "response", None)
+        usage = getattr(response, "usage", None) or getattr(data, "usage", None)
+        if response is not None:
+            ours.set_attribute("gen_ai.response.model", getattr(response, "model", None))
+        if usage is not None:
+            get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+            ours.set_attribute("gen_ai.usage.input_tokens", get("input_tokens"))
+            ours.set_attribute("gen_ai.usage.output_tokens", get("output_tokens"))
+        if span.error:
+            ours.record_error(span.error.get("message", "error"))
+        self.tracer.end_span(ours)
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self):
+        pass
+
+
+_bridge: Optional[AgentsTraceBridge] = None
+
+
+def install_agents_bridge() -> AgentsTraceBridge:
+    """Register the SDK bridge once per process"""
+    global _bridge
+    if _bridge is None:
+        from agents import add_trace_processor
+
+        _bridge = AgentsTraceBridge(tracer)
+        add_trace_processor(_bridge)
+    return _bridge
+
+
+# Shared instances: traces kept for /debug/trace, and the process tracer
+recent_traces = RecentTraces(Config.TRACE_RECENT_TURNS, Config.TRACE_RECENT_SESSIONS)
+tracer = build_tracer()
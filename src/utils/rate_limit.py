@@ -0,0 +1,84 @@
+"""
+Token-bucket rate limiter, usable from threads and the event loop alike
+
+    limiter = TokenBucket(rate=5, burst=10)   # 5 calls/s, bursts of 10
+    limiter.acquire()                         # from a thread
+    await limiter.acquire_async()             # from the event loop
+
+Used by DatabaseConnection (one bucket for the whole process) and the
+payment reconciler.
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, up to `burst` at once
+
+    Each caller reserves a token under a lock and is told how long to wait,
+    so nobody sleeps while holding the lock and sync and async callers queue
+    in one line. backoff() pauses every caller after the server rejected a
+    call for rate limiting, doubling the pause on consecutive rejections.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._strikes = 0
+        self._lock = threading.Lock()
+        self.waited = 0.0
+        self.rate_limited = 0
+
+    def reserve(self) -> float:
+        """Take a token (possibly in advance); returns the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = -self._tokens / self.rate
+            wait = max(wait, self._paused_until - now)
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def backoff(self) -> float:
+        """The server said "too many requests": pause everyone; returns the pause"""
+        with self._lock:
+            self._strikes += 1
+            self.rate_limited += 1
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self._strikes - 1))
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            return delay
+
+    def record_success(self):
+        if self._strikes:
+            with self._lock:
+                self._strikes = 0
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "wait_seconds_total": round(self.waited, 3),
+            "rate_limited": self.rate_limited,
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3)
+        }
@@ -0,0 +1,38 @@
+"""
+Shared fixtures for tests that run against a throwaway local SQLite database
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.init_db import SCHEMA
+from src.config import Config
+from src.db.connection import DatabaseConnection
+from src.db.repository import PolicyRepository
+from src.pricing.catalog import template_catalog
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    """Point DatabaseConnection at a fresh SQLite file with the full schema"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("TURSO_DATABASE_URL", raising=False)
+    monkeypatch.delenv("TURSO_AUTH_TOKEN", raising=False)
+    monkeypatch.setenv("DB_QUERY_DELAY", "0")
+    monkeypatch.setattr(Config, "validate", classmethod(lambda cls: True))
+
+    conn = sqlite3.connect("aseguraopen.db")
+    conn.executescript(SCHEMA)
+    conn.close()
+
+    DatabaseConnection.close()
+    DatabaseConnection.get_connection()
+    # Cached aggregates belong to the previous test's database
+    PolicyRepository.cache.clear()
+    template_catalog.clear()
+    yield DatabaseConnection
+    DatabaseConnection.close()
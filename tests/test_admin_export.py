@@ -0,0 +1,72 @@
+"""
+Streaming NDJSON/CSV exports of admin tables
+"""
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.db.export import iter_chunks, resolve_export
+from src.db.repository import PolicyRepository
+
+
+def seed_transitions(count=7):
+    policy = PolicyRepository.create_policy("intake")
+    for i in range(count):
+        PolicyRepository.update_policy_state(policy.id, f"state-{i}", f"paso {i}", "test")
+    return policy
+
+
+@pytest.fixture
+def client(local_db):
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+def test_chunks_cover_every_row_in_order(local_db):
+    seed_transitions()
+    spec = resolve_export("transitions", ["to_state", "created_at"])
+
+    chunks = list(iter_chunks(spec, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    rows = [row for chunk in chunks for row in chunk]
+    assert [row[0] for row in rows] == [f"state-{i}" for i in range(7)]
+    assert all(len(row) == 2 for row in rows)
+
+
+def test_resolve_rejects_unknown_tables_and_columns():
+    with pytest.raises(KeyError):
+        resolve_export("sqlite_master")
+    with pytest.raises(ValueError):
+        resolve_export("policies", ["id", "password"])
+
+
+def test_ndjson_export(client, local_db):
+    policy = seed_transitions(3)
+
+    response = client.get("/api/admin/export/state_transitions", params={"columns": "policy_id,to_state"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"policy_id": policy.id, "to_state": f"state-{i}"} for i in range(3)]
+
+
+def test_csv_export_with_date_range(client, local_db):
+    seed_transitions(2)
+    local_db.execute_update("UPDATE state_transitions SET created_at = '2020-01-01T00:00:00' WHERE to_state = 'state-0'")
+
+    response = client.get("/api/admin/export/transitions",
+                          params={"format": "csv", "columns": "to_state,reason", "created_from": "2021-01-01"})
+
+    assert 'filename="state_transitions.csv"' in response.headers["content-disposition"]
+    assert list(csv.reader(io.StringIO(response.text))) == [["to_state", "reason"], ["state-1", "paso 1"]]
+
+
+def test_export_errors(client):
+    assert client.get("/api/admin/export/nope").status_code == 404
+    assert client.get("/api/admin/export/policies", params={"columns": "secret"}).status_code == 400
+    assert client.get("/api/admin/export/policies", params={"format": "xml"}).status_code == 400
@@ -0,0 +1,88 @@
+"""
+Keyset pagination and filters of the /api/admin/* listings
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.db.pagination import decode_cursor, encode_cursor
+from src.db.repository import PolicyRepository
+
+
+def seed_policies(db, count=5):
+    """Policies created one day apart; two share a timestamp to exercise the id tie-break"""
+    ids = []
+    for i in range(count):
+        policy = PolicyRepository.create_policy("payment" if i % 2 else "quotation")
+        day = min(i, count - 2)
+        db.execute_update("UPDATE policies SET created_at = ?, insurance_type = ? WHERE id = ?",
+                          (f"2026-01-{day + 1:02d}T10:00:00", "auto" if i < 3 else "moto", policy.id))
+        ids.append(policy.id)
+    return ids
+
+
+@pytest.fixture
+def client(local_db):
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2026-01-01T10:00:00", "abc")
+    assert decode_cursor(cursor) == ("2026-01-01T10:00:00", "abc")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_every_row_once_newest_first(local_db):
+    seed_policies(local_db)
+    seen, before = [], None
+    while True:
+        page = PolicyRepository.get_all_policies(limit=2, before=before)
+        if not page:
+            break
+        seen.extend(page)
+        before = (page[-1]["created_at"], page[-1]["id"])
+
+    assert len({p["id"] for p in seen}) == 5
+    keys = [(p["created_at"], p["id"]) for p in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_filters(local_db):
+    seed_policies(local_db)
+
+    assert {p["state"] for p in PolicyRepository.get_all_policies(state="payment")} == {"payment"}
+    assert len(PolicyRepository.get_all_policies(insurance_type="moto")) == 2
+    in_range = PolicyRepository.get_all_policies(created_from="2026-01-02", created_to="2026-01-03T23:59:59")
+    assert [p["created_at"][:10] for p in in_range] == ["2026-01-03", "2026-01-02"]
+
+
+def test_endpoint_returns_next_cursor_until_exhausted(client, local_db):
+    seed_policies(local_db)
+
+    first = client.get("/api/admin/policies", params={"limit": 3}).json()
+    assert len(first["policies"]) == 3 and first["next_cursor"]
+
+    second = client.get("/api/admin/policies", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert len(second["policies"]) == 2 and second["next_cursor"] is None
+    assert not {p["id"] for p in first["policies"]} & {p["id"] for p in second["policies"]}
+
+    assert client.get("/api/admin/policies", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_other_listings_page(client, local_db):
+    ids = seed_policies(local_db, count=3)
+    for policy_id in ids:
+        PolicyRepository.create_session(f"s-{policy_id}", policy_id)
+        PolicyRepository.create_payment(policy_id, None, 100.0, f"pref-{policy_id}", "https://mp/link")
+
+    sessions = client.get("/api/admin/sessions", params={"limit": 2}).json()
+    assert len(sessions["sessions"]) == 2 and sessions["next_cursor"]
+    rest = client.get("/api/admin/sessions", params={"limit": 2, "cursor": sessions["next_cursor"]}).json()
+    assert len(rest["sessions"]) == 1
+
+    payments = client.get("/api/admin/payments", params={"payment_status": "pending", "policy_id": ids[0]}).json()
+    assert [p["policy_id"] for p in payments["payments"]] == [ids[0]]
+    assert client.get("/api/admin/vehicles").json()["vehicles"] == []
+    assert client.get("/api/admin/quotations").json()["quotations"] == []
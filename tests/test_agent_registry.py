@@ -0,0 +1,99 @@
+"""
+Process-wide agent registry and state dispatch
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.agents.orchestrator import AgentOrchestrator
+from src.agents.registry import AgentRegistry, create_default_registry
+from src.config import Config
+
+
+class FakeAgent:
+    def __init__(self, name):
+        self.name = name
+        self.tools = []
+
+
+class CountingCreator:
+    builds = 0
+
+    @classmethod
+    def create_agent(cls):
+        cls.builds += 1
+        return FakeAgent("CountingCreator")
+
+
+@pytest.fixture(autouse=True)
+def reset_builds():
+    CountingCreator.builds = 0
+
+
+def test_agents_are_built_once():
+    registry = AgentRegistry()
+    registry.register(CountingCreator, states=["intake"])
+
+    first = registry.for_state("intake")
+    assert registry.for_state("intake") is first
+    assert registry.get("CountingCreator") is first
+    assert CountingCreator.builds == 1
+    assert registry.for_state("unknown") is None
+
+
+def test_reload_rebuilds_and_notifies():
+    registry = AgentRegistry()
+    registry.register(CountingCreator, states=["intake"])
+    first = registry.for_state("intake")
+
+    seen = []
+    registry.on_reload(seen.append)
+    assert registry.reload() == ["CountingCreator"]
+
+    assert registry.for_state("intake") is not first
+    assert CountingCreator.builds == 2
+    assert seen == [["CountingCreator"]]
+
+    with pytest.raises(KeyError):
+        registry.reload("Missing")
+
+
+def test_orchestrator_uses_registry():
+    registry = AgentRegistry()
+    orchestrator = AgentOrchestrator(registry)
+
+    name = orchestrator.register(CountingCreator)
+    AgentOrchestrator(registry).register(CountingCreator)
+    assert name == "CountingCreator"
+    assert CountingCreator.builds == 1
+
+    registry.reload()
+    assert orchestrator.agents[name] is registry.get(name)
+
+
+def test_default_dispatch_table():
+    registry = create_default_registry()
+    assert registry.states() == {
+        "intake": "IntakeAgent",
+        "loaded": "QuotationAgent",
+        "quotation": "QuotationAgent",
+        "payment": "PaymentAgent",
+    }
+    assert registry.for_state("loaded") is registry.for_state("quotation")
+    assert registry.for_state("payment").name == "PaymentAgent"
+    # Issued policies are answered by the issuance worker, not an LLM agent
+    assert registry.for_state("issued") is None
+
+
+def test_reimport_requires_debug(local_db, monkeypatch):
+    reloads = []
+    monkeypatch.setattr(app_module.agent_registry, "reload",
+                        lambda name=None, reimport=False: reloads.append(reimport) or [])
+    monkeypatch.setattr(Config, "DEBUG", False)
+    with TestClient(app_module.app) as client:
+        assert client.post("/api/admin/agents/reload", params={"reimport": "true"}).status_code == 403
+        assert client.post("/api/admin/agents/reload").status_code == 200
+
+        monkeypatch.setattr(Config, "DEBUG", True)
+        assert client.post("/api/admin/agents/reload", params={"reimport": "true"}).status_code == 200
+    assert reloads == [False, True]
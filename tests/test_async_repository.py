@@ -0,0 +1,111 @@
+"""
+Async database API and PolicyRepository *_async variants (local SQLite)
+"""
+import asyncio
+import threading
+
+from src.db.connection import DatabaseConnection
+from src.db.repository import PolicyRepository, _SYNC_ONLY
+
+
+def test_fetch_and_execute(local_db):
+    async def scenario():
+        await DatabaseConnection.execute(
+            "INSERT INTO policies (id, state, intention) VALUES (?, ?, ?)",
+            ("p-1", "intake", 0)
+        )
+        return await DatabaseConnection.fetch("SELECT id, state FROM policies WHERE id = ?", ("p-1",))
+
+    rows = asyncio.run(scenario())
+    assert len(rows) == 1
+    assert rows[0][1] == "intake"
+
+
+def test_repository_async_variants(local_db):
+    async def scenario():
+        policy = await PolicyRepository.create_policy_async("intake")
+        await PolicyRepository.create_session_async("s-1", policy.id)
+        await PolicyRepository.set_intention_async(policy.id, "auto")
+        # Concurrent calls share the event loop without blocking each other
+        session, fetched = await asyncio.gather(
+            PolicyRepository.get_session_async("s-1"),
+            PolicyRepository.get_policy_async(policy.id),
+        )
+        return policy, session, fetched
+
+    policy, session, fetched = asyncio.run(scenario())
+    assert session["policy_id"] == policy.id
+    assert fetched.intention is True
+    assert fetched.insurance_type == "auto"
+
+
+def test_every_public_method_has_async_variant():
+    for name, member in vars(PolicyRepository).items():
+        if (isinstance(member, classmethod) and not name.startswith("_")
+                and not name.endswith("_async") and name not in _SYNC_ONLY):
+            assert asyncio.iscoroutinefunction(getattr(PolicyRepository, f"{name}_async"))
+
+
+def test_hot_paths_stay_on_the_event_loop(local_db, monkeypatch):
+    policy = PolicyRepository.create_policy("quotation")
+    PolicyRepository.create_session("s-1", policy.id)
+    blocking = []
+
+    async def scenario():
+        await PolicyRepository.append_message_async("s-1", "user", "hola")
+        aggregate = await PolicyRepository.load_session_aggregate_async("s-1", use_cache=False)
+        await PolicyRepository.create_payment_async(policy.id, "q-1", 1000.0, "pref-1", "https://pago")
+        await PolicyRepository.update_payment_status_async("pref-1", "approved", "mp-1")
+        payment = await PolicyRepository.get_payment_by_policy_async(policy.id)
+        transition = await PolicyRepository.update_policy_state_async(
+            policy.id, "payment", "pago iniciado", "test", expected_state="quotation"
+        )
+        fetched = await PolicyRepository.get_policy_async(policy.id)
+        return aggregate, payment, transition, fetched
+
+    # None of them may fall back to the blocking DatabaseConnection API
+    for name in ("execute_query", "execute_update", "execute_batch"):
+        monkeypatch.setattr(DatabaseConnection, name,
+                            classmethod(lambda cls, *args, name=name: blocking.append(name)))
+    aggregate, payment, transition, fetched = asyncio.run(scenario())
+
+    assert blocking == []
+    assert aggregate.messages == [{"seq": 1, "role": "user", "content": "hola"}]
+    assert (payment.payment_status, payment.payment_id) == ("approved", "mp-1")
+    assert (transition.from_state, transition.to_state) == ("quotation", "payment")
+    assert fetched.state == "payment"
+
+
+def test_first_async_use_connects_off_the_event_loop(local_db, monkeypatch):
+    DatabaseConnection.close()
+    connect = DatabaseConnection.get_connection
+    threads = []
+
+    def tracked():
+        threads.append(threading.current_thread())
+        return connect()
+
+    monkeypatch.setattr(DatabaseConnection, "get_connection", tracked)
+    assert asyncio.run(DatabaseConnection.get_async_connection()) is None
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_async_client_from_a_previous_loop_is_closed(local_db, monkeypatch):
+    class FakeClient:
+        def __init__(self):
+            self.closed = False
+
+        async def close(self):
+            self.closed = True
+
+    clients = []
+    monkeypatch.setattr("src.db.connection.libsql_client.create_client",
+                        lambda **kwargs: clients.append(FakeClient()) or clients[-1])
+    monkeypatch.setattr(DatabaseConnection, "_use_turso", True)
+    monkeypatch.setattr(DatabaseConnection, "_turso_url", "libsql://test.turso.io")
+    monkeypatch.setattr(DatabaseConnection, "_turso_token", "token")
+
+    first = asyncio.run(DatabaseConnection.get_async_connection())
+    second = asyncio.run(DatabaseConnection.get_async_connection())
+    assert first is not second
+    assert first.closed and not second.closed
@@ -0,0 +1,86 @@
+"""
+Load-test harness: report math, the fake Mercado Pago and an end-to-end run
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench.fake_mercadopago import FakeMercadoPago
+from bench.harness import compare, percentile, plate_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def agents_runtime_ok() -> bool:
+    """The Agents SDK can build its usage objects with the installed openai package"""
+    try:
+        from agents.usage import Usage
+        Usage()
+        return True
+    except Exception:
+        return False
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    def report(tps, roundtrips, p95, completed=10):
+        return {
+            "config": {"customers": 10},
+            "customers_completed": completed,
+            "turns_per_second": tps,
+            "db_roundtrips_per_turn": {"mean": roundtrips},
+            "endpoints_ms": {"POST /api/chat/{id}/message": {"p95": p95}},
+        }
+
+    baseline = report(100, 5.0, 40)
+    assert compare(baseline, report(90, 5.5, 45)) == []
+
+    regressions = compare(baseline, report(70, 7.0, 45, completed=9))
+    assert len(regressions) == 3
+    assert regressions[0].startswith("turns_per_second")
+    assert regressions[1].startswith("db_roundtrips_per_turn.mean")
+
+
+def test_plates_are_distinct_mercosur_plates():
+    plates = {plate_for(n) for n in range(500)}
+    assert len(plates) == 500
+    assert all(len(p) == 7 and p[:2].isalpha() and p[2:5].isdigit() and p[5:].isalpha() for p in plates)
+
+
+def test_fake_mercadopago_searches_payments_by_policy():
+    fake = FakeMercadoPago()
+    fake.pay("policy-a", status="rejected")
+    payment_id = fake.pay("policy-a")
+
+    found = fake.get("https://api.mercadopago.com/v1/payments/search", {}, params={"external_reference": "policy-a"})
+    assert [p["id"] for p in found["response"]["results"]] == [payment_id, "1"]
+    assert fake.get(f"https://api.mercadopago.com/v1/payments/{payment_id}", {})["response"]["status"] == "approved"
+    assert fake.notification(payment_id)["data"]["id"] == payment_id
+
+
+@pytest.mark.skipif(not agents_runtime_ok(), reason="openai package incompatible with the pinned Agents SDK")
+def test_end_to_end_run(tmp_path):
+    report_path = tmp_path / "report.json"
+    result = subprocess.run(
+        [sys.executable, "bench/run.py", "--customers", "2", "--concurrency", "2",
+         "--workdir", str(tmp_path), "--json", str(report_path)],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    report = json.loads(report_path.read_text())
+    assert report["customers_completed"] == 2
+    assert report["errors"] == {}
+    assert report["db_roundtrips_per_turn"]["count"] == report["turns"]
+    assert report["mercadopago_calls"] >= 2
@@ -0,0 +1,73 @@
+"""
+ConnectionPool behaviour and pooled local SQLite access
+"""
+import threading
+
+import pytest
+
+from src.db.connection import DatabaseConnection
+from src.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConn:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _check(conn):
+    if not conn.healthy:
+        raise RuntimeError("connection lost")
+
+
+def test_pool_respects_max_size_and_times_out():
+    pool = ConnectionPool(FakeConn, min_size=0, max_size=2, acquire_timeout=0.05)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    assert pool.stats()["in_use"] == 2
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+def test_pool_replaces_unhealthy_connections():
+    pool = ConnectionPool(FakeConn, min_size=1, max_size=1, health_check=_check,
+                          health_check_interval=0)
+    conn = pool.acquire()
+    conn.healthy = False
+    pool.release(conn)
+
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert conn.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_sqlite_connections_have_pragmas(local_db):
+    with DatabaseConnection.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_concurrent_writes_from_threads(local_db):
+    def insert(worker):
+        for i in range(20):
+            DatabaseConnection.execute_update(
+                "INSERT INTO policies (id, state) VALUES (?, ?)", (f"{worker}-{i}", "intake")
+            )
+
+    threads = [threading.Thread(target=insert, args=(w,)) for w in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert DatabaseConnection.execute_query("SELECT COUNT(*) FROM policies")[0][0] == 120
+    assert DatabaseConnection.pool_stats()["in_use"] == 0
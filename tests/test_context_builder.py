@@ -0,0 +1,109 @@
+"""
+Token-budgeted agent context builder
+"""
+import asyncio
+
+from src.agents import context_builder
+from src.agents.context_builder import ContextBuilder, estimate_tokens
+from src.db.repository import PolicyRepository
+from src.models import Policy, PolicyAggregate
+
+
+def _aggregate(n_messages, summary=None, through_seq=0, first_seq=1):
+    messages = [
+        {"seq": first_seq + i, "role": "user" if i % 2 == 0 else "agent",
+         "content": f"mensaje número {i} " + "x" * 80}
+        for i in range(n_messages)
+    ]
+    session = {"session_id": "s-ctx", "policy_id": "p-1", "messages": messages,
+               "summary": summary, "summary_through_seq": through_seq}
+    return PolicyAggregate(policy=Policy(id="p-1", state="intake"), session=session)
+
+
+def test_prompt_stays_flat_as_history_grows():
+    builder = ContextBuilder(max_tokens=600, window_messages=50, summary_enabled=False)
+
+    short = builder.build(_aggregate(2), "hola")
+    long = builder.build(_aggregate(500), "hola")
+
+    assert short.messages_included == 2
+    assert long.token_count <= 600
+    assert long.messages_dropped == 500 - long.messages_included
+    assert "mensaje número 499" in long.prompt
+    assert "mensaje número 0 " not in long.prompt
+    assert "Policy ID: p-1" in long.prompt
+    assert long.prompt.endswith("NUEVO MENSAJE DEL CLIENTE:\nhola")
+
+
+def test_window_limits_messages():
+    context = ContextBuilder(max_tokens=10_000, window_messages=4, summary_enabled=False).build(_aggregate(10), "hola")
+    assert context.messages_included == 4
+    assert context.messages_dropped == 6
+
+
+def test_rolling_summary_covers_dropped_messages():
+    builder = ContextBuilder(max_tokens=10_000, window_messages=4, summary_max_tokens=200)
+
+    first = builder.build(_aggregate(10), "hola")
+    assert first.summary_changed and first.summary_through_seq == 6
+    assert "RESUMEN DE LA CONVERSACIÓN ANTERIOR" in first.prompt
+    assert estimate_tokens(first.summary) <= 200
+
+    # Nothing new slid out: the stored summary is reused as-is
+    again = builder.build(_aggregate(10, first.summary, first.summary_through_seq), "hola")
+    assert not again.summary_changed
+    assert again.summary == first.summary
+
+
+def test_summary_tracks_real_seqs():
+    summarized = []
+
+    def summarizer(summary, messages, max_tokens, count_tokens):
+        summarized.extend(message["seq"] for message in messages)
+        return "resumen"
+
+    builder = ContextBuilder(max_tokens=10_000, window_messages=4, summarizer=summarizer)
+
+    # History whose seqs don't start at 1 (e.g. after older rows were pruned)
+    first = builder.build(_aggregate(10, first_seq=41), "hola")
+    assert first.summary_through_seq == 46
+    assert first.messages_dropped == 6
+    assert summarized == [41, 42, 43, 44, 45, 46]
+
+    summarized.clear()
+    later = builder.build(_aggregate(12, "resumen", first.summary_through_seq, first_seq=41), "hola")
+    assert later.summary_through_seq == 48
+    assert summarized == [47, 48]
+
+
+def test_build_async_persists_summary(local_db):
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.create_session("s-ctx", policy.id)
+    for i in range(8):
+        PolicyRepository.append_message("s-ctx", "user", f"mensaje {i}")
+
+    builder = ContextBuilder(max_tokens=10_000, window_messages=3)
+    aggregate = PolicyRepository.load_session_aggregate("s-ctx")
+    context = asyncio.run(builder.build_async(aggregate, "hola"))
+
+    stored = PolicyRepository.get_session_summary("s-ctx")
+    assert stored["through_seq"] == 5
+    assert stored["summary"] == context.summary
+    assert PolicyRepository.load_session_aggregate("s-ctx").session["summary_through_seq"] == 5
+
+    PolicyRepository.clear_session_messages("s-ctx")
+    assert PolicyRepository.get_session_summary("s-ctx") is None
+
+
+def test_unloadable_encoding_falls_back_to_length(monkeypatch):
+    class OfflineTiktoken:
+        @staticmethod
+        def get_encoding(name):
+            raise ConnectionError("can't download cl100k_base")
+
+    monkeypatch.setattr(context_builder, "tiktoken", OfflineTiktoken)
+    context_builder._encoding.cache_clear()
+    try:
+        assert estimate_tokens("x" * 40) == 10
+    finally:
+        context_builder._encoding.cache_clear()
@@ -0,0 +1,88 @@
+"""
+DB round-trip metrics: fingerprints, per-request attribution and /metrics
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.config import Config
+from src.db.metrics import QueryMetrics, db_metrics, fingerprint
+from src.db.repository import PolicyRepository
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setattr(Config, "DEBUG", True)
+    db_metrics.reset()
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+def test_fingerprint_normalizes_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM policies WHERE id = 'abc'  AND n > 10") == \
+        "SELECT * FROM policies WHERE id = ? AND n > ?"
+    assert fingerprint("SELECT id FROM t WHERE id IN (?, ?,?)") == "SELECT id FROM t WHERE id IN (?...)"
+    assert fingerprint("SELECT idx_1 FROM t2") == "SELECT idx_1 FROM t2"
+
+
+def test_requests_count_their_own_roundtrips_including_threads(local_db):
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.cache.clear()
+
+    async def handler():
+        with db_metrics.track_request() as stats:
+            await asyncio.to_thread(local_db.execute_query, "SELECT id FROM policies WHERE id = ?", (policy.id,))
+            await local_db.fetch("SELECT state FROM policies WHERE id = ?", (policy.id,))
+        return stats
+
+    before = db_metrics.roundtrips
+    stats = asyncio.run(handler())
+
+    assert stats.roundtrips == 2
+    assert db_metrics.roundtrips - before == 2
+    assert stats.statements["query SELECT id FROM policies WHERE id = ?"] == 1
+
+
+def test_nested_trackers_count_into_parent():
+    metrics = QueryMetrics()
+    with metrics.track_request() as outer:
+        metrics.record("query", "SELECT ?", 0.001, rows=1)
+        with metrics.track_request() as inner:
+            metrics.record("update", "UPDATE t SET a = ?", 0.002)
+
+    assert (outer.roundtrips, inner.roundtrips) == (2, 1)
+    snapshot = metrics.snapshot()
+    assert [row["operation"] for row in snapshot] == ["update", "query"]
+    assert snapshot[1]["rows"] == 1
+
+
+def test_errors_are_recorded(local_db):
+    db_metrics.reset()
+    with pytest.raises(Exception):
+        local_db.execute_query("SELECT * FROM no_such_table")
+    assert db_metrics.snapshot()[0]["errors"] == 1
+
+
+def test_debug_headers_and_prometheus_endpoint(client):
+    session = client.post("/api/chat/start").json()
+
+    response = client.get(f"/api/chat/{session['session_id']}")
+    assert int(response.headers["X-DB-Roundtrips"]) >= 1
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    text = metrics.text
+    assert "# TYPE aseguraopen_db_statement_duration_seconds histogram" in text
+    assert 'aseguraopen_db_roundtrips_per_request_count{route="/api/chat/{session_id}"} 1' in text
+    assert 'le="+Inf"' in text
+
+    top = client.get("/api/admin/db/statements", params={"top": 3}).json()
+    assert len(top["statements"]) <= 3 and top["roundtrips"] >= 1
+
+
+def test_headers_hidden_outside_debug(client, monkeypatch):
+    monkeypatch.setattr(Config, "DEBUG", False)
+    assert "X-DB-Roundtrips" not in client.get("/health").headers
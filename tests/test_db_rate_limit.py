@@ -0,0 +1,105 @@
+"""
+Client-side DB rate limiting: shared token bucket and backoff on Turso rate-limit errors
+"""
+import asyncio
+
+import pytest
+
+from src.config import Config
+from src.db import connection as db_connection
+from src.db.connection import DatabaseConnection, is_rate_limit_error
+from src.utils.rate_limit import TokenBucket
+
+
+class FakeLibsqlError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """A fast, unlimited bucket in place of the shared one"""
+    bucket = TokenBucket(rate=0, burst=1, backoff_base=0.01, backoff_max=0.05)
+    monkeypatch.setattr(db_connection, "db_rate_limiter", bucket)
+    monkeypatch.setattr(Config, "DB_RATE_LIMIT_RETRIES", 2)
+    return bucket
+
+
+def test_bucket_waits_once_burst_is_spent():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.reserve() == 0.0 for _ in range(100))
+
+
+def test_backoff_doubles_and_pauses_every_caller():
+    bucket = TokenBucket(rate=0, burst=1, backoff_base=1.0, backoff_max=3.0)
+    assert bucket.backoff() == 1.0
+    assert bucket.backoff() == 2.0
+    assert bucket.backoff() == 3.0
+    assert bucket.reserve() == pytest.approx(3.0, abs=0.05)
+    assert bucket.stats()["rate_limited"] == 3
+
+    bucket.record_success()
+    assert bucket.backoff() == 1.0
+
+
+def test_detects_turso_rate_limit_errors():
+    assert is_rate_limit_error(FakeLibsqlError("HTTP status 429: Too Many Requests"))
+    assert is_rate_limit_error(FakeLibsqlError("quota exceeded", code="RATE_LIMITED"))
+    assert not is_rate_limit_error(FakeLibsqlError("no such table: policies", code="SQLITE_UNKNOWN"))
+
+
+def test_rate_limited_call_is_retried(limiter):
+    calls = []
+
+    def flaky(query):
+        calls.append(query)
+        if len(calls) == 1:
+            raise FakeLibsqlError("HTTP status 429")
+        return ["row"]
+
+    assert DatabaseConnection._limited(flaky, "SELECT 1") == ["row"]
+    assert calls == ["SELECT 1", "SELECT 1"]
+    assert limiter.rate_limited == 1
+
+
+def test_other_errors_are_not_retried(limiter):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise FakeLibsqlError("no such table: policies")
+
+    with pytest.raises(FakeLibsqlError):
+        DatabaseConnection._limited(broken)
+    assert len(calls) == 1
+    assert limiter.rate_limited == 0
+
+
+def test_gives_up_after_configured_retries(limiter):
+    def always_limited():
+        raise FakeLibsqlError("rate limit exceeded")
+
+    with pytest.raises(FakeLibsqlError):
+        DatabaseConnection._limited(always_limited)
+    assert limiter.rate_limited == Config.DB_RATE_LIMIT_RETRIES
+
+
+def test_async_call_is_retried_with_a_fresh_awaitable(limiter):
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeLibsqlError("too many requests", code="RATE_LIMITED")
+        return "ok"
+
+    assert asyncio.run(DatabaseConnection._limited_async(flaky)) == "ok"
+    assert len(attempts) == 3
@@ -0,0 +1,119 @@
+"""
+Embedded read replica: request reads from the local copy, read-your-writes
+"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.db.metrics import db_metrics
+from src.db.replica import embedded_replica
+from src.db.repository import PolicyRepository
+
+
+class BackupSyncer:
+    """Stands in for libsql's sync: copies the local primary into the replica file"""
+
+    def __init__(self, primary: str, replica: str):
+        self.primary = primary
+        self.replica = replica
+        self.calls = 0
+        self.fail = False
+
+    def sync(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("primary unreachable")
+        src, dst = sqlite3.connect(self.primary), sqlite3.connect(self.replica)
+        try:
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def replica(local_db, tmp_path, monkeypatch):
+    syncer = BackupSyncer("aseguraopen.db", str(tmp_path / "replica.db"))
+    monkeypatch.setattr(embedded_replica, "read_your_writes", True)
+    embedded_replica.open(syncer.replica, syncer)
+    embedded_replica.replica_reads = embedded_replica.primary_reads = 0
+    PolicyRepository.cache.clear()
+    yield syncer
+    embedded_replica.close()
+
+
+def state_of(db, policy_id):
+    return db.execute_query("SELECT state FROM policies WHERE id = ?", (policy_id,))[0][0]
+
+
+def test_reads_outside_a_request_use_the_primary(replica, local_db):
+    policy = PolicyRepository.create_policy("intake")
+    assert state_of(local_db, policy.id) == "intake"
+    assert embedded_replica.replica_reads == 0
+
+
+def test_request_reads_come_from_the_replica(replica, local_db):
+    policy = PolicyRepository.create_policy("intake")
+    with embedded_replica.request_scope():
+        assert state_of(local_db, policy.id) == "intake"       # synced after the write
+
+        # Changed behind this process's back: the replica is stale until the next sync
+        conn = sqlite3.connect("aseguraopen.db")
+        conn.execute("UPDATE policies SET state = 'quotation' WHERE id = ?", (policy.id,))
+        conn.commit()
+        conn.close()
+        assert state_of(local_db, policy.id) == "intake"
+        embedded_replica.sync()
+        assert state_of(local_db, policy.id) == "quotation"
+    assert embedded_replica.replica_reads == 3
+
+
+def test_read_your_writes_syncs_once_for_concurrent_readers(replica, local_db):
+    policy = PolicyRepository.create_policy("intake")
+    with embedded_replica.request_scope():
+        state_of(local_db, policy.id)
+        calls = replica.calls
+        local_db.execute_update("UPDATE policies SET state = 'payment' WHERE id = ?", (policy.id,))
+        assert state_of(local_db, policy.id) == "payment"
+        assert state_of(local_db, policy.id) == "payment"
+    assert replica.calls == calls + 1
+
+
+def test_without_read_your_writes_reads_go_to_primary_until_synced(replica, local_db, monkeypatch):
+    monkeypatch.setattr(embedded_replica, "read_your_writes", False)
+    policy = PolicyRepository.create_policy("intake")
+    with embedded_replica.request_scope():
+        assert state_of(local_db, policy.id) == "intake"
+        assert (embedded_replica.primary_reads, embedded_replica.replica_reads) == (1, 0)
+        embedded_replica.sync()
+        state_of(local_db, policy.id)
+    assert embedded_replica.replica_reads == 1
+
+
+def test_failed_sync_falls_back_to_primary(replica, local_db):
+    replica.fail = True
+    policy = PolicyRepository.create_policy("intake")
+    with embedded_replica.request_scope():
+        assert state_of(local_db, policy.id) == "intake"
+    assert embedded_replica.primary_reads == 1 and embedded_replica.sync_errors == 1
+
+
+def test_async_read_batches_use_the_replica(replica, local_db):
+    policy = PolicyRepository.create_policy("intake")
+    db_metrics.reset()
+
+    async def read():
+        with embedded_replica.request_scope():
+            rows = await local_db.batch([("SELECT state FROM policies WHERE id = ?", (policy.id,)),
+                                         ("SELECT COUNT(*) FROM policies", None)])
+            one = await local_db.fetch("SELECT id FROM policies WHERE id = ?", (policy.id,))
+        return rows, one
+
+    rows, one = asyncio.run(read())
+
+    assert rows[0][0][0] == "intake" and one[0][0] == policy.id
+    assert {row["operation"] for row in db_metrics.snapshot()} == {"replica_batch", "replica_query"}
@@ -0,0 +1,74 @@
+"""
+Rule-based fast path for structured intake inputs (local SQLite)
+"""
+import asyncio
+
+import pytest
+
+from src.agents.fast_path import match_email, match_intention, match_phone, match_plate, try_fast_path
+from src.config import Config
+from src.db.repository import PolicyRepository
+
+
+@pytest.mark.parametrize("message,expected", [
+    ("auto", "auto"), ("Moto.", "moto"), ("quiero un seguro para mi coche", "auto"),
+    ("un auto rojo", None), ("¿cuánto sale?", None),
+])
+def test_match_intention(message, expected):
+    assert match_intention(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "2024-01-15", "15-01-2024", "2024 01 15", "15/01/2024", "15.01.2024",   # dates
+    "30.123.456", "30123456", "DNI 30123456", "20-30123456-9",             # DNI / CUIL
+])
+def test_phone_rejects_dates_and_ids(message):
+    assert match_phone(message) is None
+
+
+def test_matchers():
+    assert match_email(" Ana.Perez@Mail.com ") == "ana.perez@mail.com"
+    assert match_email("mi mail es ana@mail.com") is None
+    assert match_phone("+54 11 4567-8901") == "+54 11 4567-8901"
+    assert match_phone("(011) 4567-8901") == "(011) 4567-8901"
+    assert match_phone("1234") is None
+    assert match_plate("ab 123 cd") == "AB123CD"
+    assert match_plate("abc-123") == "ABC123"
+    assert match_plate("A123BCD") == "A123BCD"
+    assert match_plate("hola") is None
+
+
+def _reply(policy_id, message):
+    aggregate = PolicyRepository.load_policy_aggregate(policy_id)
+    return asyncio.run(try_fast_path(aggregate, message))
+
+
+def test_intake_and_plate_without_llm(local_db):
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy("intake")
+
+    assert "nombre" in _reply(policy.id, "auto")
+    assert PolicyRepository.get_policy(policy.id).insurance_type == "auto"
+
+    # Free text (a name) goes to the agent
+    assert _reply(policy.id, "Ana Pérez") is None
+    PolicyRepository.update_client_data_partial(policy.id, name="Ana Pérez")
+
+    assert "teléfono" in _reply(policy.id, "ana@mail.com")
+    assert "patente" in _reply(policy.id, "11 4567 8901")
+    assert PolicyRepository.get_policy(policy.id).state == "loaded"
+
+    reply = _reply(policy.id, "AB 123 CD")
+    assert "AB123CD" in reply
+    assert PolicyRepository.get_policy(policy.id).state == "quotation"
+    assert PolicyRepository.get_vehicle_data(policy.id).plate == "AB123CD"
+    assert PolicyRepository.get_quotations(policy.id)
+
+    # Vehicle already saved: the agent takes over
+    assert _reply(policy.id, "AB 123 CD") is None
+
+
+def test_fast_path_can_be_disabled(local_db, monkeypatch):
+    monkeypatch.setattr(Config, "FAST_PATH_ENABLED", False)
+    policy = PolicyRepository.create_policy("intake")
+    assert _reply(policy.id, "auto") is None
@@ -0,0 +1,125 @@
+"""
+Issuance outbox: enqueued with the "issued" transition, drained by the worker
+"""
+import asyncio
+
+import pytest
+
+from src.db.repository import PolicyRepository
+from src.issuance.client import IssuerClient, StubIssuerClient
+from src.issuance.outbox import ISSUANCE_FAILED_REPLY, ISSUING_REPLY, IssuanceWorker
+
+
+def issued_policy():
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy("payment")
+    PolicyRepository.save_client_data(policy.id, "Ana", "ana@example.com", "1155555555")
+    PolicyRepository.save_vehicle_data(policy.id, "AB123CD", "Ford", "Fiesta", 2018)
+    PolicyRepository.generate_quotations(policy.id, "auto")
+    PolicyRepository.update_policy_state(policy.id, "issued", "Pago aprobado", "test")
+    return policy
+
+
+def outbox_row(db, policy_id):
+    rows = db.execute_query(
+        "SELECT status, attempts, external_id FROM issuance_outbox WHERE policy_id = ?", (policy_id,)
+    )
+    return tuple(rows[0]) if rows else None
+
+
+def test_issued_transition_writes_outbox_row_atomically(local_db):
+    policy = issued_policy()
+    assert outbox_row(local_db, policy.id) == ("pending", 0, None)
+
+    # A failed transaction leaves neither the state change nor the outbox row
+    other = PolicyRepository.create_policy("payment")
+    with pytest.raises(RuntimeError):
+        with PolicyRepository.transaction():
+            PolicyRepository.update_policy_state(other.id, "issued", "Pago aprobado", "test")
+            raise RuntimeError("boom")
+    assert PolicyRepository.get_policy(other.id, use_cache=False).state == "payment"
+    assert outbox_row(local_db, other.id) is None
+
+
+def test_worker_issues_and_completes_policy(local_db):
+    policy = issued_policy()
+    client = StubIssuerClient()
+    worker = IssuanceWorker(client=client, batch_size=10)
+
+    assert asyncio.run(worker.drain()) == 1
+    assert asyncio.run(worker.drain()) == 0
+
+    assert PolicyRepository.get_policy(policy.id, use_cache=False).state == "completed"
+    assert outbox_row(local_db, policy.id) == ("done", 1, f"POL-{policy.id[:8].upper()}")
+    payload = client.issued[0]
+    assert payload["client"]["email"] == "ana@example.com"
+    assert payload["vehicle"]["plate"] == "AB123CD"
+    assert payload["insurance"]["coverage_type"]
+
+
+def test_failures_retry_with_backoff_then_fail(local_db):
+    policy = issued_policy()
+    client = StubIssuerClient()
+    client.fail_with = ConnectionError("issuer down")
+    worker = IssuanceWorker(client=client, max_attempts=2, retry_base=3600)
+
+    assert asyncio.run(worker.run_once()) == 1
+    assert outbox_row(local_db, policy.id) == ("pending", 1, None)
+    assert asyncio.run(worker.run_once()) == 0      # next attempt is an hour away
+    assert worker.status_reply(policy.id) == ISSUING_REPLY
+
+    local_db.execute_update("UPDATE issuance_outbox SET next_attempt_at = '2000-01-01' WHERE policy_id = ?",
+                            (policy.id,))
+    asyncio.run(worker.run_once())
+
+    assert outbox_row(local_db, policy.id) == ("failed", 2, None)
+    assert PolicyRepository.get_policy(policy.id, use_cache=False).state == "issued"
+    assert worker.status_reply(policy.id) == ISSUANCE_FAILED_REPLY
+    assert (worker.retried, worker.failed) == (1, 1)
+
+
+def test_incomplete_policy_does_not_block_the_batch(local_db):
+    good = issued_policy()
+    bare = PolicyRepository.create_policy("payment")
+    PolicyRepository.update_policy_state(bare.id, "issued", "Pago aprobado", "test")
+    worker = IssuanceWorker(client=StubIssuerClient(), retry_base=3600)
+
+    assert asyncio.run(worker.run_once()) == 2
+
+    assert PolicyRepository.get_policy(good.id, use_cache=False).state == "completed"
+    assert outbox_row(local_db, bare.id)[:2] == ("pending", 1)
+    assert worker.stats()["outbox"] == {"done": 1, "pending": 1}
+
+
+def test_incomplete_issuer_client_fails_on_instantiation():
+    class NoIssue(IssuerClient):
+        pass
+
+    with pytest.raises(TypeError):
+        NoIssue()
+
+
+def test_concurrent_drains_send_each_policy_once(local_db):
+    policies = [issued_policy() for _ in range(3)]
+    client = StubIssuerClient()
+    sent = []
+    issue = client.issue
+
+    async def slow_issue(payload):
+        sent.append(payload["policy_id"])
+        await asyncio.sleep(0.05)
+        return await issue(payload)
+
+    client.issue = slow_issue
+    # The admin drain endpoint and the background loop (or another process)
+    first, second = IssuanceWorker(client=client), IssuanceWorker(client=client)
+
+    async def scenario():
+        return await asyncio.gather(first.drain(), second.drain())
+
+    assert sum(asyncio.run(scenario())) == 3
+    assert sorted(sent) == sorted(policy.id for policy in policies)
+    assert client.duplicates == 0
+    for policy in policies:
+        assert outbox_row(local_db, policy.id)[:2] == ("done", 1)
+        assert PolicyRepository.get_policy(policy.id, use_cache=False).state == "completed"
@@ -0,0 +1,89 @@
+"""
+Shared Mercado Pago gateway: one pooled client, circuit breaker
+"""
+import asyncio
+
+import pytest
+from mercadopago.http import HttpClient
+
+from src.payments.gateway import (CircuitBreaker, CircuitOpenError, MercadoPagoGateway,
+                                  PaymentGatewayError, PooledHttpClient)
+from src.payments.providers import MercadoPagoProvider
+
+
+class StubHttpClient(HttpClient):
+    """Records SDK calls and replays canned responses"""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = []
+
+    def get(self, url, headers, params=None, timeout=None, maxretries=None):
+        self.calls.append(("GET", url, params, timeout))
+        if self.status is None:
+            raise PaymentGatewayError("connection reset")
+        return {"status": self.status, "response": {"id": url.rsplit("/", 1)[-1], "status": "approved",
+                                                    "results": [{"id": "p1", "status": "approved"}]}}
+
+    def post(self, url, headers, data=None, params=None, timeout=None, maxretries=None):
+        self.calls.append(("POST", url, data, timeout))
+        return {"status": 201, "response": {"id": "pref-1", "init_point": "https://mp/checkout"}}
+
+
+def test_one_sdk_and_session_for_every_call(monkeypatch):
+    http = StubHttpClient()
+    gateway = MercadoPagoGateway(access_token="TEST", http_client=http)
+
+    assert asyncio.run(gateway.create_preference_async({"items": []}))["status"] == 201
+    assert asyncio.run(gateway.get_payment_async("123"))["response"]["id"] == "123"
+    sdk = gateway.sdk()
+    gateway.search_payments({"external_reference": "policy-1"})
+
+    assert gateway.sdk() is sdk
+    assert [c[0] for c in http.calls] == ["POST", "GET", "GET"]
+    assert all(c[3] == 10.0 for c in http.calls)
+    assert gateway.stats()["calls"] == 3
+
+    pooled = PooledHttpClient(pool_size=4)
+    assert pooled.session.get_adapter("https://api.mercadopago.com")._pool_maxsize == 4
+
+
+def test_missing_token_does_not_trip_the_breaker(monkeypatch):
+    monkeypatch.delenv("MERCADOPAGO_ACCESS_TOKEN", raising=False)
+    gateway = MercadoPagoGateway(http_client=StubHttpClient(), breaker=CircuitBreaker(failure_threshold=1))
+
+    with pytest.raises(PaymentGatewayError):
+        gateway.get_payment("1")
+    assert gateway.breaker.state == "closed"
+
+
+def test_circuit_opens_and_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.payments.gateway.time.monotonic", lambda: now[0])
+    http = StubHttpClient(status=503)
+    gateway = MercadoPagoGateway(access_token="TEST", http_client=http,
+                                 breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+    gateway.get_payment("1")
+    http.status = None
+    with pytest.raises(PaymentGatewayError):
+        gateway.get_payment("1")
+    assert gateway.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        gateway.get_payment("1")
+    assert len(http.calls) == 2                         # short-circuited
+
+    now[0] += 31
+    assert gateway.breaker.state == "half_open"
+    http.status = 200
+    gateway.get_payment("1")
+    assert gateway.breaker.state == "closed"
+
+
+def test_provider_uses_the_gateway():
+    gateway = MercadoPagoGateway(access_token="TEST", http_client=StubHttpClient())
+    provider = MercadoPagoProvider(gateway)
+
+    assert asyncio.run(provider.find_payment("policy-1"))["id"] == "p1"
+    assert asyncio.run(provider.find_payment("policy-1", payment_id="42"))["id"] == "42"
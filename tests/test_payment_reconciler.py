@@ -0,0 +1,161 @@
+"""
+Payment reconciliation sweeper against the fake provider
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.agents import payment_agent
+from src.db.repository import PolicyRepository
+from src.payments.providers import FakePaymentProvider, PaymentProvider
+from src.payments.reconciler import PaymentReconciler
+from src.payments.status import apply_payment_status
+from src.utils.rate_limit import TokenBucket
+
+
+def pending_payment(db, minutes_ago=10, state="payment"):
+    policy = PolicyRepository.create_policy(state)
+    payment = PolicyRepository.create_payment(policy.id, None, 100.0, f"pref-{policy.id}", "https://mp/link")
+    created_at = (datetime.now() - timedelta(minutes=minutes_ago)).isoformat()
+    db.execute_update("UPDATE payments SET created_at = ? WHERE id = ?", (created_at, payment.id))
+    return policy
+
+
+def test_sweep_updates_statuses_and_issues_policies(local_db):
+    provider = FakePaymentProvider()
+    paid, rejected, unpaid = (pending_payment(local_db) for _ in range(3))
+    recent = pending_payment(local_db, minutes_ago=0)
+    provider.pay(paid.id, "approved")
+    provider.pay(rejected.id, "rejected")
+    provider.pay(recent.id, "approved")
+
+    reconciler = PaymentReconciler(provider=provider, min_age_minutes=5, page_size=2, rate=0)
+    assert reconciler.metrics()["backlog"] == 3
+
+    assert asyncio.run(reconciler.run_once()) == 2
+    assert provider.calls == 3                      # the recent payment is left to its webhook
+
+    assert PolicyRepository.get_policy(paid.id).state == "issued"
+    assert PolicyRepository.get_payment_by_policy(paid.id).payment_id == "fake-1"
+    assert PolicyRepository.get_payment_by_policy(rejected.id).payment_status == "rejected"
+    assert PolicyRepository.get_policy(rejected.id).state == "payment"
+    assert PolicyRepository.get_payment_by_policy(unpaid.id).payment_status == "pending"
+
+    metrics = reconciler.metrics()
+    assert (metrics["backlog"], metrics["pending"], metrics["issued"]) == (1, 2, 1)
+    assert metrics["lag_seconds"] >= 600
+
+
+def test_provider_errors_are_counted_and_retried_later(local_db):
+    provider = FakePaymentProvider()
+    policy = pending_payment(local_db)
+    provider.pay(policy.id, "approved")
+    provider.fail_with = ConnectionError("timeout")
+
+    reconciler = PaymentReconciler(provider=provider, rate=0)
+    assert asyncio.run(reconciler.run_once()) == 0
+    assert reconciler.errors == 1
+
+    provider.fail_with = None
+    assert asyncio.run(reconciler.run_once()) == 1
+    assert PolicyRepository.get_policy(policy.id).state == "issued"
+
+
+def test_reconcile_policy_checks_one_policy(local_db):
+    provider = FakePaymentProvider()
+    policy = pending_payment(local_db, minutes_ago=0)
+    reconciler = PaymentReconciler(provider=provider, rate=0)
+
+    assert asyncio.run(reconciler.reconcile_policy(policy.id)) == "pending"
+    provider.pay(policy.id, "approved")
+    assert asyncio.run(reconciler.reconcile_policy(policy.id)) == "approved"
+    assert PolicyRepository.get_policy(policy.id).state == "issued"
+
+
+def test_racing_appliers_issue_a_policy_once(local_db):
+    policy = pending_payment(local_db)
+    payment = PolicyRepository.get_payment_by_policy(policy.id)
+
+    # Webhook and reconciler both read "payment" before either one writes
+    issued = []
+    for agent in ("MercadoPagoWebhook", "PaymentReconciler"):
+        with PolicyRepository.transaction():
+            issued.append(apply_payment_status(payment, "approved", "mp-1", "payment", agent))
+    assert issued == [True, False]
+
+    transitions = local_db.execute_query(
+        "SELECT agent FROM state_transitions WHERE policy_id = ? AND to_state = 'issued'", (policy.id,))
+    assert [row[0] for row in transitions] == ["MercadoPagoWebhook"]
+    assert PolicyRepository.get_policy(policy.id).state == "issued"
+
+
+def test_stale_transition_returns_none_and_enqueues_nothing(local_db):
+    policy = pending_payment(local_db)
+    local_db.execute_update("UPDATE policies SET state = 'cancelled' WHERE id = ?", (policy.id,))
+
+    assert PolicyRepository.update_policy_state(policy.id, "issued", "late", "pytest",
+                                                expected_state="payment") is None
+    assert PolicyRepository.get_policy(policy.id).state == "cancelled"
+    outbox = local_db.execute_query("SELECT COUNT(*) FROM issuance_outbox WHERE policy_id = ?", (policy.id,))
+    assert outbox[0][0] == 0
+
+
+def test_token_bucket_limits_rate():
+    async def scenario():
+        limiter = TokenBucket(rate=50, burst=5)
+        started = asyncio.get_running_loop().time()
+        for _ in range(10):
+            await limiter.acquire_async()
+        return asyncio.get_running_loop().time() - started
+
+    # 5 immediate, then 5 more at 50/s
+    assert 0.08 <= asyncio.run(scenario()) < 0.5
+
+
+def test_incomplete_provider_fails_on_instantiation():
+    class GetOnly(PaymentProvider):
+        async def get_payment(self, payment_id):
+            return {}
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def quoted_policy(state="payment"):
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy(state)
+    PolicyRepository.save_vehicle_data(policy.id, "AB123CD", "Ford", "Fiesta", 2018)
+    PolicyRepository.generate_quotations(policy.id, "auto")
+    return policy
+
+
+@pytest.fixture
+def fake_reconciler(monkeypatch):
+    reconciler = PaymentReconciler(provider=FakePaymentProvider(), rate=0)
+    monkeypatch.setattr(payment_agent, "payment_reconciler", reconciler)
+    return reconciler
+
+
+def test_confirm_without_payment_asks_for_the_link(local_db, fake_reconciler):
+    policy = quoted_policy()
+
+    reply = asyncio.run(payment_agent.confirm_payment(policy.id, "2"))
+    assert reply == payment_agent.NO_PAYMENT_REPLY
+    assert PolicyRepository.get_policy(policy.id).state == "payment"
+
+
+def test_confirm_in_process_payment_does_not_issue(local_db, fake_reconciler):
+    policy = quoted_policy()
+    PolicyRepository.create_payment(policy.id, None, 100.0, "pref-ip", "https://mp/link")
+    fake_reconciler.provider.pay(policy.id, "in_process")
+
+    reply = asyncio.run(payment_agent.confirm_payment(policy.id, "4"))
+    assert reply == payment_agent.PAYMENT_STATUS_REPLIES["in_process"]
+    assert PolicyRepository.get_policy(policy.id).state == "payment"
+    assert PolicyRepository.get_payment_by_policy(policy.id).payment_status == "in_process"
+
+    # Mercado Pago approves it later: the reconciler issues, the reply confirms
+    fake_reconciler.provider.pay(policy.id, "approved", payment_id="fake-1")
+    assert "Pago procesado" in asyncio.run(payment_agent.confirm_payment(policy.id, "4"))
+    assert PolicyRepository.get_policy(policy.id).state == "issued"
@@ -0,0 +1,51 @@
+"""
+Per-turn aggregate loader (local SQLite)
+"""
+from src.db.repository import PolicyRepository
+
+
+def _seed_policy():
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy("quotation")
+    PolicyRepository.create_session("s-agg", policy.id)
+    PolicyRepository.update_session_messages("s-agg", [{"seq": 1, "role": "user", "content": "hola"}])
+    PolicyRepository.save_client_data(policy.id, "Ana", "ana@example.com", "1155555555")
+    PolicyRepository.save_vehicle_data(policy.id, "AB123CD", "Ford", "Fiesta", 2018)
+    PolicyRepository.generate_quotations(policy.id, "auto")
+    return policy
+
+
+def test_load_policy_aggregate(local_db):
+    policy = _seed_policy()
+
+    aggregate = PolicyRepository.load_policy_aggregate(policy.id)
+
+    assert aggregate.policy.state == "quotation"
+    assert aggregate.client.email == "ana@example.com"
+    assert aggregate.vehicle.plate == "AB123CD"
+    assert len(aggregate.quotations) == 4
+    assert aggregate.session["session_id"] == "s-agg"
+    assert aggregate.messages == [{"seq": 1, "role": "user", "content": "hola"}]
+    assert aggregate.selected_quotation is None
+
+
+def test_load_session_aggregate(local_db):
+    policy = _seed_policy()
+
+    aggregate = PolicyRepository.load_session_aggregate("s-agg")
+
+    assert aggregate.policy.id == policy.id
+    assert aggregate.client.name == "Ana"
+    assert PolicyRepository.load_session_aggregate("missing") is None
+    assert PolicyRepository.load_policy_aggregate("missing") is None
+
+
+def test_aggregate_without_optional_parts(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    aggregate = PolicyRepository.load_policy_aggregate(policy.id)
+
+    assert aggregate.client is None
+    assert aggregate.vehicle is None
+    assert aggregate.quotations == []
+    assert aggregate.session is None
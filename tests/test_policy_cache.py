@@ -0,0 +1,118 @@
+"""
+LRU+TTL policy cache and write invalidation in PolicyRepository
+"""
+from src.db.cache import LRUTTLCache
+from src.db.repository import PolicyRepository
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.db.cache.time.monotonic", lambda: now[0])
+    cache = LRUTTLCache(max_size=2, ttl=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # "a" is now most recent
+    cache.set("c", 3)                   # evicts "b"
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    now[0] += 11
+    assert cache.get("a") is None       # expired
+    assert cache.stats()["hits"] == 1
+
+
+def test_values_are_copies_and_stale_sets_are_dropped():
+    cache = LRUTTLCache()
+    value = {"messages": []}
+    cache.set("k", value)
+    cache.get("k")["messages"].append("x")
+    assert cache.get("k") == {"messages": []}
+
+    generation = cache.generation
+    cache.invalidate("k")
+    cache.set("k", {"stale": True}, generation=generation)
+    assert cache.get("k") is None
+
+
+def test_aliases_live_and_die_with_their_entry():
+    cache = LRUTTLCache(max_size=1, ttl=10)
+    cache.set("p1", 1, aliases=("s1",))
+    assert cache.key_for("s1") == "p1"
+
+    cache.set("p2", 2, aliases=("s2",))  # evicts "p1"
+    assert cache.key_for("s1") is None
+    assert cache.key_for("s2") == "p2"
+
+    cache.invalidate("p2")
+    assert cache.key_for("s2") is None
+
+
+def test_reads_hit_cache_and_writes_invalidate(local_db):
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.cache.reset_stats()
+
+    PolicyRepository.get_policy(policy.id)
+    PolicyRepository.get_client_data(policy.id)
+    PolicyRepository.load_policy_aggregate(policy.id)
+    stats = PolicyRepository.cache_stats()
+    assert (stats["misses"], stats["hits"]) == (1, 2)
+
+    PolicyRepository.set_intention(policy.id, "moto")
+    assert PolicyRepository.get_policy(policy.id).insurance_type == "moto"
+
+    PolicyRepository.update_client_data_partial(policy.id, name="Ana")
+    assert PolicyRepository.get_client_data(policy.id).name == "Ana"
+
+    PolicyRepository.update_policy_state(policy.id, "loaded", "test", "test")
+    assert PolicyRepository.load_policy_aggregate(policy.id).policy.state == "loaded"
+
+
+def test_session_writes_invalidate(local_db):
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.create_session("s-cache", policy.id)
+
+    assert PolicyRepository.load_session_aggregate("s-cache").messages == []
+    PolicyRepository.append_message("s-cache", "user", "hola")
+    assert PolicyRepository.load_session_aggregate("s-cache").messages == [{"seq": 1, "role": "user", "content": "hola"}]
+
+
+def test_session_writes_invalidate_after_alias_eviction(local_db, monkeypatch):
+    monkeypatch.setattr(PolicyRepository, "cache", LRUTTLCache(max_size=2, ttl=60))
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.create_session("s-evicted", policy.id)
+    assert PolicyRepository.load_session_aggregate("s-evicted").messages == []
+
+    # Other sessions push the alias out; the aggregate is then reloaded by policy ID
+    for n in range(3):
+        other = PolicyRepository.create_policy("intake")
+        PolicyRepository.create_session(f"s-other-{n}", other.id)
+        PolicyRepository.load_session_aggregate(f"s-other-{n}")
+    PolicyRepository.cache.set(policy.id, PolicyRepository.load_policy_aggregate(policy.id, use_cache=False))
+    assert PolicyRepository.cache.key_for("s-evicted") is None
+
+    PolicyRepository.append_message("s-evicted", "user", "hola")
+    assert PolicyRepository.load_policy_aggregate(policy.id).session["messages"] == [
+        {"seq": 1, "role": "user", "content": "hola"}
+    ]
+
+
+def test_use_cache_false_bypasses(local_db):
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.get_policy(policy.id)
+    PolicyRepository.cache.reset_stats()
+
+    PolicyRepository.get_policy(policy.id, use_cache=False)
+    PolicyRepository.load_policy_aggregate(policy.id, use_cache=False)
+    assert PolicyRepository.cache_stats()["hits"] == 0
+
+
+def test_unit_of_work_invalidates_after_commit(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    with PolicyRepository.transaction():
+        PolicyRepository.set_intention(policy.id, "auto")
+        # Reads inside the block don't see buffered writes (and may re-cache)
+        assert PolicyRepository.get_policy(policy.id).insurance_type is None
+
+    assert PolicyRepository.get_policy(policy.id).insurance_type == "auto"
@@ -0,0 +1,90 @@
+"""
+Vectorized pricing engine and its use in PolicyRepository.generate_quotations
+"""
+import time
+
+import numpy as np
+
+from src.db.repository import PolicyRepository
+from src.models import ClientData, VehicleData
+from src.pricing.engine import PricingEngine, area_code
+from src.pricing.rating import RatingTables
+
+TEMPLATES = [
+    ("t1", "auto", "Responsabilidad Civil", "Básica", 2500.0, 0.0),
+    ("t2", "auto", "Todo Riesgo", "Premium", 12000.0, 25000.0),
+    ("t3", "moto", "Responsabilidad Civil", "Básica", 1500.0, 0.0),
+]
+
+
+def engine():
+    return PricingEngine.from_rows(TEMPLATES, tables=RatingTables.load(), as_of_year=2026)
+
+
+def vehicle(make="Volkswagen", year=2022, displacement=1600):
+    return VehicleData(id="v", policy_id="p", plate="AB123CD", make=make, model="x",
+                       year=year, engine_displacement=displacement)
+
+
+def test_neutral_risk_prices_at_base():
+    quotes = engine().quote("auto", vehicle(), ClientData("c", "p", "Ana", "a@b.c", "+54 261 555 0000"))
+    assert [q["monthly_premium"] for q in quotes] == [2500.0, 12000.0]
+    assert quotes[1]["annual_premium"] == 144000.0
+    assert {q["risk_level"] for q in quotes} == {"medium"}
+
+
+def test_factors_raise_and_lower_premiums():
+    e = engine()
+    base = e.quote("auto", vehicle())[1]["monthly_premium"]
+    assert e.quote("auto", vehicle(make="BMW"))[1]["monthly_premium"] > base
+    assert e.quote("auto", vehicle(displacement=3000))[1]["monthly_premium"] > base
+    assert e.quote("auto", vehicle(make="Fiat", displacement=1200))[1]["risk_level"] == "low"
+
+    # Liability absorbs less of the risk than comprehensive cover
+    sport = e.quote("auto", vehicle(make="Porsche"))
+    rc, tr = sport[0], sport[1]
+    assert rc["monthly_premium"] / 2500.0 < tr["monthly_premium"] / 12000.0
+
+
+def test_missing_attributes_are_neutral():
+    e = engine()
+    assert e.quote("auto", None)[0]["risk_factor"] == 1.0
+    assert e.quote("moto", vehicle(year=None, displacement=None))[0]["monthly_premium"] == 1500.0
+    assert e.quote("camion", vehicle()) == []
+    assert area_code("+54 9 11 5555-0000") == "1155550000"
+
+
+def test_bulk_matches_single_quotes():
+    e = engine()
+    rng = np.random.default_rng(7)
+    n = 10_000
+    makes = rng.choice(["Fiat", "Ford", "BMW", "Ducati", "Desconocida", None], n)
+    years = rng.integers(1995, 2027, n)
+    displacements = rng.choice([1000, 1600, 2000, 3000, 4000, None], n)
+
+    started = time.perf_counter()
+    batch = e.price_bulk("auto", years, makes, displacements)
+    elapsed = time.perf_counter() - started
+
+    assert batch.monthly.shape == (n, 2)
+    assert elapsed < 2.0
+    for i in range(0, n, 997):
+        single = e.quote("auto", vehicle(makes[i], years[i], displacements[i]))
+        assert batch.quotes(i) == single
+
+
+def test_generate_quotations_uses_rating(local_db):
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy("loaded")
+    PolicyRepository.set_intention(policy.id, "auto")
+    PolicyRepository.save_vehicle_data(policy.id, "AB123CD", "Porsche", "911", 2024,
+                                       engine_displacement=3800)
+
+    quotations = PolicyRepository.generate_quotations(policy.id, "auto")
+    stored = PolicyRepository.get_quotations(policy.id)
+
+    assert len(quotations) == len(stored) == 4
+    premiums = [q["monthly_premium"] for q in quotations]
+    assert premiums == sorted(premiums)
+    levels = local_db.execute_query("SELECT DISTINCT risk_level FROM quotation_data WHERE policy_id = ?", (policy.id,))
+    assert [row[0] for row in levels] == ["high"]
@@ -0,0 +1,100 @@
+"""
+Bulk re-rating job: keyset paging, batched updates and checkpoint resume
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.db.repository import PolicyRepository
+from src.pricing.rerating import RerateJob
+
+
+def open_policies(count, state="quotation"):
+    PolicyRepository.seed_quotation_templates()
+    ids = []
+    for i in range(count):
+        policy = PolicyRepository.create_policy(state)
+        PolicyRepository.set_intention(policy.id, "auto")
+        PolicyRepository.save_vehicle_data(policy.id, f"AB{i:03d}CD", "Ford", "Ka", 2020)
+        PolicyRepository.generate_quotations(policy.id, "auto")
+        ids.append(policy.id)
+    return ids
+
+
+def premiums(policy_id):
+    return sorted(q["monthly_premium"] for q in PolicyRepository.get_quotations(policy_id))
+
+
+def test_rerate_applies_new_template_prices(local_db):
+    ids = open_policies(5)
+    closed = open_policies(1, state="completed")[0]
+    before = premiums(ids[0])
+
+    local_db.execute_update("UPDATE quotation_templates SET base_monthly_premium = base_monthly_premium * 2")
+    report = RerateJob(batch_size=2).run()
+
+    assert (report.policies, report.batches, report.total) == (5, 3, 5)
+    assert report.updated == 20 and report.completed
+    assert premiums(ids[0]) == [p * 2 for p in before]
+    assert premiums(closed) == before
+
+    # Nothing left to change on a second pass
+    again = RerateJob(batch_size=2).run()
+    assert (again.updated, again.unchanged) == (0, 20)
+
+
+def test_dry_run_writes_nothing(local_db):
+    ids = open_policies(2)
+    before = premiums(ids[0])
+    local_db.execute_update("UPDATE quotation_templates SET base_monthly_premium = 1")
+
+    report = RerateJob(dry_run=True).run()
+    assert report.updated == 8
+    assert premiums(ids[0]) == before
+
+
+def test_resume_from_checkpoint(local_db, tmp_path):
+    ids = open_policies(4)
+    local_db.execute_update("UPDATE quotation_templates SET base_monthly_premium = base_monthly_premium + 100")
+    checkpoint = str(tmp_path / "rerate.json")
+
+    def interrupt(report):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        RerateJob(batch_size=3, checkpoint_path=checkpoint, on_progress=interrupt).run()
+
+    report = RerateJob(batch_size=3, checkpoint_path=checkpoint).run()
+    assert (report.policies, report.batches, report.updated) == (4, 2, 16)
+    assert all(premiums(p) == premiums(ids[0]) for p in ids)
+
+    # A finished checkpoint is not resumed
+    assert RerateJob(batch_size=3, checkpoint_path=checkpoint).run().policies == 4
+
+
+@pytest.fixture
+def client(local_db):
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+def test_start_rejects_non_positive_batch_size(client):
+    for batch_size in (0, -5):
+        response = client.post("/api/admin/quotations/rerate", params={"batch_size": batch_size})
+        assert response.status_code == 422
+
+
+def test_status_of_a_cancelled_job(client, monkeypatch):
+    loop = asyncio.new_event_loop()
+    task = loop.create_future()
+    task.cancel()
+    monkeypatch.setattr(app_module, "_rerate_job", RerateJob(batch_size=10))
+    monkeypatch.setattr(app_module, "_rerate_task", task)
+
+    status = client.get("/api/admin/quotations/rerate").json()
+    loop.close()
+
+    assert status["running"] is False
+    assert status["error"] == "cancelled"
@@ -0,0 +1,131 @@
+"""
+Append-only session message storage and blob migration (local SQLite)
+"""
+import asyncio
+import json
+
+from src.db.connection import DatabaseConnection
+from src.db.migrations import backfill_session_stats, ensure_columns, migrate_session_messages
+from src.db.repository import PolicyRepository
+
+
+def _new_session(session_id="s-msg"):
+    policy = PolicyRepository.create_policy("intake")
+    PolicyRepository.create_session(session_id, policy.id)
+    return policy
+
+
+def test_append_and_read_messages(local_db):
+    _new_session()
+
+    PolicyRepository.append_message("s-msg", "user", "hola")
+    PolicyRepository.append_message("s-msg", "agent", "bienvenido")
+
+    session = PolicyRepository.get_session("s-msg")
+    assert session["messages"] == [
+        {"seq": 1, "role": "user", "content": "hola"},
+        {"seq": 2, "role": "agent", "content": "bienvenido"},
+    ]
+    assert PolicyRepository.load_session_aggregate("s-msg").messages == session["messages"]
+
+
+def test_append_returns_its_seq(local_db):
+    _new_session()
+
+    assert PolicyRepository.append_message("s-msg", "user", "hola")["seq"] == 1
+    assert PolicyRepository.append_message("s-msg", "agent", "bienvenido")["seq"] == 2
+
+
+def test_concurrent_appends_get_distinct_seqs(local_db):
+    _new_session()
+
+    async def append_all():
+        return await asyncio.gather(*(
+            PolicyRepository.append_message_async("s-msg", "user", f"m{i}") for i in range(10)
+        ))
+
+    seqs = sorted(message["seq"] for message in asyncio.run(append_all()))
+    assert seqs == list(range(1, 11))
+    assert len(PolicyRepository.get_session("s-msg")["messages"]) == 10
+    assert _session_stats("s-msg")[0] == 10
+
+
+def test_paged_reads(local_db):
+    _new_session()
+    for i in range(1, 8):
+        PolicyRepository.append_message("s-msg", "user", f"m{i}")
+
+    latest = PolicyRepository.get_session_messages("s-msg", limit=3)
+    assert [m["content"] for m in latest] == ["m5", "m6", "m7"]
+
+    older = PolicyRepository.get_session_messages("s-msg", limit=3, before_seq=latest[0]["seq"])
+    assert [m["content"] for m in older] == ["m2", "m3", "m4"]
+
+    newer = PolicyRepository.get_session_messages("s-msg", limit=2, after_seq=older[-1]["seq"])
+    assert [m["content"] for m in newer] == ["m5", "m6"]
+
+
+def test_clear_and_replace_messages(local_db):
+    _new_session()
+    PolicyRepository.append_message("s-msg", "user", "hola")
+
+    PolicyRepository.clear_session_messages("s-msg")
+    assert PolicyRepository.get_session("s-msg")["messages"] == []
+
+    PolicyRepository.append_message("s-msg", "user", "de nuevo")
+    assert PolicyRepository.get_session_messages("s-msg")[0]["seq"] == 1
+
+
+def test_migration_explodes_legacy_blobs(local_db):
+    policy = _new_session("legacy")
+    legacy = [{"role": "user", "content": "auto"}, {"role": "agent", "content": "¿Tu nombre?"}]
+    DatabaseConnection.execute_update(
+        "UPDATE sessions SET messages = ? WHERE session_id = ?", (json.dumps(legacy), "legacy")
+    )
+
+    assert migrate_session_messages(batch_size=1) == 1
+    assert migrate_session_messages() == 0  # idempotent
+
+    assert PolicyRepository.get_session("legacy")["messages"] == [
+        {"seq": seq, **message} for seq, message in enumerate(legacy, 1)
+    ]
+    blob = DatabaseConnection.execute_query("SELECT messages FROM sessions WHERE session_id = ?", ("legacy",))
+    assert blob[0][0] == "[]"
+    assert PolicyRepository.get_all_sessions()[0]["messages_count"] == 2
+
+
+def _session_stats(session_id):
+    row = PolicyRepository.get_all_sessions(policy_id=PolicyRepository.get_session(session_id)["policy_id"])[0]
+    return row["messages_count"], row["last_role"], row["last_message_at"] is not None
+
+
+def test_session_stats_follow_appends_and_rewrites(local_db):
+    _new_session()
+    assert _session_stats("s-msg") == (0, None, False)
+
+    PolicyRepository.append_message("s-msg", "user", "hola")
+    PolicyRepository.append_message("s-msg", "agent", "bienvenido")
+    assert _session_stats("s-msg") == (2, "agent", True)
+
+    PolicyRepository.update_session_messages("s-msg", [{"role": "user", "content": "auto"}])
+    assert _session_stats("s-msg") == (1, "user", True)
+
+    PolicyRepository.clear_session_messages("s-msg")
+    assert _session_stats("s-msg") == (0, None, False)
+
+
+def test_backfill_session_stats(local_db):
+    _new_session("old")
+    _new_session("empty")
+    for role in ("user", "agent", "user"):
+        PolicyRepository.append_message("old", role, "...")
+    # As written before the columns existed
+    DatabaseConnection.execute_update(
+        "UPDATE sessions SET message_count = 0, last_message_at = NULL, last_role = NULL"
+    )
+    ensure_columns()  # already there: no-op
+
+    assert backfill_session_stats(batch_size=1) == 1
+    assert backfill_session_stats() == 0  # idempotent
+    assert _session_stats("old") == (3, "user", True)
+    assert _session_stats("empty") == (0, None, False)
@@ -0,0 +1,101 @@
+"""
+SSE streaming of agent replies (fake streamed runner, local SQLite)
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+import src.streaming as streaming
+from src.db.metrics import db_metrics
+from src.db.repository import PolicyRepository
+
+
+class FakeStreamedResult:
+    """Replays a tool call, two text deltas and a final output"""
+
+    def __init__(self, agent):
+        self.final_output = f"Hola desde {agent.name}"
+        self.is_complete = False
+        self.cancelled = False
+
+    async def stream_events(self):
+        call = SimpleNamespace(name="get_policy_context", call_id="c1")
+        yield SimpleNamespace(type="run_item_stream_event", name="tool_called", item=SimpleNamespace(raw_item=call))
+        yield SimpleNamespace(type="run_item_stream_event", name="tool_output",
+                              item=SimpleNamespace(raw_item={"call_id": "c1", "output": "ok"}))
+        for delta in ("Hola ", "desde"):
+            yield SimpleNamespace(type="raw_response_event",
+                                  data=SimpleNamespace(type="response.output_text.delta", delta=delta))
+        self.is_complete = True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setattr(streaming.Runner, "run_streamed",
+                        staticmethod(lambda agent, prompt, **kw: FakeStreamedResult(agent)))
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+def _frames(body):
+    frames = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        frames.append((lines.get("event"), lines["data"]))
+    return frames
+
+
+def test_native_stream_emits_progress_and_persists(client):
+    session_id = client.post("/api/chat/start").json()["session_id"]
+
+    response = client.post(f"/api/chat/{session_id}/message", json={"message": "hola, ¿qué seguros tienen?", "stream": True})
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    frames = _frames(response.text)
+    assert [event for event, _ in frames] == ["tool_call", "tool_output", "delta", "delta", "done"]
+    done = json.loads(frames[-1][1])
+    assert done["response"] == "Hola desde IntakeAgent"
+    assert done["policy_state"] == "intake"
+
+    assert PolicyRepository.get_session(session_id)["messages"][-1] == {
+        "seq": 2, "role": "agent", "content": "Hola desde IntakeAgent"
+    }
+
+
+def test_chat_completion_chunks(client):
+    response = client.post("/v1/chat/completions", json={
+        "messages": [{"role": "user", "content": "hola"}], "stream": True, "session_id": "s-stream"
+    })
+    frames = [data for _, data in _frames(response.text)]
+    assert frames[-1] == "[DONE]"
+
+    chunks = [json.loads(data) for data in frames[:-1]]
+    assert all(chunk["object"] == "chat.completion.chunk" for chunk in chunks)
+    assert len({chunk["id"] for chunk in chunks}) == 1
+    assert chunks[0]["choices"][0]["delta"] == {"role": "assistant", "content": ""}
+    assert chunks[1]["progress"] == {"type": "tool_call", "name": "get_policy_context"}
+    content = "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks)
+    assert content == "Hola desde"
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+    assert PolicyRepository.get_session("s-stream")["messages"][-1]["role"] == "assistant"
+
+
+def test_streamed_turn_roundtrips_are_counted(client):
+    db_metrics.reset()
+    session_id = client.post("/api/chat/start").json()["session_id"]
+    client.post(f"/api/chat/{session_id}/message", json={"message": "hola", "stream": True}).text
+
+    # The post-stream append of the agent's reply is the turn's last write
+    rows = [row for row in db_metrics.snapshot()
+            if row["operation"] in ("update", "batch") and "session_messages" in row["statement"]]
+    appended = sum(row["count"] for row in rows)
+    histogram = db_metrics._requests["/api/chat/{session_id}/message"]
+    assert histogram.count == 1
+    assert histogram.sum >= appended >= 2
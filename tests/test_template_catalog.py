@@ -0,0 +1,56 @@
+"""
+In-memory quotation template catalog: one-batch seeding and version reloads
+"""
+from src.db.connection import DatabaseConnection
+from src.db.repository import PolicyRepository
+from src.pricing.catalog import TemplateCatalog, template_catalog
+
+
+def spy_batches(monkeypatch):
+    batches = []
+    run_batch = DatabaseConnection._run_batch.__func__
+
+    def spy(cls, statements):
+        batches.append([query for query, _ in statements])
+        return run_batch(cls, statements)
+
+    monkeypatch.setattr(DatabaseConnection, "_run_batch", classmethod(spy))
+    return batches
+
+
+def test_seed_is_one_idempotent_round_trip(local_db, monkeypatch):
+    batches = spy_batches(monkeypatch)
+    PolicyRepository.seed_quotation_templates()
+    PolicyRepository.seed_quotation_templates()
+
+    assert len(batches) == 2
+    assert local_db.execute_query("SELECT COUNT(*) FROM quotation_templates")[0][0] == 8
+
+    template = template_catalog.get("auto", "Todo Riesgo", "Premium")
+    assert template["base_monthly_premium"] == 145.0
+    assert [t["coverage_level"] for t in template_catalog.for_type("moto")][0] == "Básica"
+    assert template_catalog.get("camion", "Todo Riesgo", "Premium") is None
+
+
+def test_generate_quotations_skips_template_queries(local_db, monkeypatch):
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy("quotation")
+    PolicyRepository.save_vehicle_data(policy.id, "AB123CD", "Ford", "Fiesta", 2018)
+
+    batches = spy_batches(monkeypatch)
+    assert len(PolicyRepository.generate_quotations(policy.id, "auto")) == 4
+    assert not any("quotation_templates" in q for batch in batches for q in batch)
+
+
+def test_reload_on_version_bump(local_db):
+    PolicyRepository.seed_quotation_templates()
+    other_process = TemplateCatalog(check_interval=1e-9).reload()
+    assert other_process.version == 0
+
+    local_db.execute_update("UPDATE quotation_templates SET base_monthly_premium = 50 WHERE coverage_level = 'Premium'")
+    assert other_process.get("auto", "Todo Riesgo", "Premium")["base_monthly_premium"] == 145.0
+
+    template_catalog.bump_version()
+    assert template_catalog.get("auto", "Todo Riesgo", "Premium")["base_monthly_premium"] == 50.0
+    assert other_process.get("auto", "Todo Riesgo", "Premium")["base_monthly_premium"] == 50.0
+    assert other_process.version == 1
@@ -0,0 +1,128 @@
+"""
+Span tracing: span trees, exporters, the Agents SDK bridge and /debug/trace
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from src.config import Config
+from src.tracing import AgentsTraceBridge, FileSpanExporter, RecentTraces, Tracer, recent_traces
+
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+
+@pytest.fixture
+def client(local_db, monkeypatch):
+    monkeypatch.setattr(Config, "DEBUG", True)
+    recent_traces.clear()
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+
+def test_children_are_exported_with_their_root():
+    exporter = ListExporter()
+    tracer = Tracer([exporter])
+
+    with tracer.span("POST /turn", **{"session.id": "s1"}) as root:
+        with tracer.span("db.query"):
+            pass
+        with pytest.raises(ValueError):
+            with tracer.span("tool boom"):
+                raise ValueError("nope")
+        assert exporter.traces == []
+
+    [spans] = exporter.traces
+    assert [span.name for span in spans] == ["POST /turn", "db.query", "tool boom"]
+    assert all(span.trace_id == root.trace_id for span in spans)
+    assert spans[1].parent_id == root.span_id
+    assert (spans[2].status, spans[2].attributes["exception.type"]) == ("ERROR", "ValueError")
+
+
+def test_late_spans_join_their_session_trace():
+    store = RecentTraces(per_session=2)
+    tracer = Tracer([store])
+
+    with tracer.span("POST /stream", **{"session.id": "s1"}) as root:
+        late = tracer.start_span("agent.run")
+    tracer.end_span(late)
+    for _ in range(2):
+        with tracer.span("GET /other", **{"session.id": "s1"}):
+            pass
+
+    traces = store.get("s1")
+    assert [trace["name"] for trace in traces] == ["GET /other", "GET /other"]
+    assert store.get("s1", limit=1)[0]["trace_id"] != root.trace_id
+
+    store = RecentTraces()
+    tracer = Tracer([store])
+    with tracer.span("POST /stream", **{"session.id": "s2"}):
+        late = tracer.start_span("agent.run")
+    tracer.end_span(late)
+    assert [span["name"] for span in store.get("s2")[0]["spans"]] == ["POST /stream", "agent.run"]
+
+
+def test_disabled_tracer_is_a_no_op():
+    exporter = ListExporter()
+    tracer = Tracer([exporter], enabled=False)
+    with tracer.span("anything") as span:
+        span.set_attribute("x", 1)
+    assert exporter.traces == []
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path))
+    tracer = Tracer([exporter])
+    with tracer.span("POST /turn", kind="server", **{"db.roundtrips": 3}):
+        pass
+    exporter.flush()
+
+    line = json.loads(path.read_text().splitlines()[0])
+    [span] = line["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert span["name"] == "POST /turn" and span["kind"] == 2 and len(span["traceId"]) == 32
+    assert {"key": "db.roundtrips", "value": {"intValue": "3"}} in span["attributes"]
+
+
+def test_bridge_nests_sdk_spans_under_the_current_span():
+    exporter = ListExporter()
+    tracer = Tracer([exporter])
+    bridge = AgentsTraceBridge(tracer)
+    agent = SimpleNamespace(span_id="a1", parent_id=None, error=None,
+                            span_data=SimpleNamespace(type="agent", name="IntakeAgent"))
+    tool = SimpleNamespace(span_id="f1", parent_id="a1", error={"message": "bad input"},
+                           span_data=SimpleNamespace(type="function", name="save_client_field"))
+
+    with tracer.span("agent.run"):
+        bridge.on_span_start(agent)
+        bridge.on_span_start(tool)
+        bridge.on_span_end(tool)
+        bridge.on_span_end(agent)
+
+    names = {span.name: span for span in exporter.traces[0]}
+    assert names["agent IntakeAgent"].parent_id == names["agent.run"].span_id
+    assert names["tool save_client_field"].parent_id == names["agent IntakeAgent"].span_id
+    assert names["tool save_client_field"].status == "ERROR"
+
+
+def test_debug_trace_endpoint(client, monkeypatch):
+    session_id = client.post("/api/chat/start").json()["session_id"]
+    client.get(f"/api/chat/{session_id}")
+
+    traces = client.get(f"/debug/trace/{session_id}").json()["traces"]
+    assert traces[0]["name"] == "GET /api/chat/{session_id}"
+    root, *children = traces[0]["spans"]
+    assert root["attributes"]["http.response.status_code"] == 200
+    assert children and all(span["name"].startswith("db.") for span in children)
+    assert all(span["parent_id"] == root["span_id"] for span in children)
+
+    monkeypatch.setattr(Config, "DEBUG", False)
+    assert client.get(f"/debug/trace/{session_id}").status_code == 404
@@ -0,0 +1,116 @@
+"""
+Unit of work / batched repository operations (local SQLite)
+"""
+import asyncio
+
+import pytest
+
+from src.db.connection import DatabaseConnection
+from src.db.repository import PolicyRepository
+
+
+def _count(table):
+    return DatabaseConnection.execute_query(f"SELECT COUNT(*) FROM {table}")[0][0]
+
+
+def test_transaction_commits_buffered_writes_together(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    with PolicyRepository.transaction() as uow:
+        PolicyRepository.set_intention(policy.id, "auto")
+        PolicyRepository.update_policy_state(policy.id, "loaded", "test", "pytest")
+        # Nothing hits the database until the block exits
+        assert PolicyRepository.get_policy(policy.id).state == "intake"
+        assert len(uow.statements) == 3
+
+    stored = PolicyRepository.get_policy(policy.id)
+    assert stored.state == "loaded"
+    assert stored.insurance_type == "auto"
+    assert _count("state_transitions") == 1
+
+
+def test_transaction_discards_writes_on_error(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    with pytest.raises(RuntimeError):
+        with PolicyRepository.transaction():
+            PolicyRepository.update_policy_state(policy.id, "loaded", "test", "pytest")
+            raise RuntimeError("boom")
+
+    assert PolicyRepository.get_policy(policy.id).state == "intake"
+    assert _count("state_transitions") == 0
+
+
+def test_failed_nested_block_drops_only_its_writes(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    with PolicyRepository.transaction():
+        PolicyRepository.set_intention(policy.id, "auto")
+        try:
+            with PolicyRepository.transaction():
+                PolicyRepository.update_policy_state(policy.id, "loaded", "test", "pytest")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        PolicyRepository.update_client_data_partial(policy.id, name="Ana")
+
+    stored = PolicyRepository.get_policy(policy.id)
+    assert (stored.state, stored.insurance_type) == ("intake", "auto")
+    assert PolicyRepository.get_client_data(policy.id).name == "Ana"
+    assert _count("state_transitions") == 0
+
+
+def test_async_transaction(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    async def scenario():
+        async with PolicyRepository.transaction():
+            await PolicyRepository.update_policy_state_async(policy.id, "loaded", "a", "pytest")
+            await PolicyRepository.update_policy_state_async(policy.id, "quotation", "b", "pytest")
+
+    asyncio.run(scenario())
+
+    transitions = DatabaseConnection.execute_query(
+        "SELECT from_state, to_state FROM state_transitions ORDER BY reason"
+    )
+    assert [tuple(t) for t in transitions] == [("intake", "loaded"), ("loaded", "quotation")]
+    assert PolicyRepository.get_policy(policy.id).state == "quotation"
+
+
+def test_update_policy_state_records_transition(local_db):
+    policy = PolicyRepository.create_policy("intake")
+    transition = PolicyRepository.update_policy_state(policy.id, "loaded", "done", "pytest")
+
+    assert transition.from_state == "intake"
+    assert PolicyRepository.get_policy(policy.id).state == "loaded"
+
+    with pytest.raises(ValueError):
+        PolicyRepository.update_policy_state("missing", "loaded", "done", "pytest")
+
+
+def test_update_client_data_partial_upserts(local_db):
+    policy = PolicyRepository.create_policy("intake")
+
+    created = PolicyRepository.update_client_data_partial(policy.id, name="Ana")
+    updated = PolicyRepository.update_client_data_partial(policy.id, email="ana@example.com")
+
+    assert created.name == "Ana"
+    assert updated.id == created.id
+    assert (updated.name, updated.email) == ("Ana", "ana@example.com")
+    assert _count("client_data") == 1
+
+    with PolicyRepository.transaction():
+        pending = PolicyRepository.update_client_data_partial(policy.id, phone="11 5555 5555")
+    assert pending.phone == "11 5555 5555"
+    assert PolicyRepository.get_client_data(policy.id).phone == "11 5555 5555"
+
+
+def test_generate_quotations_batches_inserts(local_db):
+    PolicyRepository.seed_quotation_templates()
+    policy = PolicyRepository.create_policy("quotation")
+    PolicyRepository.save_vehicle_data(policy.id, "AB123CD", "Ford", "Fiesta", 2018)
+
+    quotations = PolicyRepository.generate_quotations(policy.id, "auto")
+
+    assert len(quotations) == 4
+    assert len(PolicyRepository.get_quotations(policy.id)) == 4
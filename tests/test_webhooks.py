@@ -0,0 +1,130 @@
+"""
+Mercado Pago webhook inbox: dedup, background processing, retries
+"""
+import asyncio
+
+from src.db.repository import PolicyRepository
+from src.payments.webhooks import WebhookProcessor
+
+
+def notification(notification_id=1, payment_id="pay-1"):
+    return {"id": notification_id, "type": "payment", "action": "payment.updated", "data": {"id": payment_id}}
+
+
+def payment_policy():
+    policy = PolicyRepository.create_policy("payment")
+    PolicyRepository.create_payment(policy.id, None, 100.0, "pref-1", "https://mp/link")
+    return policy
+
+
+def approved(policy_id):
+    async def fetch(payment_id):
+        return {"id": payment_id, "status": "approved", "external_reference": policy_id}
+    return fetch
+
+
+def event_rows(db):
+    return [tuple(row) for row in db.execute_query("SELECT id, status, attempts FROM webhook_events ORDER BY id")]
+
+
+def test_record_deduplicates_and_ignores_other_topics(local_db):
+    processor = WebhookProcessor(fetch_payment=approved(None))
+    processor.record(notification())
+    processor.record(notification())
+    processor.record({"id": 2, "type": "merchant_order", "data": {"id": "mo-1"}})
+
+    assert event_rows(local_db) == [("1", "pending", 0), ("2", "ignored", 0)]
+
+
+def test_events_apply_exactly_once(local_db):
+    policy = payment_policy()
+    processor = WebhookProcessor(fetch_payment=approved(policy.id))
+    processor.record(notification())
+
+    assert asyncio.run(processor.drain()) == 1
+    processor.record(notification())          # Mercado Pago retry of the same notification
+    assert asyncio.run(processor.drain()) == 0
+
+    payment = PolicyRepository.get_payment_by_policy(policy.id)
+    assert (payment.payment_status, payment.payment_id) == ("approved", "pay-1")
+    assert PolicyRepository.get_policy(policy.id).state == "issued"
+    assert event_rows(local_db) == [("1", "done", 1)]
+
+    # A second notification for the same payment doesn't transition again
+    processor.record(notification(notification_id=3))
+    asyncio.run(processor.drain())
+    transitions = local_db.execute_query(
+        "SELECT COUNT(*) FROM state_transitions WHERE policy_id = ? AND to_state = 'issued'", (policy.id,))
+    assert transitions[0][0] == 1
+
+
+def test_fetch_failures_back_off_then_fail(local_db):
+    async def broken(payment_id):
+        raise ConnectionError("timeout")
+
+    processor = WebhookProcessor(fetch_payment=broken, max_attempts=2, retry_base=0)
+    processor.record(notification())
+
+    asyncio.run(processor.drain())
+    assert event_rows(local_db) == [("1", "pending", 1)]
+    asyncio.run(processor.drain())
+    assert event_rows(local_db) == [("1", "failed", 2)]
+    assert processor.failed == 1
+
+
+def test_worker_pool_processes_in_background(local_db):
+    policy = payment_policy()
+    processor = WebhookProcessor(fetch_payment=approved(policy.id), workers=2, poll_interval=30)
+
+    async def scenario():
+        processor.start()
+        await processor.record_async(notification())
+        for _ in range(100):
+            if processor.processed:
+                break
+            await asyncio.sleep(0.02)
+        await processor.stop()
+
+    asyncio.run(scenario())
+    assert event_rows(local_db) == [("1", "done", 1)]
+
+
+def test_concurrent_drains_apply_an_event_once(local_db):
+    policy = payment_policy()
+    fetched = []
+
+    async def slow_fetch(payment_id):
+        fetched.append(payment_id)
+        await asyncio.sleep(0.05)
+        return {"id": payment_id, "status": "approved", "external_reference": policy.id}
+
+    # Two processors stand in for two uvicorn workers sharing the database
+    first = WebhookProcessor(fetch_payment=slow_fetch)
+    second = WebhookProcessor(fetch_payment=slow_fetch)
+    first.record(notification())
+
+    async def scenario():
+        return await asyncio.gather(first.drain(), second.drain())
+
+    assert sorted(asyncio.run(scenario())) == [0, 1]
+    assert fetched == ["pay-1"]
+    assert event_rows(local_db) == [("1", "done", 1)]
+    transitions = local_db.execute_query(
+        "SELECT COUNT(*) FROM state_transitions WHERE policy_id = ? AND to_state = 'issued'", (policy.id,))
+    assert transitions[0][0] == 1
+
+
+def test_expired_claim_is_taken_over(local_db):
+    policy = payment_policy()
+    processor = WebhookProcessor(fetch_payment=approved(policy.id))
+    processor.record(notification())
+
+    stale_lease = processor.claim("1")          # a worker that died mid-way
+    assert processor.claim("1") is None
+    local_db.execute_update("UPDATE webhook_events SET next_attempt_at = '2000-01-01' WHERE id = '1'")
+
+    assert asyncio.run(processor.drain()) == 1
+    assert event_rows(local_db) == [("1", "done", 1)]
+    # The dead worker's late retry no longer matches its lease
+    processor._schedule_retry("1", 1, "late", stale_lease)
+    assert event_rows(local_db) == [("1", "done", 1)]